@@ -0,0 +1,118 @@
+"""Benchmark of the chain digest of Transferables against their SHA-1.
+
+Measures the time taken to compute the SHA-1 of a file, read from start to end by a
+single thread as done at the origin and the destination, and the time taken to
+compute its chain digest, the checksums of its TransferableRanges being computed in
+parallel by an increasing number of threads. The origin and the destination compute
+the checksums of the ranges as they are uploaded and received, so this measures how
+much faster the chain digest of a whole file, as computed by a user verifying it, can
+be than its SHA-1.
+
+The file is written to a temporary directory unless an existing one is given. To
+measure hashing rather than disk throughput, the file should fit in the page cache,
+otherwise the first measurement reads it from the disk. For the 50GB inputs of the
+largest Transferables:
+
+    python -m benchmarks.chain_digest --size 50GB --dir /path/to/a/large/filesystem
+
+Usage (from the backend directory):
+
+    python -m benchmarks.chain_digest [--size BYTES] [--range-size BYTES] [--file PATH]
+"""
+
+import argparse
+import functools
+import hashlib
+import os
+import pathlib
+import tempfile
+import time
+from concurrent import futures
+from typing import Callable
+
+import humanfriendly as hf
+
+from eurydice.common import checksum
+
+_READ_SIZE = 8 * 2**20
+_WORKERS = (1, 2, 4, 8, 16)
+
+
+def _write_file(path: pathlib.Path, size: int) -> None:
+    """Write a file of the given size, repeating a block of random bytes."""
+    block = os.urandom(_READ_SIZE)
+    with path.open("wb") as file:
+        for offset in range(0, size, len(block)):
+            file.write(block[: size - offset])
+
+
+def _compute_sha1(path: pathlib.Path) -> bytes:
+    sha1 = hashlib.sha1()  # nosec
+    with path.open("rb") as file:
+        while chunk := file.read(_READ_SIZE):
+            sha1.update(chunk)
+    return sha1.digest()
+
+
+def _compute_range_checksum(fd: int, byte_offset: int, size: int) -> bytes:
+    digest = hashlib.blake2b(digest_size=checksum.DIGEST_SIZE)
+    for offset in range(byte_offset, byte_offset + size, _READ_SIZE):
+        chunk = os.pread(fd, min(_READ_SIZE, byte_offset + size - offset), offset)
+        if not chunk:
+            break
+        digest.update(chunk)
+    return digest.digest()
+
+
+def _compute_chain_digest(path: pathlib.Path, range_size: int, workers: int) -> bytes:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        file_size = os.fstat(fd).st_size
+        with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            # an empty file is sent as a single empty range
+            range_checksums = executor.map(
+                functools.partial(_compute_range_checksum, fd, size=range_size),
+                range(0, file_size or 1, range_size),
+            )
+            return checksum.chain_digest(range_checksums)
+    finally:
+        os.close(fd)
+
+
+def _measure(label: str, size: int, function: Callable[..., object], *args) -> None:
+    start = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:>24} {elapsed:>10.2f} s {size / 2**20 / elapsed:>10.1f} MiB/s")
+
+
+def _run(path: pathlib.Path, range_size: int) -> None:
+    size = path.stat().st_size
+    print(f"{hf.format_size(size)} file, {hf.format_size(range_size)} ranges, {os.cpu_count()} CPUs")
+
+    _measure("SHA-1 (single thread)", size, _compute_sha1, path)
+    for workers in _WORKERS:
+        _measure(f"chain digest ({workers} threads)", size, _compute_chain_digest, path, range_size, workers)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="1GiB", help="size of the generated file")
+    parser.add_argument("--range-size", default="500MB", help="TRANSFERABLE_RANGE_SIZE of the origin")
+    parser.add_argument("--file", type=pathlib.Path, help="existing file to hash instead of a generated one")
+    parser.add_argument("--dir", type=pathlib.Path, help="directory the file is generated in")
+    args = parser.parse_args()
+
+    range_size = hf.parse_size(args.range_size)
+    if args.file is not None:
+        _run(args.file, range_size)
+        return
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        path = pathlib.Path(directory) / "transferable"
+        _write_file(path, hf.parse_size(args.size))
+        _run(path, range_size)
+
+
+if __name__ == "__main__":
+    main()
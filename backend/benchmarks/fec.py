@@ -0,0 +1,100 @@
+"""Benchmark of the XOR parity forward error correction of TransferableRanges.
+
+Measures the speed at which parities are computed by the sender and missed ranges
+rebuilt by the receiver, then simulates the transfer of a Transferable over a lossy
+link to compare, for several TRANSFERABLE_PARITY_GROUP_SIZE values, the share of
+Transferables fully received and the resulting effective throughput.
+
+Each range is assumed to be sent in its own OnTheWirePacket, and every packet to be
+lost independently with the same probability. The parity of a group is sent in the
+packet following the last range of the group, and is lost like any other packet.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.fec [--range-size BYTES] [--ranges N] [--trials N]
+"""
+
+import argparse
+import os
+import random
+import time
+
+from eurydice.common import parity
+
+_GROUP_SIZES = (0, 4, 8, 16, 32)
+_LOSS_RATES = (0.0, 1e-4, 1e-3, 1e-2, 5e-2)
+
+
+def _measure_parity_speed(range_size: int, group_size: int, repeat: int = 5) -> tuple[float, float]:
+    """Measure the speed in MiB/s at which parities are computed and ranges rebuilt."""
+    ranges = [os.urandom(range_size) for _ in range(group_size)]
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        group_parity = parity.xor(ranges)
+    encode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        rebuilt = parity.xor([group_parity, *ranges[1:]], size=range_size)
+    rebuild_time = time.perf_counter() - start
+
+    assert rebuilt == ranges[0]
+    processed = repeat * group_size * range_size / 2**20
+    return processed / encode_time, processed / rebuild_time
+
+
+def _is_received(nb_ranges: int, group_size: int, loss_rate: float, rng: random.Random) -> bool:
+    """Simulate the transfer of a Transferable, returning whether it is fully received."""
+    if group_size < 2:
+        return all(rng.random() >= loss_rate for _ in range(nb_ranges))
+
+    for start in range(0, nb_ranges, group_size):
+        nb_lost = sum(rng.random() < loss_rate for _ in range(min(group_size, nb_ranges - start)))
+        parity_lost = rng.random() < loss_rate
+        if nb_lost > 1 or (nb_lost == 1 and parity_lost):
+            return False
+
+    return True
+
+
+def _simulate(nb_ranges: int, group_size: int, loss_rate: float, trials: int, seed: int) -> tuple[float, float]:
+    """Return the share of Transferables fully received and the effective throughput,
+    as a share of the link throughput, when failed Transferables are sent again.
+    """
+    rng = random.Random(seed)
+    received = sum(_is_received(nb_ranges, group_size, loss_rate, rng) for _ in range(trials))
+    completion_rate = received / trials
+
+    nb_parities = -(-nb_ranges // group_size) if group_size >= 2 else 0
+    efficiency = nb_ranges / (nb_ranges + nb_parities)
+    return completion_rate, completion_rate * efficiency
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--range-size", type=int, default=5 * 2**20, help="size of a TransferableRange in bytes")
+    parser.add_argument("--ranges", type=int, default=200, help="number of ranges of the simulated Transferable")
+    parser.add_argument("--trials", type=int, default=2000, help="number of simulated transfers per data point")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"parity speed, {args.range_size} bytes ranges")
+    print(f"{'group size':>10} {'encode MiB/s':>14} {'rebuild MiB/s':>14}")
+    for group_size in _GROUP_SIZES[1:]:
+        encode_speed, rebuild_speed = _measure_parity_speed(args.range_size, group_size)
+        print(f"{group_size:>10} {encode_speed:>14.1f} {rebuild_speed:>14.1f}")
+
+    print()
+    print(f"transfer of {args.ranges} ranges, {args.trials} trials (completion rate / effective throughput)")
+    print(f"{'loss rate':>10}" + "".join(f"{f'group={g}' if g else 'no parity':>20}" for g in _GROUP_SIZES))
+    for loss_rate in _LOSS_RATES:
+        cells = []
+        for group_size in _GROUP_SIZES:
+            completion_rate, throughput = _simulate(args.ranges, group_size, loss_rate, args.trials, args.seed)
+            cells.append(f"{completion_rate:>9.1%} / {throughput:>6.1%}")
+        print(f"{loss_rate:>10g}" + "".join(f"{cell:>20}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
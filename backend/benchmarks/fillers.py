@@ -0,0 +1,135 @@
+"""Simulation benchmark of the TransferableRange fillers of the sender.
+
+Fills a test database with the pending TransferableRanges of several users, each
+with its own priority and file sizes, then selects the ranges of successive packets
+with each filler to compare how fairly the bandwidth is shared between the users
+and how many database queries are made per packet.
+
+The share of each user is compared to its weight, that is its priority plus one,
+and the fairness of the whole schedule is summarized by Jain's index computed on
+the shares normalized by the weights: 1 means that every user got exactly its
+weighted share, 1/n that a single user got all the bandwidth.
+
+Only the selection of the ranges is measured: no data is read from the
+filesystem and selected ranges are directly marked as transferred.
+
+Usage (from the backend directory, with the database settings of the origin in
+the environment):
+
+    python -m benchmarks.fillers [--packets N] [--packet-size BYTES] [--quantum BYTES]
+"""
+
+import argparse
+import collections
+import os
+
+_USERS = (
+    # priority, number of ranges, size of a range
+    (0, 200, 250 * 10**3),
+    (0, 40, 2 * 10**6),
+    (1, 40, 2 * 10**6),
+    (2, 200, 250 * 10**3),
+)
+
+
+def _jain_index(values: list[float]) -> float:
+    return sum(values) ** 2 / (len(values) * sum(v**2 for v in values))
+
+
+def _make_pending_ranges() -> list[int]:
+    """Create the pending TransferableRanges of the simulated users, returning the
+    ids of their UserProfiles.
+    """
+    from eurydice.origin.core import enums as origin_enums
+    from tests.origin.integration import factory as origin_factory
+
+    user_profile_ids = []
+    for priority, count, size in _USERS:
+        user_profile = origin_factory.UserProfileFactory(priority=priority)
+        for _ in range(count):
+            origin_factory.TransferableRangeFactory(
+                size=size,
+                transfer_state=origin_enums.TransferableRangeTransferState.PENDING,
+                outgoing_transferable__user_profile=user_profile,
+            )
+        user_profile_ids.append(user_profile.id)
+
+    return user_profile_ids
+
+
+def _simulate(filler_class: type, packets: int) -> tuple[list[float], float]:
+    """Select the ranges of the given number of packets with a filler, returning the
+    share of the bytes sent to each user and the mean number of queries per packet.
+    """
+    from django.db import connection, transaction
+    from django.test.utils import CaptureQueriesContext
+
+    from eurydice.origin.core import models as origin_models
+
+    with transaction.atomic():
+        user_profile_ids = _make_pending_ranges()
+        filler = filler_class()
+        sent_bytes = collections.Counter()
+        nb_queries = 0
+
+        for _ in range(packets):
+            with CaptureQueriesContext(connection) as queries:
+                selected, _ = filler._select()
+                origin_models.TransferableRange.objects.filter(id__in=[r.id for r in selected]).mark_as_transferred()
+            nb_queries += len(queries)
+
+            for transferable_range in selected:
+                sent_bytes[transferable_range.outgoing_transferable.user_profile_id] += transferable_range.size
+
+        transaction.set_rollback(True)
+
+    total = sum(sent_bytes.values()) or 1
+    return [sent_bytes[user_profile_id] / total for user_profile_id in user_profile_ids], nb_queries / packets
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--packets", type=int, default=10, help="number of packets to select ranges for")
+    parser.add_argument("--packet-size", type=int, default=8 * 10**6, help="TRANSFERABLE_RANGE_SIZE in bytes")
+    parser.add_argument("--quantum", type=int, default=10**6, help="SENDER_DRR_QUANTUM in bytes")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "eurydice.origin.config.settings.test")
+
+    import django
+
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import override_settings
+
+    from eurydice.origin.sender.packet_generator import fillers
+
+    weights = [priority + 1 for priority, _, _ in _USERS]
+    expected_shares = [w / sum(weights) for w in weights]
+
+    print(f"{args.packets} packets of {args.packet_size} bytes, deficit round robin quantum of {args.quantum} bytes")
+    print(f"{'user (priority, range size)':>30}" + "".join(f"{f'{p}, {s}':>14}" for p, _, s in _USERS))
+    print(f"{'expected share':>30}" + "".join(f"{s:>14.1%}" for s in expected_shares))
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with override_settings(TRANSFERABLE_RANGE_SIZE=args.packet_size, SENDER_DRR_QUANTUM=args.quantum):
+            for filler_class in (
+                fillers.UserRotatingTransferableRangeFiller,
+                fillers.FIFOTransferableRangeFiller,
+                fillers.DeficitRoundRobinTransferableRangeFiller,
+            ):
+                shares, queries_per_packet = _simulate(filler_class, args.packets)
+                fairness = _jain_index([s / w for s, w in zip(shares, weights)])
+                print(
+                    f"{filler_class.__name__.removesuffix('TransferableRangeFiller'):>30}"
+                    + "".join(f"{s:>14.1%}" for s in shares)
+                    + f"   Jain's index {fairness:.3f}, {queries_per_packet:.1f} queries/packet"
+                )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
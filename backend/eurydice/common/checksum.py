@@ -0,0 +1,71 @@
+"""Checksums of the data of TransferableRanges.
+
+Each range is checksummed when it is uploaded to the origin, and the checksum is sent
+along with the range so that the destination detects a corrupted range as soon as it
+is received, instead of after the whole Transferable has been written to disk.
+
+The checksums of the ranges of a Transferable are chained, in order, into its chain
+digest: the checksum of each range is hashed with the digest of the ranges before it,
+so that the destination extends the digest as the ranges are received. Unlike the
+SHA-1 of the whole file, each range is verified independently, only the chaining of
+the checksums being sequential.
+"""
+
+import functools
+import hashlib
+from typing import Iterable
+
+DIGEST_SIZE = 16
+
+# The chain digest of a Transferable without any range.
+EMPTY_CHAIN_DIGEST = bytes(DIGEST_SIZE)
+
+
+def compute(data: bytes | memoryview) -> bytes:
+    """Compute the checksum of the given data.
+
+    Args:
+        data: the data of a TransferableRange.
+
+    Returns:
+        The BLAKE2b digest of the data, on DIGEST_SIZE bytes.
+
+    """
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
+
+
+def extend_chain_digest(chain_digest: bytes, range_checksum: bytes) -> bytes:
+    """Combine the chain digest of the ranges of a Transferable with the checksum of
+    the range following them.
+
+    Args:
+        chain_digest: the chain digest of the previous ranges, or EMPTY_CHAIN_DIGEST.
+        range_checksum: the checksum of the next range.
+
+    Returns:
+        The chain digest of the previous ranges and the next one, on DIGEST_SIZE bytes.
+
+    """
+    return hashlib.blake2b(chain_digest + range_checksum, digest_size=DIGEST_SIZE).digest()
+
+
+def chain_digest(range_checksums: Iterable[bytes]) -> bytes:
+    """Combine the checksums of the ranges of a Transferable into its chain digest.
+
+    Args:
+        range_checksums: the checksums of the ranges, ordered by byte offset.
+
+    Returns:
+        The chain digest of the Transferable, on DIGEST_SIZE bytes.
+
+    """
+    return functools.reduce(extend_chain_digest, range_checksums, EMPTY_CHAIN_DIGEST)
+
+
+__all__ = (
+    "DIGEST_SIZE",
+    "EMPTY_CHAIN_DIGEST",
+    "compute",
+    "extend_chain_digest",
+    "chain_digest",
+)
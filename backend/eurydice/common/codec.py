@@ -0,0 +1,552 @@
+"""A hand-written codec for OnTheWirePackets, faster than the pydantic/MessagePack one.
+
+The `framed` wire format lays out a packet as follows:
+
+    +-------+---------+---------------+--------+------------+-----+------------+
+    | MAGIC | VERSION | HEADER_LENGTH | HEADER | PAYLOAD #0 | ... | PAYLOAD #n |
+    +-------+---------+---------------+--------+------------+-----+------------+
+
+- MAGIC is a 4 bytes prefix starting with 0xC1, a byte which is never used by
+  MessagePack, so that a framed packet cannot be mistaken for a `msgpack` one.
+- VERSION is the version of the schema of the header, on 1 byte. Only packets of the
+  current SCHEMA_VERSION are decoded, older and newer ones being rejected: the origin
+  and the destination must be upgraded together before the origin sends `framed`
+  packets again.
+- HEADER_LENGTH is the length of the header in bytes, as a big-endian uint32.
+- HEADER is a MessagePack array holding the metadata of the packet, where models are
+  encoded as arrays of positional fields (see the `_encode_*` functions). The
+  Transferables are encoded once, in a table that TransferableRanges and
+  TransferableParities reference by index.
+- PAYLOADS are the raw data of the TransferableRanges then of the
+  TransferableParities, in order. Their lengths are given in the header.
+
+When decoding, only the header is validated, by hand, and the protocol models are
+built with `model_construct`, without going through pydantic validation. The TransferableRange data are
+memoryviews over the decoded buffer, so that no payload is ever copied.
+
+The pydantic models (and their `msgpack` serialization) are kept as the reference
+implementation of the protocol.
+"""
+
+import enum
+import io
+import mmap
+import struct
+import uuid
+from typing import Any, BinaryIO, Callable, Iterator
+
+import msgpack
+
+from eurydice.common import enums, protocol
+
+MAGIC = b"\xc1EUR"
+
+# Bump this version whenever the layout of the header changes.
+SCHEMA_VERSION = 1
+
+_PREFIX = struct.Struct(f">{len(MAGIC)}sBI")
+
+# The size of the chunks in which payloads are copied from a stream to a spool file.
+_SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+class WireFormat(str, enum.Enum):
+    """The formats in which an OnTheWirePacket can be serialized."""
+
+    MSGPACK = "msgpack"
+    FRAMED = "framed"
+
+
+def is_framed(data: bytes | memoryview) -> bool:
+    """Tell whether the given serialized packet uses the `framed` wire format."""
+    return bytes(data[: len(MAGIC)]) == MAGIC
+
+
+# ------------------------------------------------------------------------------
+# Encoding
+# ------------------------------------------------------------------------------
+
+
+def _encode_transferable(transferable: protocol.Transferable) -> list:
+    return [
+        transferable.id.bytes,
+        transferable.name,
+        transferable.user_profile_id.bytes,
+        transferable.user_provided_meta,
+        transferable.sha1,
+        transferable.size,
+        transferable.chain_digest,
+    ]
+
+
+class _TransferableTable:
+    """The Transferables referenced by the TransferableRanges and TransferableParities
+    of a packet, each of them encoded only once.
+
+    The Transferables of the ranges of a file are distinct objects which only differ
+    by the fields the origin sends in some ranges only, hence the key used to tell
+    them apart.
+    """
+
+    def __init__(self) -> None:
+        self._indexes: dict[tuple, int] = {}
+        self.entries: list[list] = []
+
+    def index(self, transferable: protocol.Transferable) -> int:
+        key = (
+            transferable.id,
+            transferable.sha1,
+            transferable.size,
+            transferable.chain_digest,
+            transferable.user_provided_meta is None,
+        )
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = len(self.entries)
+            self.entries.append(_encode_transferable(transferable))
+        return index
+
+
+def _encode_transferable_range(transferable_range: protocol.TransferableRange, table: _TransferableTable) -> list:
+    return [
+        table.index(transferable_range.transferable),
+        transferable_range.is_last,
+        transferable_range.byte_offset,
+        len(transferable_range.data),
+        None if transferable_range.compression is None else str(transferable_range.compression.value),
+        transferable_range.uncompressed_size,
+        transferable_range.parity_protected,
+        transferable_range.checksum,
+    ]
+
+
+def _encode_transferable_parity(transferable_parity: protocol.TransferableParity, table: _TransferableTable) -> list:
+    return [
+        table.index(transferable_parity.transferable),
+        transferable_parity.is_last,
+        [[r.byte_offset, r.size] for r in transferable_parity.ranges],
+        len(transferable_parity.data),
+    ]
+
+
+def _encode_transferable_revocation(revocation: protocol.TransferableRevocation) -> list:
+    return [
+        revocation.transferable_id.bytes,
+        revocation.user_profile_id.bytes,
+        str(revocation.reason.value),
+        revocation.transferable_name,
+        revocation.transferable_sha1,
+    ]
+
+
+def _encode_history_entry(entry: protocol.HistoryEntry) -> list:
+    return [
+        entry.transferable_id.bytes,
+        entry.user_profile_id.bytes,
+        str(entry.state.value),
+        entry.name,
+        entry.sha1,
+        entry.user_provided_meta,
+    ]
+
+
+def _with_payload(
+    packet: protocol.OnTheWirePacket,
+) -> list[protocol.TransferableRange | protocol.TransferableParity]:
+    """List the models of the packet whose data follow the header, in order."""
+    return [*packet.transferable_ranges, *packet.transferable_parities]
+
+
+def _encode_header(packet: protocol.OnTheWirePacket) -> bytes:
+    history = packet.history
+    table = _TransferableTable()
+    ranges = [_encode_transferable_range(r, table) for r in packet.transferable_ranges]
+    parities = [_encode_transferable_parity(p, table) for p in packet.transferable_parities]
+    return msgpack.packb(
+        [
+            table.entries,
+            ranges,
+            [_encode_transferable_revocation(r) for r in packet.transferable_revocations],
+            None if history is None else [_encode_history_entry(e) for e in history.entries],
+            parities,
+        ]
+    )
+
+
+def iter_encode_framed(packet: protocol.OnTheWirePacket) -> Iterator[bytes | memoryview]:
+    """Serialize an OnTheWirePacket in the `framed` wire format.
+
+    Args:
+        packet: the packet to serialize.
+
+    Yields:
+        The prefix and header of the packet, then the data of its TransferableRanges
+        and TransferableParities as memoryviews over the original payloads.
+
+    Raises:
+        SerializationError: if the serialization fails.
+
+    """
+    try:
+        header = _encode_header(packet)
+    except Exception as exc:
+        raise protocol.SerializationError from exc
+
+    yield _PREFIX.pack(MAGIC, SCHEMA_VERSION, len(header)) + header
+
+    for obj in _with_payload(packet):
+        if len(obj.data) > 0:
+            yield memoryview(obj.data)
+
+
+def iter_encode(packet: protocol.OnTheWirePacket, wire_format: WireFormat) -> Iterator[bytes | memoryview]:
+    """Serialize an OnTheWirePacket in the given wire format, chunk by chunk.
+
+    Args:
+        packet: the packet to serialize.
+        wire_format: the wire format to use.
+
+    Yields:
+        Successive chunks of the serialized packet.
+
+    Raises:
+        SerializationError: if the serialization fails.
+
+    """
+    if wire_format == WireFormat.FRAMED:
+        return iter_encode_framed(packet)
+
+    return packet.iter_bytes()
+
+
+# ------------------------------------------------------------------------------
+# Decoding
+# ------------------------------------------------------------------------------
+
+
+_NONE = type(None)
+
+# The expected types of the positional fields of each encoded model.
+_TRANSFERABLE_FIELDS = (bytes, str, bytes, (dict, _NONE), (bytes, _NONE), (int, _NONE), (bytes, _NONE))
+_TRANSFERABLE_RANGE_FIELDS = (int, bool, int, int, (str, _NONE), (int, _NONE), bool, (bytes, _NONE))
+_TRANSFERABLE_PARITY_FIELDS = (int, bool, list, int)
+_PROTECTED_RANGE_FIELDS = (int, int)
+_TRANSFERABLE_REVOCATION_FIELDS = (bytes, bytes, str, str, (bytes, _NONE))
+_HISTORY_ENTRY_FIELDS = (bytes, bytes, str, str, (bytes, _NONE), (dict, _NONE))
+_PACKET_FIELDS = (list, list, list, (list, _NONE), list)
+
+
+def _check_fields(value: Any, field_types: tuple, model: str) -> list:
+    """Make sure the value is an encoded model whose positional fields have the
+    expected types.
+    """
+    if type(value) is not list or len(value) != len(field_types) or not all(map(isinstance, value, field_types)):
+        raise ValueError(f"Invalid encoded {model}")
+    return value
+
+
+def _check_meta(meta: dict, model: str) -> dict[str, str]:
+    if not all(type(key) is str and type(value) is str for key, value in meta.items()):
+        raise ValueError(f"Invalid user provided metadata in encoded {model}")
+    return meta
+
+
+def _decode_transferable(value: Any) -> protocol.Transferable:
+    id_, name, user_profile_id, meta, sha1, size, chain_digest = _check_fields(
+        value, _TRANSFERABLE_FIELDS, "Transferable"
+    )
+
+    return protocol.Transferable.model_construct(
+        id=uuid.UUID(bytes=id_),
+        name=name,
+        user_profile_id=uuid.UUID(bytes=user_profile_id),
+        user_provided_meta=None if meta is None else _check_meta(meta, "Transferable"),
+        sha1=sha1,
+        size=size,
+        chain_digest=chain_digest,
+    )
+
+
+def _lookup_transferable(transferables: list[protocol.Transferable], index: int) -> protocol.Transferable:
+    if not 0 <= index < len(transferables):
+        raise ValueError(f"Invalid Transferable index {index}")
+    return transferables[index]
+
+
+def _decode_transferable_range(
+    value: Any, transferables: list[protocol.Transferable]
+) -> tuple[protocol.TransferableRange, int]:
+    """Decode a TransferableRange without its data, also return the data's length."""
+    transferable, is_last, byte_offset, length, compression, uncompressed_size, parity_protected, checksum = (
+        _check_fields(value, _TRANSFERABLE_RANGE_FIELDS, "TransferableRange")
+    )
+
+    if length < 0:
+        raise ValueError("Invalid encoded TransferableRange: negative data length")
+    if byte_offset < 0:
+        raise ValueError("Invalid encoded TransferableRange: negative byte offset")
+    if uncompressed_size is not None and uncompressed_size < 0:
+        raise ValueError("Invalid encoded TransferableRange: negative uncompressed size")
+
+    transferable_range = protocol.TransferableRange.model_construct(
+        transferable=_lookup_transferable(transferables, transferable),
+        is_last=is_last,
+        byte_offset=byte_offset,
+        data=b"",
+        compression=None if compression is None else enums.TransferableRangeCompression(compression),
+        uncompressed_size=uncompressed_size,
+        parity_protected=parity_protected,
+        checksum=checksum,
+    )
+
+    return transferable_range, length
+
+
+def _decode_protected_range(value: Any) -> protocol.ProtectedRange:
+    byte_offset, size = _check_fields(value, _PROTECTED_RANGE_FIELDS, "ProtectedRange")
+    return protocol.ProtectedRange.model_construct(byte_offset=byte_offset, size=size)
+
+
+def _decode_transferable_parity(
+    value: Any, transferables: list[protocol.Transferable]
+) -> tuple[protocol.TransferableParity, int]:
+    """Decode a TransferableParity without its data, also return the data's length."""
+    transferable, is_last, ranges, length = _check_fields(value, _TRANSFERABLE_PARITY_FIELDS, "TransferableParity")
+
+    if length < 0:
+        raise ValueError("Invalid encoded TransferableParity: negative data length")
+
+    transferable_parity = protocol.TransferableParity.model_construct(
+        transferable=_lookup_transferable(transferables, transferable),
+        is_last=is_last,
+        ranges=[_decode_protected_range(r) for r in ranges],
+        data=b"",
+    )
+
+    return transferable_parity, length
+
+
+def _decode_transferable_revocation(value: Any) -> protocol.TransferableRevocation:
+    transferable_id, user_profile_id, reason, name, sha1 = _check_fields(
+        value, _TRANSFERABLE_REVOCATION_FIELDS, "TransferableRevocation"
+    )
+
+    return protocol.TransferableRevocation.model_construct(
+        transferable_id=uuid.UUID(bytes=transferable_id),
+        user_profile_id=uuid.UUID(bytes=user_profile_id),
+        reason=enums.TransferableRevocationReason(reason),
+        transferable_name=name,
+        transferable_sha1=sha1,
+    )
+
+
+def _decode_history_entry(value: Any) -> protocol.HistoryEntry:
+    transferable_id, user_profile_id, state, name, sha1, meta = _check_fields(
+        value, _HISTORY_ENTRY_FIELDS, "HistoryEntry"
+    )
+
+    decoded_state = enums.OutgoingTransferableState(state)
+    if not decoded_state.is_final:
+        raise ValueError("Invalid encoded HistoryEntry: state must be final")
+
+    return protocol.HistoryEntry.model_construct(
+        transferable_id=uuid.UUID(bytes=transferable_id),
+        user_profile_id=uuid.UUID(bytes=user_profile_id),
+        state=decoded_state,
+        name=name,
+        sha1=sha1,
+        user_provided_meta=None if meta is None else _check_meta(meta, "HistoryEntry"),
+    )
+
+
+def _decode_header(header: bytes | memoryview) -> tuple[protocol.OnTheWirePacket, list[int]]:
+    """Decode and validate the header of a framed packet.
+
+    Returns:
+        The packet, whose TransferableRanges and TransferableParities have empty
+        data, and the lengths of the payloads following the header.
+
+    """
+    transferables, ranges, revocations, history, parities = _check_fields(
+        msgpack.unpackb(header), _PACKET_FIELDS, "OnTheWirePacket"
+    )
+    transferables = [_decode_transferable(value) for value in transferables]
+
+    transferable_ranges = []
+    lengths = []
+    for value in ranges:
+        transferable_range, length = _decode_transferable_range(value, transferables)
+        transferable_ranges.append(transferable_range)
+        lengths.append(length)
+
+    transferable_parities = []
+    for value in parities:
+        transferable_parity, length = _decode_transferable_parity(value, transferables)
+        transferable_parities.append(transferable_parity)
+        lengths.append(length)
+
+    packet = protocol.OnTheWirePacket.model_construct(
+        transferable_ranges=transferable_ranges,
+        transferable_revocations=[_decode_transferable_revocation(value) for value in revocations],
+        history=(
+            None
+            if history is None
+            else protocol.History.model_construct(
+                entries=[_decode_history_entry(value) for value in history],
+            )
+        ),
+        transferable_parities=transferable_parities,
+    )
+
+    return packet, lengths
+
+
+def _decode_prefix(prefix: bytes | memoryview) -> int:
+    """Check the prefix of a framed packet and return the length of its header."""
+    magic, version, header_length = _PREFIX.unpack(prefix)
+
+    if magic != MAGIC:
+        raise ValueError("Not a framed OnTheWirePacket")
+
+    if version != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported framed OnTheWirePacket schema version {version}")
+
+    return header_length
+
+
+def decode_framed(data: bytes | memoryview) -> protocol.OnTheWirePacket:
+    """Deserialize an OnTheWirePacket serialized in the `framed` wire format.
+
+    Args:
+        data: the serialized packet. The data of the returned TransferableRanges and
+            TransferableParities are memoryviews over this buffer.
+
+    Returns:
+        The deserialized OnTheWirePacket.
+
+    Raises:
+        DeserializationError: if the deserialization fails.
+
+    """
+    try:
+        view = memoryview(data)
+        header_start = _PREFIX.size
+        header_end = header_start + _decode_prefix(view[:header_start])
+        packet, lengths = _decode_header(view[header_start:header_end])
+
+        if header_end + sum(lengths) != len(view):
+            raise ValueError("Payloads length mismatch the lengths given in the header")
+
+        start = header_end
+        for obj, length in zip(_with_payload(packet), lengths):
+            obj.__dict__["data"] = view[start : start + length]
+            start += length
+    except Exception as exc:
+        raise protocol.DeserializationError from exc
+
+    return packet
+
+
+def decode(data: bytes) -> protocol.OnTheWirePacket:
+    """Deserialize an OnTheWirePacket, whatever its wire format.
+
+    Args:
+        data: the serialized packet.
+
+    Returns:
+        The deserialized OnTheWirePacket.
+
+    Raises:
+        DeserializationError: if the deserialization fails.
+
+    """
+    if is_framed(data):
+        return decode_framed(data)
+
+    return protocol.OnTheWirePacket.from_bytes(data)
+
+
+def _read_exactly(stream: io.BufferedIOBase, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise EOFError("Stream ended in the middle of an OnTheWirePacket")
+    return data
+
+
+def _read_framed_from_stream(stream: io.BufferedIOBase, spool: BinaryIO) -> protocol.OnTheWirePacket:
+    """Read a framed packet from a stream, copying its payloads to the spool file."""
+    header_length = _decode_prefix(_read_exactly(stream, _PREFIX.size))
+    packet, lengths = _decode_header(_read_exactly(stream, header_length))
+
+    positions = []
+    for length in lengths:
+        start = spool.tell()
+        while length > 0:
+            chunk = _read_exactly(stream, min(length, _SPOOL_CHUNK_SIZE))
+            spool.write(chunk)
+            length -= len(chunk)
+        positions.append((start, spool.tell()))
+
+    spool.flush()
+    if spool.tell() > 0:
+        view = memoryview(mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ))
+        for obj, (start, end) in zip(_with_payload(packet), positions):
+            obj.__dict__["data"] = view[start:end]
+
+    return packet
+
+
+def _iter_framed_from_stream(
+    stream: io.BufferedIOBase, spool_factory: Callable[[], BinaryIO]
+) -> Iterator[protocol.OnTheWirePacket]:
+    while stream.peek(1):  # type: ignore[attr-defined]
+        try:
+            with spool_factory() as spool:
+                packet = _read_framed_from_stream(stream, spool)
+        except Exception as exc:
+            raise protocol.DeserializationError from exc
+
+        yield packet
+
+
+def iter_from_stream(
+    stream: io.BufferedIOBase, spool_factory: Callable[[], BinaryIO]
+) -> Iterator[protocol.OnTheWirePacket]:
+    """Deserialize OnTheWirePackets while reading them from a buffered stream,
+    whatever their wire format.
+
+    The wire format is detected from the first bytes of the stream, all the packets
+    of a stream must use the same format.
+    See `protocol.OnTheWirePacket.iter_from_stream` for how data is spooled.
+
+    Args:
+        stream: the buffered file-like object to read serialized packets from.
+        spool_factory: a callable returning a new binary file, opened for both
+            reading and writing, to store TransferableRange data into.
+
+    Yields:
+        The deserialized OnTheWirePackets.
+
+    Raises:
+        DeserializationError: if the deserialization fails.
+
+    """
+    # peek may return less bytes than asked for, but the first byte is enough to tell
+    # the formats apart as MessagePack never uses the first byte of MAGIC
+    if stream.peek(1)[:1] == MAGIC[:1]:  # type: ignore[attr-defined]
+        return _iter_framed_from_stream(stream, spool_factory)
+
+    return protocol.OnTheWirePacket.iter_from_stream(stream, spool_factory)
+
+
+__all__ = (
+    "MAGIC",
+    "SCHEMA_VERSION",
+    "WireFormat",
+    "is_framed",
+    "iter_encode",
+    "iter_encode_framed",
+    "decode",
+    "decode_framed",
+    "iter_from_stream",
+)
@@ -0,0 +1,105 @@
+"""Compression of the data of TransferableRanges sent through the diode."""
+
+import zlib
+
+from eurydice.common import enums
+
+# The size of the sample compressed to estimate whether some data is worth compressing.
+_SAMPLE_SIZE = 64 * 1024
+
+# The data is only compressed when compressing its sample saves at least this ratio.
+_MIN_SAMPLE_SAVING = 0.1
+
+# Compressing data smaller than this is not worth the CPU time.
+_MIN_DATA_SIZE = 4 * 1024
+
+# The size of the chunks in which compressed data is fed to the decompressor.
+_DECOMPRESSION_CHUNK_SIZE = 64 * 1024
+
+_ZLIB_LEVEL = 1
+
+
+class CompressionError(RuntimeError):
+    """Signal an error encountered while compressing or decompressing data."""
+
+
+def compress(data: bytes, algorithm: enums.TransferableRangeCompression) -> bytes:
+    """Compress the given data with a fast setting of the given algorithm.
+
+    Args:
+        data: the data to compress.
+        algorithm: the compression algorithm.
+
+    Returns:
+        The compressed data.
+
+    """
+    return zlib.compress(data, _ZLIB_LEVEL)
+
+
+def decompress(data: bytes, algorithm: enums.TransferableRangeCompression, size: int) -> bytes:
+    """Decompress the given data, which must decompress to exactly `size` bytes.
+
+    The data is fed to the decompressor in fixed size chunks, which is never asked for
+    more than `size + 1` bytes, so that forged data cannot exhaust memory.
+
+    Args:
+        data: the compressed data.
+        algorithm: the algorithm the data was compressed with.
+        size: the size of the data before it was compressed.
+
+    Returns:
+        The decompressed data.
+
+    Raises:
+        CompressionError: if the data is invalid, or if it does not decompress to
+            `size` bytes.
+
+    """
+    decompressor = zlib.decompressobj()
+    decompressed = bytearray()
+
+    try:
+        with memoryview(data) as view:
+            for start in range(0, len(view), _DECOMPRESSION_CHUNK_SIZE):
+                chunk = view[start : start + _DECOMPRESSION_CHUNK_SIZE]
+                decompressed += decompressor.decompress(chunk, size + 1 - len(decompressed))
+                if len(decompressed) > size:
+                    raise CompressionError(f"Decompressed data is larger than {size} bytes")
+    except (zlib.error, ValueError) as error:
+        raise CompressionError(f"Invalid {algorithm.value} compressed data") from error
+
+    if not decompressor.eof:
+        raise CompressionError(f"Truncated {algorithm.value} compressed data")
+
+    if len(decompressed) != size:
+        raise CompressionError(f"Decompressed data is smaller than {size} bytes")
+
+    return bytes(decompressed)
+
+
+def is_worth_compressing(data: bytes, algorithm: enums.TransferableRangeCompression) -> bool:
+    """Estimate whether compressing the given data saves enough space by compressing
+    a sample of it.
+
+    Args:
+        data: the data to compress.
+        algorithm: the compression algorithm.
+
+    Returns:
+        True if the data is likely to compress well, False otherwise.
+
+    """
+    if len(data) < _MIN_DATA_SIZE:
+        return False
+
+    sample = data[:_SAMPLE_SIZE]
+    return len(compress(sample, algorithm)) <= len(sample) * (1 - _MIN_SAMPLE_SAVING)
+
+
+__all__ = (
+    "CompressionError",
+    "compress",
+    "decompress",
+    "is_worth_compressing",
+)
@@ -47,7 +47,14 @@ class TransferableRevocationReason(models.TextChoices):
     UPLOAD_INTERRUPTION = "UPLOAD_INTERRUPTION", _("Multipart upload was interrupted")
 
 
+class TransferableRangeCompression(models.TextChoices):
+    """The set of all algorithms that can be used to compress TransferableRange data."""
+
+    ZLIB = "zlib", _("zlib")
+
+
 __all__ = (
     "OutgoingTransferableState",
     "TransferableRevocationReason",
+    "TransferableRangeCompression",
 )
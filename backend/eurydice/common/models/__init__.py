@@ -1,12 +1,13 @@
 """Models common between origin and destination."""
 
 from .base import AbstractBaseModel, SingletonModel, TimestampSingleton
-from .fields import SHA1Field, TransferableNameField, TransferableSizeField, UserProvidedMetaField
+from .fields import RangeChecksumField, SHA1Field, TransferableNameField, TransferableSizeField, UserProvidedMetaField
 from .user import AbstractUser
 
 __all__ = (
     "AbstractBaseModel",
     "AbstractUser",
+    "RangeChecksumField",
     "SingletonModel",
     "TimestampSingleton",
     "TransferableNameField",
@@ -5,6 +5,8 @@ from django.conf import settings
 from django.core import exceptions, validators
 from django.db import models
 
+from eurydice.common import checksum
+
 
 class TransferableNameField(models.CharField):
     """A field to store the name of a Transferable."""
@@ -37,6 +39,17 @@ class SHA1Field(models.BinaryField):
         super().__init__(*args, **kwargs)
 
 
+class RangeChecksumField(models.BinaryField):
+    """A field to store the checksum of the data of a TransferableRange."""
+
+    DIGEST_SIZE_IN_BYTES: int = checksum.DIGEST_SIZE
+
+    def __init__(self, *args, **kwargs) -> None:
+        kwargs["validators"] = (validators.MinLengthValidator(RangeChecksumField.DIGEST_SIZE_IN_BYTES),)
+        kwargs["max_length"] = RangeChecksumField.DIGEST_SIZE_IN_BYTES
+        super().__init__(*args, **kwargs)
+
+
 class UserProvidedMetaField(models.JSONField):
     """A field to store Transferable metadata provided by the user as JSON."""
 
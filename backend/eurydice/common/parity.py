@@ -0,0 +1,79 @@
+"""XOR parity used as forward error correction for TransferableRanges.
+
+A parity is the XOR of a group of buffers, each of them padded with zeros to the
+size of the largest one. Any single buffer of the group can be rebuilt as the XOR
+of the parity and of all the other buffers.
+"""
+
+from typing import Iterable
+
+# The size of the chunks of the buffers XORed at once, which bounds the size of the
+# temporary integers the XOR goes through.
+_CHUNK_SIZE = 1024 * 1024
+
+
+class ParityAccumulator:
+    """Incrementally compute the XOR parity of buffers.
+
+    The parity is accumulated in place, in a buffer grown to the size of the largest
+    buffer added so far. Buffers are XORed chunk by chunk, as integers.
+    """
+
+    def __init__(self) -> None:
+        self._parity = bytearray()
+
+    def add(self, data: bytes | memoryview) -> None:
+        """XOR the given buffer into the parity."""
+        if not self._parity:
+            self._parity[:] = data
+            return
+
+        if len(data) > len(self._parity):
+            self._parity.extend(bytes(len(data) - len(self._parity)))
+
+        with memoryview(self._parity) as parity, memoryview(data) as view:
+            for start in range(0, len(view), _CHUNK_SIZE):
+                chunk = view[start : start + _CHUNK_SIZE]
+                end = start + len(chunk)
+                xored = int.from_bytes(parity[start:end], "little") ^ int.from_bytes(chunk, "little")
+                parity[start:end] = xored.to_bytes(len(chunk), "little")
+
+    def digest(self, size: int | None = None) -> bytes:
+        """Return the parity, truncated to or padded with zeros to `size` bytes if given.
+
+        Args:
+            size: the size of the returned parity, defaults to the size of the largest
+                buffer added so far.
+
+        Returns:
+            The XOR parity of the buffers.
+
+        """
+        if size is None or size == len(self._parity):
+            return bytes(self._parity)
+
+        if size < len(self._parity):
+            with memoryview(self._parity) as parity:
+                return bytes(parity[:size])
+
+        return bytes(self._parity) + bytes(size - len(self._parity))
+
+
+def xor(buffers: Iterable[bytes | memoryview], size: int | None = None) -> bytes:
+    """Compute the XOR parity of the given buffers.
+
+    Args:
+        buffers: the buffers to XOR together.
+        size: the size of the result, defaults to the size of the largest buffer.
+
+    Returns:
+        The XOR parity of the buffers.
+
+    """
+    accumulator = ParityAccumulator()
+    for buffer in buffers:
+        accumulator.add(buffer)
+    return accumulator.digest(size)
+
+
+__all__ = ("ParityAccumulator", "xor")
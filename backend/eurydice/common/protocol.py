@@ -2,8 +2,11 @@
 and destination sides.
 """
 
+import io
+import mmap
+import struct
 import uuid
-from typing import Any
+from typing import Any, BinaryIO, Callable, Iterator
 
 import msgpack
 import pydantic
@@ -20,21 +23,28 @@ class Transferable(pydantic.BaseModel):
         user_profile_id: the UUID of the user profile owning the Transferable on the
             origin side.
         user_provided_meta: the metadata provided by the user on file submission.
+            This attribute can be None as the metadata is only provided if the
+            TransferableRange that refers to the object is the first or the last.
         sha1: the SHA-1 digest of the file corresponding to the Transferable.
             This attribute can be None as the digest of the Transferable is only
             provided if the TransferableRange that refers to the object is the last.
         size: the size in bytes of the file corresponding to the Transferable.
             This attribute can be None as the size of the Transferable is only
             provided if the TransferableRange that refers to the object is the last.
+        chain_digest: the checksums of the ranges of the Transferable combined with
+            eurydice.common.checksum.chain_digest. This attribute can be None as it
+            is only provided if the TransferableRange that refers to the object is the
+            last, and if the checksums of all the ranges are known.
 
     """
 
     id: uuid.UUID
     name: str
     user_profile_id: uuid.UUID
-    user_provided_meta: dict[str, str]
+    user_provided_meta: dict[str, str] | None
     sha1: bytes | None = None
     size: int | None = None
+    chain_digest: bytes | None = None
 
 
 class TransferableRange(pydantic.BaseModel):
@@ -46,12 +56,72 @@ class TransferableRange(pydantic.BaseModel):
         byte_offset: the start position of this range in the related Transferable.
         data: the data payload of the TransferableRange i.e. a chunk of the file
             of the related Transferable.
+        compression: the algorithm the data was compressed with, or None if the data
+            is not compressed.
+        uncompressed_size: the size of the data before it was compressed, or None if
+            the data is not compressed.
+        parity_protected: whether a TransferableParity covering this range will be
+            sent, allowing the destination to rebuild the range if it is lost.
+        checksum: the checksum of the uncompressed data, or None if it is unknown.
 
     """
 
     transferable: Transferable
     is_last: bool
+    byte_offset: pydantic.NonNegativeInt
+    data: bytes
+    compression: enums.TransferableRangeCompression | None = None
+    uncompressed_size: pydantic.NonNegativeInt | None = None
+    parity_protected: bool = False
+    checksum: bytes | None = None
+
+    # the data before it was compressed, kept by the origin until the parities covering
+    # the range are computed, and never serialized
+    _uncompressed_data: bytes | memoryview | None = pydantic.PrivateAttr(default=None)
+
+    def keep_uncompressed_data(self, data: bytes | memoryview) -> None:
+        """Keep the data of the range as it was before compression, until it is taken
+        back with `pop_uncompressed_data`.
+        """
+        self._uncompressed_data = data
+
+    def pop_uncompressed_data(self) -> bytes | memoryview | None:
+        """Return and forget the data kept with `keep_uncompressed_data`, if any."""
+        data, self._uncompressed_data = self._uncompressed_data, None
+        return data
+
+
+class ProtectedRange(pydantic.BaseModel):
+    """The position of a TransferableRange covered by a TransferableParity.
+
+    Attributes:
+        byte_offset: the start position of the range in the related Transferable.
+        size: the size in bytes of the (uncompressed) data of the range.
+
+    """
+
     byte_offset: int
+    size: int
+
+
+class TransferableParity(pydantic.BaseModel):
+    """A forward error correction range sent as part of an OnTheWirePacket, allowing
+    the destination to rebuild one lost TransferableRange among those it covers.
+
+    Attributes:
+        transferable: the Transferable the covered ranges belong to, as sent with the
+            last covered range.
+        is_last: boolean indicating if the last covered range is the last range of
+            the Transferable.
+        ranges: the consecutive TransferableRanges covered by this parity.
+        data: the XOR of the uncompressed data of the covered ranges, each of them
+            padded with zeros to the size of the largest one.
+
+    """
+
+    transferable: Transferable
+    is_last: bool
+    ranges: list[ProtectedRange]
     data: bytes
 
 
@@ -136,6 +206,114 @@ def _pack_default(obj: Any) -> Any:
     return obj
 
 
+# Binary payloads at least this large are not copied into the MessagePack framing
+# buffer, they are yielded as-is by the streaming encoder.
+_ZERO_COPY_MIN_SIZE = 64 * 1024
+
+
+def _pack_bin_header(length: int) -> bytes:
+    """Build the MessagePack header of a bin object of the given length.
+
+    msgpack.Packer has no public method for this, the header is built following the
+    specification: https://github.com/msgpack/msgpack/blob/master/spec.md#bin-format-family
+
+    """
+    if length < 2**8:
+        return struct.pack(">BB", 0xC4, length)
+    if length < 2**16:
+        return struct.pack(">BH", 0xC5, length)
+    return struct.pack(">BI", 0xC6, length)
+
+
+def _stream_pack(obj: Any, packer: msgpack.Packer, buffer: bytearray) -> Iterator[bytes | memoryview]:
+    """Pack the given object with MessagePack, accumulating the framing in the buffer
+    and yielding large binary payloads without copying them.
+
+    The buffer is flushed (i.e. yielded then cleared) before each large payload.
+    It is up to the caller to flush what remains in the buffer once done.
+
+    The produced bytes are identical to the ones produced by `msgpack.packb`.
+
+    """
+    if isinstance(obj, dict):
+        buffer += packer.pack_map_header(len(obj))
+        for key, value in obj.items():
+            buffer += packer.pack(key)
+            yield from _stream_pack(value, packer, buffer)
+    elif isinstance(obj, (list, tuple)):
+        buffer += packer.pack_array_header(len(obj))
+        for item in obj:
+            yield from _stream_pack(item, packer, buffer)
+    elif isinstance(obj, bytes) and len(obj) >= _ZERO_COPY_MIN_SIZE:
+        buffer += _pack_bin_header(len(obj))
+        yield bytes(buffer)
+        buffer.clear()
+        yield memoryview(obj)
+    else:
+        buffer += packer.pack(obj)
+
+
+# The size of the chunks in which TransferableRange data are copied from a stream to
+# a spool file by the streaming decoder.
+_SPOOL_CHUNK_SIZE = 1024 * 1024
+
+# Map the MessagePack bin format markers to the size of their length field.
+_BIN_LENGTH_SIZES = {0xC4: 1, 0xC5: 2, 0xC6: 4}
+
+
+def _read_exactly(unpacker: msgpack.Unpacker, size: int) -> bytes:
+    """Read exactly `size` raw bytes from the unpacker."""
+    data = unpacker.read_bytes(size)
+    if len(data) != size:
+        raise msgpack.OutOfData
+    return data
+
+
+def _spool_bin(unpacker: msgpack.Unpacker, spool: BinaryIO) -> tuple[int, int]:
+    """Copy the MessagePack bin object at the current position of the unpacker to the
+    spool file, chunk by chunk.
+
+    Returns:
+        The start and end positions of the bin payload in the spool file.
+
+    """
+    marker = _read_exactly(unpacker, 1)[0]
+    if marker not in _BIN_LENGTH_SIZES:
+        raise ValueError(f"Expected a MessagePack bin object, got marker {marker:#x}")
+
+    remaining = int.from_bytes(_read_exactly(unpacker, _BIN_LENGTH_SIZES[marker]), "big")
+    start = spool.tell()
+    while remaining > 0:
+        chunk = _read_exactly(unpacker, min(remaining, _SPOOL_CHUNK_SIZE))
+        spool.write(chunk)
+        remaining -= len(chunk)
+
+    return start, spool.tell()
+
+
+def _unpack_streamed_spooled(
+    unpacker: msgpack.Unpacker, spool: BinaryIO, model: type["TransferableRange"] | type["TransferableParity"]
+) -> tuple["TransferableRange | TransferableParity", tuple[int, int]]:
+    """Unpack a TransferableRange or a TransferableParity from the unpacker, spooling
+    its data.
+
+    Returns:
+        The model with empty data, and the position of its data in the spool file.
+
+    """
+    fields = {}
+    position = (0, 0)
+    for _ in range(unpacker.read_map_header()):
+        key = unpacker.unpack()
+        if key == "data":
+            position = _spool_bin(unpacker, spool)
+            fields[key] = b""
+        else:
+            fields[key] = unpacker.unpack()
+
+    return model.parse_obj(fields), position
+
+
 class OnTheWirePacket(pydantic.BaseModel):
     """A packet of data and metadata sent over the network.
 
@@ -143,12 +321,37 @@ class OnTheWirePacket(pydantic.BaseModel):
         transferable_ranges: a list of the TransferableRanges in the packet.
         transferable_revocations: a list of the TransferableRevocations in the packet.
         history: an optional History of processed Transferables.
+        transferable_parities: a list of the TransferableParities in the packet.
 
     """
 
     transferable_ranges: list[TransferableRange] = []
     transferable_revocations: list[TransferableRevocation] = []
     history: History | None = None
+    transferable_parities: list[TransferableParity] = []
+
+    def iter_bytes(self) -> Iterator[bytes | memoryview]:
+        """Serialize the OnTheWirePacket object to a stream of byte chunks.
+
+        The MessagePack framing is yielded in chunks while the data of the
+        TransferableRanges are yielded as memoryviews over the original payloads,
+        so that the packet can be written to a socket without building an
+        intermediate copy of it.
+
+        Yields:
+            Successive chunks of the serialized OnTheWirePacket.
+
+        Raises:
+            SerializationError: if the serialization fails.
+
+        """
+        try:
+            buffer = bytearray()
+            yield from _stream_pack(self.dict(), msgpack.Packer(default=_pack_default), buffer)
+            if buffer:
+                yield bytes(buffer)
+        except Exception as exc:
+            raise SerializationError from exc
 
     def to_bytes(self) -> bytes:
         """Serialize the OnTheWirePacket object to bytes.
@@ -160,10 +363,7 @@ class OnTheWirePacket(pydantic.BaseModel):
             SerializationError: if the serialization fails.
 
         """
-        try:
-            return msgpack.packb(self.dict(), default=_pack_default)
-        except Exception as exc:
-            raise SerializationError from exc
+        return b"".join(self.iter_bytes())
 
     @classmethod
     def from_bytes(cls, data: bytes) -> "OnTheWirePacket":
@@ -185,15 +385,96 @@ class OnTheWirePacket(pydantic.BaseModel):
         except Exception as exc:
             raise DeserializationError from exc
 
+    @classmethod
+    def iter_from_stream(
+        cls, stream: io.BufferedIOBase, spool_factory: Callable[[], BinaryIO]
+    ) -> Iterator["OnTheWirePacket"]:
+        """Deserialize OnTheWirePacket objects while reading them from a stream.
+
+        The stream may contain several consecutive serialized packets, which are
+        yielded as soon as they are fully read, until the end of the stream.
+
+        The data of each TransferableRange is copied to a spool file as it is read
+        from the stream, so that only a small buffer is held in memory whatever the
+        size of the packet. Each packet gets its own spool file, obtained by calling
+        `spool_factory`. The data of the yielded TransferableRanges are read-only
+        memoryviews over a memory map of that spool file.
+
+        Args:
+            stream: the file-like object to read serialized packets from.
+            spool_factory: a callable returning a new binary file, opened for both
+                reading and writing, to store TransferableRange data into.
+
+        Yields:
+            The deserialized OnTheWirePackets.
+
+        Raises:
+            DeserializationError: if the deserialization fails.
+
+        """
+        unpacker = msgpack.Unpacker(stream, max_buffer_size=0)
+
+        while True:
+            try:
+                nb_fields = unpacker.read_map_header()
+            except msgpack.OutOfData:
+                return
+            except Exception as exc:
+                raise DeserializationError from exc
+
+            try:
+                with spool_factory() as spool:
+                    packet = cls._unpack_streamed(unpacker, nb_fields, spool)
+            except Exception as exc:
+                raise DeserializationError from exc
+
+            yield packet
+
+    @classmethod
+    def _unpack_streamed(cls, unpacker: msgpack.Unpacker, nb_fields: int, spool: BinaryIO) -> "OnTheWirePacket":
+        """Unpack the fields of a packet whose map header has already been read."""
+        fields = {}
+        spooled_fields: dict[str, list] = {"transferable_ranges": [], "transferable_parities": []}
+        spooled: list[TransferableRange | TransferableParity] = []
+        positions = []
+
+        for _ in range(nb_fields):
+            key = unpacker.unpack()
+            if key in spooled_fields:
+                model: type[TransferableRange] | type[TransferableParity] = (
+                    TransferableRange if key == "transferable_ranges" else TransferableParity
+                )
+                for _ in range(unpacker.read_array_header()):
+                    obj, position = _unpack_streamed_spooled(unpacker, spool, model)
+                    spooled_fields[key].append(obj)
+                    spooled.append(obj)
+                    positions.append(position)
+            else:
+                fields[key] = unpacker.unpack()
+
+        packet = cls.parse_obj(fields)
+        packet.transferable_ranges = spooled_fields["transferable_ranges"]
+        packet.transferable_parities = spooled_fields["transferable_parities"]
+
+        spool.flush()
+        if spool.tell() > 0:
+            view = memoryview(mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ))
+            for obj, (start, end) in zip(spooled, positions):
+                obj.data = view[start:end]  # type: ignore[assignment]
+
+        return packet
+
     def is_empty(self) -> bool:
         """Check if packet is empty.
 
         Returns:
-            True if the packet has no TransferableRanges, TransferableRevocations
-            and OngoingHistory.
+            True if the packet has no TransferableRanges, TransferableRevocations,
+            TransferableParities and OngoingHistory.
 
         """
-        return (len(self.transferable_ranges) == len(self.transferable_revocations) == 0) and self.history is None
+        return (
+            len(self.transferable_ranges) == len(self.transferable_revocations) == len(self.transferable_parities) == 0
+        ) and self.history is None
 
     def __str__(self) -> str:
         self.history: History | None = self.history
@@ -209,6 +490,8 @@ class OnTheWirePacket(pydantic.BaseModel):
 __all__ = (
     "Transferable",
     "TransferableRange",
+    "ProtectedRange",
+    "TransferableParity",
     "TransferableRevocation",
     "HistoryEntry",
     "History",
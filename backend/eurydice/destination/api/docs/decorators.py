@@ -248,6 +248,16 @@ incoming_transferable = spectacular_utils.extend_schema_view(
                 location=spectacular_utils.OpenApiParameter.HEADER,
                 response=[status.HTTP_200_OK],
             ),
+            spectacular_utils.OpenApiParameter(
+                name="Chain-Digest",
+                description=(
+                    "The BLAKE2b checksums of the ranges the requested file was transferred in, combined into a "
+                    "single digest. Absent for files transferred before chain digests were introduced."
+                ),
+                type=str,
+                location=spectacular_utils.OpenApiParameter.HEADER,
+                response=[status.HTTP_200_OK],
+            ),
             spectacular_utils.OpenApiParameter(
                 name=f"{settings.METADATA_HEADER_PREFIX}*",
                 description=("Optional file metadata provided as HTTP headers when submitting the file."),
@@ -321,6 +331,8 @@ metrics = spectacular_utils.extend_schema_view(
                             "ongoing_transferables": 3,
                             "recent_successes": 14,
                             "recent_errors": 0,
+                            "pending_post_ingestion_jobs": 1,
+                            "recent_post_ingestion_job_latency": 42.5,
                             "last_packet_received_at": ("2023-09-12T16:03:57.217694+02:00"),
                         },
                     ),
@@ -24,6 +24,18 @@ class RollingMetricsSerializer(serializers.Serializer):
         help_text=_("The amount of transferables that failed to be transferred within the last few minutes"),
         min_value=0,
     )
+    pending_post_ingestion_jobs = serializers.IntegerField(
+        help_text=_("The amount of transferables waiting to be decrypted by the post-ingestion workers"),
+        min_value=0,
+    )
+    recent_post_ingestion_job_latency = serializers.FloatField(
+        help_text=_(
+            "The mean time in seconds taken to decrypt transferables by the post-ingestion workers, "
+            "from their full reception, within the last few minutes"
+        ),
+        allow_null=True,
+        min_value=0,
+    )
     last_packet_received_at = serializers.DateTimeField(
         help_text=_("The date the last packet was received (either data or heartbeat)")
     )
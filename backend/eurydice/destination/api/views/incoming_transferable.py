@@ -117,6 +117,8 @@ class IncomingTransferableViewSet(
             **instance.user_provided_meta,
             "Digest": "SHA=" + base64.b64encode(instance.sha1).decode("utf-8"),
         }
+        if instance.chain_digest is not None:
+            headers["Chain-Digest"] = base64.b64encode(instance.chain_digest).decode("utf-8")
 
         return _fs_response(instance, filename, headers)
 
@@ -1,7 +1,7 @@
 import datetime
 
 from django.conf import settings
-from django.db.models import Count, Q
+from django.db.models import Avg, Count, F, Q
 from django.utils import timezone
 from rest_framework import generics
 
@@ -18,7 +18,7 @@ class MetricsView(generics.RetrieveAPIView):
     serializer_class = serializers.RollingMetricsSerializer
     permission_classes = [CanViewMetrics]
 
-    def get_object(self) -> dict[str, int | datetime.datetime | None]:
+    def get_object(self) -> dict[str, int | float | datetime.datetime | None]:
         """Returns rolling metrics for the view to display."""
         metrics = models.IncomingTransferable.objects.values("state").aggregate(
             ongoing_transferables=Count("id", filter=Q(state=models.IncomingTransferableState.ONGOING)),
@@ -41,6 +41,19 @@ class MetricsView(generics.RetrieveAPIView):
                 ),
             ),
         )
+        jobs = models.PostIngestionJob.objects.aggregate(
+            pending=Count("id", filter=Q(finished_at__isnull=True)),
+            recent_latency=Avg(
+                F("finished_at") - F("created_at"),
+                filter=Q(
+                    finished_at__gt=timezone.now() - datetime.timedelta(seconds=settings.METRICS_SLIDING_WINDOW),
+                ),
+            ),
+        )
+        metrics["pending_post_ingestion_jobs"] = jobs["pending"]
+        metrics["recent_post_ingestion_job_latency"] = (
+            jobs["recent_latency"].total_seconds() if jobs["recent_latency"] is not None else None
+        )
         metrics["last_packet_received_at"] = models.LastPacketReceivedAt.get_timestamp()
         return metrics
 
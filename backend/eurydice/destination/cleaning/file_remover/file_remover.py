@@ -35,6 +35,8 @@ class DestinationFileRemover(RepeatedTask):
             models.IncomingTransferable.objects.filter(
                 state=models.IncomingTransferableState.ONGOING,
                 created_at__lt=expiration_time,
+                # fully received, waiting to be decrypted by the post-ingestion workers
+                post_ingestion_job__isnull=True,
             ).exclude(file_upload_parts__created_at__gte=expiration_time)
         )
         return qset.iterator()
@@ -54,6 +54,7 @@ from eurydice.common.config.settings.base import (
 env = environ.Env(
     PACKET_RECEIVER_HOST=(str, "127.0.0.1"),
     PACKET_RECEIVER_PORT=(int, 65432),
+    PACKET_RECEIVER_PORTS=(list, []),
     PACKET_RECEIVER_TIMEOUT=(float, 0.1),
     EXPECT_PACKET_EVERY=(str, "5min"),
     FILE_REMOVER_EXPIRE_TRANSFERABLES_AFTER=(str, "7days"),
@@ -62,7 +63,23 @@ env = environ.Env(
     DBTRIMMER_TRIM_TRANSFERABLES_AFTER=(str, "14days"),
     DBTRIMMER_RUN_EVERY=(str, "6h"),
     DBTRIMMER_POLL_EVERY=(str, "200ms"),
+    POST_INGESTION_QUEUE=(bool, False),
+    POST_INGESTION_WORKERS=(int, 2),
+    POST_INGESTION_POLL_EVERY=(str, "1s"),
     RECEIVER_BUFFER_MAX_ITEMS=(int, 4),
+    RECEIVER_STREAMING_DECODE=(bool, False),
+    RECEIVER_SPOOL_DIR=(str, None),
+    RECEIVER_REORDER_WINDOW=(int, None),
+    RECEIVER_BACKPRESSURE_TIMEOUT=(str, "1s"),
+    RECEIVER_MAX_CONNECTIONS=(int, 4),
+    RECEIVER_OVERFLOW_DIR=(str, None),
+    RECEIVER_OVERFLOW_MAX_SIZE=(str, "1GB"),
+    RECEIVER_EXTRACTION_WORKERS=(int, 1),
+    RECEIVER_PIPELINE_DEPTH=(int, 2),
+    RECEIVER_BATCH_EXTRACTION=(bool, False),
+    RECEIVER_SHA1_CACHE_SIZE=(int, 1024),
+    RECEIVER_SHA1_CHECKPOINT_INTERVAL=(int, 16),
+    RECEIVER_STREAMING_DECRYPTION=(bool, True),
     PRIVKEY_PATH=(str, "/home/eurydice/keys/eurydice"),
 )
 
@@ -114,6 +131,11 @@ PACKET_RECEIVER_HOST = env("PACKET_RECEIVER_HOST")
 # The TCP server of the packet receiver is bound to this port.
 PACKET_RECEIVER_PORT = env("PACKET_RECEIVER_PORT")
 
+# The ports the TCP server of the packet receiver listens on when the origin stripes
+# its packets across several diode links, one per link (e.g. "65432,65433"). Uses
+# PACKET_RECEIVER_PORT if unset.
+PACKET_RECEIVER_PORTS = [int(port) for port in env("PACKET_RECEIVER_PORTS")]
+
 # The duration (in seconds) after which the packet receiver timeout while waiting for
 # new packets. This interrupt is needed to process received Unix signals and log
 # missed heartbeats.
@@ -126,6 +148,69 @@ PACKET_RECEIVER_TIMEOUT = env("PACKET_RECEIVER_TIMEOUT")
 # drop a Transferable because of this limit.
 RECEIVER_BUFFER_MAX_ITEMS = env("RECEIVER_BUFFER_MAX_ITEMS")
 
+# How long (in seconds) the receiver stops reading from a connection while its buffer
+# queue is full, waiting for room to be made for a received packet, before dropping
+# the packet. Packets are dropped as soon as the queue is full if 0.
+RECEIVER_BACKPRESSURE_TIMEOUT = hf.parse_timespan(env("RECEIVER_BACKPRESSURE_TIMEOUT"))
+
+# The directory of the spool the receiver appends received packets to when its buffer
+# queue is full, instead of dropping them. Spooled packets are read back in order once
+# the queue is drained. Disabled if unset.
+RECEIVER_OVERFLOW_DIR = env("RECEIVER_OVERFLOW_DIR")
+
+# The maximum amount of bytes (e.g. "1GB") of the packets held by the overflow spool,
+# after which the receiver waits for room in it as it does for the queue.
+RECEIVER_OVERFLOW_MAX_SIZE = hf.parse_size(env("RECEIVER_OVERFLOW_MAX_SIZE"))
+
+# How many connections the receiver reads from concurrently on each of its ports.
+# Further connections wait for one of them to end before being read, so that the
+# packets held in memory by the receiver stay bounded.
+RECEIVER_MAX_CONNECTIONS = env("RECEIVER_MAX_CONNECTIONS")
+
+# Whether the receiver decodes OnTheWirePackets while reading them from the socket,
+# instead of reading each packet fully in memory before decoding it. In this mode,
+# the data of the TransferableRanges is spooled to temporary files as it arrives,
+# so that the packets waiting in the buffer queue hold almost no memory.
+RECEIVER_STREAMING_DECODE = env("RECEIVER_STREAMING_DECODE")
+
+# The directory in which the receiver creates the (anonymous) temporary files used
+# to spool TransferableRange data when RECEIVER_STREAMING_DECODE is enabled. Uses the
+# system temporary directory if unset.
+RECEIVER_SPOOL_DIR = env("RECEIVER_SPOOL_DIR")
+
+# How many TransferableRanges following a missing one are stashed, waiting for it to
+# be received through another link, before the missing range is considered lost and
+# the Transferable in error. Packets sent through several links are not received in
+# order. Defaults to 4 ranges per link with several PACKET_RECEIVER_PORTS, and to 0
+# (ranges are expected in order) otherwise.
+RECEIVER_REORDER_WINDOW = env("RECEIVER_REORDER_WINDOW")
+if RECEIVER_REORDER_WINDOW is None:
+    RECEIVER_REORDER_WINDOW = 4 * len(PACKET_RECEIVER_PORTS) if len(PACKET_RECEIVER_PORTS) > 1 else 0
+
+# How many threads extract the TransferableRanges of a packet, each one ingesting the
+# ranges of different Transferables through its own connection to the database. The
+# ranges are extracted one after the other by the receiver itself if 1.
+RECEIVER_EXTRACTION_WORKERS = env("RECEIVER_EXTRACTION_WORKERS")
+
+# How many decoded packets can wait for the previous ones to be handled. Packets are
+# received and decoded by a thread of their own while the previous ones are handled.
+RECEIVER_PIPELINE_DEPTH = env("RECEIVER_PIPELINE_DEPTH")
+
+# Whether the database changes made by the ingestion of the TransferableRanges of a
+# packet are written at once, in a constant number of queries, instead of range by range.
+RECEIVER_BATCH_EXTRACTION = env("RECEIVER_BATCH_EXTRACTION")
+
+# How many IncomingTransferables the SHA-1 of the data received so far is kept in memory
+# for, and every how many ranges of an IncomingTransferable its SHA-1 is saved to the
+# database, from which it is rebuilt when evicted from memory or after a restart.
+RECEIVER_SHA1_CACHE_SIZE = env("RECEIVER_SHA1_CACHE_SIZE")
+RECEIVER_SHA1_CHECKPOINT_INTERVAL = env("RECEIVER_SHA1_CHECKPOINT_INTERVAL")
+
+# Whether encrypted IncomingTransferables are decrypted as their ranges are ingested,
+# rather than from their encrypted file once fully received. As their SHA-1, their
+# decryption state is kept in memory for RECEIVER_SHA1_CACHE_SIZE IncomingTransferables.
+RECEIVER_STREAMING_DECRYPTION = env("RECEIVER_STREAMING_DECRYPTION")
+
 # The receiver will log an error if it does not receive a packet in this time interval.
 EXPECT_PACKET_EVERY = datetime.timedelta(seconds=hf.parse_timespan(env("EXPECT_PACKET_EVERY")))
 
@@ -152,5 +237,16 @@ DBTRIMMER_RUN_EVERY = datetime.timedelta(seconds=hf.parse_timespan(env("DBTRIMME
 # How often the dbtrimmer polls for SIGINT.
 DBTRIMMER_POLL_EVERY = datetime.timedelta(seconds=hf.parse_timespan(env("DBTRIMMER_POLL_EVERY")))
 
+# Whether the encrypted IncomingTransferables that could not be decrypted as they were
+# ingested are decrypted by the post-ingestion workers instead of the receiver, which
+# then goes on receiving packets. The post_ingestion service must be running.
+POST_INGESTION_QUEUE = env("POST_INGESTION_QUEUE")
+
+# How many processes of the post_ingestion service run jobs concurrently.
+POST_INGESTION_WORKERS = env("POST_INGESTION_WORKERS")
+
+# How often the post_ingestion service looks for new jobs and finished ones.
+POST_INGESTION_POLL_EVERY = datetime.timedelta(seconds=hf.parse_timespan(env("POST_INGESTION_POLL_EVERY")))
+
 # Internal path to private key
 PRIVKEY_PATH = env("PRIVKEY_PATH")
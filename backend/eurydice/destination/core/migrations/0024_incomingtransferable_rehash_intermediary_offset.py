@@ -0,0 +1,26 @@
+import django.core.validators
+from django.db import migrations, models
+
+import eurydice.common.models.fields
+
+
+def _set_rehash_intermediary_offset(apps, schema_editor):
+    # the rehash intermediary was saved along with every received range
+    IncomingTransferable = apps.get_model("eurydice_destination_core", "IncomingTransferable")
+    IncomingTransferable.objects.update(rehash_intermediary_offset=models.F("bytes_received"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eurydice_destination_core', '0023_update_incomingtransferable_finished_at_state_constraint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='incomingtransferable',
+            name='rehash_intermediary_offset',
+            field=eurydice.common.models.fields.TransferableSizeField(default=0, help_text='The amount of bytes received when the rehash intermediary was saved', validators=[django.core.validators.MaxValueValidator(54975581388800)], verbose_name='Rehash intermediary offset'),
+        ),
+        migrations.RunPython(_set_rehash_intermediary_offset, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+import django.core.validators
+from django.db import migrations
+
+import eurydice.common.models.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eurydice_destination_core', '0024_incomingtransferable_rehash_intermediary_offset'),
+    ]
+
+    operations = [
+        # the chain digest of the transferables received before is unknown
+        migrations.AddField(
+            model_name='incomingtransferable',
+            name='chain_digest',
+            field=eurydice.common.models.fields.RangeChecksumField(default=None, help_text='The checksums of the ranges received until now combined with eurydice.common.checksum.chain_digest, or NULL if unknown', max_length=16, null=True, validators=[django.core.validators.MinLengthValidator(16)], verbose_name='Chain digest'),
+        ),
+        migrations.AlterField(
+            model_name='incomingtransferable',
+            name='chain_digest',
+            field=eurydice.common.models.fields.RangeChecksumField(default=b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00', help_text='The checksums of the ranges received until now combined with eurydice.common.checksum.chain_digest, or NULL if unknown', max_length=16, null=True, validators=[django.core.validators.MinLengthValidator(16)], verbose_name='Chain digest'),
+        ),
+    ]
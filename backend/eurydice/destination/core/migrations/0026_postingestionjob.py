@@ -0,0 +1,29 @@
+# Generated by Django 5.2.9 on 2026-10-18 04:33
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eurydice_destination_core', '0025_incomingtransferable_chain_digest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostIngestionJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Creation date')),
+                ('started_at', models.DateTimeField(help_text='A timestamp indicating when a post-ingestion worker started the job', null=True, verbose_name='Start date')),
+                ('finished_at', models.DateTimeField(help_text='A timestamp indicating when the job was finished', null=True, verbose_name='Finish date')),
+                ('incoming_transferable', models.OneToOneField(help_text='The IncomingTransferable to decrypt', on_delete=django.db.models.deletion.CASCADE, related_name='post_ingestion_job', to='eurydice_destination_core.incomingtransferable', verbose_name='Incoming Transferable')),
+            ],
+            options={
+                'db_table': 'eurydice_post_ingestion_jobs',
+                'indexes': [models.Index(fields=['finished_at', 'started_at'], name='post_ingestion_job_pending_idx')],
+            },
+        ),
+    ]
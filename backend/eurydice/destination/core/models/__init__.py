@@ -3,6 +3,7 @@
 from .file_upload_part import FileUploadPart
 from .incoming_transferable import IncomingTransferable, IncomingTransferableState
 from .last_packet_received_at import LastPacketReceivedAt
+from .post_ingestion_job import PostIngestionJob
 from .user import User, UserProfile
 
 __all__ = (
@@ -12,4 +13,5 @@ __all__ = (
     "IncomingTransferableState",
     "FileUploadPart",
     "LastPacketReceivedAt",
+    "PostIngestionJob",
 )
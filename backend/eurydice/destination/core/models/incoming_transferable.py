@@ -8,6 +8,7 @@ from django.db.models import F, Q, expressions, functions, query
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+import eurydice.common.checksum as checksum
 import eurydice.common.models as common_models
 import eurydice.destination.core.models as destination_models
 import eurydice.destination.utils.rehash as rehash
@@ -141,6 +142,20 @@ class IncomingTransferable(common_models.AbstractBaseModel):
         ),
         default=rehash.sha1_to_bytes(hashlib.sha1(b"")),  # nosec
     )
+    rehash_intermediary_offset = common_models.TransferableSizeField(
+        verbose_name=_("Rehash intermediary offset"),
+        help_text=_("The amount of bytes received when the rehash intermediary was saved"),
+        default=0,
+    )
+    chain_digest = common_models.RangeChecksumField(
+        verbose_name=_("Chain digest"),
+        help_text=_(
+            "The checksums of the ranges received until now combined with "
+            "eurydice.common.checksum.chain_digest, or NULL if unknown"
+        ),
+        null=True,
+        default=checksum.EMPTY_CHAIN_DIGEST,
+    )
     bytes_received = common_models.TransferableSizeField(
         verbose_name=_("Amount of bytes received"),
         help_text=_("The amount of bytes received until now for the Transferable"),
@@ -181,6 +196,11 @@ class IncomingTransferable(common_models.AbstractBaseModel):
         help_text=common_models.AbstractBaseModel.created_at.field.help_text,  # type: ignore  # noqa: E501
     )
 
+    @property
+    def is_encrypted(self) -> bool:
+        """Whether the file of the IncomingTransferable was encrypted by its owner."""
+        return self.user_provided_meta.get("Metadata-Encrypted") == "true"
+
     def _clear_multipart_data(self) -> None:
         """Delete FileUploadParts from the database for this IncomingTransferable.
 
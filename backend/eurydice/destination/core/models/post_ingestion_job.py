@@ -0,0 +1,37 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+import eurydice.common.models as common_models
+
+
+class PostIngestionJob(common_models.AbstractBaseModel):
+    """The decryption of a fully received IncomingTransferable, left by the receiver
+    to the post-ingestion workers.
+    """
+
+    incoming_transferable = models.OneToOneField(
+        "eurydice_destination_core.IncomingTransferable",
+        on_delete=models.CASCADE,
+        related_name="post_ingestion_job",
+        verbose_name=_("Incoming Transferable"),
+        help_text=_("The IncomingTransferable to decrypt"),
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        verbose_name=_("Start date"),
+        help_text=_("A timestamp indicating when a post-ingestion worker started the job"),
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        verbose_name=_("Finish date"),
+        help_text=_("A timestamp indicating when the job was finished"),
+    )
+
+    class Meta:
+        db_table = "eurydice_post_ingestion_jobs"
+        indexes = [
+            models.Index(fields=["finished_at", "started_at"], name="post_ingestion_job_pending_idx"),
+        ]
+
+
+__all__ = ("PostIngestionJob",)
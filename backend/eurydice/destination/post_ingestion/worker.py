@@ -0,0 +1,152 @@
+import datetime
+import multiprocessing
+import time
+from concurrent import futures
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from eurydice.common.cleaning.repeated_task import RepeatedTask
+from eurydice.common.logging.logger import LOG_KEY, logger
+from eurydice.destination.core import models
+from eurydice.destination.receiver.utils import decryption_tools
+from eurydice.destination.storage import fs
+
+
+def _decrypt(user_provided_meta: dict[str, str], file_path: str, decrypted_file_path: str) -> float:
+    """Decrypt the file of an IncomingTransferable, in a process of the pool.
+
+    Returns:
+        The time taken to decrypt the file, in seconds.
+
+    """
+    started_at = time.perf_counter()
+    decryption_tools.decrypt_file(
+        models.IncomingTransferable(user_provided_meta=user_provided_meta),
+        Path(file_path),
+        Path(decrypted_file_path),
+    )
+    return time.perf_counter() - started_at
+
+
+class PostIngestionWorker(RepeatedTask):
+    """Runs the PostIngestionJobs left by the receiver in a pool of
+    `settings.POST_INGESTION_WORKERS` processes, and marks their IncomingTransferables
+    as SUCCESS, or ERROR, once done.
+
+    Jobs are looked for, and finished jobs handled, every
+    `settings.POST_INGESTION_POLL_EVERY`. The time jobs waited in the queue and the
+    time they ran for are logged for each job, and exposed by the metrics endpoint.
+
+    Args:
+        executor: the pool to run the jobs in, a pool of processes by default.
+
+    """
+
+    def __init__(self, executor: futures.Executor | None = None) -> None:
+        super().__init__(settings.POST_INGESTION_POLL_EVERY, settings.POST_INGESTION_POLL_EVERY)
+        self._executor = executor
+        self._running: dict[futures.Future, models.PostIngestionJob] = {}
+
+    def _ready(self) -> None:
+        """Release the jobs left running by a previous run, and start the pool."""
+        released = models.PostIngestionJob.objects.filter(
+            started_at__isnull=False,
+            finished_at__isnull=True,
+        ).update(started_at=None)
+
+        if self._executor is None:
+            self._executor = futures.ProcessPoolExecutor(
+                max_workers=settings.POST_INGESTION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+
+        logger.info({LOG_KEY: "post_ingestion_worker", "status": "ready", "released_jobs": released})
+
+    def _claim_jobs(self, count: int) -> list[models.PostIngestionJob]:
+        """Mark the given amount of the oldest pending jobs as started."""
+        with transaction.atomic():
+            jobs = list(
+                models.PostIngestionJob.objects.select_for_update(skip_locked=True, of=("self",))
+                .select_related("incoming_transferable")
+                .filter(started_at__isnull=True)
+                .order_by("created_at")[:count]
+            )
+            started_at = timezone.now()
+            models.PostIngestionJob.objects.filter(id__in=[job.id for job in jobs]).update(started_at=started_at)
+
+        for job in jobs:
+            job.started_at = started_at
+
+        return jobs
+
+    def _submit(self, job: models.PostIngestionJob) -> None:
+        transferable = job.incoming_transferable
+        future = self._executor.submit(  # type: ignore[union-attr]
+            _decrypt,
+            transferable.user_provided_meta,
+            str(fs.file_path(transferable)),
+            str(fs.decrypted_path(transferable)),
+        )
+        self._running[future] = job
+
+    def _finish(self, job: models.PostIngestionJob, future: futures.Future) -> None:
+        """Mark the IncomingTransferable of a job as SUCCESS or ERROR depending on its
+        outcome, unless it was revoked in the meantime.
+
+        The files of an IncomingTransferable no longer ONGOING are removed, as its
+        decryption may have recreated them after its revocation removed them.
+        """
+        error = future.exception()
+
+        with transaction.atomic():
+            transferable = models.IncomingTransferable.objects.select_for_update().get(id=job.incoming_transferable_id)
+            if transferable.state == models.IncomingTransferableState.ONGOING:
+                if error is None:
+                    transferable.mark_as_success()
+                else:
+                    fs.delete(transferable)
+                    transferable.mark_as_error()
+            else:
+                fs.delete(transferable)
+
+            job.finished_at = timezone.now()
+            job.save(update_fields=["finished_at"])
+
+        log = {
+            LOG_KEY: "post_ingestion_job",
+            "transferable_id": str(transferable.id),
+            "state": transferable.state,
+            "queued_ms": (job.started_at - job.created_at) // datetime.timedelta(milliseconds=1),  # type: ignore[operator]
+            "run_ms": (job.finished_at - job.started_at) // datetime.timedelta(milliseconds=1),  # type: ignore[operator]
+        }
+        if error is None:
+            log["decryption_ms"] = round(future.result() * 1000)
+            logger.info(log)
+        else:
+            logger.error({**log, "error": repr(error)})
+
+    def _run(self) -> None:
+        """Handle the finished jobs, and start pending ones in the free processes."""
+        for future in [f for f in self._running if f.done()]:
+            self._finish(self._running.pop(future), future)
+
+        free_workers = settings.POST_INGESTION_WORKERS - len(self._running)
+        if free_workers > 0:
+            for job in self._claim_jobs(free_workers):
+                self._submit(job)
+
+    def start(self) -> None:  # pragma: no cover
+        """Entrypoint for the PostIngestionWorker."""
+        try:
+            super().start()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+
+
+__all__ = ("PostIngestionWorker",)
@@ -1,4 +1,10 @@
+import bisect
 import datetime
+import itertools
+import math
+import queue
+import threading
+import time
 
 from django.conf import settings
 from django.db import connections
@@ -8,7 +14,7 @@ from eurydice.common import protocol
 from eurydice.common.logging.logger import LOG_KEY, logger
 from eurydice.common.utils import signals
 from eurydice.destination.core.models import LastPacketReceivedAt
-from eurydice.destination.receiver import packet_handler, packet_receiver
+from eurydice.destination.receiver import packet_handler, packet_receiver, sha1_cache
 
 
 class _PacketLogger:
@@ -54,47 +60,240 @@ class _PacketLogger:
             self._last_log_at = now
 
 
+class _LatencyHistogram:
+    """Histogram of the latencies of a stage of the receiver, in buckets whose upper
+    bounds double from one millisecond.
+    """
+
+    BUCKETS = tuple(0.001 * 2**i for i in range(17))
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Count a latency in its bucket."""
+        self.counts[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def percentile(self, percent: int) -> float:
+        """The upper bound of the bucket holding the given percentile of the latencies."""
+        rank = math.ceil(percent / 100 * sum(self.counts))
+        for upper_bound, cumulated in zip(self.BUCKETS, itertools.accumulate(self.counts)):
+            if cumulated >= rank:
+                return min(upper_bound, self.max_seconds)
+
+        return self.max_seconds
+
+
+class _StageLatencies:
+    """Record the latencies of the stages of the receiver, and periodically log their
+    percentiles, in microseconds, to see which stage the receiver is saturated by.
+
+    The stages are the decoding of the received packets, the time decoded packets
+    wait for the previous ones to be handled, their handling by the extractors, and
+    the recording of their reception. Packets decoded by the receiver threads (see
+    RECEIVER_STREAMING_DECODE) have no decode stage.
+    """
+
+    STAGES = ("decode", "queue", "handle", "record")
+    LOG_EVERY = datetime.timedelta(minutes=1)
+
+    def __init__(self, stages: tuple[str, ...] = STAGES) -> None:
+        self._lock = threading.Lock()
+        self._stages = stages
+        self._histograms = {stage: _LatencyHistogram() for stage in self._stages}
+        self._last_log_at = timezone.now()
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Record the latency of a stage for a packet."""
+        with self._lock:
+            self._histograms[stage].record(seconds)
+
+    def log(self, force: bool = False) -> None:
+        """Log the percentiles of the latencies recorded since the last log, if it
+        is time to.
+        """
+        if not force and timezone.now() - self._last_log_at < self.LOG_EVERY:
+            return
+
+        with self._lock:
+            histograms, self._histograms = self._histograms, {stage: _LatencyHistogram() for stage in self._stages}
+            self._last_log_at = timezone.now()
+
+        if not any(sum(h.counts) for h in histograms.values()):
+            return
+
+        latencies = {"packets": sum(histograms["handle"].counts)}
+        for stage, histogram in histograms.items():
+            for percent in _LatencyHistogram.PERCENTILES:
+                latencies[f"{stage}_p{percent}_us"] = round(histogram.percentile(percent) * 1_000_000)
+            latencies[f"{stage}_max_us"] = round(histogram.max_seconds * 1_000_000)
+
+        logger.info({LOG_KEY: "receiver_stage_latencies", **latencies})
+
+
+class _DecodeStage(threading.Thread):
+    """Receive and decode packets, handing them over to the handling stage through
+    a bounded queue, so that packets are decoded while the previous ones are handled.
+
+    Reception errors are handed over in place of the packets, to be dealt with by
+    the handling stage.
+    """
+
+    def __init__(
+        self,
+        receiver: packet_receiver.PacketReceiver,
+        stage_queue: queue.Queue,
+        stage_latencies: _StageLatencies,
+    ) -> None:
+        super().__init__(name="receiver-decode")
+        self._receiver = receiver
+        self._queue = stage_queue
+        self._latencies = stage_latencies
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            item, decoded_at = _receive(self._receiver)
+            if not isinstance(item, Exception):
+                self._latencies.record("decode", self._receiver.last_decode_seconds)
+
+            if not self._hand_over(item, decoded_at):
+                return
+
+    def _hand_over(self, item: protocol.OnTheWirePacket | Exception, decoded_at: float) -> bool:
+        """Put an item in the stage queue, waiting for room in it until stopped.
+
+        Returns:
+            Whether the item was put in the queue.
+
+        """
+        while not self._stopped.is_set():
+            try:
+                self._queue.put((item, decoded_at), timeout=settings.PACKET_RECEIVER_TIMEOUT)
+            except queue.Full:
+                continue
+            return True
+
+        return False
+
+    def stop(self) -> None:
+        """Stop receiving packets and wait for the thread to stop."""
+        self._stopped.set()
+        self.join()
+
+
+def _receive(receiver: packet_receiver.PacketReceiver) -> tuple[protocol.OnTheWirePacket | Exception, float]:
+    """Receive a packet, or the error encountered while receiving it, and the time at
+    which it was decoded.
+    """
+    item: protocol.OnTheWirePacket | Exception
+    try:
+        item = receiver.receive(timeout=settings.PACKET_RECEIVER_TIMEOUT)
+    except Exception as error:
+        item = error
+
+    return item, time.perf_counter()
+
+
+def _log_unexpected_error(error: Exception) -> None:
+    logger.error(
+        {
+            LOG_KEY: "on_the_wire_exception",
+            "message": "An unexpected error occurred while processing an OnTheWirePacket",
+            "error": str(error),
+        }
+    )
+
+
+def _handle(
+    item: protocol.OnTheWirePacket | Exception,
+    decoded_at: float,
+    handler: packet_handler.OnTheWirePacketHandler,
+    packet_logger: _PacketLogger,
+    stage_latencies: _StageLatencies,
+) -> None:
+    """Handle a packet received by the decode stage, or the error it encountered."""
+    try:
+        if isinstance(item, Exception):
+            raise item
+    except packet_receiver.ReceptionError as error:
+        logger.error(
+            {
+                LOG_KEY: "packet_reception_error",
+                "message": "Error on packet reception.",
+                "error": str(error),
+            }
+        )
+    else:
+        started_at = time.perf_counter()
+        LastPacketReceivedAt.update()
+        recorded_at = time.perf_counter()
+        packet_logger.log_received(item)
+        handler.handle(item)
+
+        stage_latencies.record("queue", started_at - decoded_at)
+        stage_latencies.record("record", recorded_at - started_at)
+        stage_latencies.record("handle", time.perf_counter() - recorded_at)
+
+
 def _loop() -> None:
     """Loop indefinitely until interrupted, receive packets as they become available,
     and log an error when no data packet or heartbeat is received in the defined time
     interval.
+
+    Packets are received and decoded by a decode stage thread while the previous ones
+    are handled, at most RECEIVER_PIPELINE_DEPTH packets waiting between the two. When
+    RECEIVER_STREAMING_DECODE is enabled, packets are already decoded by the receiver
+    threads, and are received without a decode stage.
     """
     with packet_receiver.PacketReceiver() as receiver:
         handler = packet_handler.OnTheWirePacketHandler()
         keep_running = signals.BooleanCondition()
         packet_logger = _PacketLogger()
+        stage_queue: queue.Queue = queue.Queue(maxsize=settings.RECEIVER_PIPELINE_DEPTH)
+        decode_stage: _DecodeStage | None = None
+        if settings.RECEIVER_STREAMING_DECODE:
+            stage_latencies = _StageLatencies(stages=("queue", "handle", "record"))
+        else:
+            stage_latencies = _StageLatencies()
+            decode_stage = _DecodeStage(receiver, stage_queue, stage_latencies)
+            decode_stage.start()
 
         logger.info({LOG_KEY: "receiver_ready", "message": "Ready to receive OnTheWirePackets"})
 
-        while True:
-            try:
+        try:
+            while True:
+                item, decoded_at = stage_queue.get() if decode_stage else _receive(receiver)
                 try:
-                    packet = receiver.receive(timeout=settings.PACKET_RECEIVER_TIMEOUT)
-                except packet_receiver.NothingToReceive:
-                    if not keep_running:
-                        break
-
-                    packet_logger.log_not_received()
-                except packet_receiver.ReceptionError as error:
-                    logger.error(
-                        {
-                            LOG_KEY: "packet_reception_error",
-                            "message": "Error on packet reception.",
-                            "error": str(error),
-                        }
-                    )
-                else:
-                    LastPacketReceivedAt.update()
-                    packet_logger.log_received(packet)
-                    handler.handle(packet)
+                    if isinstance(item, packet_receiver.NothingToReceive):
+                        if not keep_running:
+                            break
+
+                        packet_logger.log_not_received()
+                    else:
+                        _handle(item, decoded_at, handler, packet_logger, stage_latencies)
+
+                    stage_latencies.log()
+                except Exception as error:
+                    _log_unexpected_error(error)
+        finally:
+            if decode_stage:
+                decode_stage.stop()
+
+        # handle the packets decoded before the decode stage was stopped
+        while not stage_queue.empty():
+            item, decoded_at = stage_queue.get()
+            try:
+                if not isinstance(item, packet_receiver.NothingToReceive):
+                    _handle(item, decoded_at, handler, packet_logger, stage_latencies)
             except Exception as error:
-                logger.error(
-                    {
-                        LOG_KEY: "on_the_wire_exception",
-                        "message": "An unexpected error occurred while processing an OnTheWirePacket",
-                        "error": str(error),
-                    }
-                )
+                _log_unexpected_error(error)
+
+        stage_latencies.log(force=True)
+        sha1_cache.checkpoint_all()
 
 
 def run() -> None:  # pragma: no cover
@@ -0,0 +1,274 @@
+"""Storage for the received packets that do not fit in the queue of the receiver.
+
+When packets are received faster than they are processed, for instance while the
+database is slowed down by a vacuum or the trimmer, the packets that do not fit in
+the bounded in-memory queue of the receiver are appended to segment files in the
+RECEIVER_OVERFLOW_DIR directory instead of being dropped. They are read back in
+order once the queue is drained, and each segment file is removed as soon as all its
+packets have been read.
+
+Spooled packets do not survive a restart of the receiver, the segment files left by
+a previous run being removed.
+"""
+
+import collections
+import os
+import pathlib
+import struct
+import threading
+import time
+from typing import Iterable
+
+from eurydice.common import protocol
+from eurydice.common.logging.logger import LOG_KEY, logger
+
+# The size after which a segment file is closed and a new one is started.
+SEGMENT_SIZE = 64 * 1024 * 1024
+
+# Each record starts with its kind and the size of its payload.
+_RECORD_HEADER = struct.Struct(">BQ")
+_DATA = 0
+_ERROR = 1
+
+
+class OverflowSpoolFullError(RuntimeError):
+    """The overflow spool has no room left for a packet."""
+
+
+def _write_at(fd: int, data: bytes | memoryview, offset: int) -> int:
+    """Write all the given data at the given offset of a file, return the offset
+    following it.
+    """
+    with memoryview(data) as view:
+        while view:
+            written = os.pwrite(fd, view, offset)
+            offset += written
+            view = view[written:]
+    return offset
+
+
+class _Segment:
+    """An append-only segment file, and the number of records it holds that were not
+    read yet.
+    """
+
+    def __init__(self, path: pathlib.Path) -> None:
+        self.path = path
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        self.size = 0
+        self.records = 0
+        self.writers = 0
+        self.removed = False
+
+    def remove(self) -> None:
+        """Remove the segment file, closing it once no record is being written to it."""
+        self.removed = True
+        self.path.unlink(missing_ok=True)
+        if self.writers == 0:
+            os.close(self.fd)
+
+
+class _Record:
+    """The position of a packet in a segment file."""
+
+    def __init__(self, segment: _Segment, offset: int, size: int) -> None:
+        self.segment = segment
+        self.offset = offset
+        self.size = size
+        self.written = False
+        self.failed = False
+
+
+class OverflowSpool:
+    """Bounded FIFO of serialized packets, stored in append-only segment files.
+
+    The spool is safe to use from several threads: the threads handling the
+    connections of the receiver append packets to it, while the PacketReceiver reads
+    them back. The lock of the spool is only held to reserve room for a packet in a
+    segment file and to publish it once written, packets being written and read
+    without holding it.
+
+    Args:
+        directory: the directory the segment files are created in.
+        max_size: the maximum amount of bytes of the packets held by the spool.
+
+    """
+
+    def __init__(self, directory: pathlib.Path, max_size: int) -> None:
+        self._directory = directory
+        self._max_size = max_size
+        self._condition = threading.Condition()
+        self._records: collections.deque[_Record] = collections.deque()
+        self._writing: _Segment | None = None
+        self._next_segment = 0
+        self._size = 0
+
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._remove_leftover_segments()
+
+    def _remove_leftover_segments(self) -> None:
+        """Remove the segment files left by a previous run of the receiver."""
+        leftovers = list(self._directory.glob("*.seg"))
+        if leftovers:
+            logger.warning(
+                {
+                    LOG_KEY: "overflow_spool_leftovers_removed",
+                    "message": "Removed the packets spooled by a previous run of the receiver",
+                    "segments": len(leftovers),
+                    "size": sum(path.stat().st_size for path in leftovers),
+                }
+            )
+        for path in leftovers:
+            path.unlink()
+
+    def __len__(self) -> int:
+        """The number of packets held by the spool, including those being written."""
+        return len(self._records)
+
+    @property
+    def size(self) -> int:
+        """The amount of bytes of the packets held by the spool."""
+        return self._size
+
+    def _has_room(self, size: int) -> bool:
+        # a packet larger than the spool can only be stored alone
+        return self._size == 0 or self._size + size <= self._max_size
+
+    def _reserve(self, size: int) -> _Record:
+        """Reserve room for a record at the end of the segment being written, starting
+        a new segment if it is full.
+        """
+        if self._writing is None or self._writing.size >= SEGMENT_SIZE:
+            if self._writing is not None and self._writing.records == 0:
+                self._writing.remove()
+
+            self._writing = _Segment(self._directory / f"{self._next_segment:012d}.seg")
+            self._next_segment += 1
+
+        record = _Record(self._writing, self._writing.size, size)
+        self._writing.size += size
+        self._writing.records += 1
+        self._writing.writers += 1
+        self._records.append(record)
+        self._size += size
+        return record
+
+    def append(
+        self,
+        item: bytes | Iterable[bytes | memoryview] | protocol.DeserializationError,
+        timeout: float = 0,
+    ) -> float:
+        """Append a packet, or the error encountered while receiving it, to the spool.
+
+        Args:
+            item: the serialized packet, either whole or as successive chunks, or the
+                error to be reported in its place.
+            timeout: how long to wait (in seconds) for room to be made in the spool.
+
+        Returns:
+            The time spent waiting for room in the spool, in seconds.
+
+        Raises:
+            OverflowSpoolFullError: if there is still no room for the packet in the
+                spool after the timeout.
+
+        """
+        if isinstance(item, protocol.DeserializationError):
+            kind, chunks = _ERROR, [str(item).encode()]
+        else:
+            kind, chunks = _DATA, [item] if isinstance(item, bytes) else list(item)
+
+        payload_size = sum(len(chunk) for chunk in chunks)
+        record_size = _RECORD_HEADER.size + payload_size
+
+        with self._condition:
+            waiting_since = time.monotonic()
+            if not self._condition.wait_for(lambda: self._has_room(record_size), timeout=timeout):
+                raise OverflowSpoolFullError(
+                    f"No room for a packet of {payload_size} bytes in the overflow spool holding {self._size} bytes"
+                )
+            waited_seconds = time.monotonic() - waiting_since
+
+            record = self._reserve(record_size)
+
+        try:
+            offset = _write_at(record.segment.fd, _RECORD_HEADER.pack(kind, payload_size), record.offset)
+            for chunk in chunks:
+                offset = _write_at(record.segment.fd, chunk, offset)
+        except BaseException:
+            record.failed = True
+            raise
+        finally:
+            with self._condition:
+                record.written = True
+                record.segment.writers -= 1
+                if record.segment.removed and record.segment.writers == 0:
+                    os.close(record.segment.fd)
+                self._condition.notify_all()
+
+        return waited_seconds
+
+    def _release(self, record: _Record) -> None:
+        """Forget a record that was read, removing its segment once all its records
+        were read, and the last segment once the spool is empty to start afresh
+        rather than keeping an ever growing segment.
+        """
+        self._size -= record.size
+        segment = record.segment
+        segment.records -= 1
+        if segment.records == 0 and not segment.removed and (segment is not self._writing or not self._records):
+            segment.remove()
+            if segment is self._writing:
+                self._writing = None
+
+        self._condition.notify_all()
+
+    def pop(self) -> bytes | protocol.DeserializationError | None:
+        """Remove and return the oldest packet of the spool.
+
+        Returns:
+            The serialized packet, the error encountered while receiving it, or None
+            if the spool is empty or its oldest packet is still being written.
+
+        """
+        with self._condition:
+            while self._records and self._records[0].failed:
+                self._release(self._records.popleft())
+
+            if not self._records or not self._records[0].written:
+                return None
+
+            record = self._records.popleft()
+
+        try:
+            data = os.pread(record.segment.fd, record.size, record.offset)
+        finally:
+            with self._condition:
+                self._release(record)
+
+        kind, size = _RECORD_HEADER.unpack_from(data)
+        payload = data[_RECORD_HEADER.size :]
+
+        if kind == _ERROR:
+            return protocol.DeserializationError(payload.decode())
+
+        return payload
+
+    def close(self) -> None:
+        """Remove all the packets held by the spool."""
+        with self._condition:
+            segments = {id(record.segment): record.segment for record in self._records}
+            if self._writing is not None:
+                segments[id(self._writing)] = self._writing
+
+            for segment in segments.values():
+                if not segment.removed:
+                    segment.remove()
+
+            self._records.clear()
+            self._writing = None
+            self._size = 0
+            self._condition.notify_all()
+
+
+__all__ = ("OverflowSpool", "OverflowSpoolFullError", "SEGMENT_SIZE")
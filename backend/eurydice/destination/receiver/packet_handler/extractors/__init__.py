@@ -1,8 +1,10 @@
 from .history import OngoingHistoryExtractor
+from .transferable_parity import TransferableParityExtractor, UnrecoverableTransferableRangeError
 from .transferable_range import (
     FinalDigestMismatchError,
     FinalSizeMismatchError,
     MissedTransferableRangeError,
+    RangeChecksumMismatchError,
     TransferableRangeExtractionError,
     TransferableRangeExtractor,
 )
@@ -12,8 +14,11 @@ __all__ = (
     "OngoingHistoryExtractor",
     "TransferableRangeExtractor",
     "TransferableRevocationExtractor",
+    "TransferableParityExtractor",
     "TransferableRangeExtractionError",
     "MissedTransferableRangeError",
     "FinalDigestMismatchError",
     "FinalSizeMismatchError",
+    "RangeChecksumMismatchError",
+    "UnrecoverableTransferableRangeError",
 )
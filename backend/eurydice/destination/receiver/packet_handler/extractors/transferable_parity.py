@@ -0,0 +1,178 @@
+from django.conf import settings
+
+import eurydice.common.protocol as protocol
+import eurydice.destination.core.models as models
+import eurydice.destination.receiver.packet_handler.extractors.base as base_extractor
+import eurydice.destination.receiver.range_stash as range_stash
+import eurydice.destination.receiver.transferable_ingestion_fs as transferable_ingestion_fs  # noqa: E501
+from eurydice.common import parity
+from eurydice.common.logging.logger import LOG_KEY, logger
+from eurydice.destination.receiver.packet_handler.extractors import transferable_range
+from eurydice.destination.storage import fs
+
+
+class UnrecoverableTransferableRangeError(transferable_range.TransferableRangeExtractionError):
+    """The missed TransferableRanges of a Transferable cannot be rebuilt."""
+
+
+def _read_protected_range(
+    protected_range: protocol.ProtectedRange,
+    transferable: models.IncomingTransferable,
+) -> bytes:
+    """Read the data of a received range covered by a parity, either from the data
+    already ingested or from the stashed ranges.
+    """
+    if protected_range.byte_offset < transferable.bytes_received:
+        return fs.read_bytes_at(transferable, protected_range.byte_offset, protected_range.size)
+
+    stashed = range_stash.get(transferable, protected_range.byte_offset)
+    if stashed is None:
+        raise UnrecoverableTransferableRangeError(
+            f"Range at byte offset {protected_range.byte_offset} of Transferable {transferable.id} is missing"
+        )
+
+    return stashed.data
+
+
+def _rebuild_missed_range(
+    transferable_parity: protocol.TransferableParity,
+    transferable: models.IncomingTransferable,
+) -> protocol.TransferableRange | None:
+    """
+    Given a TransferableParity and its associated IncomingTransferable, rebuild the
+    range missed by the IncomingTransferable if the parity covers it.
+
+    Args:
+        transferable_parity: the received TransferableParity.
+        transferable: the associated IncomingTransferable.
+
+    Returns:
+        The rebuilt TransferableRange, or None if no range covered by the parity
+        was missed.
+
+    Raises:
+        UnrecoverableTransferableRangeError: when the missed range cannot be rebuilt.
+
+    """
+    expected_byte_offset = transferable.bytes_received
+    ranges = transferable_parity.ranges
+
+    if expected_byte_offset >= ranges[-1].byte_offset + ranges[-1].size:
+        # all the ranges covered by the parity have already been ingested
+        return None
+
+    if expected_byte_offset < ranges[0].byte_offset:
+        raise UnrecoverableTransferableRangeError(
+            f"The parity covering byte offset {expected_byte_offset} of Transferable {transferable.id} was missed"
+        )
+
+    stashed_offsets = set(range_stash.offsets(transferable))
+    missed = [r for r in ranges if r.byte_offset >= expected_byte_offset and r.byte_offset not in stashed_offsets]
+    if len(missed) != 1 or missed[0].byte_offset != expected_byte_offset:
+        raise UnrecoverableTransferableRangeError(
+            f"Cannot rebuild {len(missed)} missed ranges of Transferable {transferable.id} from a single parity"
+        )
+
+    (missed_range,) = missed
+    data = parity.xor(
+        [transferable_parity.data, *(_read_protected_range(r, transferable) for r in ranges if r is not missed_range)],
+        size=missed_range.size,
+    )
+
+    return protocol.TransferableRange(
+        transferable=transferable_parity.transferable,
+        is_last=transferable_parity.is_last and missed_range is ranges[-1],
+        byte_offset=missed_range.byte_offset,
+        data=data,
+    )
+
+
+class TransferableParityExtractor(base_extractor.OnTheWirePacketExtractor):
+    """
+    Object to rebuild missed TransferableRanges from the TransferableParities of a
+    given OnTheWirePacket.
+
+    This extractor must run after the TransferableRangeExtractor, so that the ranges
+    covered by a parity have all been either ingested or stashed.
+    """
+
+    def __init__(self) -> None:
+        self._transferable_range_extractor = transferable_range.TransferableRangeExtractor()
+
+    def _abort(self, transferable: models.IncomingTransferable, error: Exception) -> None:
+        """Abort the ingestion of an IncomingTransferable whose missed range cannot be
+        rebuilt.
+        """
+        transferable_ingestion_fs.abort_ingestion(transferable)
+        logger.error(
+            {
+                LOG_KEY: "extract_transferable_parity_failure",
+                "transferable_id": str(transferable.id),
+                "message": "Encountered an error when trying to rebuild a missed "
+                "transferable range from an OnTheWirePacket.",
+                "error": str(error),
+            }
+        )
+
+    def _extract_transferable_parity(self, transferable_parity: protocol.TransferableParity) -> None:
+        """Rebuild and ingest the range missed by the IncomingTransferable associated
+        with the given parity, if any.
+        """
+        try:
+            transferable = models.IncomingTransferable.objects.get(id=transferable_parity.transferable.id)
+        except models.IncomingTransferable.DoesNotExist:
+            return
+
+        if transferable.state != models.IncomingTransferableState.ONGOING:
+            return
+
+        try:
+            rebuilt_range = _rebuild_missed_range(transferable_parity, transferable)
+        except UnrecoverableTransferableRangeError as error:
+            if settings.RECEIVER_REORDER_WINDOW == 0:
+                self._abort(transferable, error)
+                return
+
+            # with striped packets, the ranges covered by the parity may still be on
+            # their way, the reorder window of the TransferableRangeExtractor bounds
+            # the wait for them
+            logger.warning(
+                {
+                    LOG_KEY: "extract_transferable_parity",
+                    "transferable_id": str(transferable.id),
+                    "message": "Ignoring TransferableParity received ahead of the ranges it covers",
+                    "error": str(error),
+                }
+            )
+            return
+        except Exception as error:
+            self._abort(transferable, error)
+            return
+
+        if rebuilt_range is None:
+            return
+
+        logger.info(
+            {
+                LOG_KEY: "extract_transferable_parity",
+                "transferable_id": str(transferable.id),
+                "transferable_range_byte_offset": str(rebuilt_range.byte_offset),
+                "message": "Rebuilt missed TransferableRange from TransferableParity",
+            }
+        )
+
+        self._transferable_range_extractor.extract(protocol.OnTheWirePacket(transferable_ranges=[rebuilt_range]))
+
+    def extract(self, packet: protocol.OnTheWirePacket) -> None:
+        """Given an OnTheWirePacket, rebuild the TransferableRanges that were missed
+        using its TransferableParities.
+
+        Args:
+            packet: packet to extract TransferableParities from.
+
+        """
+        for transferable_parity in packet.transferable_parities:
+            self._extract_transferable_parity(transferable_parity)
+
+
+__all__ = ("TransferableParityExtractor", "UnrecoverableTransferableRangeError")
@@ -1,16 +1,23 @@
 import hashlib
 import os
-from pathlib import Path
+import time
+import uuid
+from concurrent import futures
 
 import humanfriendly as hf
+from django import db
+from django.conf import settings
 
 import eurydice.common.protocol as protocol
 import eurydice.destination.core.models as models
 import eurydice.destination.receiver.packet_handler.extractors.base as base_extractor
+import eurydice.destination.receiver.range_stash as range_stash
+import eurydice.destination.receiver.sha1_cache as sha1_cache
+import eurydice.destination.receiver.streaming_decryption as streaming_decryption
 import eurydice.destination.receiver.transferable_ingestion_fs as transferable_ingestion_fs  # noqa: E501
-import eurydice.destination.utils.rehash as rehash
+from eurydice.common import checksum, compression
 from eurydice.common.logging.logger import LOG_KEY, logger
-from eurydice.destination.receiver.utils.decryption_tools import DecryptionTools
+from eurydice.destination.receiver.utils import decryption_tools
 from eurydice.destination.storage import fs
 
 
@@ -25,6 +32,13 @@ class MissedTransferableRangeError(TransferableRangeExtractionError):
     """The received TransferableRange's byte offset is not the expected one."""
 
 
+class RangeChecksumMismatchError(TransferableRangeExtractionError):
+    """
+    The checksum of the received TransferableRange's data does not match the one
+    received in the OnTheWirePacket.
+    """
+
+
 class FinalDigestMismatchError(TransferableRangeExtractionError):
     """
     The received successful IncomingTransferable's final digest
@@ -32,6 +46,13 @@ class FinalDigestMismatchError(TransferableRangeExtractionError):
     """
 
 
+class FinalChainDigestMismatchError(TransferableRangeExtractionError):
+    """
+    The received successful IncomingTransferable's final chain digest
+    does not match the one received in the OnTheWirePacket.
+    """
+
+
 class FinalSizeMismatchError(TransferableRangeExtractionError):
     """
     The received successful IncomingTransferable's final size
@@ -56,6 +77,10 @@ def _get_or_create_transferable(
 
     If the TransferableRange references an unknown user profile, it is also created.
 
+    As the origin only sends the user provided metadata in the first and last ranges
+    of a Transferable, an IncomingTransferable created from a range received ahead of
+    the first one has no metadata until the first range is received.
+
     Args:
         transferable_range: the TransferableRange (its data may be used for creations).
 
@@ -67,7 +92,7 @@ def _get_or_create_transferable(
         associated_user_profile_id=transferable_range.transferable.user_profile_id
     )
 
-    transferable, _ = models.IncomingTransferable.objects.get_or_create(
+    transferable, created = models.IncomingTransferable.objects.get_or_create(
         id=transferable_range.transferable.id,
         defaults={
             "id": transferable_range.transferable.id,
@@ -76,10 +101,89 @@ def _get_or_create_transferable(
             "bytes_received": 0,
             "size": transferable_range.transferable.size,
             "sha1": None,
-            "user_provided_meta": transferable_range.transferable.user_provided_meta,
+            "user_provided_meta": transferable_range.transferable.user_provided_meta or {},
         },
     )
 
+    if not created and not transferable.user_provided_meta and transferable_range.transferable.user_provided_meta:
+        transferable.user_provided_meta = transferable_range.transferable.user_provided_meta
+        transferable.save(update_fields=["user_provided_meta"])
+
+    return transferable
+
+
+def _get_or_create_transferables(
+    transferable_ranges: list[protocol.TransferableRange],
+) -> dict[uuid.UUID, models.IncomingTransferable]:
+    """
+    Given the TransferableRanges of an OnTheWirePacket, get or create all the associated
+    IncomingTransferables, and the unknown user profiles they reference, in a constant
+    number of queries.
+
+    The IncomingTransferables are created as `_get_or_create_transferable` would.
+
+    Args:
+        transferable_ranges: the TransferableRanges (their data may be used for creations).
+
+    Returns:
+        The IncomingTransferable ORM instances corresponding to the given ranges, by ID.
+
+    """
+    first_ranges: dict[uuid.UUID, protocol.TransferableRange] = {}
+    for transferable_range in transferable_ranges:
+        first_ranges.setdefault(transferable_range.transferable.id, transferable_range)
+
+    transferables = models.IncomingTransferable.objects.in_bulk(list(first_ranges))
+    missing = [r.transferable for i, r in first_ranges.items() if i not in transferables]
+    if not missing:
+        return transferables
+
+    associated_user_profile_ids = {t.user_profile_id for t in missing}
+    models.UserProfile.objects.bulk_create(
+        [models.UserProfile(associated_user_profile_id=i) for i in associated_user_profile_ids],
+        ignore_conflicts=True,
+    )
+    user_profiles = {
+        user_profile.associated_user_profile_id: user_profile
+        for user_profile in models.UserProfile.objects.filter(
+            associated_user_profile_id__in=associated_user_profile_ids
+        )
+    }
+
+    created = models.IncomingTransferable.objects.bulk_create(
+        [
+            models.IncomingTransferable(
+                id=transferable.id,
+                user_profile=user_profiles[transferable.user_profile_id],
+                name=transferable.name,
+                bytes_received=0,
+                size=transferable.size,
+                sha1=None,
+                user_provided_meta=transferable.user_provided_meta or {},
+            )
+            for transferable in missing
+        ]
+    )
+    transferables.update((transferable.id, transferable) for transferable in created)
+
+    return transferables
+
+
+def _get_batched_transferable(
+    transferable_range: protocol.TransferableRange,
+    batch: transferable_ingestion_fs.IngestionBatch,
+) -> models.IncomingTransferable:
+    """
+    Given a TransferableRange, get the associated IncomingTransferable from the batch of
+    its OnTheWirePacket, filling in the user provided metadata as
+    `_get_or_create_transferable` would.
+    """
+    transferable = batch.transferables[transferable_range.transferable.id]
+
+    if not transferable.user_provided_meta and transferable_range.transferable.user_provided_meta:
+        transferable.user_provided_meta = transferable_range.transferable.user_provided_meta
+        batch.updated(transferable)
+
     return transferable
 
 
@@ -168,6 +272,36 @@ def _assert_transferable_size_is_consistent(
         )
 
 
+def _assert_transferable_range_checksum_is_consistent(
+    transferable_range: protocol.TransferableRange,
+) -> None:
+    """Given a received TransferableRange, raise an exception if the checksum of its
+    data does not match the one computed by the origin.
+
+    This allows aborting the ingestion of a corrupted Transferable as soon as the
+    corrupted range is received, instead of on its last range.
+
+    Args:
+        transferable_range: the received TransferableRange, with uncompressed data.
+
+    Raises:
+        RangeChecksumMismatchError: when the two checksums don't match
+
+    """
+    if transferable_range.checksum is None:
+        # ranges uploaded before checksums were introduced have none
+        return
+
+    computed_checksum = checksum.compute(transferable_range.data)
+
+    if computed_checksum != transferable_range.checksum:
+        raise RangeChecksumMismatchError(
+            f"Computed checksum for TransferableRange at byte offset {transferable_range.byte_offset} "
+            f"of Transferable {transferable_range.transferable.id} was {computed_checksum.hex()} "
+            f"expected {transferable_range.checksum.hex()}"
+        )
+
+
 def _assert_transferable_sha1_is_consistent(
     transferable_range: protocol.TransferableRange,
     computed_sha1: "hashlib._Hash",
@@ -197,6 +331,65 @@ def _assert_transferable_sha1_is_consistent(
         )
 
 
+def _extend_chain_digest(
+    transferable_range: protocol.TransferableRange,
+    transferable: models.IncomingTransferable,
+) -> bytes | None:
+    """
+    Given a TransferableRange and its associated Transferable database entry, returns
+    the chain digest of the Transferable including the range, or None if the chain
+    digest of the Transferable is unknown.
+
+    Ranges rebuilt from a TransferableParity, as well as ranges uploaded before
+    checksums were introduced, have no checksum: the checksum of their data is then
+    computed.
+
+    Args:
+        transferable_range: the TransferableRange, with uncompressed data.
+        transferable: the database entry used to retrieve the current chain digest.
+
+    """
+    if transferable.chain_digest is None:
+        return None
+
+    range_checksum = transferable_range.checksum
+    if range_checksum is None:
+        range_checksum = checksum.compute(transferable_range.data)
+
+    return checksum.extend_chain_digest(bytes(transferable.chain_digest), range_checksum)
+
+
+def _assert_transferable_chain_digest_is_consistent(
+    transferable_range: protocol.TransferableRange,
+    computed_chain_digest: bytes | None,
+) -> None:
+    """Given a received TransferableRange and the chain digest computed on the ranges
+    received, raise an exception if the computed and expected chain digests diverge.
+
+    Nothing is checked if either of the chain digests is unknown.
+
+    NOTE: this function is supposed to be called on the last TransferableRange.
+
+    Args:
+        transferable_range: the received TransferableRange.
+        computed_chain_digest: the chain digest computed from all the ranges received
+            for this Transferable.
+
+    Raises:
+        FinalChainDigestMismatchError: when the two chain digests don't match
+
+    """
+    expected_chain_digest = transferable_range.transferable.chain_digest
+    if computed_chain_digest is None or expected_chain_digest is None:
+        return
+
+    if computed_chain_digest != expected_chain_digest:
+        raise FinalChainDigestMismatchError(
+            f"Computed chain digest for Transferable {transferable_range.transferable.id} "
+            f"was {computed_chain_digest.hex()} expected {expected_chain_digest.hex()}"
+        )
+
+
 def _extract_data(
     transferable_range: protocol.TransferableRange,
     transferable: models.IncomingTransferable,
@@ -210,15 +403,52 @@ def _extract_data(
 
     Args:
         transferable_range: the TransferableRange to get data from.
-        transferable: the database entry used to retrieve the current SHA1.
+        transferable: the database entry whose current SHA1 is retrieved from the cache.
 
     """
-    sha1 = rehash.sha1_from_bytes(bytes(transferable.rehash_intermediary))
+    sha1 = sha1_cache.get(transferable)
     sha1.update(transferable_range.data)
 
     return transferable_range.data, sha1
 
 
+def _decompress_transferable_range(
+    transferable_range: protocol.TransferableRange,
+) -> protocol.TransferableRange:
+    """
+    Given a TransferableRange, return it with its data decompressed if it was sent
+    compressed.
+
+    The data must decompress to the uncompressed size sent along with the range,
+    which cannot be larger than what remains of the Transferable after the range's
+    byte offset, so that a forged range cannot exhaust memory.
+
+    Args:
+        transferable_range: the received TransferableRange.
+
+    Returns:
+        A TransferableRange holding uncompressed data.
+
+    Raises:
+        CompressionError: when the data cannot be decompressed.
+
+    """
+    if transferable_range.compression is None:
+        return transferable_range
+
+    transferable_size = transferable_range.transferable.size
+    if transferable_size is None:
+        transferable_size = settings.TRANSFERABLE_MAX_SIZE
+
+    size = transferable_range.uncompressed_size
+    if size is None or not 0 <= size <= transferable_size - transferable_range.byte_offset:
+        raise compression.CompressionError(f"Invalid uncompressed size {size} for a compressed TransferableRange")
+
+    data = compression.decompress(transferable_range.data, transferable_range.compression, size)
+
+    return transferable_range.model_copy(update={"data": data, "compression": None, "uncompressed_size": None})
+
+
 def _prepare_ingestion(
     source: protocol.TransferableRange,
     destination: models.IncomingTransferable,
@@ -234,25 +464,88 @@ def _prepare_ingestion(
     """
     _assert_transferable_is_ready(destination)
     _assert_no_transferable_ranges_were_missed(source, destination)
+    _assert_transferable_range_checksum_is_consistent(source)
 
     data, computed_sha1 = _extract_data(source, destination)
+    computed_chain_digest = _extend_chain_digest(source, destination)
 
     if source.is_last:
         _assert_transferable_size_is_consistent(source, destination)
         _assert_transferable_sha1_is_consistent(source, computed_sha1)
+        _assert_transferable_chain_digest_is_consistent(source, computed_chain_digest)
 
     return transferable_ingestion_fs.PendingIngestionData(
         data=data,
         sha1=computed_sha1,
         eof=source.is_last,
+        chain_digest=computed_chain_digest,
+    )
+
+
+def _is_ahead_of_missed_range(
+    transferable_range: protocol.TransferableRange,
+    transferable: models.IncomingTransferable,
+) -> bool:
+    """
+    Tell whether the given TransferableRange follows a missed range that may be
+    rebuilt from a TransferableParity, or received later through another link when
+    packets are striped (see RECEIVER_REORDER_WINDOW), in which case it must be stashed
+    until then.
+    """
+    return (
+        (transferable_range.parity_protected or settings.RECEIVER_REORDER_WINDOW > 0)
+        and transferable.state == models.IncomingTransferableState.ONGOING
+        and transferable_range.byte_offset > transferable.bytes_received
     )
 
 
-def _extract_transferable_range(transferable_range: protocol.TransferableRange) -> None:
+def _is_behind_received_data(
+    transferable_range: protocol.TransferableRange,
+    transferable: models.IncomingTransferable,
+) -> bool:
+    """
+    Tell whether the given TransferableRange was already ingested, which happens when
+    packets are striped and a range overtaken by the parity covering it is received
+    after being rebuilt.
+    """
+    return settings.RECEIVER_REORDER_WINDOW > 0 and transferable_range.byte_offset < transferable.bytes_received
+
+
+def _assert_reorder_window_is_not_exceeded(transferable: models.IncomingTransferable) -> None:
+    """
+    Given an IncomingTransferable, make sure that the number of ranges stashed while
+    waiting for a range received through another link does not exceed the reorder
+    window, after which the awaited range is considered missed.
+
+    Args:
+        transferable: the IncomingTransferable a range was just stashed for.
+
+    Raises:
+        MissedTransferableRangeError when the reorder window is exceeded.
+
+    """
+    nb_stashed = len(range_stash.offsets(transferable))
+    if 0 < settings.RECEIVER_REORDER_WINDOW < nb_stashed:
+        raise MissedTransferableRangeError(
+            f"Expected byte offset {transferable.bytes_received} but received {nb_stashed} "
+            f"TransferableRanges following it for Transferable {transferable.id}"
+        )
+
+
+def _extract_transferable_range(
+    transferable_range: protocol.TransferableRange,
+    batch: transferable_ingestion_fs.IngestionBatch | None = None,
+) -> models.IncomingTransferable | None:
     """Extract a single transferable range.
 
     Args:
         transferable_range: the transferable range to process.
+        batch: if given, the batch of the OnTheWirePacket the range belongs to, the
+            database changes being registered in it instead of being saved right away.
+
+    Returns:
+        The IncomingTransferable if the range was ingested and more data is expected
+        for it, None otherwise.
 
     """
     logger.info(
@@ -264,7 +557,10 @@ def _extract_transferable_range(transferable_range: protocol.TransferableRange)
         }
     )
 
-    transferable = _get_or_create_transferable(transferable_range)
+    if batch is None:
+        transferable = _get_or_create_transferable(transferable_range)
+    else:
+        transferable = _get_batched_transferable(transferable_range, batch)
 
     if transferable.state == models.IncomingTransferableState.ERROR:
         logger.info(
@@ -276,15 +572,44 @@ def _extract_transferable_range(transferable_range: protocol.TransferableRange)
                 "message": "Ignoring the associated transferable range received.",
             }
         )
-        return
+        return None
+
+    if _is_behind_received_data(transferable_range, transferable):
+        logger.warning(
+            {
+                LOG_KEY: "extract_transferable_range",
+                "transferable_id": str(transferable_range.transferable.id),
+                "transferable_range_byte_offset": str(transferable_range.byte_offset),
+                "expected_byte_offset": str(transferable.bytes_received),
+                "message": "Ignoring TransferableRange already ingested.",
+            }
+        )
+        return None
 
     try:
+        transferable_range = _decompress_transferable_range(transferable_range)
+
+        if _is_ahead_of_missed_range(transferable_range, transferable):
+            range_stash.stash(transferable, transferable_range)
+            logger.warning(
+                {
+                    LOG_KEY: "extract_transferable_range",
+                    "transferable_id": str(transferable_range.transferable.id),
+                    "transferable_range_byte_offset": str(transferable_range.byte_offset),
+                    "expected_byte_offset": str(transferable.bytes_received),
+                    "message": "Stashed TransferableRange received after a missed one, "
+                    "waiting for the missed range or a TransferableParity to rebuild it",
+                }
+            )
+            _assert_reorder_window_is_not_exceeded(transferable)
+            return None
+
         to_ingest = _prepare_ingestion(
             source=transferable_range,
             destination=transferable,
         )
 
-        transferable_ingestion_fs.ingest(transferable, to_ingest)
+        transferable_ingestion_fs.ingest(transferable, to_ingest, batch)
 
         logger.info(
             {
@@ -295,19 +620,21 @@ def _extract_transferable_range(transferable_range: protocol.TransferableRange)
             }
         )
 
-        if transferable.state == models.IncomingTransferableState.SUCCESS:
-            if transferable.user_provided_meta.get("Metadata-Encrypted") == "true":
-                _decrypt_transferable(transferable)
+        if to_ingest.eof:
+            if transferable.is_encrypted:
+                _decrypt_transferable(transferable, batch)
             logger.info(
                 {
                     LOG_KEY: "extract_transferable_range",
                     "transferable_id": str(transferable_range.transferable.id),
                     "transferable_range_byte_offset": str(transferable_range.byte_offset),
-                    "state": models.IncomingTransferableState.SUCCESS.value,
+                    "state": transferable.state,
                     "message": "IncomingTransferable fully received",
                 }
             )
 
+            return None
+
     except Exception as error:
         transferable_ingestion_fs.abort_ingestion(transferable)
         logger.error(
@@ -321,8 +648,46 @@ def _extract_transferable_range(transferable_range: protocol.TransferableRange)
             }
         )
 
+        return None
+
+    return transferable
+
+
+def _extract_transferable_range_and_stashed_successors(
+    transferable_range: protocol.TransferableRange,
+    batch: transferable_ingestion_fs.IngestionBatch | None = None,
+) -> None:
+    """Extract a single transferable range, then the stashed ranges following it.
+
+    Args:
+        transferable_range: the transferable range to process.
+        batch: if given, the batch of the OnTheWirePacket the range belongs to.
+
+    """
+    next_transferable_range: protocol.TransferableRange | None = transferable_range
+
+    while next_transferable_range is not None:
+        transferable = _extract_transferable_range(next_transferable_range, batch)
+        if transferable is None:
+            break
+
+        next_transferable_range = range_stash.pop(transferable, transferable.bytes_received)
 
-def _decrypt_transferable(transferable: models.IncomingTransferable) -> None:
+
+def _decrypt_transferable(
+    transferable: models.IncomingTransferable,
+    batch: transferable_ingestion_fs.IngestionBatch | None = None,
+) -> None:
+    """Decrypt a fully received encrypted IncomingTransferable, and mark it as SUCCESS.
+
+    If the IncomingTransferable could not be decrypted as it was ingested, and
+    POST_INGESTION_QUEUE is set, its decryption is left to the post-ingestion workers.
+
+    Args:
+        transferable: the IncomingTransferable to decrypt.
+        batch: if given, the batch of the OnTheWirePacket its last range belongs to.
+
+    """
     logger.info(
         {
             LOG_KEY: "decryption_start",
@@ -341,47 +706,101 @@ def _decrypt_transferable(transferable: models.IncomingTransferable) -> None:
             }
         )
         transferable_ingestion_fs.abort_ingestion(transferable)
-    else:
-        decrypt_tools = DecryptionTools(transferable)
-        chunk_size = decrypt_tools.chunk_size
-        decrypted_file_path = Path(f"{file_path}.tmp")
-        with (
-            open(file_path, "rb") as encrypted_transferable_file,
-            open(decrypted_file_path, "ab+") as decrypted_transferable_file,
-        ):
-            for chunk_i in range(decrypt_tools.nb_chunks):
-                if chunk_i == decrypt_tools.nb_chunks - 1:
-                    chunk_size = decrypt_tools.last_chunk_size
-                chunk = encrypted_transferable_file.read(chunk_size)
-                if len(chunk) != chunk_size:
-                    raise RuntimeError(
-                        "Encrypted file was fully read before decryption finished. Error in number or size of chunks."
-                    )
-                decrypted_chunk = decrypt_tools.decrypt_chunk(chunk)
-                decrypted_transferable_file.write(decrypted_chunk)
-
-            # Verify if stream is empty now
-            if not encrypted_transferable_file.read(chunk_size) == b"":
-                raise RuntimeError("Encrypted file size mismatches number and sizes of chunks. File isn't fully read")
-
-        # Replace file with unencrypted file
-        file_path.write_bytes(decrypted_file_path.read_bytes())
-        decrypted_file_path.unlink()
+        return
 
-        logger.info(
-            {
-                LOG_KEY: "decryption_success",
-                "transferable_id": str(transferable.id),
-                "message": "Finished decryption of transferable",
-            }
-        )
+    if not streaming_decryption.finish(transferable):
+        if settings.POST_INGESTION_QUEUE:
+            transferable_ingestion_fs.enqueue_post_ingestion(transferable, batch)
+            logger.info(
+                {
+                    LOG_KEY: "decryption_queued",
+                    "transferable_id": str(transferable.id),
+                    "message": "Decryption of transferable left to the post-ingestion workers",
+                }
+            )
+            return
+
+        decryption_tools.decrypt_file(transferable, file_path, fs.decrypted_path(transferable))
+
+    transferable.mark_as_success(save=batch is None)
+
+    logger.info(
+        {
+            LOG_KEY: "decryption_success",
+            "transferable_id": str(transferable.id),
+            "message": "Finished decryption of transferable",
+        }
+    )
+
+
+def _extract_transferable_ranges(
+    transferable_ranges: list[protocol.TransferableRange],
+    batch: transferable_ingestion_fs.IngestionBatch | None = None,
+) -> None:
+    """Extract the given transferable ranges one after the other.
+
+    Args:
+        transferable_ranges: the ranges to extract.
+        batch: if given, the batch of the OnTheWirePacket the ranges belong to.
+
+    """
+    for transferable_range in transferable_ranges:
+        _extract_transferable_range_and_stashed_successors(transferable_range, batch)
+
+
+def _extract_transferable_ranges_in_worker(
+    transferable_ranges: list[protocol.TransferableRange],
+    batch: transferable_ingestion_fs.IngestionBatch | None = None,
+) -> None:
+    """Extract the given transferable ranges one after the other from a worker thread.
+
+    Each worker thread keeps its own connection to the database from one packet to
+    the next, closed only once unusable or older than CONN_MAX_AGE.
+    """
+    db.close_old_connections()
+    try:
+        _extract_transferable_ranges(transferable_ranges, batch)
+    finally:
+        db.close_old_connections()
+
+
+def _partition_by_transferable(
+    transferable_ranges: list[protocol.TransferableRange], count: int
+) -> list[list[protocol.TransferableRange]]:
+    """Split the given transferable ranges in at most `count` partitions holding about
+    as many ranges each, all the ranges of a Transferable being in the same partition
+    in their order.
+    """
+    per_transferable: dict[uuid.UUID, list[protocol.TransferableRange]] = {}
+    for transferable_range in transferable_ranges:
+        per_transferable.setdefault(transferable_range.transferable.id, []).append(transferable_range)
+
+    partitions: list[list[protocol.TransferableRange]] = [[] for _ in range(min(count, len(per_transferable)))]
+    for ranges in sorted(per_transferable.values(), key=len, reverse=True):
+        min(partitions, key=len).extend(ranges)
+
+    return partitions
 
 
 class TransferableRangeExtractor(base_extractor.OnTheWirePacketExtractor):
     """
     Object to extract TransferableRanges from a given OnTheWirePacket.
+
+    The ranges of different Transferables are extracted concurrently by
+    RECEIVER_EXTRACTION_WORKERS threads, each one with its own connection to the
+    database, while the ranges of a Transferable are extracted in order by a
+    single thread. With RECEIVER_BATCH_EXTRACTION, the database changes of all the
+    threads are written at once after the data of all the ranges of the packet was
+    stored.
     """
 
+    def __init__(self) -> None:
+        self._executor = None
+        if settings.RECEIVER_EXTRACTION_WORKERS > 1:
+            self._executor = futures.ThreadPoolExecutor(
+                max_workers=settings.RECEIVER_EXTRACTION_WORKERS, thread_name_prefix="range-extraction"
+            )
+
     def extract(self, packet: protocol.OnTheWirePacket) -> None:
         """Given an OnTheWirePacket, extract all its TransferableRanges.
 
@@ -389,8 +808,45 @@ class TransferableRangeExtractor(base_extractor.OnTheWirePacketExtractor):
             packet: packet to extract TransferableRanges from.
 
         """
-        for transferable_range in packet.transferable_ranges:
-            _extract_transferable_range(transferable_range)
+        batch = None
+        if settings.RECEIVER_BATCH_EXTRACTION and packet.transferable_ranges:
+            batch = transferable_ingestion_fs.IngestionBatch(_get_or_create_transferables(packet.transferable_ranges))
+
+        try:
+            self._extract(packet.transferable_ranges, batch)
+        finally:
+            if batch is not None:
+                batch.flush()
+
+    def _extract(
+        self,
+        transferable_ranges: list[protocol.TransferableRange],
+        batch: transferable_ingestion_fs.IngestionBatch | None,
+    ) -> None:
+        """Extract the given transferable ranges, split between the worker threads."""
+        partitions = _partition_by_transferable(transferable_ranges, settings.RECEIVER_EXTRACTION_WORKERS)
+
+        if self._executor is None or len(partitions) < 2:
+            _extract_transferable_ranges(transferable_ranges, batch)
+            return
+
+        started_at = time.perf_counter()
+        extractions = [
+            self._executor.submit(_extract_transferable_ranges_in_worker, partition, batch) for partition in partitions
+        ]
+        futures.wait(extractions)
+
+        logger.debug(
+            {
+                LOG_KEY: "extract_transferable_ranges_timings",
+                "transferable_ranges": len(transferable_ranges),
+                "partitions": len(partitions),
+                "extract_us": round((time.perf_counter() - started_at) * 1_000_000),
+            }
+        )
+
+        for extraction in extractions:
+            extraction.result()
 
 
 __all__ = ("TransferableRangeExtractor",)
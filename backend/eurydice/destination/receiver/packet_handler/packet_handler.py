@@ -8,6 +8,7 @@ class OnTheWirePacketHandler:
     def __init__(self) -> None:
         self._extractors = (
             extractors.TransferableRangeExtractor(),
+            extractors.TransferableParityExtractor(),
             extractors.TransferableRevocationExtractor(),
             extractors.OngoingHistoryExtractor(),
         )
@@ -1,45 +1,288 @@
+import pathlib
 import queue
 import socketserver
+import tempfile
 import threading
+import time
 from socket import socket
 from types import TracebackType
-from typing import Type
+from typing import BinaryIO, Type
 
 from django.conf import settings
 
-from eurydice.common import protocol
+from eurydice.common import codec, protocol
 from eurydice.common.logging.logger import LOG_KEY, logger
+from eurydice.destination.receiver import overflow_spool as _overflow_spool
+
+# the items put in the queue of the receiver, see PacketReceiver.receive
+_QueueItem = bytes | protocol.OnTheWirePacket | protocol.DeserializationError
+
+
+def _create_spool_file() -> BinaryIO:
+    """Create an anonymous temporary file to spool TransferableRange data into."""
+    return tempfile.TemporaryFile(dir=settings.RECEIVER_SPOOL_DIR)  # noqa: SIM115
+
+
+class _ReceptionCounters:
+    """Count the packets dropped, spooled or delayed because the queue of the receiver
+    was full, across the threads handling the connections of a server.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.dropped_packets = 0
+        self.spooled_packets = 0
+        self.backpressured_packets = 0
+        self.backpressure_seconds = 0.0
+
+    def record_drop(self) -> None:
+        """Count a packet dropped because the queue was full."""
+        with self._lock:
+            self.dropped_packets += 1
+
+    def record_spooled(self) -> None:
+        """Count a packet appended to the overflow spool because the queue was full."""
+        with self._lock:
+            self.spooled_packets += 1
+
+    def record_backpressure(self, seconds: float) -> None:
+        """Count a packet that waited the given time for room in the queue."""
+        with self._lock:
+            self.backpressured_packets += 1
+            self.backpressure_seconds += seconds
+
+
+class _EnqueueOrder:
+    """Let the threads handling the connections of a server put their packets in the
+    queue in the order the connections were accepted, one connection after the other,
+    so that concurrent connections do not reorder the packets of the diode link.
+    """
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        self._issued = 0
+        self._serving = 0
+
+    def take_ticket(self) -> int:
+        """Get the turn of a newly accepted connection."""
+        with self._condition:
+            ticket = self._issued
+            self._issued += 1
+            return ticket
+
+    def wait_turn(self, ticket: int) -> None:
+        """Wait for the connections accepted before the one with the given ticket to
+        be handled.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._serving == ticket)
+
+    def done(self, ticket: int) -> None:
+        """Give the turn to the connection accepted after the one with the given
+        ticket.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._serving == ticket)
+            self._serving += 1
+            self._condition.notify_all()
 
 
 class _RequestHandler(socketserver.StreamRequestHandler):
     server: "_Server"
 
+    def setup(self) -> None:
+        super().setup()
+        self._ticket = self.server.tickets.pop(self.request)
+        self._has_turn = False
+
     def handle(self) -> None:
-        """Put the data of each socket request in the server queue."""
+        """Put the data of each socket request in the server queue.
+
+        The packets of a connection are put in the queue once the connections
+        accepted before it are handled.
+        """
+        try:
+            if settings.RECEIVER_STREAMING_DECODE:
+                self._handle_stream()
+            else:
+                self._enqueue(self.rfile.read())
+        finally:
+            self.server.enqueue_order.done(self._ticket)
+
+    def _handle_stream(self) -> None:
+        """Decode the packets of the socket request while reading them, and put them
+        in the server queue as soon as they are decoded.
+
+        A decoding error is put in the queue in place of the packet, so that it can
+        be reported by the PacketReceiver.
+        """
+        try:
+            for packet in codec.iter_from_stream(self.rfile, _create_spool_file):
+                self._enqueue(packet)
+        except protocol.DeserializationError as error:
+            self._enqueue(error)
+
+    def _enqueue(self, item: _QueueItem) -> None:
+        """Put an item in the server queue.
+
+        When the queue is full, the item is appended to the overflow spool if there is
+        one (see RECEIVER_OVERFLOW_DIR), and items keep being spooled until the spool
+        is drained so that they are received in order. Otherwise, or when the spool is
+        full too, the connection is not read any further until room is made for the
+        item, which is dropped after RECEIVER_BACKPRESSURE_TIMEOUT.
+        """
+        if not self._has_turn:
+            self.server.enqueue_order.wait_turn(self._ticket)
+            self._has_turn = True
+
+        overflow_spool = self.server.overflow_spool
+        if overflow_spool is not None and len(overflow_spool) > 0:
+            self._spool(item, overflow_spool)
+            return
+
         try:
-            self.server.queue.put(self.rfile.read(), block=False)
+            self.server.queue.put(item, block=False)
         except queue.Full:
-            logger.error(
-                {
-                    LOG_KEY: "dropped_transferable",
-                    "message": "Receiver received data while processing queue is at full capacity",
-                }
-            )
+            if overflow_spool is not None:
+                self._spool(item, overflow_spool)
+            else:
+                self._enqueue_with_backpressure(item)
         else:
             logger.debug({LOG_KEY: "new_block_added_to_queue"})
 
+    def _enqueue_with_backpressure(self, item: _QueueItem) -> None:
+        """Wait for room in the full server queue to put an item in it, dropping the
+        item if the queue is still full after RECEIVER_BACKPRESSURE_TIMEOUT.
+        """
+        waiting_since = time.monotonic()
+        try:
+            if settings.RECEIVER_BACKPRESSURE_TIMEOUT <= 0:
+                raise queue.Full
 
-class _Server(socketserver.TCPServer):
-    def __init__(self, receiving_queue: queue.Queue):
+            self.server.queue.put(item, timeout=settings.RECEIVER_BACKPRESSURE_TIMEOUT)
+        except queue.Full:
+            self._drop()
+        else:
+            self._record_backpressure(time.monotonic() - waiting_since)
+
+    def _spool(self, item: _QueueItem, overflow_spool: _overflow_spool.OverflowSpool) -> None:
+        """Append an item to the overflow spool, waiting for room in it for at most
+        RECEIVER_BACKPRESSURE_TIMEOUT before dropping the item.
+        """
+        spooled: bytes | list[bytes | memoryview] | protocol.DeserializationError
+        if isinstance(item, protocol.OnTheWirePacket):
+            # the data of the packet was spooled to a temporary file while decoding it,
+            # and is streamed from it to the overflow spool without being copied
+            spooled = list(codec.iter_encode(item, codec.WireFormat.FRAMED))
+        else:
+            spooled = item
+
+        try:
+            waited_seconds = overflow_spool.append(spooled, timeout=settings.RECEIVER_BACKPRESSURE_TIMEOUT)
+        except _overflow_spool.OverflowSpoolFullError:
+            self._drop()
+            return
+
+        self.server.counters.record_spooled()
+        if waited_seconds > 0:
+            self._record_backpressure(waited_seconds)
+
+        logger.debug(
+            {
+                LOG_KEY: "new_block_added_to_overflow_spool",
+                "spooled_packets": len(overflow_spool),
+                "spooled_bytes": overflow_spool.size,
+            }
+        )
+
+    def _drop(self) -> None:
+        """Count and log an item dropped for lack of room to hold it."""
+        counters = self.server.counters
+        counters.record_drop()
+        logger.error(
+            {
+                LOG_KEY: "dropped_transferable",
+                "message": "Receiver received data while processing queue is at full capacity",
+                "dropped_packets": counters.dropped_packets,
+            }
+        )
+
+    def _record_backpressure(self, waited_seconds: float) -> None:
+        """Count and log an item that waited for room to be made for it."""
+        counters = self.server.counters
+        counters.record_backpressure(waited_seconds)
+        logger.warning(
+            {
+                LOG_KEY: "receiver_backpressure",
+                "message": "Stopped reading received data while processing queue was at full capacity",
+                "waited_ms": round(waited_seconds * 1000),
+                "backpressured_packets": counters.backpressured_packets,
+            }
+        )
+
+
+def _receiver_ports() -> list[int]:
+    """List the ports to listen on, one per diode link."""
+    return settings.PACKET_RECEIVER_PORTS or [settings.PACKET_RECEIVER_PORT]
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    # connections blocked on a full queue must not prevent the receiver from stopping
+    daemon_threads = True
+
+    # how often a server waiting for a free connection slot checks whether it is
+    # being shut down, in seconds
+    _SLOT_POLL_INTERVAL = 0.5
+
+    def __init__(
+        self, receiving_queue: queue.Queue, port: int, overflow_spool: _overflow_spool.OverflowSpool | None = None
+    ):
         self.queue = receiving_queue
+        self.overflow_spool = overflow_spool
+        self.connection_slots = threading.BoundedSemaphore(settings.RECEIVER_MAX_CONNECTIONS)
+        self._holding_slot: set[socket] = set()
+        self._stopping = threading.Event()
+        self.enqueue_order = _EnqueueOrder()
+        self.tickets: dict[socket, int] = {}
+        self.counters = _ReceptionCounters()
         super().__init__(
             server_address=(
                 settings.PACKET_RECEIVER_HOST,
-                settings.PACKET_RECEIVER_PORT,
+                port,
             ),
             RequestHandlerClass=_RequestHandler,
         )
 
+    def process_request(self, request: socket, client_address: tuple[str, int]) -> None:  # type: ignore[override]
+        """Handle a newly accepted connection in its own thread, taking its turn to
+        put packets in the queue.
+
+        At most RECEIVER_MAX_CONNECTIONS connections are read at once, the others
+        are not accepted until one of them ends. Connection slots are taken here, in
+        the order the connections are accepted, so that the connections holding the
+        slots never wait for the turn of a connection without one.
+        """
+        while not self.connection_slots.acquire(timeout=self._SLOT_POLL_INTERVAL):
+            if self._stopping.is_set():
+                self.shutdown_request(request)
+                return
+
+        self._holding_slot.add(request)
+        self.tickets[request] = self.enqueue_order.take_ticket()
+        super().process_request(request, client_address)
+
+    def shutdown_request(self, request: socket) -> None:  # type: ignore[override]
+        """Close a connection, freeing its connection slot."""
+        super().shutdown_request(request)
+        if request in self._holding_slot:
+            self._holding_slot.discard(request)
+            self.connection_slots.release()
+
+    def shutdown(self) -> None:
+        """Stop the server loop, even while it waits for a free connection slot."""
+        self._stopping.set()
+        super().shutdown()
+
     def handle_error(
         self,
         request: socket | tuple[bytes, socket],
@@ -50,11 +293,18 @@ class _Server(socketserver.TCPServer):
 
 
 class _ReceiverThread(threading.Thread):
-    def __init__(self, receiving_queue: queue.Queue):
+    def __init__(
+        self, receiving_queue: queue.Queue, port: int, overflow_spool: _overflow_spool.OverflowSpool | None = None
+    ):
         self._queue = receiving_queue
-        self._server = _Server(self._queue)
+        self._server = _Server(self._queue, port, overflow_spool)
         super().__init__()
 
+    @property
+    def counters(self) -> _ReceptionCounters:
+        """The counters of the packets dropped or delayed by the server."""
+        return self._server.counters
+
     def run(self) -> None:
         with self._server as server:
             server.serve_forever()
@@ -78,6 +328,15 @@ class PacketReceiver:
     """Receive serialized OnTheWirePackets using a receiver thread running a TCP server,
     and deserialize the packets.
 
+    Each receiver thread reads several connections concurrently. When the queue is
+    full, packets are appended to an overflow spool on disk if RECEIVER_OVERFLOW_DIR
+    is set. Otherwise, or when the spool is full too, connections are not read any
+    further until room is made, the packets still waiting after
+    RECEIVER_BACKPRESSURE_TIMEOUT being dropped.
+
+    When packets are striped across several diode links, a receiver thread listens on
+    the port of each link, all of them filling the same queue.
+
     Example:
         >>> with packet_receiver.PacketReceiver() as r:
         ...     packet = r.receive(timeout=0.1)
@@ -86,23 +345,77 @@ class PacketReceiver:
 
     def __init__(self) -> None:
         self._queue: queue.Queue = queue.Queue(maxsize=settings.RECEIVER_BUFFER_MAX_ITEMS)
-        self._receiver_thread = _ReceiverThread(self._queue)
+        self._overflow_spool = (
+            _overflow_spool.OverflowSpool(
+                pathlib.Path(settings.RECEIVER_OVERFLOW_DIR), settings.RECEIVER_OVERFLOW_MAX_SIZE
+            )
+            if settings.RECEIVER_OVERFLOW_DIR
+            else None
+        )
+        self._receiver_threads = [
+            _ReceiverThread(self._queue, port, self._overflow_spool) for port in _receiver_ports()
+        ]
+        # the time spent decoding the last received packet, in seconds
+        self.last_decode_seconds = 0.0
+
+    @property
+    def dropped_packets(self) -> int:
+        """Number of packets dropped because the queue was full."""
+        return sum(t.counters.dropped_packets for t in self._receiver_threads)
+
+    @property
+    def spooled_packets(self) -> int:
+        """Number of packets appended to the overflow spool because the queue was full."""
+        return sum(t.counters.spooled_packets for t in self._receiver_threads)
+
+    @property
+    def backpressured_packets(self) -> int:
+        """Number of packets that waited for room in the full queue."""
+        return sum(t.counters.backpressured_packets for t in self._receiver_threads)
+
+    @property
+    def backpressure_seconds(self) -> float:
+        """Total time spent by packets waiting for room in the full queue."""
+        return sum(t.counters.backpressure_seconds for t in self._receiver_threads)
 
     def start(self) -> None:
-        """Start the PacketReceiver i.e. start the receiver thread.
+        """Start the PacketReceiver i.e. start the receiver threads.
 
         A PacketReceiver cannot be stopped then restarted. A new object must be created.
 
         """
-        self._receiver_thread.start()
+        for receiver_thread in self._receiver_threads:
+            receiver_thread.start()
 
     def stop(self) -> None:
-        """Stop the PacketReceiver i.e. ask the receiver thread to stop and wait
-        for it to stop.
+        """Stop the PacketReceiver i.e. ask the receiver threads to stop and wait
+        for them to stop.
 
         """
-        self._receiver_thread.stop()
-        self._receiver_thread.join()
+        for receiver_thread in self._receiver_threads:
+            receiver_thread.stop()
+        for receiver_thread in self._receiver_threads:
+            receiver_thread.join()
+        if self._overflow_spool is not None:
+            self._overflow_spool.close()
+
+    def _get(self, block: bool, timeout: float | None) -> _QueueItem:
+        """Get the next received item, from the queue or from the overflow spool.
+
+        The items of the queue were all received before the spooled ones, as items
+        are only put in the queue again once the spool is drained.
+        """
+        if self._overflow_spool is None:
+            return self._queue.get(block, timeout)
+
+        try:
+            return self._queue.get(block=False)
+        except queue.Empty:
+            spooled = self._overflow_spool.pop()
+            if spooled is not None:
+                return spooled
+
+        return self._queue.get(block, timeout)
 
     def receive(self, block: bool = True, timeout: float | None = None) -> protocol.OnTheWirePacket:
         """Receive and deserialize an OnTheWirePacket.
@@ -124,14 +437,25 @@ class PacketReceiver:
 
         """
         try:
-            data = self._queue.get(block, timeout)
+            data = self._get(block, timeout)
         except queue.Empty:
             raise NothingToReceive
 
+        # packets already decoded by the receiver thread (see RECEIVER_STREAMING_DECODE)
+        if isinstance(data, protocol.OnTheWirePacket):
+            self.last_decode_seconds = 0.0
+            return data
+
+        if isinstance(data, protocol.DeserializationError):
+            raise ReceptionError from data
+
+        started_at = time.perf_counter()
         try:
-            return protocol.OnTheWirePacket.from_bytes(data)
+            return codec.decode(data)
         except protocol.DeserializationError as exc:
             raise ReceptionError from exc
+        finally:
+            self.last_decode_seconds = time.perf_counter() - started_at
 
     def __enter__(self):
         self.start()
@@ -0,0 +1,86 @@
+"""Storage for the TransferableRanges received ahead of a missed range.
+
+When a range of an IncomingTransferable is lost, the ranges following it cannot be
+ingested until the missed one is rebuilt. They are kept on the filesystem, next to
+the data of the Transferable, and ingested in order once the gap is filled.
+Stashed ranges are removed along with the data of the Transferable.
+"""
+
+from eurydice.common import protocol
+from eurydice.destination.core import models
+from eurydice.destination.storage import fs
+
+
+def stash(transferable: models.IncomingTransferable, transferable_range: protocol.TransferableRange) -> None:
+    """Store a TransferableRange received ahead of a missed range.
+
+    Args:
+        transferable: the IncomingTransferable the range belongs to.
+        transferable_range: the received range, with uncompressed data.
+
+    """
+    path = fs.stash_path(transferable)
+    path.mkdir(parents=True, exist_ok=True)
+    packet = protocol.OnTheWirePacket(transferable_ranges=[transferable_range])
+    (path / str(transferable_range.byte_offset)).write_bytes(packet.to_bytes())
+
+
+def offsets(transferable: models.IncomingTransferable) -> list[int]:
+    """List the byte offsets of the stashed ranges of an IncomingTransferable.
+
+    Args:
+        transferable: the IncomingTransferable to list stashed ranges of.
+
+    Returns:
+        The sorted byte offsets of the stashed ranges.
+
+    """
+    path = fs.stash_path(transferable)
+    if not path.is_dir():
+        return []
+
+    return sorted(int(child.name) for child in path.iterdir())
+
+
+def get(transferable: models.IncomingTransferable, byte_offset: int) -> protocol.TransferableRange | None:
+    """Read the stashed range of an IncomingTransferable starting at the given offset.
+
+    Args:
+        transferable: the IncomingTransferable the range belongs to.
+        byte_offset: the byte offset of the range.
+
+    Returns:
+        The stashed range, or None if there is no such range.
+
+    """
+    try:
+        serialized = (fs.stash_path(transferable) / str(byte_offset)).read_bytes()
+    except FileNotFoundError:
+        return None
+
+    return protocol.OnTheWirePacket.from_bytes(serialized).transferable_ranges[0]
+
+
+def pop(transferable: models.IncomingTransferable, byte_offset: int) -> protocol.TransferableRange | None:
+    """Remove and return the stashed range of an IncomingTransferable starting at the
+    given offset.
+
+    Args:
+        transferable: the IncomingTransferable the range belongs to.
+        byte_offset: the byte offset of the range.
+
+    Returns:
+        The stashed range, or None if there is no such range.
+
+    """
+    transferable_range = get(transferable, byte_offset)
+    if transferable_range is not None:
+        path = fs.stash_path(transferable)
+        (path / str(byte_offset)).unlink()
+        if not any(path.iterdir()):
+            path.rmdir()
+
+    return transferable_range
+
+
+__all__ = ("stash", "offsets", "get", "pop")
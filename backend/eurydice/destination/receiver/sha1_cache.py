@@ -0,0 +1,164 @@
+"""In-memory cache of the SHA-1 of the IncomingTransferables being received.
+
+The SHA-1 of a Transferable is computed incrementally as its ranges are ingested.
+Rather than loading the state of the hashlib object from the database for each range
+and dumping it back once the range is ingested (see eurydice.destination.utils.rehash),
+the receiver keeps the live hashlib objects of the RECEIVER_SHA1_CACHE_SIZE
+Transferables it most recently ingested ranges for.
+
+The state of a hashlib object is only saved to the database as a checkpoint every
+RECEIVER_SHA1_CHECKPOINT_INTERVAL ranges, and when the receiver stops. When a hashlib
+object is not in the cache, because it was evicted or the receiver was restarted, it
+is rebuilt from the last checkpoint and the data received since then, read back from
+the file of the Transferable.
+"""
+
+import collections
+import hashlib
+import threading
+
+from django.conf import settings
+
+from eurydice.common.logging.logger import LOG_KEY, logger
+from eurydice.destination.core import models
+from eurydice.destination.storage import fs
+from eurydice.destination.utils import rehash
+
+# The size of the chunks the data received since the last checkpoint is read by.
+_READ_SIZE = 1024 * 1024
+
+
+class Sha1RecoveryError(RuntimeError):
+    """The data received since the last checkpoint could not be read back."""
+
+
+class _Entry:
+    """A cached hashlib object, and the amount of bytes it was computed on."""
+
+    __slots__ = ("sha1", "bytes_received", "ranges_since_checkpoint")
+
+    def __init__(self, sha1: "hashlib._Hash", bytes_received: int, ranges_since_checkpoint: int) -> None:
+        self.sha1 = sha1
+        self.bytes_received = bytes_received
+        self.ranges_since_checkpoint = ranges_since_checkpoint
+
+
+_entries: collections.OrderedDict = collections.OrderedDict()
+_lock = threading.Lock()
+
+
+def _recover(transferable: models.IncomingTransferable) -> "hashlib._Hash":
+    """Rebuild the hashlib object of an IncomingTransferable from its last checkpoint
+    and the data received since then.
+    """
+    if transferable.bytes_received == 0:
+        return hashlib.sha1()  # nosec
+
+    sha1 = rehash.sha1_from_bytes(bytes(transferable.rehash_intermediary))
+    offset = transferable.rehash_intermediary_offset
+    if offset == transferable.bytes_received:
+        return sha1
+
+    with fs.file_path(transferable).open("rb") as file:
+        file.seek(offset)
+        remaining = transferable.bytes_received - offset
+        while remaining > 0:
+            chunk = file.read(min(remaining, _READ_SIZE))
+            if not chunk:
+                raise Sha1RecoveryError(
+                    f"Expected {transferable.bytes_received} bytes in the file of Transferable "
+                    f"{transferable.id} but found {transferable.bytes_received - remaining}"
+                )
+            sha1.update(chunk)
+            remaining -= len(chunk)
+
+    logger.info(
+        {
+            LOG_KEY: "sha1_cache_recovery",
+            "transferable_id": str(transferable.id),
+            "checkpoint_offset": offset,
+            "rehashed_bytes": transferable.bytes_received - offset,
+        }
+    )
+
+    return sha1
+
+
+def get(transferable: models.IncomingTransferable) -> "hashlib._Hash":
+    """Get the SHA-1 of the data received so far for an IncomingTransferable.
+
+    Args:
+        transferable: the IncomingTransferable to get the SHA-1 of.
+
+    Returns:
+        A hashlib object that may be updated without altering the cached one.
+
+    Raises:
+        Sha1RecoveryError: when the SHA-1 is not cached and the data received since
+            the last checkpoint could not be read back.
+
+    """
+    with _lock:
+        entry = _entries.get(transferable.id)
+        if entry is not None and entry.bytes_received == transferable.bytes_received:
+            _entries.move_to_end(transferable.id)
+            return entry.sha1.copy()
+
+    return _recover(transferable)
+
+
+def put(transferable: models.IncomingTransferable, sha1: "hashlib._Hash") -> bool:
+    """Cache the SHA-1 of the data received so far for an IncomingTransferable.
+
+    Args:
+        transferable: the IncomingTransferable, with its amount of bytes received
+            updated.
+        sha1: the SHA-1 of the bytes received.
+
+    Returns:
+        Whether the state of the hashlib object should be saved as a checkpoint.
+
+    """
+    with _lock:
+        entry = _entries.pop(transferable.id, None)
+        ranges_since_checkpoint = (entry.ranges_since_checkpoint if entry is not None else 0) + 1
+        checkpoint = ranges_since_checkpoint >= settings.RECEIVER_SHA1_CHECKPOINT_INTERVAL
+
+        _entries[transferable.id] = _Entry(
+            sha1, transferable.bytes_received, 0 if checkpoint else ranges_since_checkpoint
+        )
+        while len(_entries) > settings.RECEIVER_SHA1_CACHE_SIZE:
+            _entries.popitem(last=False)
+
+    return checkpoint
+
+
+def discard(transferable: models.IncomingTransferable) -> None:
+    """Remove the SHA-1 of an IncomingTransferable no longer being received from the cache."""
+    with _lock:
+        _entries.pop(transferable.id, None)
+
+
+def checkpoint_all() -> None:
+    """Save the state of the cached hashlib objects changed since their last checkpoint."""
+    with _lock:
+        entries = [
+            (transferable_id, entry) for transferable_id, entry in _entries.items() if entry.ranges_since_checkpoint
+        ]
+        for _, entry in entries:
+            entry.ranges_since_checkpoint = 0
+
+    for transferable_id, entry in entries:
+        models.IncomingTransferable.objects.filter(
+            id=transferable_id,
+            state=models.IncomingTransferableState.ONGOING,
+            bytes_received=entry.bytes_received,
+        ).update(
+            rehash_intermediary=rehash.sha1_to_bytes(entry.sha1),
+            rehash_intermediary_offset=entry.bytes_received,
+        )
+
+    logger.info({LOG_KEY: "sha1_cache_checkpoint", "transferables": len(entries)})
+
+
+__all__ = ("Sha1RecoveryError", "get", "put", "discard", "checkpoint_all")
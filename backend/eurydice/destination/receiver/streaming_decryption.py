@@ -0,0 +1,199 @@
+"""Decryption of the encrypted IncomingTransferables as their ranges are ingested.
+
+The data of an encrypted Transferable is decrypted chunk by chunk as its ranges are
+ingested, to a file that atomically replaces the encrypted file once the Transferable
+is fully received. The encrypted file is still written, as the SHA-1 of the
+Transferable is computed on it and rebuilt from it (see sha1_cache).
+
+Like the SHA-1 of the Transferables, the secretstream states are only kept in memory,
+for the RECEIVER_SHA1_CACHE_SIZE Transferables ranges were most recently ingested
+for. When the state of a Transferable is lost, because it was evicted or the receiver
+was restarted, the Transferable is decrypted from its encrypted file once fully
+received instead.
+"""
+
+import collections
+import os
+import pathlib
+import threading
+
+from django.conf import settings
+
+from eurydice.common.logging.logger import LOG_KEY, logger
+from eurydice.destination.core import models
+from eurydice.destination.receiver.utils.decryption_tools import DecryptionTools
+from eurydice.destination.storage import fs
+
+
+class StreamingDecryptor:
+    """Decrypts the data of an encrypted IncomingTransferable as it is fed.
+
+    Complete chunks are decrypted and appended to the decrypted file right away, the
+    bytes of an incomplete chunk being kept until the rest of the chunk is fed.
+
+    Args:
+        transferable: the encrypted IncomingTransferable to decrypt.
+
+    Attributes:
+        bytes_consumed: the amount of encrypted bytes fed to the decryptor.
+
+    """
+
+    def __init__(self, transferable: models.IncomingTransferable) -> None:
+        self._tools = DecryptionTools(transferable)
+        self._path = fs.decrypted_path(transferable)
+        self._pending = bytearray()
+        self._chunks_left = self._tools.nb_chunks
+        self.bytes_consumed = 0
+
+        self._path.write_bytes(b"")
+
+    def _next_chunk_size(self) -> int:
+        return self._tools.last_chunk_size if self._chunks_left == 1 else self._tools.chunk_size
+
+    def feed(self, data: bytes) -> None:
+        """Decrypt the chunks completed by the given data.
+
+        The chunks are decrypted from slices of the data rather than from a buffer the
+        data is appended to, only the bytes of a chunk spanning several feeds being
+        kept until it is complete.
+        """
+        self.bytes_consumed += len(data)
+
+        offset = 0
+        with self._path.open("ab") as decrypted_file, memoryview(data) as view:
+            if self._pending and self._chunks_left:
+                # complete the chunk started by the previous data
+                offset = min(self._next_chunk_size() - len(self._pending), len(view))
+                self._pending += view[:offset]
+                if len(self._pending) < self._next_chunk_size():
+                    return
+
+                decrypted_file.write(self._tools.decrypt_chunk(bytes(self._pending)))
+                self._pending.clear()
+                self._chunks_left -= 1
+
+            while self._chunks_left and len(view) - offset >= (chunk_size := self._next_chunk_size()):
+                # PyNaCl only decrypts bytes
+                decrypted_file.write(self._tools.decrypt_chunk(bytes(view[offset : offset + chunk_size])))
+                offset += chunk_size
+                self._chunks_left -= 1
+
+            self._pending += view[offset:]
+
+    def finish(self, file_path: pathlib.Path) -> None:
+        """Replace the encrypted file with the decrypted one.
+
+        Args:
+            file_path: the path of the encrypted file.
+
+        Raises:
+            RuntimeError: if the data fed does not match the number and sizes of the
+                chunks of the Transferable.
+
+        """
+        if self._chunks_left:
+            raise RuntimeError(
+                "Encrypted file was fully read before decryption finished. Error in number or size of chunks."
+            )
+        if self._pending:
+            raise RuntimeError("Encrypted file size mismatches number and sizes of chunks. File isn't fully read")
+
+        os.replace(self._path, file_path)
+
+    def abort(self) -> None:
+        """Remove the data decrypted so far."""
+        self._path.unlink(missing_ok=True)
+
+
+_decryptors: collections.OrderedDict = collections.OrderedDict()
+_lock = threading.Lock()
+
+
+def _is_streamed(transferable: models.IncomingTransferable) -> bool:
+    return settings.RECEIVER_STREAMING_DECRYPTION and transferable.is_encrypted
+
+
+def feed(transferable: models.IncomingTransferable, data: bytes) -> None:
+    """Decrypt a range of an encrypted IncomingTransferable about to be ingested.
+
+    Nothing is done for Transferables that are not encrypted, and for those whose
+    decryption state was lost: they will be decrypted once fully received.
+
+    Args:
+        transferable: the IncomingTransferable, its amount of bytes received not yet
+            including the range.
+        data: the data of the range.
+
+    """
+    if not _is_streamed(transferable):
+        return
+
+    with _lock:
+        decryptor = _decryptors.pop(transferable.id, None)
+
+    if transferable.bytes_received == 0:
+        if decryptor is not None:
+            decryptor.abort()
+        decryptor = StreamingDecryptor(transferable)
+    elif decryptor is None or decryptor.bytes_consumed != transferable.bytes_received:
+        if decryptor is not None:
+            decryptor.abort()
+        return
+
+    decryptor.feed(data)
+
+    with _lock:
+        _decryptors[transferable.id] = decryptor
+        while len(_decryptors) > settings.RECEIVER_SHA1_CACHE_SIZE:
+            _, evicted = _decryptors.popitem(last=False)
+            evicted.abort()
+
+
+def finish(transferable: models.IncomingTransferable) -> bool:
+    """Replace the encrypted file of a fully received IncomingTransferable with its
+    decrypted data, if all of it was decrypted as it was ingested.
+
+    Args:
+        transferable: the fully received IncomingTransferable.
+
+    Returns:
+        Whether the file was replaced, or the Transferable is still to be decrypted.
+
+    Raises:
+        RuntimeError: if the data received does not match the number and sizes of
+            the chunks of the Transferable.
+
+    """
+    if not _is_streamed(transferable):
+        return False
+
+    with _lock:
+        decryptor = _decryptors.pop(transferable.id, None)
+
+    if decryptor is None or decryptor.bytes_consumed != transferable.bytes_received:
+        if decryptor is not None:
+            decryptor.abort()
+        logger.info(
+            {
+                LOG_KEY: "streaming_decryption_unavailable",
+                "transferable_id": str(transferable.id),
+                "message": "Decryption state lost during the ingestion, decrypting the whole file",
+            }
+        )
+        return False
+
+    decryptor.finish(fs.file_path(transferable))
+    return True
+
+
+def discard(transferable: models.IncomingTransferable) -> None:
+    """Drop the decryption state of an IncomingTransferable no longer being received."""
+    with _lock:
+        decryptor = _decryptors.pop(transferable.id, None)
+
+    if decryptor is not None:
+        decryptor.abort()
+
+
+__all__ = ("StreamingDecryptor", "feed", "finish", "discard")
@@ -1,4 +1,5 @@
 import hashlib
+import uuid
 from math import ceil
 from typing import NamedTuple
 
@@ -6,6 +7,7 @@ from django.db import transaction
 
 from eurydice.common.logging.logger import LOG_KEY, logger
 from eurydice.destination.core import models
+from eurydice.destination.receiver import sha1_cache, streaming_decryption
 from eurydice.destination.storage import fs
 from eurydice.destination.utils import rehash
 
@@ -20,11 +22,14 @@ class PendingIngestionData(NamedTuple):
             the Transferable.
         eof: boolean indicating whether or not the end of the Transferable has been
             reached (if false, additional data should come later).
+        chain_digest: chain digest of current data and all data previously ingested into
+            the Transferable, or None if unknown.
     """
 
     data: bytes
     sha1: "hashlib._Hash"
     eof: bool
+    chain_digest: bytes | None = None
 
 
 def _storage_exists(incoming_transferable: models.IncomingTransferable) -> bool:
@@ -60,9 +65,121 @@ def _store_range(
     logger.debug({LOG_KEY: "store_range", "status": "done"})
 
 
+class IngestionBatch:
+    """
+    Database changes made by the ingestion of the ranges of a packet, written at once
+    by `flush` instead of range by range.
+
+    The ranges of different Transferables may be ingested concurrently into the same
+    batch by several threads.
+
+    Attributes:
+        transferables: the IncomingTransferables the ranges of the packet belong to,
+            by ID, as fetched or created at once for the whole packet.
+    """
+
+    # the fields of an IncomingTransferable that ingesting a range may change
+    UPDATED_FIELDS = (
+        "bytes_received",
+        "rehash_intermediary",
+        "rehash_intermediary_offset",
+        "chain_digest",
+        "size",
+        "sha1",
+        "state",
+        "finished_at",
+        "user_provided_meta",
+    )
+
+    def __init__(self, transferables: dict[uuid.UUID, models.IncomingTransferable]) -> None:
+        self.transferables = transferables
+        # the amount of bytes received by the transferables as known to the database
+        self._bytes_received = {i: t.bytes_received for i, t in transferables.items()}
+        self._updated: dict[uuid.UUID, models.IncomingTransferable] = {}
+        self._parts: list[models.FileUploadPart] = []
+        self._finished: list[models.IncomingTransferable] = []
+        self._jobs: list[models.PostIngestionJob] = []
+
+    def updated(self, incoming_transferable: models.IncomingTransferable) -> None:
+        """Register an IncomingTransferable whose fields were changed."""
+        self._updated[incoming_transferable.id] = incoming_transferable
+
+    def add_part(self, incoming_transferable: models.IncomingTransferable, part_number: int) -> None:
+        """Register a FileUploadPart to create."""
+        self._parts.append(models.FileUploadPart(incoming_transferable=incoming_transferable, part_number=part_number))
+
+    def finished(self, incoming_transferable: models.IncomingTransferable) -> None:
+        """Register an IncomingTransferable fully received, whose FileUploadParts are
+        to be deleted.
+        """
+        self._finished.append(incoming_transferable)
+
+    def add_job(self, incoming_transferable: models.IncomingTransferable) -> None:
+        """Register a PostIngestionJob to create."""
+        self._jobs.append(models.PostIngestionJob(incoming_transferable=incoming_transferable))
+
+    def flush(self) -> None:
+        """Write the registered changes to the database in a single transaction.
+
+        If the changes cannot be written, the ingestion of the ranges of the packet is
+        aborted for the changed Transferables, so that their files and in-memory states
+        do not get ahead of the database.
+        """
+        if not self._updated and not self._parts:
+            return
+
+        try:
+            self._write()
+        except Exception:
+            self._abort()
+            raise
+
+        self._updated.clear()
+        self._parts.clear()
+        self._finished.clear()
+        self._jobs.clear()
+
+    def _write(self) -> None:
+        with transaction.atomic():
+            if self._updated:
+                models.IncomingTransferable.objects.bulk_update(self._updated.values(), fields=self.UPDATED_FIELDS)
+
+            # the parts of the transferables finished in the packet would be deleted
+            parts = [
+                p for p in self._parts if p.incoming_transferable.state == models.IncomingTransferableState.ONGOING
+            ]
+            if parts:
+                models.FileUploadPart.objects.bulk_create(parts)
+
+            if self._finished:
+                models.FileUploadPart.objects.filter(incoming_transferable__in=self._finished).delete()
+
+            if self._jobs:
+                models.PostIngestionJob.objects.bulk_create(self._jobs)
+
+    def _abort(self) -> None:
+        """Drop the data ingested into the changed Transferables since the batch was
+        created, along with their SHA-1 and decryption states.
+        """
+        for incoming_transferable in self._updated.values():
+            if _storage_exists(incoming_transferable):
+                fs.truncate(incoming_transferable, self._bytes_received[incoming_transferable.id])
+            sha1_cache.discard(incoming_transferable)
+            streaming_decryption.discard(incoming_transferable)
+
+        logger.error(
+            {
+                LOG_KEY: "ingestion_batch_aborted",
+                "transferables": len(self._updated),
+                "message": "Could not write the changes of the packet to the database, its ranges were dropped.",
+            }
+        )
+
+
 def _update_incoming_transferable(
     incoming_transferable: models.IncomingTransferable,
     to_ingest: PendingIngestionData,
+    save: bool = True,
 ) -> None:
     """
     Registers new data to the Transferable database entry, but does not send actual data
@@ -71,25 +188,41 @@ def _update_incoming_transferable(
     Args:
         incoming_transferable: Transferable to update.
         to_ingest: PendingIngestionData to ingest into the IncomingTransferable.
+        save: whether to save the changed fields or only edit the ORM instance.
     """
     incoming_transferable.bytes_received += len(to_ingest.data)
-    incoming_transferable.rehash_intermediary = rehash.sha1_to_bytes(to_ingest.sha1)
+    incoming_transferable.chain_digest = to_ingest.chain_digest
 
-    updated_fields = ["bytes_received", "rehash_intermediary"]
+    updated_fields = ["bytes_received", "chain_digest"]
 
     if to_ingest.eof:
+        sha1_cache.discard(incoming_transferable)
         incoming_transferable.size = incoming_transferable.bytes_received
         incoming_transferable.sha1 = to_ingest.sha1.digest()
 
-        incoming_transferable.mark_as_success(save=False)
-        updated_fields.extend(("size", "state", "finished_at", "sha1"))
+        updated_fields.extend(("size", "sha1"))
+
+        # encrypted transferables are marked as SUCCESS once decrypted
+        if not incoming_transferable.is_encrypted:
+            incoming_transferable.mark_as_success(save=False)
+            updated_fields.extend(("state", "finished_at"))
+    elif sha1_cache.put(incoming_transferable, to_ingest.sha1):
+        incoming_transferable.rehash_intermediary = rehash.sha1_to_bytes(to_ingest.sha1)
+        incoming_transferable.rehash_intermediary_offset = incoming_transferable.bytes_received
+        updated_fields.extend(("rehash_intermediary", "rehash_intermediary_offset"))
 
-    incoming_transferable.save(update_fields=updated_fields)
+    if save:
+        incoming_transferable.save(update_fields=updated_fields)
+
+
+def _part_number(incoming_transferable: models.IncomingTransferable, to_ingest: PendingIngestionData) -> int:
+    return ceil(incoming_transferable.bytes_received // len(to_ingest.data))
 
 
 def ingest(
     incoming_transferable: models.IncomingTransferable,
     to_ingest: PendingIngestionData,
+    batch: IngestionBatch | None = None,
 ) -> None:
     """
     Add data to the given Transferable.
@@ -97,10 +230,26 @@ def ingest(
     Args:
         incoming_transferable: Transferable to add data to.
         to_ingest: PendingIngestionData to ingest into the IncomingTransferable.
+        batch: if given, the database changes are registered in the batch instead
+            of being saved right away.
     """
     if not _storage_exists(incoming_transferable):
         _create_storage_file(incoming_transferable)
 
+    streaming_decryption.feed(incoming_transferable, to_ingest.data)
+
+    if batch is not None:
+        _update_incoming_transferable(incoming_transferable, to_ingest, save=False)
+        _store_range(incoming_transferable, to_ingest.data)
+        batch.updated(incoming_transferable)
+
+        if not to_ingest.eof:
+            batch.add_part(incoming_transferable, _part_number(incoming_transferable, to_ingest))
+        else:
+            batch.finished(incoming_transferable)
+
+        return
+
     with transaction.atomic():
         _update_incoming_transferable(incoming_transferable, to_ingest)
         _store_range(incoming_transferable, to_ingest.data)
@@ -115,10 +264,9 @@ def ingest(
                     "message": "Create FileUploadPart object in database.",
                 }
             )
-            part_number = ceil(incoming_transferable.bytes_received // len(to_ingest.data))
             models.FileUploadPart.objects.create(
                 incoming_transferable=incoming_transferable,
-                part_number=part_number,
+                part_number=_part_number(incoming_transferable, to_ingest),
             )
         else:
             incoming_transferable._clear_multipart_data()
@@ -128,6 +276,25 @@ def ingest(
         pass
 
 
+def enqueue_post_ingestion(
+    incoming_transferable: models.IncomingTransferable,
+    batch: IngestionBatch | None = None,
+) -> None:
+    """
+    Leave the decryption of a fully received Transferable to the post-ingestion
+    workers, which will mark it as SUCCESS once done.
+
+    Args:
+        incoming_transferable: Transferable to decrypt.
+        batch: if given, the PostIngestionJob is registered in the batch instead of
+            being saved right away.
+    """
+    if batch is not None:
+        batch.add_job(incoming_transferable)
+    else:
+        models.PostIngestionJob.objects.create(incoming_transferable=incoming_transferable)
+
+
 def abort_ingestion(failed_transferable: models.IncomingTransferable) -> None:
     """
     Abort a Transferable ingestion. This will mark the Transferable as ERROR, and
@@ -137,9 +304,11 @@ def abort_ingestion(failed_transferable: models.IncomingTransferable) -> None:
         failed_transferable: Transferable that failed (its data will be deleted).
     """
     fs.delete(failed_transferable)
+    sha1_cache.discard(failed_transferable)
+    streaming_decryption.discard(failed_transferable)
     failed_transferable.bytes_received = 0
 
     failed_transferable.mark_as_error()
 
 
-__all__ = ["PendingIngestionData", "ingest", "abort_ingestion"]
+__all__ = ["PendingIngestionData", "IngestionBatch", "ingest", "enqueue_post_ingestion", "abort_ingestion"]
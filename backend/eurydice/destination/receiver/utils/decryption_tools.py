@@ -1,4 +1,6 @@
 import logging
+import os
+from pathlib import Path
 
 import nacl.bindings
 
@@ -59,6 +61,45 @@ class DecryptionTools:
         )
 
 
+def decrypt_file(incoming_transferable: IncomingTransferable, file_path: Path, decrypted_file_path: Path) -> None:
+    """Decrypt the file of a fully received IncomingTransferable, replacing it with its
+    decrypted data.
+
+    Args:
+        incoming_transferable: the IncomingTransferable the file belongs to.
+        file_path: the path of the encrypted file.
+        decrypted_file_path: the path of the file to decrypt the data to.
+
+    Raises:
+        RuntimeError: if the file does not match the number and sizes of the chunks
+            of the IncomingTransferable.
+
+    """
+    decrypt_tools = DecryptionTools(incoming_transferable)
+    chunk_size = decrypt_tools.chunk_size
+    with (
+        open(file_path, "rb") as encrypted_transferable_file,
+        open(decrypted_file_path, "wb") as decrypted_transferable_file,
+    ):
+        for chunk_i in range(decrypt_tools.nb_chunks):
+            if chunk_i == decrypt_tools.nb_chunks - 1:
+                chunk_size = decrypt_tools.last_chunk_size
+            chunk = encrypted_transferable_file.read(chunk_size)
+            if len(chunk) != chunk_size:
+                raise RuntimeError(
+                    "Encrypted file was fully read before decryption finished. Error in number or size of chunks."
+                )
+            decrypted_chunk = decrypt_tools.decrypt_chunk(chunk)
+            decrypted_transferable_file.write(decrypted_chunk)
+
+        # Verify if stream is empty now
+        if not encrypted_transferable_file.read(chunk_size) == b"":
+            raise RuntimeError("Encrypted file size mismatches number and sizes of chunks. File isn't fully read")
+
+    # Replace file with unencrypted file
+    os.replace(decrypted_file_path, file_path)
+
+
 class InvalidKey(RuntimeError):
     """Whenever a symmetric or asymmetric key is wrong"""
 
@@ -1,3 +1,5 @@
+import os
+import shutil
 from pathlib import Path
 
 from django.conf import settings
@@ -12,12 +14,30 @@ def file_path(transferable: IncomingTransferable) -> Path:
     return Path(settings.TRANSFERABLE_STORAGE_DIR) / str(transferable.id)
 
 
+def stash_path(transferable: IncomingTransferable) -> Path:
+    """
+    Returns the path of the directory holding the ranges received out of order for
+    a given transferable.
+    """
+    return Path(settings.TRANSFERABLE_STORAGE_DIR) / f"{transferable.id}.stash"
+
+
+def decrypted_path(transferable: IncomingTransferable) -> Path:
+    """
+    Returns the path of the file the data of a given encrypted transferable is
+    decrypted to, before it replaces the encrypted file.
+    """
+    return Path(settings.TRANSFERABLE_STORAGE_DIR) / f"{transferable.id}.decrypted"
+
+
 def delete(transferable: IncomingTransferable) -> None:
     """
     Deletes data from the filesystem for a given transferable range.
     """
     path = file_path(transferable)
     path.unlink(missing_ok=True)
+    decrypted_path(transferable).unlink(missing_ok=True)
+    shutil.rmtree(stash_path(transferable), ignore_errors=True)
 
 
 def write_bytes(transferable: IncomingTransferable, data: bytes) -> None:
@@ -37,9 +57,27 @@ def append_bytes(transferable: IncomingTransferable, data: bytes) -> None:
         file.write(data)
 
 
+def truncate(transferable: IncomingTransferable, size: int) -> None:
+    """
+    Truncates the file of a given transferable to the given size.
+    """
+    path = file_path(transferable)
+    os.truncate(path, size)
+
+
 def read_bytes(transferable: IncomingTransferable) -> bytes:
     """
     Reads data from the filesystem for a given transferable range.
     """
     path = file_path(transferable)
     return path.read_bytes()
+
+
+def read_bytes_at(transferable: IncomingTransferable, offset: int, size: int) -> bytes:
+    """
+    Reads `size` bytes starting at `offset` from the filesystem for a given transferable.
+    """
+    path = file_path(transferable)
+    with open(path, "rb") as file:
+        file.seek(offset)
+        return file.read(size)
@@ -17,7 +17,7 @@ from rest_framework import request as drf_request
 from rest_framework import response as drf_response
 from rest_framework.parsers import MultiPartParser
 
-from eurydice.common import enums
+from eurydice.common import checksum, enums
 from eurydice.common.api import pagination, permissions
 from eurydice.common.logging.logger import LOG_KEY, logger
 from eurydice.common.models.user import AbstractUser
@@ -75,7 +75,9 @@ def _store_transferable_range(
     if not _storage_exists(transferable_range):
         __create_storage_folder(transferable_range)
 
-    fs.append_bytes(transferable_range, file_obj.read(settings.ORIGIN_CHUNK_SIZE))
+    data = file_obj.read(settings.ORIGIN_CHUNK_SIZE)
+    fs.append_bytes(transferable_range, data)
+    transferable_range.checksum = checksum.compute(data)
     transferable_range.size = stream_partition.bytes_read
     transferable.bytes_received += transferable_range.size
     transferable.save(update_fields=["bytes_received", "size"])
@@ -59,15 +59,38 @@ env = environ.Env(
     TRANSFERABLE_HISTORY_DURATION=(str, "5h"),
     TRANSFERABLE_HISTORY_SEND_EVERY=(str, "5min"),
     PACKET_SENDER_QUEUE_SIZE=(int, 1),
+    SENDER_PREFETCH_WORKERS=(int, 4),
     MAX_TRANSFERABLES_PER_PACKET=(int, 800),
     HEARTBEAT_SEND_EVERY=(str, "2min"),
     FILE_REMOVER_EXPIRE_TRANSFERABLES_AFTER=(str, "1day"),
     FILE_REMOVER_RUN_EVERY=(str, "1h"),
     FILE_REMOVER_POLL_EVERY=(str, "200ms"),
     SENDER_POLL_DATABASE_EVERY=(str, "0.1s"),
+    SENDER_DATABASE_NOTIFICATIONS=(bool, False),
+    SENDER_DATABASE_NOTIFICATIONS_TIMEOUT=(str, "10s"),
     SENDER_RANGE_FILLER_CLASS=(str, "UserRotatingTransferableRangeFiller"),
+    SENDER_DRR_QUANTUM=(str, "10MB"),
+    SENDER_EXPRESS_LANE_MAX_SIZE=(str, "10MB"),
+    SENDER_EXPRESS_LANE_SHARE=(float, 0.2),
     LIDIS_HOST=(str, None),
     LIDIS_PORT=(int, None),
+    LIDIS_ENDPOINTS=(list, []),
+    SENDER_WIRE_FORMAT=(str, "msgpack"),
+    SENDER_PERSISTENT_CONNECTION=(bool, False),
+    SENDER_RECONNECT_ATTEMPTS=(int, 5),
+    SENDER_RECONNECT_BACKOFF=(str, "500ms"),
+    SENDER_RECONNECT_BACKOFF_MAX=(str, "30s"),
+    SENDER_SOCKET_SEND_BUFFER_SIZE=(str, None),
+    SENDER_TCP_NODELAY=(bool, False),
+    SENDER_TCP_CORK=(bool, False),
+    SENDER_SENDFILE=(bool, False),
+    SENDER_SENDFILE_MIN_SIZE=(str, "16MB"),
+    SENDER_RATE_LIMIT=(str, None),
+    SENDER_RATE_LIMIT_BURST=(str, "4MB"),
+    TRANSFERABLE_RANGE_COMPRESSION=(str, None),
+    TRANSFERABLE_CHAIN_DIGEST=(bool, True),
+    TRANSFERABLE_PARITY_GROUP_SIZE=(int, 0),
+    TRANSFERABLE_PARITY_MAX_OPEN_GROUPS=(int, 16),
     DBTRIMMER_TRIM_TRANSFERABLES_AFTER=(str, "1day"),
     DBTRIMMER_RUN_EVERY=(str, "6h"),
     DBTRIMMER_POLL_EVERY=(str, "200ms"),
@@ -160,15 +183,37 @@ FILE_REMOVER_POLL_EVERY = datetime.timedelta(seconds=humanfriendly.parse_timespa
 # Time to wait after having generated all packets
 SENDER_POLL_DATABASE_EVERY = humanfriendly.parse_timespan(env("SENDER_POLL_DATABASE_EVERY"))
 
+# Whether the idle sender waits for the database to notify it of new
+# TransferableRanges, TransferableRevocations or maintenance mode changes, instead of
+# polling it every SENDER_POLL_DATABASE_EVERY. The sender still wakes up at least
+# every SENDER_DATABASE_NOTIFICATIONS_TIMEOUT (in seconds), e.g. to send histories.
+SENDER_DATABASE_NOTIFICATIONS = env("SENDER_DATABASE_NOTIFICATIONS")
+SENDER_DATABASE_NOTIFICATIONS_TIMEOUT = humanfriendly.parse_timespan(env("SENDER_DATABASE_NOTIFICATIONS_TIMEOUT"))
+
 # The class used for implementing TransferableFiller in OnTheWirePacket generator.
 SENDER_RANGE_FILLER_CLASS = env("SENDER_RANGE_FILLER_CLASS")
 
+# The amount of bytes users are credited with at each of their turns, times their
+# priority plus one, with the DeficitRoundRobinTransferableRangeFiller.
+SENDER_DRR_QUANTUM = humanfriendly.parse_size(env("SENDER_DRR_QUANTUM"), binary=False)
+
+# With the ExpressLaneTransferableRangeFiller, the size up to which Transferables are
+# sent through the express lane, and the share of TRANSFERABLE_RANGE_SIZE reserved
+# to this lane in each packet.
+SENDER_EXPRESS_LANE_MAX_SIZE = humanfriendly.parse_size(env("SENDER_EXPRESS_LANE_MAX_SIZE"), binary=False)
+SENDER_EXPRESS_LANE_SHARE = env("SENDER_EXPRESS_LANE_SHARE")
+
 # The sending frequency of an empty heartbeat packet in seconds (if there is no data to send).
 HEARTBEAT_SEND_EVERY = humanfriendly.parse_timespan(env("HEARTBEAT_SEND_EVERY"))
 
 # How many packets can be waiting for being sent by the PacketSender.
 PACKET_SENDER_QUEUE_SIZE = env("PACKET_SENDER_QUEUE_SIZE")
 
+# The number of threads reading the data of the TransferableRanges of the packet
+# being generated from the filesystem, and compressing them, concurrently. Packets
+# are generated while the previous ones are being sent.
+SENDER_PREFETCH_WORKERS = env("SENDER_PREFETCH_WORKERS")
+
 # How many transferables can coexist in an OnTheWirePacket. Overestimating this value
 # can slightly slow down the sender, underestimating this value can disadvantage
 # users who send large quantities of small files.
@@ -180,6 +225,82 @@ LIDIS_HOST = env.str("LIDIS_HOST")
 # Lidi sender service port.
 LIDIS_PORT = env.int("LIDIS_PORT")
 
+# The "host:port" addresses of several Lidi sender services, one per diode link, to
+# send packets through in parallel. Overrides LIDIS_HOST and LIDIS_PORT when set.
+LIDIS_ENDPOINTS = [(host, int(port)) for host, _, port in (e.rpartition(":") for e in env("LIDIS_ENDPOINTS"))]
+
+# The wire format in which OnTheWirePackets are serialized by the sender: either
+# "msgpack" (pydantic models serialized with MessagePack) or "framed" (faster
+# hand-written codec, see eurydice.common.codec). The receiver detects the format
+# of each packet it receives, but only accepts the "framed" schema version of its own
+# release: the destination must be upgraded along with the origin.
+SENDER_WIRE_FORMAT = env("SENDER_WIRE_FORMAT")
+
+# Whether the sender keeps a single connection to the Lidi sender service open and
+# writes packets one after the other on it, instead of opening a new connection for
+# every packet. Requires RECEIVER_STREAMING_DECODE to be enabled on the destination.
+SENDER_PERSISTENT_CONNECTION = env("SENDER_PERSISTENT_CONNECTION")
+
+# How many times the sender reconnects to the Lidi sender service to send a packet
+# before giving up on it, when using a persistent connection. The delay before
+# reconnecting starts at SENDER_RECONNECT_BACKOFF (in seconds) and doubles after each
+# failed attempt, up to SENDER_RECONNECT_BACKOFF_MAX.
+SENDER_RECONNECT_ATTEMPTS = env("SENDER_RECONNECT_ATTEMPTS")
+SENDER_RECONNECT_BACKOFF = humanfriendly.parse_timespan(env("SENDER_RECONNECT_BACKOFF"))
+SENDER_RECONNECT_BACKOFF_MAX = humanfriendly.parse_timespan(env("SENDER_RECONNECT_BACKOFF_MAX"))
+
+# The size of the send buffer of the socket to the Lidi sender service (SO_SNDBUF),
+# left to the operating system if unset.
+SENDER_SOCKET_SEND_BUFFER_SIZE = (
+    humanfriendly.parse_size(env("SENDER_SOCKET_SEND_BUFFER_SIZE"), binary=False)
+    if env("SENDER_SOCKET_SEND_BUFFER_SIZE")
+    else None
+)
+
+# Socket options of the connection to the Lidi sender service: TCP_NODELAY disables
+# Nagle's algorithm, TCP_CORK (Linux only) holds partial segments while a packet is
+# written and flushes them at the end of each packet.
+SENDER_TCP_NODELAY = env("SENDER_TCP_NODELAY")
+SENDER_TCP_CORK = env("SENDER_TCP_CORK")
+
+# Whether the data of the TransferableRanges of at least SENDER_SENDFILE_MIN_SIZE
+# bytes are mapped in memory instead of being read, and written to the connection to
+# the Lidi sender service with sendfile when they are sent unchanged, without going
+# through Python memory. Requires the "framed" SENDER_WIRE_FORMAT. Each of these
+# ranges holds an open file until its packet is sent.
+SENDER_SENDFILE = env("SENDER_SENDFILE")
+SENDER_SENDFILE_MIN_SIZE = humanfriendly.parse_size(env("SENDER_SENDFILE_MIN_SIZE"), binary=False)
+
+# The maximum rate in bytes per second at which packets are written to the Lidi sender
+# service, which should match the capacity of the diode link, unlimited if unset.
+# Writes are paced with a token bucket holding up to SENDER_RATE_LIMIT_BURST bytes.
+SENDER_RATE_LIMIT = (
+    humanfriendly.parse_size(env("SENDER_RATE_LIMIT"), binary=False) if env("SENDER_RATE_LIMIT") else None
+)
+SENDER_RATE_LIMIT_BURST = humanfriendly.parse_size(env("SENDER_RATE_LIMIT_BURST"), binary=False)
+
+# The algorithm used to compress the data of TransferableRanges before sending them,
+# only `zlib` is supported. Data is sent uncompressed if unset, if it comes from an
+# encrypted upload, or if a sample of it does not compress well.
+TRANSFERABLE_RANGE_COMPRESSION = env("TRANSFERABLE_RANGE_COMPRESSION")
+
+# Whether the checksums of the TransferableRanges of a Transferable are combined into
+# a chain digest sent along with its last range, in addition to its SHA-1. Unlike the
+# SHA-1, the chain digest can be computed by several threads hashing ranges in parallel.
+TRANSFERABLE_CHAIN_DIGEST = env("TRANSFERABLE_CHAIN_DIGEST")
+
+# The number of consecutive TransferableRanges of a Transferable covered by a single
+# XOR parity range, which allows the destination to rebuild one lost range in each
+# group. The bandwidth overhead is 1 / TRANSFERABLE_PARITY_GROUP_SIZE. Forward error
+# correction is disabled when set to 0.
+TRANSFERABLE_PARITY_GROUP_SIZE = env("TRANSFERABLE_PARITY_GROUP_SIZE")
+
+# The maximum number of Transferables whose parity is being computed at once, each of
+# them holding a buffer the size of a TransferableRange. When a range of another
+# Transferable is sent, the parity of the oldest group is sent early, covering fewer
+# ranges.
+TRANSFERABLE_PARITY_MAX_OPEN_GROUPS = env("TRANSFERABLE_PARITY_MAX_OPEN_GROUPS")
+
 
 # The duration after which transferables are deleted from the database.
 DBTRIMMER_TRIM_TRANSFERABLES_AFTER = datetime.timedelta(
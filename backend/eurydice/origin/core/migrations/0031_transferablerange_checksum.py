@@ -0,0 +1,20 @@
+# Generated by Django 5.2.9 on 2026-10-18 02:59
+
+import django.core.validators
+import eurydice.common.models.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eurydice_origin_core', '0030_alter_transferablerevocation_reason'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transferablerange',
+            name='checksum',
+            field=eurydice.common.models.fields.RangeChecksumField(default=None, help_text='The checksum of the data of this TransferableRange', max_length=16, null=True, validators=[django.core.validators.MinLengthValidator(16)], verbose_name='Checksum'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from pathlib import Path
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eurydice_origin_core', '0031_transferablerange_checksum'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            Path(
+                "eurydice/origin/core/migrations/triggers/0032/transferable_range_update.sql",
+            ).read_text("utf-8"),
+            reverse_sql=Path(
+                "eurydice/origin/core/migrations/triggers/0022/transferable_range_update.sql",
+            ).read_text("utf-8"),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from pathlib import Path
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eurydice_origin_core', '0032_transferable_range_update_statement_trigger'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            Path(
+                "eurydice/origin/core/migrations/triggers/0033/sender_notifications.sql",
+            ).read_text("utf-8"),
+            reverse_sql=Path(
+                "eurydice/origin/core/migrations/triggers/0033/remove_sender_notifications.sql",
+            ).read_text("utf-8"),
+        ),
+    ]
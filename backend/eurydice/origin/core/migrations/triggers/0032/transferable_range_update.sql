@@ -0,0 +1,81 @@
+CREATE OR REPLACE FUNCTION trigger_on_range_update ()
+    RETURNS TRIGGER
+    AS $$
+BEGIN
+    --
+    -- Update 'auto_' fields in the OutgoingTransferables associated to
+    -- updated TransferableRanges
+    --
+    -- This trigger runs once per UPDATE statement, so that the ranges updated
+    -- together (e.g. all the ranges of a packet) result in a single UPDATE of each
+    -- associated OutgoingTransferable
+    --
+    -- Below are strict rules about when a TransferableRange is allowed to change ;
+    -- these rules were made so that the code below does not have to handle subtle cases
+    -- such as updating the size of an already TRANSFERRED range, or the finished_at
+    -- field of a range already in a final state
+    IF EXISTS (
+        SELECT
+            1
+        FROM
+            old_ranges
+            JOIN new_ranges ON new_ranges.id = old_ranges.id
+        WHERE
+            old_ranges.outgoing_transferable_id != new_ranges.outgoing_transferable_id) THEN
+        RAISE EXCEPTION 'TransferableRanges should not change their associated OutgoingTransferable';
+    END IF;
+    IF EXISTS (
+        SELECT
+            1
+        FROM
+            old_ranges
+        WHERE
+            transfer_state != 'PENDING') THEN
+        RAISE EXCEPTION 'TransferableRanges should not change if they are not PENDING';
+    END IF;
+    IF EXISTS (
+        SELECT
+            1
+        FROM
+            new_ranges
+        WHERE
+            transfer_state = 'PENDING') THEN
+        RAISE EXCEPTION 'TransferableRanges should not change if their state does not change';
+    END IF;
+    UPDATE
+        eurydice_outgoing_transferables
+    SET
+        auto_bytes_transferred = auto_bytes_transferred + finished_ranges.bytes_transferred,
+        auto_pending_ranges_count = auto_pending_ranges_count - finished_ranges.finished_count,
+        auto_transferred_ranges_count = auto_transferred_ranges_count + finished_ranges.transferred_count,
+        auto_error_ranges_count = auto_error_ranges_count + finished_ranges.error_count,
+        auto_canceled_ranges_count = auto_canceled_ranges_count + finished_ranges.canceled_count,
+        auto_last_range_finished_at = finished_ranges.last_finished_at,
+        auto_state_updated_at = finished_ranges.last_finished_at
+    FROM (
+        SELECT
+            outgoing_transferable_id,
+            COALESCE(SUM(size) FILTER (WHERE transfer_state = 'TRANSFERRED'), 0) AS bytes_transferred,
+            COUNT(*) AS finished_count,
+            COUNT(*) FILTER (WHERE transfer_state = 'TRANSFERRED') AS transferred_count,
+            COUNT(*) FILTER (WHERE transfer_state = 'ERROR') AS error_count,
+            COUNT(*) FILTER (WHERE transfer_state = 'CANCELED') AS canceled_count,
+            MAX(finished_at) AS last_finished_at
+        FROM
+            new_ranges
+        GROUP BY
+            outgoing_transferable_id) AS finished_ranges
+    WHERE
+        eurydice_outgoing_transferables.id = finished_ranges.outgoing_transferable_id;
+    RETURN NULL;
+END;
+$$
+LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS on_range_update ON eurydice_transferable_ranges;
+
+CREATE TRIGGER on_range_update
+    AFTER UPDATE ON eurydice_transferable_ranges
+    REFERENCING OLD TABLE AS old_ranges NEW TABLE AS new_ranges
+    FOR EACH STATEMENT
+    EXECUTE PROCEDURE trigger_on_range_update ();
@@ -0,0 +1,7 @@
+DROP TRIGGER notify_sender_on_range_insert ON eurydice_transferable_ranges;
+
+DROP TRIGGER notify_sender_on_revocation_insert ON eurydice_transferable_revocations;
+
+DROP TRIGGER notify_sender_on_maintenance_change ON eurydice_maintenance;
+
+DROP FUNCTION trigger_notify_sender ();
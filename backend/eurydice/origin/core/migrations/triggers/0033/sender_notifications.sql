@@ -0,0 +1,36 @@
+CREATE OR REPLACE FUNCTION trigger_notify_sender ()
+    RETURNS TRIGGER
+    AS $$
+BEGIN
+    --
+    -- Wake up the sender waiting on the 'eurydice_sender' channel, as there may be
+    -- something new to send (notifications are only delivered on commit, and
+    -- identical notifications of a transaction are delivered once)
+    --
+    PERFORM
+        pg_notify('eurydice_sender', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$
+LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS notify_sender_on_range_insert ON eurydice_transferable_ranges;
+
+CREATE TRIGGER notify_sender_on_range_insert
+    AFTER INSERT ON eurydice_transferable_ranges
+    FOR EACH STATEMENT
+    EXECUTE PROCEDURE trigger_notify_sender ();
+
+DROP TRIGGER IF EXISTS notify_sender_on_revocation_insert ON eurydice_transferable_revocations;
+
+CREATE TRIGGER notify_sender_on_revocation_insert
+    AFTER INSERT ON eurydice_transferable_revocations
+    FOR EACH STATEMENT
+    EXECUTE PROCEDURE trigger_notify_sender ();
+
+DROP TRIGGER IF EXISTS notify_sender_on_maintenance_change ON eurydice_maintenance;
+
+CREATE TRIGGER notify_sender_on_maintenance_change
+    AFTER INSERT OR UPDATE ON eurydice_maintenance
+    FOR EACH STATEMENT
+    EXECUTE PROCEDURE trigger_notify_sender ();
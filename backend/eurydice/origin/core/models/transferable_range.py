@@ -11,11 +11,31 @@ import eurydice.common.models as common_models
 from eurydice.origin.core import enums
 
 
+class TransferableRangeQuerySet(models.QuerySet):
+    def mark_as_transferred(self) -> int:
+        """Mark the TransferableRanges as TRANSFERRED in the DB and set their finish
+        date to now, with a single UPDATE query.
+
+        The auto-fields of the associated OutgoingTransferables are then updated once
+        per OutgoingTransferable, rather than once per TransferableRange.
+
+        Returns:
+            The number of TransferableRanges marked as TRANSFERRED.
+
+        """
+        return self.update(
+            transfer_state=enums.TransferableRangeTransferState.TRANSFERRED,
+            finished_at=timezone.now(),
+        )
+
+
 class TransferableRange(common_models.AbstractBaseModel):
     """A fragment of an OutgoingTransferable i.e. a chunk of a file submitted by
     a user.
     """
 
+    objects = TransferableRangeQuerySet.as_manager()
+
     byte_offset: models.PositiveBigIntegerField = models.PositiveBigIntegerField(
         validators=(validators.MaxValueValidator(settings.TRANSFERABLE_MAX_SIZE),),
         verbose_name=_("Byte offset"),
@@ -26,6 +46,12 @@ class TransferableRange(common_models.AbstractBaseModel):
         verbose_name=_("Size in bytes"),
         help_text=_("The size in bytes of this TransferableRange"),
     )
+    checksum = common_models.RangeChecksumField(
+        verbose_name=_("Checksum"),
+        help_text=_("The checksum of the data of this TransferableRange"),
+        null=True,
+        default=None,
+    )
     transfer_state: models.CharField = models.CharField(
         max_length=11,
         choices=enums.TransferableRangeTransferState.choices,
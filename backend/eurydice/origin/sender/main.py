@@ -10,7 +10,7 @@ from eurydice.common import protocol
 from eurydice.common.logging.logger import LOG_KEY, logger
 from eurydice.common.utils import signals
 from eurydice.origin.core.models import LastPacketSentAt
-from eurydice.origin.sender import packet_generator, packet_sender
+from eurydice.origin.sender import notifications, packet_generator, packet_sender
 
 
 def _log_packet_stats(packet: protocol.OnTheWirePacket) -> None:
@@ -42,6 +42,31 @@ def _heartbeat_should_be_sent(last_packet_sent_at: datetime.datetime | None) ->
     return timezone.now() >= last_packet_sent_at + datetime.timedelta(seconds=settings.HEARTBEAT_SEND_EVERY)
 
 
+def _wait_for_new_data(
+    listener: notifications.DatabaseNotificationListener | None,
+    last_packet_sent_at: datetime.datetime | None,
+) -> None:
+    """
+    Wait before generating the next packet, when there was nothing to send
+
+    Args:
+        listener: the listener to wait for database notifications with, or None
+            to simply wait SENDER_POLL_DATABASE_EVERY
+        last_packet_sent_at: datetime at which last packet was sent
+    """
+    if listener is None:
+        time.sleep(settings.SENDER_POLL_DATABASE_EVERY)
+        return
+
+    timeout = settings.SENDER_DATABASE_NOTIFICATIONS_TIMEOUT
+    if last_packet_sent_at is not None:
+        # wake up in time for the next heartbeat
+        next_heartbeat_at = last_packet_sent_at + datetime.timedelta(seconds=settings.HEARTBEAT_SEND_EVERY)
+        timeout = min(timeout, (next_heartbeat_at - timezone.now()).total_seconds())
+
+    listener.wait(max(timeout, 0))
+
+
 def _loop() -> None:
     """
     Loop indefinitely until interrupted, sending packets as they become available
@@ -53,6 +78,11 @@ def _loop() -> None:
     generator = packet_generator.OnTheWirePacketGenerator()
     keep_running = signals.BooleanCondition()
 
+    listener = None
+    if settings.SENDER_DATABASE_NOTIFICATIONS:
+        listener = notifications.DatabaseNotificationListener()
+        listener.listen()
+
     with packet_sender.PacketSender() as sender:
         logger.info({LOG_KEY: "sender_ready", "message": "Ready to send OnTheWirePackets"})
 
@@ -64,7 +94,7 @@ def _loop() -> None:
                 LastPacketSentAt.update()
                 _log_packet_stats(packet)
             else:
-                time.sleep(settings.SENDER_POLL_DATABASE_EVERY)
+                _wait_for_new_data(listener, sender.last_packet_sent_at)
 
 
 def run() -> None:  # pragma: no cover
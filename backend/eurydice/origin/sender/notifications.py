@@ -0,0 +1,61 @@
+"""Wake-ups of the sender on PostgreSQL notifications.
+
+Database triggers notify the `eurydice_sender` channel whenever TransferableRanges or
+TransferableRevocations are inserted and whenever the maintenance mode changes, so
+that an idle sender can wait for something new to send instead of polling the
+database.
+"""
+
+import select
+
+from django.db import connection
+
+CHANNEL = "eurydice_sender"
+
+
+class DatabaseNotificationListener:
+    """Listen to the sender channel through the database connection of the current
+    thread, which keeps being used for regular queries.
+    """
+
+    def __init__(self) -> None:
+        self._listening_connection = None
+
+    def listen(self) -> None:
+        """Start listening to the sender channel, unless already listening on the
+        current database connection.
+        """
+        connection.ensure_connection()
+
+        if self._listening_connection is not connection.connection:
+            with connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            self._listening_connection = connection.connection
+
+    def wait(self, timeout: float) -> bool:
+        """Wait for a notification on the sender channel.
+
+        Notifications received since the previous call, including those received
+        while running other queries, are consumed at once.
+
+        Args:
+            timeout: the maximum time to wait for, in seconds.
+
+        Returns:
+            True if a notification was received, False if the wait timed out.
+
+        """
+        self.listen()
+        raw_connection = connection.connection
+
+        if not raw_connection.notifies:
+            readable, _, _ = select.select([raw_connection], [], [], timeout)
+            if readable:
+                raw_connection.poll()
+
+        notified = bool(raw_connection.notifies)
+        raw_connection.notifies.clear()
+        return notified
+
+
+__all__ = ("CHANNEL", "DatabaseNotificationListener")
@@ -1,10 +1,19 @@
 from .history import OngoingHistoryFiller
-from .transferable_range import FIFOTransferableRangeFiller, UserRotatingTransferableRangeFiller
+from .transferable_parity import TransferableParityFiller
+from .transferable_range import (
+    DeficitRoundRobinTransferableRangeFiller,
+    ExpressLaneTransferableRangeFiller,
+    FIFOTransferableRangeFiller,
+    UserRotatingTransferableRangeFiller,
+)
 from .transferable_revocation import TransferableRevocationFiller
 
 __all__ = (
+    "DeficitRoundRobinTransferableRangeFiller",
+    "ExpressLaneTransferableRangeFiller",
     "FIFOTransferableRangeFiller",
     "UserRotatingTransferableRangeFiller",
     "TransferableRevocationFiller",
     "OngoingHistoryFiller",
+    "TransferableParityFiller",
 )
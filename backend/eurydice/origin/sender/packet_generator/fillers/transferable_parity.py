@@ -0,0 +1,158 @@
+import dataclasses
+import uuid
+
+from django.conf import settings
+
+import eurydice.common.protocol as protocol
+from eurydice.common import compression, parity
+from eurydice.common.logging.logger import LOG_KEY, logger
+from eurydice.origin.sender.packet_generator.fillers import base
+
+
+@dataclasses.dataclass
+class _ParityGroup:
+    """The consecutive TransferableRanges of a Transferable covered by the parity
+    being computed.
+    """
+
+    transferable: protocol.Transferable
+    ranges: list[protocol.ProtectedRange] = dataclasses.field(default_factory=list)
+    accumulator: parity.ParityAccumulator = dataclasses.field(default_factory=parity.ParityAccumulator)
+    user_provided_meta: dict[str, str] | None = None
+    is_last: bool = False
+
+    def add(self, transferable_range: protocol.TransferableRange, data: bytes | memoryview) -> None:
+        if not self.ranges:
+            self.user_provided_meta = transferable_range.transferable.user_provided_meta
+        self.ranges.append(protocol.ProtectedRange(byte_offset=transferable_range.byte_offset, size=len(data)))
+        self.accumulator.add(data)
+        self.transferable = transferable_range.transferable
+        self.is_last = transferable_range.is_last
+
+    def to_parity(self) -> protocol.TransferableParity:
+        """Build the TransferableParity of the group, as sent with its last range."""
+        transferable = self.transferable
+        if transferable.user_provided_meta is None and self.user_provided_meta is not None:
+            # the metadata sent with the first range must be sent with its parity too,
+            # in case the first range has to be rebuilt from it
+            transferable = transferable.model_copy(update={"user_provided_meta": self.user_provided_meta})
+
+        return protocol.TransferableParity(
+            transferable=transferable,
+            is_last=self.is_last,
+            ranges=self.ranges,
+            data=self.accumulator.digest(),
+        )
+
+
+def _uncompressed_data(transferable_range: protocol.TransferableRange) -> bytes | memoryview:
+    """Return the data of the given TransferableRange as it was before compression,
+    as kept by the TransferableRangeFiller when it compressed the range.
+    """
+    uncompressed_data = transferable_range.pop_uncompressed_data()
+    if uncompressed_data is not None:
+        return uncompressed_data
+
+    if transferable_range.compression is None or transferable_range.uncompressed_size is None:
+        return transferable_range.data
+
+    return compression.decompress(
+        transferable_range.data,
+        transferable_range.compression,
+        transferable_range.uncompressed_size,
+    )
+
+
+class TransferableParityFiller(base.OnTheWirePacketFiller):
+    """
+    Fill the given packet with TransferableParities computed over the
+    TransferableRanges already in the packet.
+
+    Every TRANSFERABLE_PARITY_GROUP_SIZE consecutive ranges of a Transferable are
+    covered by one parity, allowing the destination to rebuild one lost range per
+    group. As ranges of a group are spread over several packets, the parity being
+    computed for each Transferable is kept in memory until its group is complete.
+    At most TRANSFERABLE_PARITY_MAX_OPEN_GROUPS groups are kept, the oldest one being
+    completed early to make room for a new one.
+    A completed parity is sent in the next packet, so that losing the packet holding
+    the last range of a group does not also lose its parity.
+
+    This filler must run after the fillers adding TransferableRanges and
+    TransferableRevocations to the packet.
+    """
+
+    def __init__(self) -> None:
+        self._groups: dict[uuid.UUID, _ParityGroup] = {}
+        self._completed: list[protocol.TransferableParity] = []
+
+    def _discard_finished_transferables(self, packet: protocol.OnTheWirePacket) -> None:
+        """Forget the groups of the Transferables that will not be sent anymore."""
+        finished_transferable_ids = {revocation.transferable_id for revocation in packet.transferable_revocations}
+        if packet.history is not None:
+            finished_transferable_ids.update(entry.transferable_id for entry in packet.history.entries)
+
+        for transferable_id in finished_transferable_ids:
+            self._groups.pop(transferable_id, None)
+
+    def _complete(self, transferable_id: uuid.UUID) -> None:
+        """Compute the parity of the group of the given Transferable, to be sent in
+        the next packet.
+        """
+        group = self._groups.pop(transferable_id)
+        self._completed.append(group.to_parity())
+
+        logger.info(
+            {
+                LOG_KEY: "adding_transferable_parity",
+                "transferable_id": str(transferable_id),
+                "transferable_parity_byte_offset": str(group.ranges[0].byte_offset),
+                "transferable_parity_ranges": len(group.ranges),
+            }
+        )
+
+    def _add(self, transferable_range: protocol.TransferableRange) -> None:
+        """Add the given TransferableRange to the group of its Transferable, and
+        compute the parity of the group once it is complete.
+        """
+        transferable_id = transferable_range.transferable.id
+        group = self._groups.get(transferable_id)
+
+        if group is None:
+            if transferable_range.is_last:
+                # the parity of a group of a single range would just be a copy of it
+                transferable_range.pop_uncompressed_data()
+                return
+
+            if len(self._groups) >= settings.TRANSFERABLE_PARITY_MAX_OPEN_GROUPS:
+                self._complete(next(iter(self._groups)))
+
+            group = self._groups[transferable_id] = _ParityGroup(transferable_range.transferable)
+
+        group.add(transferable_range, _uncompressed_data(transferable_range))
+        transferable_range.parity_protected = True
+
+        if transferable_range.is_last or len(group.ranges) >= settings.TRANSFERABLE_PARITY_GROUP_SIZE:
+            self._complete(transferable_id)
+
+    def fill(self, packet: protocol.OnTheWirePacket) -> None:
+        """Given an OnTheWirePacket, add the TransferableParities of the groups of
+        ranges completed by the previous packet, and start computing the ones covering
+        its TransferableRanges.
+
+        Args:
+            packet: packet to fill with TransferableParities.
+
+        """
+        packet.transferable_parities.extend(self._completed)
+        self._completed.clear()
+
+        if settings.TRANSFERABLE_PARITY_GROUP_SIZE < 2:
+            return
+
+        self._discard_finished_transferables(packet)
+
+        for transferable_range in packet.transferable_ranges:
+            self._add(transferable_range)
+
+
+__all__ = ("TransferableParityFiller",)
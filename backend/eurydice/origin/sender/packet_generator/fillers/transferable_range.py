@@ -1,13 +1,25 @@
-from typing import Iterator
+import bisect
+import collections
+import dataclasses
+import datetime
+import functools
+import math
+import operator
+import time
+import uuid
+from concurrent import futures
+from typing import Iterable, Iterator, Sequence
 
 from django.conf import settings
 from django.db import models
+from django.db.models import functions
 from django.db.models.query import QuerySet
+from django.utils import timezone
 
 import eurydice.common.protocol as protocol
 import eurydice.origin.core.models as origin_models
 import eurydice.origin.sender.user_selector as user_selector
-from eurydice.common import exceptions
+from eurydice.common import checksum, compression, enums, exceptions
 from eurydice.common.logging.logger import LOG_KEY, logger
 from eurydice.common.utils import orm
 from eurydice.origin.core import enums as origin_enums
@@ -15,6 +27,23 @@ from eurydice.origin.sender.packet_generator.fillers import base
 from eurydice.origin.storage import fs
 
 
+def _compute_chain_digest(outgoing_transferable: origin_models.OutgoingTransferable) -> bytes | None:
+    """
+    Combine the checksums of the TransferableRanges of an OutgoingTransferable into
+    its chain digest, or return None if the checksum of one of them is unknown.
+    """
+    range_checksums = list(
+        origin_models.TransferableRange.objects.filter(outgoing_transferable=outgoing_transferable)
+        .order_by("byte_offset")
+        .values_list("checksum", flat=True)
+    )
+
+    if None in range_checksums:
+        return None
+
+    return checksum.chain_digest(bytes(c) for c in range_checksums)
+
+
 def _build_protocol_transferable(
     transferable_range: origin_models.TransferableRange,
 ) -> protocol.Transferable:
@@ -22,6 +51,13 @@ def _build_protocol_transferable(
     Given the django model for a TransferableRange and a user, build the
     protocol's model for the associated Transferable
 
+    The user provided metadata, which can be large, is only sent in the first and
+    last ranges of the Transferable, as the destination only uses it when creating
+    the Transferable and when it is fully received.
+
+    The chain digest of the Transferable is sent in its last range if
+    TRANSFERABLE_CHAIN_DIGEST is enabled.
+
     Args:
         transferable_range: the TransferableRange django model
 
@@ -30,17 +66,25 @@ def _build_protocol_transferable(
     """
 
     sha1: bytes | None = None
+    chain_digest: bytes | None = None
+    user_provided_meta: dict[str, str] | None = None
 
     if transferable_range.is_last:
         sha1 = bytes(transferable_range.outgoing_transferable.sha1)  # type: ignore[attr-defined]
+        if settings.TRANSFERABLE_CHAIN_DIGEST:
+            chain_digest = _compute_chain_digest(transferable_range.outgoing_transferable)  # type: ignore[attr-defined]
     else:
         sha1 = None
 
+    if transferable_range.is_last or transferable_range.byte_offset == 0:
+        user_provided_meta = transferable_range.outgoing_transferable.user_provided_meta  # type: ignore[attr-defined]
+
     return protocol.Transferable(
         id=transferable_range.outgoing_transferable.id,  # type: ignore[attr-defined]
         name=transferable_range.outgoing_transferable.name,  # type: ignore[attr-defined]
-        user_provided_meta=transferable_range.outgoing_transferable.user_provided_meta,  # type: ignore[attr-defined]  # noqa: E501
+        user_provided_meta=user_provided_meta,
         sha1=sha1,
+        chain_digest=chain_digest,
         size=transferable_range.outgoing_transferable.size,  # type: ignore[attr-defined]
         user_profile_id=transferable_range.outgoing_transferable.user_profile.id,  # type: ignore[attr-defined]
     )
@@ -76,12 +120,20 @@ def _fetch_next_transferable_ranges_for_user(
     )[: settings.MAX_TRANSFERABLES_PER_PACKET]
 
 
-def _fetch_pending_transferable_ranges() -> QuerySet[origin_models.TransferableRange]:
+def _fetch_pending_transferable_ranges(
+    condition: models.Q = models.Q(),
+    limit: int | None = None,
+) -> QuerySet[origin_models.TransferableRange]:
     """
     Fetch the next MAX_TRANSFERABLES_PER_PACKET pending TransferableRanges.
 
     Also pre-fetches revocations and ERROR ranges, to reduce the amount of db queries.
 
+    Args:
+        condition: additional filter on the pending TransferableRanges
+        limit: maximum amount of TransferableRanges to fetch, defaults to
+            MAX_TRANSFERABLES_PER_PACKET
+
     Returns:
         the pending TransferableRanges
 
@@ -90,6 +142,7 @@ def _fetch_pending_transferable_ranges() -> QuerySet[origin_models.TransferableR
     return orm.make_queryset_with_subquery_join(
         queryset=origin_models.TransferableRange.objects.select_related("outgoing_transferable__revocation")
         .filter(
+            condition,
             transfer_state=origin_enums.TransferableRangeTransferState.PENDING,
         )
         .order_by("created_at"),
@@ -98,33 +151,159 @@ def _fetch_pending_transferable_ranges() -> QuerySet[origin_models.TransferableR
         ),
         on=models.Q(outgoing_transferable_id=models.F("outgoing_transferable_id")),
         select={"erroneous_outgoing_transferable_id": "outgoing_transferable_id"},
-    )[: settings.MAX_TRANSFERABLES_PER_PACKET]
+    )[: settings.MAX_TRANSFERABLES_PER_PACKET if limit is None else limit]
+
+
+def _fetch_pending_transferable_ranges_per_user(
+    condition: models.Q,
+    deficits: dict[uuid.UUID, int],
+    range_overhead: int,
+    max_credit: int,
+    limit_per_user: int,
+) -> QuerySet[origin_models.TransferableRange]:
+    """
+    Fetch the next pending TransferableRanges of every user, in a single query, as
+    many as the credit of the user covers plus one.
+
+    The credit of a user is its deficit plus SENDER_DRR_QUANTUM times its priority
+    plus one, up to the given maximum, and each range costs its size plus the given
+    overhead. The credit is annotated on the fetched ranges.
+
+    Also pre-fetches user profiles, revocations and ERROR ranges, to reduce the
+    amount of db queries.
+
+    Args:
+        condition: filter on the pending TransferableRanges
+        deficits: the deficits of the users, the other users having none
+        range_overhead: the cost of a range on top of its size
+        max_credit: the maximum credit of a user
+        limit_per_user: maximum amount of TransferableRanges to fetch for each user
+
+    Returns:
+        the pending TransferableRanges, oldest first
+
+    """
+    user_profile_id = models.F("outgoing_transferable__user_profile_id")
+    order_by = [models.F("created_at").asc(), models.F("id").asc()]
+    deficit = models.Case(
+        *(
+            models.When(outgoing_transferable__user_profile_id=key, then=models.Value(value))
+            for key, value in deficits.items()
+            if value
+        ),
+        default=models.Value(0),
+        output_field=models.BigIntegerField(),
+    )
+    # computed as a bigint, the quantum of high priority users overflowing an integer
+    quantum = models.Value(settings.SENDER_DRR_QUANTUM, models.BigIntegerField()) * functions.Cast(
+        models.F("outgoing_transferable__user_profile__priority") + 1, models.BigIntegerField()
+    )
+    credit = functions.Least(deficit + quantum, models.Value(max_credit), output_field=models.BigIntegerField())
+
+    return orm.make_queryset_with_subquery_join(
+        queryset=origin_models.TransferableRange.objects.select_related(
+            "outgoing_transferable__revocation", "outgoing_transferable__user_profile"
+        )
+        .filter(condition, transfer_state=origin_enums.TransferableRangeTransferState.PENDING)
+        .annotate(
+            credit=credit,
+            position=models.Window(
+                expression=functions.RowNumber(),
+                partition_by=user_profile_id,
+                order_by=order_by,
+            ),
+            # the cost of the ranges of the user before this one
+            previous_cost=functions.Coalesce(
+                models.Window(
+                    expression=models.Sum(models.F("size") + range_overhead),
+                    partition_by=user_profile_id,
+                    order_by=order_by,
+                    frame=models.RowRange(start=None, end=-1),
+                ),
+                0,
+            ),
+        )
+        # filtering on the window wraps the query instead of joining on a subquery,
+        # which keeps the ranges from being numbered once per candidate row
+        .filter(position__lte=limit_per_user, previous_cost__lt=models.F("credit"))
+        .order_by("created_at", "id"),
+        subquery=origin_models.TransferableRange.objects.values("outgoing_transferable_id").filter(
+            transfer_state=origin_enums.TransferableRangeTransferState.ERROR,
+        ),
+        on=models.Q(outgoing_transferable_id=models.F("outgoing_transferable_id")),
+        select={"erroneous_outgoing_transferable_id": "outgoing_transferable_id"},
+    )
 
 
 def _get_transferable_range_data(
     transferable_range: origin_models.TransferableRange,
-) -> bytes:
+) -> bytes | memoryview:
     """
     Given a TransferableRange, fetch and return its data from the filesystem.
 
+    When SENDER_SENDFILE is enabled, the data of large ranges are mapped in memory
+    rather than read, so that the sender can write them with sendfile.
+
     Args:
         transferable_range: range for which to fetch data
 
     Returns:
-        TransferableRange data as bytes
+        TransferableRange data as bytes, or as a memoryview over the mapped file
 
     Raises:
         FileNotFoundError: if object is not found in filesystem.
 
     """
     try:
-        data = fs.read_bytes(transferable_range)
+        if settings.SENDER_SENDFILE and transferable_range.size >= max(settings.SENDER_SENDFILE_MIN_SIZE, 1):
+            data: bytes | memoryview = fs.map_bytes(transferable_range)
+        else:
+            data = fs.read_bytes(transferable_range)
     except FileNotFoundError as e:
         raise exceptions.FileNotFoundError() from e
 
     return data
 
 
+def _compress_transferable_range(
+    transferable_range: protocol.TransferableRange,
+    user_provided_meta: dict[str, str],
+) -> None:
+    """
+    Compress the data of the given TransferableRange in place with the algorithm set in
+    TRANSFERABLE_RANGE_COMPRESSION, unless compressing it would not save bandwidth.
+
+    Data of encrypted uploads is never compressed, and other data is compressed only
+    when a sample of it compresses well and when the result is actually smaller.
+
+    Args:
+        transferable_range: the protocol TransferableRange to compress.
+        user_provided_meta: the metadata of the associated Transferable, which the
+            protocol Transferable only holds in some ranges.
+
+    """
+    if not settings.TRANSFERABLE_RANGE_COMPRESSION:
+        return
+
+    if user_provided_meta.get("Metadata-Encrypted") == "true":
+        return
+
+    algorithm = enums.TransferableRangeCompression(settings.TRANSFERABLE_RANGE_COMPRESSION)
+
+    if not compression.is_worth_compressing(transferable_range.data, algorithm):
+        return
+
+    compressed = compression.compress(transferable_range.data, algorithm)
+
+    if len(compressed) < len(transferable_range.data):
+        if settings.TRANSFERABLE_PARITY_GROUP_SIZE >= 2:
+            # the parities cover the uncompressed data
+            transferable_range.keep_uncompressed_data(transferable_range.data)
+        transferable_range.uncompressed_size = len(transferable_range.data)
+        transferable_range.data = compressed
+        transferable_range.compression = algorithm
+
+
 class OTWPacketAlreadyHasTransferableRanges(ValueError):
     """
     Exception raised when passing an OnTheWirePacket which already has
@@ -145,28 +324,99 @@ def _delete_objects_from_fs(
         fs.delete(transferable_range)
 
 
+def _mark_as_transferred(
+    transferable_ranges: list[origin_models.TransferableRange],
+) -> None:
+    """
+    Mark TransferableRanges as TRANSFERRED in the DB with a single query.
+
+    Args:
+        transferable_ranges: List of TransferableRanges added to a packet
+    """
+    if transferable_ranges:
+        origin_models.TransferableRange.objects.filter(  # type: ignore[attr-defined]
+            id__in=[transferable_range.id for transferable_range in transferable_ranges]
+        ).mark_as_transferred()
+
+
+def _build_protocol_transferable_range(
+    transferable_range: origin_models.TransferableRange,
+) -> protocol.TransferableRange:
+    """
+    Given the django model for a TransferableRange, build the protocol's model for
+    it, without its data.
+
+    Args:
+        transferable_range: the TransferableRange django model
+
+    Returns:
+        protocol's model for the TransferableRange, with empty data
+    """
+    return protocol.TransferableRange(
+        transferable=_build_protocol_transferable(transferable_range),
+        is_last=transferable_range.is_last,
+        byte_offset=transferable_range.byte_offset,
+        data=b"",
+        checksum=None if transferable_range.checksum is None else bytes(transferable_range.checksum),
+    )
+
+
+def _read(
+    transferable_range: origin_models.TransferableRange,
+    protocol_transferable_range: protocol.TransferableRange,
+) -> protocol.TransferableRange:
+    """
+    Read the data of the given TransferableRange from the filesystem into its
+    protocol model, compressing it if worth it.
+
+    This function does not query the database, so that ranges can be read by the
+    prefetch threads of the TransferableRangeFiller.
+
+    Args:
+        transferable_range: django model for the TransferableRange to read
+        protocol_transferable_range: protocol's model for the TransferableRange
+
+    Returns:
+        the protocol TransferableRange, holding its data
+
+    Raises:
+        FileNotFoundError: if the data of the range is not found in filesystem.
+
+    """
+    # set after validation, which would reject the memoryview of a mapped file
+    protocol_transferable_range.data = _get_transferable_range_data(transferable_range)  # type: ignore[assignment]
+
+    _compress_transferable_range(
+        protocol_transferable_range,
+        transferable_range.outgoing_transferable.user_provided_meta,  # type: ignore[attr-defined]
+    )
+
+    return protocol_transferable_range
+
+
 def _add(
     transferable_range: origin_models.TransferableRange,
     packet: protocol.OnTheWirePacket,
+    prefetched: futures.Future | None = None,
 ) -> None:
     """
-    Add given TransferableRange to the given packet, mark it as TRANSFERRED
-    and delete its associated data from filesystem.
+    Add given TransferableRange to the given packet and mark it as TRANSFERRED,
+    without saving it (see `_mark_as_transferred`).
 
     Args:
         transferable_range: django model for the TransferableRange to add
         packet: Pydantic protocol packet to add TransferableRange to
+        prefetched: the future of the protocol TransferableRange read in advance,
+            if any, the range being read otherwise
 
     """
-    protocol_transferable = _build_protocol_transferable(transferable_range)
-
     try:
-        protocol_transferable_range = protocol.TransferableRange(
-            transferable=protocol_transferable,
-            is_last=transferable_range.is_last,
-            byte_offset=transferable_range.byte_offset,
-            data=_get_transferable_range_data(transferable_range),
-        )
+        if prefetched is None:
+            protocol_transferable_range = _read(
+                transferable_range, _build_protocol_transferable_range(transferable_range)
+            )
+        else:
+            protocol_transferable_range = prefetched.result()
     except exceptions.FileNotFoundError:
         transferable_range.mark_as_error()
         logger.error(
@@ -189,7 +439,7 @@ def _add(
 
     packet.transferable_ranges.append(protocol_transferable_range)
 
-    transferable_range.mark_as_transferred()
+    transferable_range.mark_as_transferred(save=False)
 
 
 def _cancel(
@@ -205,22 +455,56 @@ def _cancel(
     transferable_range.mark_as_canceled()
 
 
-def _process(
-    transferable_range: origin_models.TransferableRange,
-    packet: protocol.OnTheWirePacket,
-) -> int:
-    """Process a transferable range by either adding it to the packet or cancelling
-    it."""
-    if (
+def _is_to_cancel(transferable_range: origin_models.TransferableRange) -> bool:
+    """Tell whether the given TransferableRange must be cancelled rather than sent,
+    because its Transferable failed or was revoked.
+    """
+    return (
         transferable_range.erroneous_outgoing_transferable_id is not None  # type: ignore # noqa: E501
         or hasattr(transferable_range.outgoing_transferable, "revocation")
-    ):
-        _cancel(transferable_range)
-        return 0
+    )
+
+
+def _select_up_to(
+    transferable_ranges: Iterable[origin_models.TransferableRange],
+    budget: int,
+) -> tuple[list[origin_models.TransferableRange], list[origin_models.TransferableRange]]:
+    """Select TransferableRanges until their size reaches the given budget, cancelling
+    the ranges of failed or revoked Transferables along the way.
+
+    The range reaching the budget is selected, so at least one range is selected
+    when there is one to send, whatever the budget.
 
-    _add(transferable_range, packet)
+    Args:
+        transferable_ranges: the candidate TransferableRanges, in order.
+        budget: the amount of bytes to select.
+
+    Returns:
+        the TransferableRanges to add, and the cancelled ones.
 
-    return transferable_range.size
+    """
+    packet_size = 0
+    selected = []
+    cancelled = []
+
+    for transferable_range in transferable_ranges:
+        if _is_to_cancel(transferable_range):
+            _cancel(transferable_range)
+            cancelled.append(transferable_range)
+        else:
+            selected.append(transferable_range)
+            packet_size += transferable_range.size
+
+        if packet_size >= budget:
+            break
+
+    return selected, cancelled
+
+
+def _percentile(samples: Sequence[float], percent: int) -> float:
+    """The nearest-rank percentile of the given samples."""
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)]
 
 
 class TransferableRangeFiller(base.OnTheWirePacketFiller):
@@ -229,8 +513,18 @@ class TransferableRangeFiller(base.OnTheWirePacketFiller):
 
     Fills the given packet with TransferableRange's data and metadata
     by calling the `fill()` method
+
+    The ranges to send are first selected from the database, then their data are
+    read from the filesystem (and compressed) concurrently by SENDER_PREFETCH_WORKERS
+    threads, while they are added to the packet in order. At most one packet worth
+    of data is read at once.
     """
 
+    def __init__(self) -> None:
+        self._executor = futures.ThreadPoolExecutor(
+            max_workers=settings.SENDER_PREFETCH_WORKERS, thread_name_prefix="range-prefetch"
+        )
+
     def _get_transferable_ranges_to_process(
         self,
     ) -> Iterator[origin_models.TransferableRange]:
@@ -242,6 +536,17 @@ class TransferableRangeFiller(base.OnTheWirePacketFiller):
         """
         raise NotImplementedError()
 
+    def _select(self) -> tuple[list[origin_models.TransferableRange], list[origin_models.TransferableRange]]:
+        """Select the TransferableRanges to add to the next packet, up to
+        TRANSFERABLE_RANGE_SIZE bytes, cancelling the ranges of failed or revoked
+        Transferables along the way.
+
+        Returns:
+            the TransferableRanges to add, and the cancelled ones.
+
+        """
+        return _select_up_to(self._get_transferable_ranges_to_process(), settings.TRANSFERABLE_RANGE_SIZE)
+
     def fill(self, packet: protocol.OnTheWirePacket) -> None:
         """Given an OnTheWirePacket, fill it with TransferableRanges up to
         TRANSFERABLE_RANGE_SIZE bytes if it has no existing TransferableRanges.
@@ -257,21 +562,35 @@ class TransferableRangeFiller(base.OnTheWirePacketFiller):
         if len(packet.transferable_ranges) > 0:
             raise OTWPacketAlreadyHasTransferableRanges
 
-        packet_size = 0
+        started_at = time.perf_counter()
+        selected, to_delete = self._select()
+        selected_at = time.perf_counter()
 
-        to_delete = []
+        prefetched = [
+            self._executor.submit(_read, transferable_range, _build_protocol_transferable_range(transferable_range))
+            for transferable_range in selected
+        ]
 
-        for transferable_range in self._get_transferable_ranges_to_process():
+        transferred = []
+        for transferable_range, prefetched_range in zip(selected, prefetched):
             try:
-                packet_size += _process(transferable_range, packet)
-                to_delete.append(transferable_range)
+                _add(transferable_range, packet, prefetched_range)
+                transferred.append(transferable_range)
             except exceptions.FileNotFoundError:
                 pass
 
-            if packet_size >= settings.TRANSFERABLE_RANGE_SIZE:
-                break
+        _mark_as_transferred(transferred)
+        _delete_objects_from_fs(to_delete + transferred)
 
-        _delete_objects_from_fs(to_delete)
+        if selected:
+            logger.info(
+                {
+                    LOG_KEY: "transferable_range_filler_timings",
+                    "transferable_ranges": len(selected),
+                    "select_us": round((selected_at - started_at) * 1_000_000),
+                    "read_us": round((time.perf_counter() - selected_at) * 1_000_000),
+                }
+            )
 
 
 class UserRotatingTransferableRangeFiller(TransferableRangeFiller):
@@ -317,8 +636,281 @@ class FIFOTransferableRangeFiller(TransferableRangeFiller):
         return iter(_fetch_pending_transferable_ranges())
 
 
+@dataclasses.dataclass
+class _UserQueue:
+    """The pending TransferableRanges of a user fetched by the
+    DeficitRoundRobinTransferableRangeFiller and not sent yet.
+    """
+
+    user_profile_id: uuid.UUID
+    priority: int
+    ranges: collections.deque[origin_models.TransferableRange] = dataclasses.field(default_factory=collections.deque)
+    exhausted: bool = False
+    last_created_at: datetime.datetime | None = None
+    last_ids: list[uuid.UUID] = dataclasses.field(default_factory=list)
+
+    def extend(self, transferable_ranges: list[origin_models.TransferableRange]) -> None:
+        """Queue the given ranges, which are the next pending ranges of the user."""
+        for transferable_range in transferable_ranges:
+            if transferable_range.created_at != self.last_created_at:
+                self.last_created_at = transferable_range.created_at
+                self.last_ids = []
+            self.last_ids.append(transferable_range.id)
+
+        self.ranges.extend(transferable_ranges)
+
+    def next_ranges(self) -> models.Q:
+        """Filter the pending ranges of the user following the ones fetched so far."""
+        return models.Q(
+            outgoing_transferable__user_profile_id=self.user_profile_id,
+            created_at__gte=self.last_created_at,
+        ) & ~models.Q(id__in=self.last_ids)
+
+
+class DeficitRoundRobinTransferableRangeFiller(TransferableRangeFiller):
+    """
+    Fill the given packet with TransferableRange's data and metadata
+    by calling the `fill()` method
+
+    Users are served with a Deficit Round Robin algorithm, which shares the
+    bandwidth between users in bytes rather than in turns: at each of their turns,
+    users are credited SENDER_DRR_QUANTUM bytes times their priority plus one, and
+    their ranges are sent as long as their credit covers them. Each range also costs
+    RANGE_OVERHEAD bytes, so that empty files are not free to send.
+
+    Credits are kept across packets, as long as users have pending ranges, so that
+    users with large ranges get their share over several packets. A turn cut short
+    by a full packet is resumed in the next packet.
+
+    Only the pending ranges of each user that its credit for the round covers, plus
+    one, are fetched. They are fetched for all users in a single query, at the start
+    of the rounds in which some users have run out of fetched ranges.
+    """
+
+    RANGE_OVERHEAD = 4096
+
+    def __init__(self) -> None:
+        self._deficits: dict[uuid.UUID, int] = {}
+        self._last_user_profile_id: uuid.UUID | None = None
+        self._in_turn = False
+        super().__init__()
+
+    def _cost(self, transferable_range: origin_models.TransferableRange) -> int:
+        """The credit needed to send the given range, ranges to cancel being free."""
+        if _is_to_cancel(transferable_range):
+            return 0
+
+        return transferable_range.size + self.RANGE_OVERHEAD
+
+    def _rotation(self, user_profile_ids: Iterable[uuid.UUID]) -> list[uuid.UUID]:
+        """Order the given users, starting with the user whose turn was cut short,
+        or with the one after the last served user.
+        """
+        ordered = sorted(user_profile_ids)
+        if self._last_user_profile_id is None:
+            return ordered
+
+        if self._in_turn:
+            start = bisect.bisect_left(ordered, self._last_user_profile_id)
+        else:
+            start = bisect.bisect_right(ordered, self._last_user_profile_id)
+
+        return ordered[start:] + ordered[:start]
+
+    def _fetch(
+        self,
+        queues: dict[uuid.UUID, _UserQueue],
+        condition: models.Q,
+        room: int,
+        limit: int,
+    ) -> set[uuid.UUID]:
+        """Fetch the next pending ranges of the users matching the given condition,
+        as many as their credit for the round covers plus one, and queue them.
+
+        Args:
+            queues: the queues of the users, to which new users are added
+            condition: filter on the pending ranges to fetch
+            room: the amount of bytes left in the packet, which bounds the credits
+            limit: maximum amount of ranges to fetch for each user
+
+        Returns:
+            the users of which all the pending ranges were fetched
+
+        """
+        fetched: dict[uuid.UUID, list[origin_models.TransferableRange]] = collections.defaultdict(list)
+        for transferable_range in _fetch_pending_transferable_ranges_per_user(
+            condition, self._deficits, self.RANGE_OVERHEAD, room, limit
+        ):
+            user_profile_id = transferable_range.outgoing_transferable.user_profile_id  # type: ignore[attr-defined]
+            if user_profile_id not in queues:
+                queues[user_profile_id] = _UserQueue(
+                    user_profile_id=user_profile_id,
+                    priority=transferable_range.outgoing_transferable.user_profile.priority,  # type: ignore[attr-defined]
+                )
+            fetched[user_profile_id].append(transferable_range)
+
+        exhausted = set()
+        for user_profile_id, transferable_ranges in fetched.items():
+            queues[user_profile_id].extend(transferable_ranges)
+            # the credit would have covered the following range, if any
+            cost = sum(r.size + self.RANGE_OVERHEAD for r in transferable_ranges)
+            if len(transferable_ranges) < limit and cost < transferable_ranges[0].credit:  # type: ignore[attr-defined]
+                exhausted.add(user_profile_id)
+
+        return exhausted
+
+    def _get_transferable_ranges_to_process(
+        self,
+    ) -> Iterator[origin_models.TransferableRange]:
+        """
+        TransferableRange iterator using Deficit Round Robin
+
+        Yields:
+            TransferableRanges queried from DB
+        """
+        queues: dict[uuid.UUID, _UserQueue] = {}
+        for user_profile_id in self._fetch(
+            queues, models.Q(), settings.TRANSFERABLE_RANGE_SIZE, settings.MAX_TRANSFERABLES_PER_PACKET
+        ):
+            queues[user_profile_id].exhausted = True
+
+        # users without pending ranges lose their credit
+        self._deficits = {user_profile_id: self._deficits.get(user_profile_id, 0) for user_profile_id in queues}
+
+        yielded = 0
+        yielded_size = 0
+        while queues:
+            starving = [queue for queue in queues.values() if not queue.ranges]
+            if starving:
+                exhausted = self._fetch(
+                    queues,
+                    functools.reduce(operator.or_, (queue.next_ranges() for queue in starving)),
+                    settings.TRANSFERABLE_RANGE_SIZE - yielded_size,
+                    settings.MAX_TRANSFERABLES_PER_PACKET - yielded,
+                )
+                for queue in starving:
+                    queue.exhausted = not queue.ranges or queue.user_profile_id in exhausted
+
+            for user_profile_id in self._rotation(queues):
+                queue = queues[user_profile_id]
+
+                if not (self._in_turn and user_profile_id == self._last_user_profile_id):
+                    self._deficits[user_profile_id] += settings.SENDER_DRR_QUANTUM * (queue.priority + 1)
+                    self._last_user_profile_id = user_profile_id
+                    self._in_turn = True
+
+                while queue.ranges and self._cost(queue.ranges[0]) <= self._deficits[user_profile_id]:
+                    transferable_range = queue.ranges.popleft()
+                    cost = self._cost(transferable_range)
+                    self._deficits[user_profile_id] -= cost
+                    yielded += 1
+                    if cost:
+                        yielded_size += transferable_range.size
+                    yield transferable_range
+
+                    if yielded >= settings.MAX_TRANSFERABLES_PER_PACKET:
+                        return
+
+                self._in_turn = False
+                if not queue.ranges and queue.exhausted:
+                    del queues[user_profile_id]
+                    self._deficits[user_profile_id] = 0
+
+
+class ExpressLaneTransferableRangeFiller(TransferableRangeFiller):
+    """
+    Fill the given packet with TransferableRange's data and metadata
+    by calling the `fill()` method
+
+    Small Transferables, up to SENDER_EXPRESS_LANE_MAX_SIZE bytes, are not queued
+    behind the ranges of large ones: SENDER_EXPRESS_LANE_SHARE of the
+    TRANSFERABLE_RANGE_SIZE of each packet is reserved to their ranges, and the rest
+    of the packet, at least one range, is filled with the ranges of the other
+    Transferables. Both lanes are served in FIFO order, and each one gets the whole
+    packet when the other has nothing to send.
+
+    The time spent waiting by the ranges of each lane is logged as percentiles over
+    the last LATENCY_SAMPLES ranges, to help tune the split.
+    """
+
+    LATENCY_SAMPLES = 1000
+    LATENCY_PERCENTILES = (50, 90, 99)
+
+    def __init__(self) -> None:
+        self._latencies = {lane: collections.deque[float](maxlen=self.LATENCY_SAMPLES) for lane in ("express", "bulk")}
+        super().__init__()
+
+    @staticmethod
+    def _express_condition() -> models.Q:
+        return models.Q(outgoing_transferable__size__lte=settings.SENDER_EXPRESS_LANE_MAX_SIZE)
+
+    def _select(self) -> tuple[list[origin_models.TransferableRange], list[origin_models.TransferableRange]]:
+        """Select the TransferableRanges to add to the next packet, the ranges of small
+        Transferables first, up to their reserved share of TRANSFERABLE_RANGE_SIZE,
+        then the ranges of the other Transferables, up to TRANSFERABLE_RANGE_SIZE.
+
+        Returns:
+            the TransferableRanges to add, and the cancelled ones.
+
+        """
+        # keep room for at least one range of the bulk lane
+        express_ranges = iter(
+            _fetch_pending_transferable_ranges(
+                self._express_condition(), limit=settings.MAX_TRANSFERABLES_PER_PACKET - 1
+            )
+        )
+        express, cancelled = _select_up_to(
+            express_ranges, int(settings.TRANSFERABLE_RANGE_SIZE * settings.SENDER_EXPRESS_LANE_SHARE)
+        )
+        express_size = sum(r.size for r in express)
+
+        bulk, bulk_cancelled = _select_up_to(
+            _fetch_pending_transferable_ranges(
+                ~self._express_condition(), limit=settings.MAX_TRANSFERABLES_PER_PACKET - len(express)
+            ),
+            settings.TRANSFERABLE_RANGE_SIZE - express_size,
+        )
+        cancelled += bulk_cancelled
+
+        if not bulk and express_size < settings.TRANSFERABLE_RANGE_SIZE:
+            # the bulk lane has nothing to send, the express lane gets the whole packet
+            more_express, more_cancelled = _select_up_to(
+                express_ranges, settings.TRANSFERABLE_RANGE_SIZE - express_size
+            )
+            express += more_express
+            cancelled += more_cancelled
+
+        self._record_latencies(express=express, bulk=bulk)
+        return express + bulk, cancelled
+
+    def _record_latencies(self, **selected: list[origin_models.TransferableRange]) -> None:
+        """Record the time spent waiting by the selected ranges of each lane, and log
+        the percentiles of the latencies of each lane.
+        """
+        now = timezone.now()
+        for lane, transferable_ranges in selected.items():
+            self._latencies[lane].extend((now - r.created_at).total_seconds() for r in transferable_ranges)
+
+        if not any(selected.values()):
+            return
+
+        logger.info(
+            {
+                LOG_KEY: "express_lane_latencies",
+                **{
+                    f"{lane}_p{percent}_ms": round(_percentile(samples, percent) * 1000)
+                    for lane, samples in self._latencies.items()
+                    if samples
+                    for percent in self.LATENCY_PERCENTILES
+                },
+            }
+        )
+
+
 __all__ = (
     "TransferableRangeFiller",
     "UserRotatingTransferableRangeFiller",
     "FIFOTransferableRangeFiller",
+    "DeficitRoundRobinTransferableRangeFiller",
+    "ExpressLaneTransferableRangeFiller",
 )
@@ -17,6 +17,7 @@ class OnTheWirePacketGenerator:
             range_filler_class(),
             fillers.TransferableRevocationFiller(),
             fillers.OngoingHistoryFiller(),
+            fillers.TransferableParityFiller(),
         )
 
     def generate_next_packet(self) -> protocol.OnTheWirePacket:
@@ -1,71 +1,342 @@
 import datetime
+import functools
 import queue
 import socket
 import threading
+import time
 from types import TracebackType
-from typing import Type
+from typing import Callable, Type
 
 from django.conf import settings
 from django.utils import timezone
 
-from eurydice.common import protocol
+from eurydice.common import codec, protocol
 from eurydice.common.logging.logger import LOG_KEY, logger
+from eurydice.origin.storage import fs
 
 
 class SenderThreadNotRunningError(RuntimeError):
     """Raised when the sender thread is expected to be running but is not."""
 
 
-def _send_through_socket(data: bytes) -> None:
-    address = (settings.LIDIS_HOST, settings.LIDIS_PORT)
-    with socket.create_connection(address) as conn:
-        logger.info(
-            {LOG_KEY: "sender_start_sending", "LIDIS_HOST": settings.LIDIS_HOST, "LIDIS_PORT": settings.LIDIS_PORT}
-        )
-        conn.sendall(data)
+def _lidis_endpoints() -> list[tuple[str, int]]:
+    """The addresses of the Lidi sender services packets are sent to, one per diode
+    link.
+    """
+    return settings.LIDIS_ENDPOINTS or [(settings.LIDIS_HOST, settings.LIDIS_PORT)]
+
+
+def _connect(endpoint: tuple[str, int]) -> socket.socket:
+    """Open a connection to a Lidi sender service, with the socket options set in
+    the settings.
+    """
+    conn = socket.create_connection(endpoint)
+
+    try:
+        if settings.SENDER_SOCKET_SEND_BUFFER_SIZE:
+            conn.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, settings.SENDER_SOCKET_SEND_BUFFER_SIZE)
+        if settings.SENDER_TCP_NODELAY:
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except OSError:
+        conn.close()
+        raise
+
+    return conn
+
+
+class _RateLimiter:
+    """Token bucket pacing the writes to the Lidi sender service to at most
+    SENDER_RATE_LIMIT bytes per second, with bursts of up to SENDER_RATE_LIMIT_BURST
+    bytes.
+
+    Writing faster than the diode link can carry gets packets dropped downstream,
+    so the rate should be set to the capacity of the link.
+
+    Attributes:
+        rate:               the rate in bytes per second, None for no limit
+        burst:              the capacity of the bucket in bytes
+        sent_bytes:         the amount of bytes written so far
+        throttled_seconds:  the time spent waiting for tokens so far
+
+    """
+
+    def __init__(self, rate: int | None, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.sent_bytes = 0
+        self.throttled_seconds = 0.0
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+
+    def max_write_size(self, size: int) -> int:
+        """The size of the pieces a write of the given size must be split in."""
+        if self.rate is None:
+            return max(size, 1)
+
+        return max(min(size, self.burst), 1)
+
+    def acquire(self, size: int) -> None:
+        """Wait until the given amount of bytes, at most the burst size, may be
+        written.
+        """
+        self.sent_bytes += size
+        if self.rate is None:
+            return
+
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate) - size
+        self._updated_at = now
+
+        if self._tokens < 0:
+            # the bucket is in debt until the tokens are refilled, which is accounted
+            # for by the next acquisition
+            delay = -self._tokens / self.rate
+            time.sleep(delay)
+            self.throttled_seconds += delay
+
+
+def _write_chunk(conn: socket.socket, chunk: bytes | memoryview, rate_limiter: _RateLimiter | None) -> None:
+    """Write a serialized chunk of a packet to the connection, in pieces paced by the
+    rate limiter.
+    """
+    file = fs.sendable_file(chunk)
+    step = max(len(chunk), 1) if rate_limiter is None else rate_limiter.max_write_size(len(chunk))
+    view = memoryview(chunk)
+
+    for offset in range(0, len(chunk), step):
+        size = min(step, len(chunk) - offset)
+        if rate_limiter is not None:
+            rate_limiter.acquire(size)
+
+        if file is None:
+            conn.sendall(view[offset : offset + size])
+        else:
+            # the payload is the whole content of a range file, which is copied to
+            # the socket by the kernel
+            conn.sendfile(file, offset, size)
+
+
+def _write_packet(
+    conn: socket.socket, packet: protocol.OnTheWirePacket, rate_limiter: _RateLimiter | None = None
+) -> None:
+    """Serialize the packet and stream it through the given connection, chunk by chunk,
+    without materializing the whole serialized packet.
+
+    The data of ranges mapped from their files (see SENDER_SENDFILE) are written
+    with sendfile. Writes are paced by the given rate limiter, if any.
+    """
+    cork = settings.SENDER_TCP_CORK and hasattr(socket, "TCP_CORK")
+    if cork:
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, 1)
+
+    for chunk in codec.iter_encode(packet, codec.WireFormat(settings.SENDER_WIRE_FORMAT)):
+        _write_chunk(conn, chunk, rate_limiter)
+
+    if cork:
+        # flush the end of the packet
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, 0)
+
+
+def _send_through_socket(
+    packet: protocol.OnTheWirePacket, endpoint: tuple[str, int], rate_limiter: _RateLimiter | None = None
+) -> None:
+    """Serialize the packet and stream it through a new connection to a Lidi sender
+    service.
+    """
+    with _connect(endpoint) as conn:
+        logger.info({LOG_KEY: "sender_start_sending", "LIDIS_HOST": endpoint[0], "LIDIS_PORT": endpoint[1]})
+        _write_packet(conn, packet, rate_limiter)
         logger.info({LOG_KEY: "sender_data_sent"})
 
 
-def _is_poison_pill(data: bytes | None) -> bool:
-    """Tell whether the data inputted is a 'poison pill' i.e. a packet signaling that
+class _PersistentConnection:
+    """A connection to the Lidi sender service kept open to send packets one after
+    the other, which avoids going through a TCP handshake and slow start for each
+    packet.
+
+    When the connection fails, the packet being sent is sent again from the start on
+    a new connection, after a delay doubling with each failed attempt. The receiver
+    discards the truncated packet of the failed connection.
+    """
+
+    def __init__(self, endpoint: tuple[str, int], rate_limiter: _RateLimiter | None = None) -> None:
+        self._conn: socket.socket | None = None
+        self._endpoint = endpoint
+        self._rate_limiter = rate_limiter
+
+    def send(self, packet: protocol.OnTheWirePacket) -> None:
+        """Serialize the packet and stream it through the connection, reconnecting
+        to the Lidi sender service if needed.
+
+        Raises:
+            OSError: if the packet could not be sent after SENDER_RECONNECT_ATTEMPTS
+                reconnections.
+            SerializationError: if the serialization of the packet fails.
+
+        """
+        backoff = settings.SENDER_RECONNECT_BACKOFF
+        attempt = 0
+
+        while True:
+            try:
+                if self._conn is None:
+                    self._conn = _connect(self._endpoint)
+                    logger.info(
+                        {
+                            LOG_KEY: "sender_connected",
+                            "LIDIS_HOST": self._endpoint[0],
+                            "LIDIS_PORT": self._endpoint[1],
+                        }
+                    )
+
+                _write_packet(self._conn, packet, self._rate_limiter)
+            except OSError as error:
+                # a partially written packet cannot be resumed, the connection is
+                # closed so that the receiver discards it
+                self.close()
+
+                if attempt >= settings.SENDER_RECONNECT_ATTEMPTS:
+                    raise
+
+                attempt += 1
+                logger.warning(
+                    {
+                        LOG_KEY: "sender_reconnect",
+                        "message": f"Reconnecting to the Lidi sender service in {backoff}s.",
+                        "attempt": attempt,
+                        "error": str(error),
+                    }
+                )
+                time.sleep(backoff)
+                backoff = min(backoff * 2, settings.SENDER_RECONNECT_BACKOFF_MAX)
+            except BaseException:
+                self.close()
+                raise
+            else:
+                logger.info({LOG_KEY: "sender_data_sent"})
+                return
+
+    def close(self) -> None:
+        """Close the connection, if open."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _is_poison_pill(packet: protocol.OnTheWirePacket | None) -> bool:
+    """Tell whether the packet inputted is a 'poison pill' i.e. a packet signaling that
     the sender thread must stop.
 
     """
-    return data is None
+    return packet is None
 
 
 class _SenderThread(threading.Thread):
-    def __init__(self, sending_queue: queue.Queue):
+    def __init__(self, sending_queue: queue.Queue, endpoint: tuple[str, int] | None = None):
         super().__init__()
         self._queue = sending_queue
+        self._endpoint = endpoint or _lidis_endpoints()[0]
+        self.failed_sends = 0
+        self.rate_limiter = _RateLimiter(settings.SENDER_RATE_LIMIT, settings.SENDER_RATE_LIMIT_BURST)
 
     def run(self) -> None:
-        while True:
-            data = self._queue.get(block=True)
+        send: Callable[[protocol.OnTheWirePacket], None] = functools.partial(
+            _send_through_socket, endpoint=self._endpoint, rate_limiter=self.rate_limiter
+        )
+        connection = None
 
-            if _is_poison_pill(data):
-                break
+        if settings.SENDER_PERSISTENT_CONNECTION:
+            connection = _PersistentConnection(self._endpoint, self.rate_limiter)
+            send = connection.send
+
+        try:
+            self._send_queued_packets(send)
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def _send_queued_packets(self, send: Callable[[protocol.OnTheWirePacket], None]) -> None:
+        while True:
+            waiting_since = time.perf_counter()
+            packet = self._queue.get(block=True)
 
             try:
-                _send_through_socket(data)
-            except socket.error as error:
-                logger.error(
-                    {
-                        LOG_KEY: "sender_thread_failure",
-                        "message": "Failed to send data through the socket.",
-                        "error": str(error),
-                    }
-                )
+                if _is_poison_pill(packet):
+                    break
+
+                self._send_packet(send, packet, waiting_since)
+            finally:
+                self._queue.task_done()
+
+    def _send_packet(
+        self, send: Callable[[protocol.OnTheWirePacket], None], packet: protocol.OnTheWirePacket, waiting_since: float
+    ) -> None:
+        """Send a packet, logging the failures and the timings of the sending."""
+        sending_since = time.perf_counter()
+        sent_bytes = self.rate_limiter.sent_bytes
+        throttled_seconds = self.rate_limiter.throttled_seconds
+        try:
+            send(packet)
+        except protocol.SerializationError as error:
+            self.failed_sends += 1
+            logger.error(
+                {
+                    LOG_KEY: "sender_thread_failure",
+                    "message": "Failed to serialize the packet.",
+                    "error": str(error.__cause__),
+                    "failed_sends": self.failed_sends,
+                }
+            )
+        except socket.error as error:
+            self.failed_sends += 1
+            logger.error(
+                {
+                    LOG_KEY: "sender_thread_failure",
+                    "message": "Failed to send data through the socket.",
+                    "error": str(error),
+                    "failed_sends": self.failed_sends,
+                }
+            )
+        else:
+            # the time spent waiting for the packet is the time the link was left
+            # idle because the packet was not generated yet
+            send_seconds = time.perf_counter() - sending_since
+            sent_bytes = self.rate_limiter.sent_bytes - sent_bytes
+            logger.info(
+                {
+                    LOG_KEY: "sender_timings",
+                    "wait_us": round((sending_since - waiting_since) * 1_000_000),
+                    "send_us": round(send_seconds * 1_000_000),
+                    "throttled_us": round((self.rate_limiter.throttled_seconds - throttled_seconds) * 1_000_000),
+                    "sent_bytes": sent_bytes,
+                    "throughput_bytes_per_second": round(sent_bytes / send_seconds) if send_seconds else 0,
+                }
+            )
 
 
 class PacketSender:
     """Serialize OnTheWirePackets and send them to a Lidi sender service through
     a TCP socket using a sender thread.
 
+    Packets are serialized by the sender thread while being written to the socket,
+    so at most PACKET_SENDER_QUEUE_SIZE packets (plus the one being sent) are held
+    in memory.
+
     Attributes:
         last_packet_sent_at:    date at which last packet was sent, None if no packets
                                 have been sent
 
+    Packets are sent either through a new connection each, or one after the other
+    through a persistent connection (see SENDER_PERSISTENT_CONNECTION), at most at
+    SENDER_RATE_LIMIT bytes per second when set.
+
+    When several Lidi sender services are configured (see LIDIS_ENDPOINTS), each one
+    has its own sender thread and connection, and packets are sent through whichever
+    link is free first. The destination reorders the TransferableRanges it receives.
+    A packet carrying a history or revocations is only queued once the packets
+    queued before it have been sent, so that it does not overtake them on another
+    link.
+
     Example:
         with packet_sender.PacketSender() as s:
              s.send(on_the_wire_packet)
@@ -74,27 +345,36 @@ class PacketSender:
 
     def __init__(self) -> None:
         self._queue: queue.Queue = queue.Queue(maxsize=settings.PACKET_SENDER_QUEUE_SIZE)
-        self._sender_thread = _SenderThread(self._queue)
+        self._sender_threads = [_SenderThread(self._queue, endpoint) for endpoint in _lidis_endpoints()]
         self.last_packet_sent_at: datetime.datetime | None = None
 
     def start(self) -> None:
-        """Start the PacketSender i.e. start the sender thread.
+        """Start the PacketSender i.e. start the sender threads.
 
         A PacketSender cannot be stopped then restarted. A new object must be created.
 
         """
-        self._sender_thread.start()
+        for sender_thread in self._sender_threads:
+            sender_thread.start()
 
     def stop(self) -> None:
-        """Stop the PacketSender i.e. ask the sender thread to stop and wait for it to
-        stop.
+        """Stop the PacketSender i.e. ask the sender threads to stop and wait for them
+        to stop.
 
-        The sender thread will stop and this method will return when there is no more
+        The sender threads will stop and this method will return when there is no more
         data packet waiting to be sent in the queue.
 
         """
-        self._send_poison_pill()
-        self._sender_thread.join()
+        for _ in self._sender_threads:
+            self._send_poison_pill()
+
+        for sender_thread in self._sender_threads:
+            sender_thread.join()
+
+    @property
+    def failed_sends(self) -> int:
+        """The number of packets that could not be sent so far."""
+        return sum(sender_thread.failed_sends for sender_thread in self._sender_threads)
 
     def send(self, packet: protocol.OnTheWirePacket) -> None:
         """Submit a OnTheWirePacket for being sent by the PacketSender.
@@ -103,19 +383,23 @@ class PacketSender:
             packet: the OnTheWirePacket to send.
 
         Raises:
-            SenderThreadNotRunningError: if the sender thread is not running, either
+            SenderThreadNotRunningError: if a sender thread is not running, either
             because the PacketSender has not been started, has been stopped,
             or because the sender thread encountered a problem at runtime.
 
         """
-        if not self._sender_thread.is_alive():
+        if not all(sender_thread.is_alive() for sender_thread in self._sender_threads):
             raise SenderThreadNotRunningError()
 
-        self._queue.put(packet.to_bytes(), block=True)
+        if len(self._sender_threads) > 1 and (packet.history is not None or packet.transferable_revocations):
+            # wait for the packets queued before to be sent
+            self._queue.join()
+
+        self._queue.put(packet, block=True)
         self.last_packet_sent_at = timezone.now()
 
     def _send_poison_pill(self) -> None:
-        """Send a poison pill packet to ask the sender thread to stop."""
+        """Send a poison pill packet to ask a sender thread to stop."""
         self._queue.put(None, block=True)
 
     def __enter__(self) -> "PacketSender":
@@ -1,17 +1,79 @@
 import django.core.exceptions as django_exceptions
 from django.conf import settings
 
+from eurydice.common import codec, enums
+
 
 def check_configuration() -> None:
-    """Verify LIDIS configuration
+    """Verify LIDIS and wire format configuration
 
     Raises:
         django_exceptions.ImproperlyConfigured: when LIDIS_HOST or PORT is missing
+            and LIDIS_ENDPOINTS is not set,
+            when SENDER_WIRE_FORMAT is not a known wire format, when
+            TRANSFERABLE_RANGE_COMPRESSION is not a known compression algorithm,
+            when TRANSFERABLE_PARITY_GROUP_SIZE or TRANSFERABLE_PARITY_MAX_OPEN_GROUPS
+            is invalid, when the reconnection settings are negative, when
+            SENDER_SENDFILE is enabled without the framed wire format, when SENDER_PREFETCH_WORKERS or
+            SENDER_DRR_QUANTUM is not positive, when SENDER_EXPRESS_LANE_SHARE
+            is not between 0 and 1, or when SENDER_RATE_LIMIT or
+            SENDER_RATE_LIMIT_BURST is not positive
     """
-    if not all((settings.LIDIS_HOST, settings.LIDIS_PORT)):
+    if not settings.LIDIS_ENDPOINTS and not all((settings.LIDIS_HOST, settings.LIDIS_PORT)):
+        raise django_exceptions.ImproperlyConfigured(
+            "Either both LIDIS_HOST and LIDIS_PORT or LIDIS_ENDPOINTS environment variables must be defined"
+        )
+
+    if settings.SENDER_WIRE_FORMAT not in {wire_format.value for wire_format in codec.WireFormat}:
+        raise django_exceptions.ImproperlyConfigured(
+            f"SENDER_WIRE_FORMAT must be one of {', '.join(wire_format.value for wire_format in codec.WireFormat)}"
+        )
+
+    if settings.TRANSFERABLE_RANGE_COMPRESSION:
+        if settings.TRANSFERABLE_RANGE_COMPRESSION not in enums.TransferableRangeCompression.values:
+            raise django_exceptions.ImproperlyConfigured(
+                f"TRANSFERABLE_RANGE_COMPRESSION must be one of {', '.join(enums.TransferableRangeCompression.values)}"
+            )
+
+    if settings.TRANSFERABLE_PARITY_GROUP_SIZE < 0 or settings.TRANSFERABLE_PARITY_GROUP_SIZE == 1:
+        raise django_exceptions.ImproperlyConfigured(
+            "TRANSFERABLE_PARITY_GROUP_SIZE must be either 0 (disabled) or greater than 1"
+        )
+
+    if settings.TRANSFERABLE_PARITY_MAX_OPEN_GROUPS < 1:
+        raise django_exceptions.ImproperlyConfigured("TRANSFERABLE_PARITY_MAX_OPEN_GROUPS must be positive")
+
+    if (
+        min(
+            settings.SENDER_RECONNECT_ATTEMPTS,
+            settings.SENDER_RECONNECT_BACKOFF,
+            settings.SENDER_RECONNECT_BACKOFF_MAX,
+        )
+        < 0
+    ):
+        raise django_exceptions.ImproperlyConfigured(
+            "SENDER_RECONNECT_ATTEMPTS, SENDER_RECONNECT_BACKOFF and SENDER_RECONNECT_BACKOFF_MAX must not be negative"
+        )
+
+    if settings.SENDER_SENDFILE and settings.SENDER_WIRE_FORMAT != codec.WireFormat.FRAMED.value:
         raise django_exceptions.ImproperlyConfigured(
-            "Both LIDIS_HOST and LIDIS_PORT environment variables must be defined"
+            f"SENDER_SENDFILE requires SENDER_WIRE_FORMAT to be {codec.WireFormat.FRAMED.value}"
         )
 
+    if settings.SENDER_PREFETCH_WORKERS < 1:
+        raise django_exceptions.ImproperlyConfigured("SENDER_PREFETCH_WORKERS must be at least 1")
+
+    if settings.SENDER_DRR_QUANTUM <= 0:
+        raise django_exceptions.ImproperlyConfigured("SENDER_DRR_QUANTUM must be positive")
+
+    if not 0 < settings.SENDER_EXPRESS_LANE_SHARE < 1:
+        raise django_exceptions.ImproperlyConfigured("SENDER_EXPRESS_LANE_SHARE must be between 0 and 1 (excluded)")
+
+    if (
+        settings.SENDER_RATE_LIMIT is not None
+        and min(settings.SENDER_RATE_LIMIT, settings.SENDER_RATE_LIMIT_BURST) <= 0
+    ):
+        raise django_exceptions.ImproperlyConfigured("SENDER_RATE_LIMIT and SENDER_RATE_LIMIT_BURST must be positive")
+
 
 __all__ = ("check_configuration",)
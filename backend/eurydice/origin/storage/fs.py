@@ -1,4 +1,6 @@
+import mmap
 from pathlib import Path
+from typing import BinaryIO
 
 from django.conf import settings
 
@@ -43,3 +45,41 @@ def read_bytes(transferable_range: TransferableRange) -> bytes:
     """
     path = file_path(transferable_range)
     return path.read_bytes()
+
+
+class MappedFile(mmap.mmap):
+    """
+    A read-only memory map of the data of a transferable range.
+
+    The mapped file is kept open in the `file` attribute, so that the data can also be
+    sent with `socket.sendfile`, even after the file has been deleted.
+    """
+
+    file: BinaryIO
+
+
+def map_bytes(transferable_range: TransferableRange) -> memoryview:
+    """
+    Maps in memory the data of a given, non-empty, transferable range, which is only
+    read from the filesystem when accessed.
+    """
+    path = file_path(transferable_range)
+    file = path.open("rb")
+    try:
+        mapped = MappedFile(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except BaseException:
+        file.close()
+        raise
+
+    mapped.file = file
+    return memoryview(mapped)
+
+
+def sendable_file(data: bytes | memoryview) -> BinaryIO | None:
+    """
+    Returns the open file holding exactly the given data, if they map a whole file.
+    """
+    if isinstance(data, memoryview) and isinstance(data.obj, MappedFile) and data.nbytes == len(data.obj):
+        return data.obj.file
+
+    return None
@@ -33,6 +33,24 @@ class TransferableRangeFactory(factory.Factory):
         exclude = ("_byte_offset",)
 
 
+class ProtectedRangeFactory(factory.Factory):
+    byte_offset = factory.Faker("pyint", max_value=settings.TRANSFERABLE_MAX_SIZE)
+    size = factory.Faker("pyint", max_value=1024)
+
+    class Meta:
+        model = protocol.ProtectedRange
+
+
+class TransferableParityFactory(factory.Factory):
+    transferable = factory.SubFactory(TransferableFactory)
+    is_last = factory.Faker("pybool")
+    ranges = factory.List([factory.SubFactory(ProtectedRangeFactory) for _ in range(3)])
+    data = factory.Faker("binary", length=1024)
+
+    class Meta:
+        model = protocol.TransferableParity
+
+
 class TransferableRevocationFactory(factory.Factory):
     transferable_id = factory.Faker("uuid4", cast_to=None)
     user_profile_id = factory.Faker("uuid4", cast_to=None)
@@ -78,6 +96,8 @@ class OnTheWirePacketFactory(factory.Factory):
 __all__ = (
     "TransferableFactory",
     "TransferableRangeFactory",
+    "ProtectedRangeFactory",
+    "TransferableParityFactory",
     "TransferableRevocationFactory",
     "HistoryEntryFactory",
     "HistoryFactory",
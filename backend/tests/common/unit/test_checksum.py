@@ -0,0 +1,24 @@
+from faker import Faker
+
+from eurydice.common import checksum
+
+
+def test_compute_checksum(faker: Faker):
+    data = faker.binary(length=1024)
+
+    computed = checksum.compute(data)
+
+    assert len(computed) == checksum.DIGEST_SIZE
+    assert checksum.compute(memoryview(data)) == computed
+    assert checksum.compute(data[:-1] + bytes([data[-1] ^ 1])) != computed
+
+
+def test_chain_digest(faker: Faker):
+    range_checksums = [checksum.compute(faker.binary(length=100)) for _ in range(3)]
+
+    computed = checksum.chain_digest(range_checksums)
+
+    assert len(computed) == checksum.DIGEST_SIZE
+    assert computed == checksum.extend_chain_digest(checksum.chain_digest(range_checksums[:2]), range_checksums[2])
+    assert checksum.chain_digest(reversed(range_checksums)) != computed
+    assert checksum.chain_digest([]) == checksum.EMPTY_CHAIN_DIGEST
@@ -0,0 +1,193 @@
+import io
+import struct
+import tempfile
+
+import msgpack
+import pytest
+from faker import Faker
+
+from eurydice.common import checksum, codec, compression, enums, protocol
+from tests.common.integration.factory import protocol as protocol_factory
+
+_TRANSFERABLE = [b"0" * 16, "name", b"0" * 16, {}, None, None, None]
+
+
+def _make_packet(faker: Faker, has_history: bool) -> protocol.OnTheWirePacket:
+    return protocol_factory.OnTheWirePacketFactory(
+        transferable_ranges=[
+            protocol_factory.TransferableRangeFactory(data=faker.binary(length=length)) for length in (0, 1, 2**16)
+        ]
+        + [
+            protocol_factory.TransferableRangeFactory(
+                data=compression.compress(b"data" * 1024, enums.TransferableRangeCompression.ZLIB),
+                compression=enums.TransferableRangeCompression.ZLIB,
+                uncompressed_size=len(b"data" * 1024),
+            ),
+            protocol_factory.TransferableRangeFactory(
+                checksum=checksum.compute(b"data"),
+                data=b"data",
+                transferable=protocol_factory.TransferableFactory(
+                    chain_digest=checksum.chain_digest([checksum.compute(b"data")])
+                ),
+            ),
+        ],
+        transferable_parities=[protocol_factory.TransferableParityFactory()],
+        _has_history=has_history,
+    )
+
+
+def _encode(packet: protocol.OnTheWirePacket) -> bytes:
+    return b"".join(codec.iter_encode_framed(packet))
+
+
+class TestFramedCodec:
+    @pytest.mark.parametrize("has_history", [True, False])
+    def test_encode_decode_success(self, has_history: bool, faker: Faker):
+        packet = _make_packet(faker, has_history)
+
+        decoded = codec.decode(_encode(packet))
+
+        assert decoded == packet
+
+    def test_decode_is_zero_copy(self, faker: Faker):
+        serialized = _encode(_make_packet(faker, False))
+
+        decoded = codec.decode_framed(serialized)
+
+        for obj in [*decoded.transferable_ranges, *decoded.transferable_parities]:
+            assert isinstance(obj.data, memoryview)
+            assert obj.data.obj is serialized
+
+    def test_encode_transferables_once(self, faker: Faker):
+        transferable = protocol_factory.TransferableFactory(sha1=None)
+        first, middle, last = (
+            transferable,
+            transferable.model_copy(update={"user_provided_meta": None}),
+            transferable.model_copy(update={"sha1": faker.sha1(raw_output=True)}),
+        )
+        packet = protocol.OnTheWirePacket(
+            transferable_ranges=[
+                protocol_factory.TransferableRangeFactory(transferable=t, byte_offset=i)
+                for i, t in enumerate((first, middle, middle, last))
+            ]
+        )
+        serialized = _encode(packet)
+        _, _, header_length = struct.unpack_from(">4sBI", serialized)
+
+        header = msgpack.unpackb(serialized[struct.calcsize(">4sBI") :][:header_length])
+
+        assert len(header[0]) == 3
+        assert [r[0] for r in header[1]] == [0, 1, 1, 2]
+        assert codec.decode(serialized) == packet
+
+    def test_decode_history_entry_without_meta(self):
+        packet = protocol.OnTheWirePacket(
+            history=protocol.History(entries=[protocol_factory.HistoryEntryFactory(user_provided_meta=None)])
+        )
+
+        assert codec.decode(_encode(packet)) == packet
+
+    def test_decode_msgpack_success(self, faker: Faker):
+        packet = _make_packet(faker, True)
+
+        assert not codec.is_framed(packet.to_bytes())
+        assert codec.decode(packet.to_bytes()) == packet
+
+    def test_iter_encode_msgpack(self, faker: Faker):
+        packet = _make_packet(faker, True)
+
+        assert b"".join(codec.iter_encode(packet, codec.WireFormat.MSGPACK)) == packet.to_bytes()
+
+    def test_iter_encode_error_raises_SerializationError(self):  # noqa: N802
+        packet = protocol.OnTheWirePacket.model_construct(
+            transferable_ranges=[],
+            transferable_revocations=[object()],
+            history=None,
+        )
+
+        with pytest.raises(protocol.SerializationError):
+            list(codec.iter_encode(packet, codec.WireFormat.FRAMED))
+
+    @pytest.mark.parametrize(
+        "header",
+        [
+            # not an array
+            {},
+            # missing fields
+            [[], []],
+            # range with a negative payload length
+            [[_TRANSFERABLE], [[0, True, 0, -1, None, None, False, None]], [], None, []],
+            # range with a negative byte offset
+            [[_TRANSFERABLE], [[0, True, -1, 0, None, None, False, None]], [], None, []],
+            # range with a string byte offset
+            [[_TRANSFERABLE], [[0, True, "0", 0, None, None, False, None]], [], None, []],
+            # range with an unknown compression algorithm
+            [[_TRANSFERABLE], [[0, True, 0, 0, "foo", None, False, None]], [], None, []],
+            # range with a negative uncompressed size
+            [[_TRANSFERABLE], [[0, True, 0, 0, "zlib", -1, False, None]], [], None, []],
+            # range with a string uncompressed size
+            [[_TRANSFERABLE], [[0, True, 0, 0, "zlib", "0", False, None]], [], None, []],
+            # range with a string checksum
+            [[_TRANSFERABLE], [[0, True, 0, 0, None, None, False, "0"]], [], None, []],
+            # range referencing an unknown transferable
+            [[_TRANSFERABLE], [[1, True, 0, 0, None, None, False, None]], [], None, []],
+            # range referencing a transferable with a negative index
+            [[_TRANSFERABLE], [[-1, True, 0, 0, None, None, False, None]], [], None, []],
+            # transferable with an invalid UUID
+            [[[b"0", "name", b"0" * 16, {}, None, None, None]], [], [], None, []],
+            # transferable with invalid metadata
+            [[[b"0" * 16, "name", b"0" * 16, {"a": 1}, None, None, None]], [], [], None, []],
+            # revocation with an unknown reason
+            [[], [], [[b"0" * 16, b"0" * 16, "FOO", "name", None]], None, []],
+            # history entry with a non final state
+            [
+                [],
+                [],
+                [],
+                [[b"0" * 16, b"0" * 16, enums.OutgoingTransferableState.ONGOING.value, "name", None, None]],
+                [],
+            ],
+            # parity with an invalid protected range
+            [[_TRANSFERABLE], [], [], None, [[0, True, [[0]], 0]]],
+        ],
+    )
+    def test_decode_invalid_header_raises_DeserializationError(self, header: object):  # noqa: N802
+        packed = msgpack.packb(header)
+        serialized = struct.pack(">4sBI", codec.MAGIC, codec.SCHEMA_VERSION, len(packed)) + packed
+
+        with pytest.raises(protocol.DeserializationError):
+            codec.decode(serialized)
+
+    def test_decode_unknown_version_raises_DeserializationError(self, faker: Faker):  # noqa: N802
+        serialized = bytearray(_encode(_make_packet(faker, False)))
+        serialized[len(codec.MAGIC)] = codec.SCHEMA_VERSION + 1
+
+        with pytest.raises(protocol.DeserializationError):
+            codec.decode(bytes(serialized))
+
+    @pytest.mark.parametrize("delta", [-1, 1])
+    def test_decode_payload_length_mismatch_raises_DeserializationError(  # noqa: N802
+        self, delta: int, faker: Faker
+    ):
+        serialized = _encode(_make_packet(faker, False))
+        serialized = serialized[:-1] if delta < 0 else serialized + b"\x00"
+
+        with pytest.raises(protocol.DeserializationError):
+            codec.decode(serialized)
+
+
+class TestIterFromStream:
+    @pytest.mark.parametrize("wire_format", list(codec.WireFormat))
+    def test_iter_from_stream_success(self, wire_format: codec.WireFormat, faker: Faker):
+        packets = [_make_packet(faker, True), protocol.OnTheWirePacket(), _make_packet(faker, False)]
+        stream = io.BufferedReader(
+            io.BytesIO(b"".join(b"".join(codec.iter_encode(packet, wire_format)) for packet in packets))
+        )
+
+        assert list(codec.iter_from_stream(stream, tempfile.TemporaryFile)) == packets
+
+    def test_iter_from_stream_truncated_raises_DeserializationError(self, faker: Faker):  # noqa: N802
+        stream = io.BufferedReader(io.BytesIO(_encode(_make_packet(faker, False))[:-1]))
+
+        with pytest.raises(protocol.DeserializationError):
+            list(codec.iter_from_stream(stream, tempfile.TemporaryFile))
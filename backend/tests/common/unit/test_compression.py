@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from eurydice.common import compression, enums
+
+_ZLIB = enums.TransferableRangeCompression.ZLIB
+_COMPRESSIBLE_DATA = b"timestamp,user,action\n" + b"2024-01-01T00:00:00,alice,login\n" * 4096
+
+
+def test_compress_decompress_success():
+    compressed = compression.compress(_COMPRESSIBLE_DATA, _ZLIB)
+
+    assert len(compressed) < len(_COMPRESSIBLE_DATA)
+    assert compression.decompress(compressed, _ZLIB, len(_COMPRESSIBLE_DATA)) == _COMPRESSIBLE_DATA
+
+
+def test_decompress_in_several_chunks_success():
+    data = os.urandom(256 * 1024)
+
+    assert compression.decompress(compression.compress(data, _ZLIB), _ZLIB, len(data)) == data
+
+
+@pytest.mark.parametrize("offset", [-1, 1])
+def test_decompress_size_mismatch_raises_CompressionError(offset: int):  # noqa: N802
+    compressed = compression.compress(_COMPRESSIBLE_DATA, _ZLIB)
+
+    with pytest.raises(compression.CompressionError):
+        compression.decompress(compressed, _ZLIB, len(_COMPRESSIBLE_DATA) + offset)
+
+
+@pytest.mark.parametrize(
+    "compressed",
+    [b"not zlib data", compression.compress(_COMPRESSIBLE_DATA, _ZLIB)[:-8]],
+)
+def test_decompress_invalid_data_raises_CompressionError(compressed: bytes):  # noqa: N802
+    with pytest.raises(compression.CompressionError):
+        compression.decompress(compressed, _ZLIB, len(_COMPRESSIBLE_DATA))
+
+
+@pytest.mark.parametrize(
+    ("data", "expected"),
+    [
+        (_COMPRESSIBLE_DATA, True),
+        (os.urandom(len(_COMPRESSIBLE_DATA)), False),
+        (b"a" * 16, False),
+    ],
+)
+def test_is_worth_compressing(data: bytes, expected: bool):
+    assert compression.is_worth_compressing(data, _ZLIB) is expected
@@ -0,0 +1,46 @@
+from unittest import mock
+
+import pytest
+from faker import Faker
+
+from eurydice.common import parity
+
+
+@pytest.mark.parametrize("sizes", [(16, 16, 16), (16, 3, 0, 9), (1,)])
+def test_xor_rebuilds_any_buffer(sizes: tuple[int, ...], faker: Faker):
+    buffers = [faker.binary(length=size) for size in sizes]
+    xor_parity = parity.xor(buffers)
+
+    assert len(xor_parity) == max(sizes)
+    for i, buffer in enumerate(buffers):
+        others = buffers[:i] + buffers[i + 1 :]
+        assert parity.xor([xor_parity, *others], size=len(buffer)) == buffer
+
+
+def test_parity_accumulator_digest_size():
+    accumulator = parity.ParityAccumulator()
+    accumulator.add(b"\x01\x02\x03")
+    accumulator.add(memoryview(b"\x01"))
+
+    assert accumulator.digest() == b"\x00\x02\x03"
+    assert accumulator.digest(size=1) == b"\x00"
+    assert accumulator.digest(size=5) == b"\x00\x02\x03\x00\x00"
+
+
+@mock.patch.object(parity, "_CHUNK_SIZE", 4)
+def test_parity_accumulator_xors_by_chunks(faker: Faker):
+    buffers = [faker.binary(length=size) for size in (10, 7, 13)]
+    expected = bytearray(13)
+    for buffer in buffers:
+        for i, byte in enumerate(buffer):
+            expected[i] ^= byte
+
+    accumulator = parity.ParityAccumulator()
+    for buffer in buffers:
+        accumulator.add(memoryview(buffer))
+
+    assert accumulator.digest() == expected
+
+
+def test_xor_empty():
+    assert parity.xor([]) == b""
@@ -1,7 +1,10 @@
 import hashlib
+import io
+import tempfile
 from unittest import mock
 
 import humanfriendly as hf
+import msgpack
 import pydantic
 import pytest
 from faker import Faker
@@ -35,6 +38,22 @@ class TestHistoryEntry:
             )
 
 
+class TestTransferableRange:
+    @pytest.mark.parametrize("field", ["byte_offset", "uncompressed_size"])
+    def test_validation_failure_negative(self, field: str, faker: Faker):
+        fields = {"byte_offset": 0, "uncompressed_size": 0, field: -1}
+        with pytest.raises(pydantic.ValidationError):
+            protocol.TransferableRange(
+                transferable=protocol.Transferable(
+                    id=faker.uuid4(), name="archive.zip", user_profile_id=faker.uuid4(), user_provided_meta=None
+                ),
+                is_last=True,
+                data=b"",
+                compression=enums.TransferableRangeCompression.ZLIB,
+                **fields,
+            )
+
+
 def test__pack_default_success_uuid(faker: Faker):
     obj = faker.uuid4(cast_to=None)
     assert protocol._pack_default(obj) == str(obj)
@@ -124,10 +143,92 @@ class TestOnTheWirePacket:
         with pytest.raises(protocol.SerializationError):
             packet.to_bytes()
 
+    @pytest.mark.parametrize("data_size", [0, 10, protocol._ZERO_COPY_MIN_SIZE, 2**16 + 1])
+    def test_iter_bytes_matches_msgpack(self, data_size: int, faker: Faker):
+        data = faker.binary(length=data_size)
+        packet = protocol.OnTheWirePacket(
+            transferable_ranges=[
+                protocol.TransferableRange(
+                    transferable=protocol.Transferable(
+                        id=faker.uuid4(),
+                        name=faker.file_name(),
+                        user_profile_id=faker.uuid4(),
+                        user_provided_meta={"Meta-Foo": "bar"},
+                    ),
+                    byte_offset=0,
+                    data=data,
+                    is_last=False,
+                )
+            ]
+        )
+
+        chunks = list(packet.iter_bytes())
+
+        assert b"".join(chunks) == msgpack.packb(packet.dict(), default=protocol._pack_default)
+        if data_size >= protocol._ZERO_COPY_MIN_SIZE:
+            assert any(isinstance(chunk, memoryview) and chunk.obj is data for chunk in chunks)
+
     def test_from_bytes_error_raises_DeserializationError(self):  # noqa: N802
         with pytest.raises(protocol.DeserializationError):
             protocol.OnTheWirePacket.from_bytes(b"hello, world")
 
+    @mock.patch.object(protocol, "_SPOOL_CHUNK_SIZE", 100)
+    def test_iter_from_stream_success(self, faker: Faker):
+        transferable = protocol.Transferable(
+            id=faker.uuid4(),
+            name=faker.file_name(),
+            user_profile_id=faker.uuid4(),
+            user_provided_meta={"Meta-Foo": "bar"},
+        )
+        packets = [
+            protocol.OnTheWirePacket(
+                transferable_ranges=[
+                    protocol.TransferableRange(
+                        transferable=transferable,
+                        byte_offset=0,
+                        data=faker.binary(length=length),
+                        is_last=False,
+                    )
+                    for length in (0, 10, 2**8, 2**16)
+                ],
+                transferable_parities=[
+                    protocol.TransferableParity(
+                        transferable=transferable,
+                        is_last=False,
+                        ranges=[protocol.ProtectedRange(byte_offset=0, size=2**16)],
+                        data=faker.binary(length=2**16),
+                    )
+                ],
+            ),
+            protocol.OnTheWirePacket(),
+            protocol.OnTheWirePacket(history=protocol.History(entries=[])),
+        ]
+        stream = io.BytesIO(b"".join(packet.to_bytes() for packet in packets))
+
+        received = list(protocol.OnTheWirePacket.iter_from_stream(stream, tempfile.TemporaryFile))
+
+        assert len(received) == len(packets)
+        for received_packet, packet in zip(received, packets):
+            assert received_packet.history == packet.history
+            assert received_packet.transferable_revocations == packet.transferable_revocations
+            assert [r.transferable for r in received_packet.transferable_ranges] == [
+                r.transferable for r in packet.transferable_ranges
+            ]
+            assert [bytes(r.data) for r in received_packet.transferable_ranges] == [
+                r.data for r in packet.transferable_ranges
+            ]
+            assert [bytes(p.data) for p in received_packet.transferable_parities] == [
+                p.data for p in packet.transferable_parities
+            ]
+
+    def test_iter_from_stream_empty_stream(self):
+        assert list(protocol.OnTheWirePacket.iter_from_stream(io.BytesIO(b""), tempfile.TemporaryFile)) == []
+
+    @pytest.mark.parametrize("serialized", [b"hello, world", protocol.OnTheWirePacket().to_bytes()[:-1]])
+    def test_iter_from_stream_error_raises_DeserializationError(self, serialized: bytes):  # noqa: N802
+        with pytest.raises(protocol.DeserializationError):
+            list(protocol.OnTheWirePacket.iter_from_stream(io.BytesIO(serialized), tempfile.TemporaryFile))
+
 
 @pytest.mark.parametrize(
     ("packet", "expected_emptiness"),
@@ -151,6 +252,11 @@ class TestOnTheWirePacket:
             protocol.OnTheWirePacket(transferable_revocations=[mock.Mock(spec=protocol.TransferableRevocation)]),
             False,
         ),
+        # packet with at least one transferable parity is not empty
+        (
+            protocol.OnTheWirePacket(transferable_parities=[mock.Mock(spec=protocol.TransferableParity)]),
+            False,
+        ),
     ],
 )
 def test_on_the_wire_packet_is_empty(
@@ -129,6 +129,19 @@ def test_select_transferables_to_remove_success_and_ongoing_transferables(
     assert retrieved == expected_selected_transferable_id
 
 
+@pytest.mark.django_db()
+def test_select_transferables_to_remove_skips_post_ingestion_jobs(
+    settings: conf.Settings,
+):
+    settings.FILE_REMOVER_EXPIRE_TRANSFERABLES_AFTER = datetime.timedelta(seconds=1)
+
+    expired_date = timezone.now() - settings.FILE_REMOVER_EXPIRE_TRANSFERABLES_AFTER - datetime.timedelta(seconds=1)
+    factory.PostIngestionJobFactory(incoming_transferable__created_at=expired_date)
+
+    file_remover = DestinationFileRemover()
+    assert not list(file_remover._select_transferables_to_remove())
+
+
 @pytest.mark.django_db()
 def test_remove_transferable_success(
     caplog: pytest.LogCaptureFixture,
@@ -97,6 +97,8 @@ def test__generate_metrics(
             + recent_transferable_nb[States.REMOVED]
         ),
         "recent_errors": recent_transferable_nb[States.ERROR],
+        "pending_post_ingestion_jobs": 0,
+        "recent_post_ingestion_job_latency": None,
         "last_packet_received_at": None,
     }
 
@@ -165,3 +167,23 @@ def test__metrics_permissions_allow(api_client: test.APIClient):
     response = api_client.get(url)
 
     assert response.status_code == 200
+
+
+@pytest.mark.django_db()
+def test__post_ingestion_job_metrics(faker: Faker, settings: conf.Settings):
+    settings.METRICS_SLIDING_WINDOW = 3600
+    now = faker.date_time_this_decade(tzinfo=timezone.get_current_timezone())
+
+    for queued_seconds, finished in ((10, False), (20, True), (40, True), (7200, True)):
+        with freezegun.freeze_time(now - timedelta(seconds=queued_seconds)):
+            job = factory.PostIngestionJobFactory()
+        if finished:
+            job.finished_at = now - timedelta(seconds=queued_seconds // 2)
+            job.save(update_fields=["finished_at"])
+
+    with freezegun.freeze_time(now):
+        metrics_object = metrics.MetricsView.get_object(None)
+
+    assert metrics_object["pending_post_ingestion_jobs"] == 1
+    # the job finished outside of the sliding window is not accounted for
+    assert metrics_object["recent_post_ingestion_job_latency"] == 15
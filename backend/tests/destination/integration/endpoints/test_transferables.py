@@ -386,6 +386,7 @@ class TestIncomingTransferable:
                     "Content-Type": "application/octet-stream",
                     "Content-Disposition": f'attachment; filename="{filename}"',
                     "Digest": "SHA=" + base64.b64encode(obj.sha1).decode("utf-8"),
+                    "Chain-Digest": base64.b64encode(obj.chain_digest).decode("utf-8"),
                 }.items()
             )
             assert response.getvalue() == data
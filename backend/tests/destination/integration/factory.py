@@ -53,6 +53,8 @@ class IncomingTransferableFactory(factory.django.DjangoModelFactory):
     def rehash_intermediary(self) -> bytes:
         return rehash.sha1_to_bytes(hashlib.sha1(self._random_bytes))  # nosec: B303
 
+    rehash_intermediary_offset = factory.SelfAttribute("bytes_received")
+
     user_profile = factory.SubFactory(UserProfileFactory)
 
     user_provided_meta = {"Metadata-Foo": "Bar"}
@@ -82,6 +84,16 @@ class FileUploadPartFactory(factory.django.DjangoModelFactory):
         model = destination_models.FileUploadPart
 
 
+class PostIngestionJobFactory(factory.django.DjangoModelFactory):
+    incoming_transferable = factory.SubFactory(
+        IncomingTransferableFactory,
+        state=destination_models.IncomingTransferableState.ONGOING,
+    )
+
+    class Meta:
+        model = destination_models.PostIngestionJob
+
+
 @contextlib.contextmanager
 def fs_stored_incoming_transferable(data: bytes, **kwargs) -> ContextManager[destination_models.IncomingTransferable]:
     obj = IncomingTransferableFactory(**kwargs)
@@ -99,5 +111,6 @@ __all__ = (
     "UserProfileFactory",
     "IncomingTransferableFactory",
     "FileUploadPartFactory",
+    "PostIngestionJobFactory",
     "fs_stored_incoming_transferable",
 )
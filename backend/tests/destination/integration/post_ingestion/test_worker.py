@@ -0,0 +1,115 @@
+import pathlib
+from concurrent import futures
+
+import pytest
+from django.conf import Settings
+from django.utils import timezone
+
+from eurydice.destination.core import models
+from eurydice.destination.post_ingestion import worker
+from eurydice.destination.storage import fs
+from tests.common.decryption_constants import ENCRYPTED_PART, EXPECTED_PART, user_provided_metadata_encrypted
+from tests.destination.integration import factory
+
+
+def _make_job(data: bytes) -> models.PostIngestionJob:
+    job = factory.PostIngestionJobFactory(
+        incoming_transferable__user_provided_meta=user_provided_metadata_encrypted.copy(),
+        incoming_transferable__size=len(data),
+        incoming_transferable__bytes_received=len(data),
+    )
+    fs.write_bytes(job.incoming_transferable, data)
+    return job
+
+
+def _run_jobs(post_ingestion_worker: worker.PostIngestionWorker) -> None:
+    """Start the pending jobs, wait for them and handle their outcome."""
+    post_ingestion_worker._run()
+    futures.wait(list(post_ingestion_worker._running))
+    post_ingestion_worker._run()
+
+
+@pytest.fixture()
+def post_ingestion_worker(settings: Settings, tmp_path: pathlib.Path) -> worker.PostIngestionWorker:
+    settings.TRANSFERABLE_STORAGE_DIR = tmp_path
+    with futures.ThreadPoolExecutor(max_workers=settings.POST_INGESTION_WORKERS) as executor:
+        post_ingestion_worker = worker.PostIngestionWorker(executor)
+        post_ingestion_worker._ready()
+        yield post_ingestion_worker
+
+
+@pytest.mark.django_db()
+def test_post_ingestion_worker_decrypts_transferable(post_ingestion_worker: worker.PostIngestionWorker):
+    job = _make_job(ENCRYPTED_PART)
+
+    _run_jobs(post_ingestion_worker)
+
+    job.refresh_from_db()
+    assert job.started_at is not None
+    assert job.finished_at is not None
+    assert job.incoming_transferable.state == models.IncomingTransferableState.SUCCESS
+    assert fs.read_bytes(job.incoming_transferable) == EXPECTED_PART
+    assert not fs.decrypted_path(job.incoming_transferable).exists()
+
+
+@pytest.mark.django_db()
+def test_post_ingestion_worker_decryption_error(post_ingestion_worker: worker.PostIngestionWorker):
+    job = _make_job(bytes(len(ENCRYPTED_PART)))
+
+    _run_jobs(post_ingestion_worker)
+
+    job.refresh_from_db()
+    assert job.finished_at is not None
+    assert job.incoming_transferable.state == models.IncomingTransferableState.ERROR
+    assert not fs.file_path(job.incoming_transferable).exists()
+    assert not fs.decrypted_path(job.incoming_transferable).exists()
+
+
+@pytest.mark.django_db()
+def test_post_ingestion_worker_transferable_revoked(post_ingestion_worker: worker.PostIngestionWorker):
+    job = _make_job(ENCRYPTED_PART)
+
+    post_ingestion_worker._run()
+    futures.wait(list(post_ingestion_worker._running))
+    job.incoming_transferable.mark_as_revoked()
+    post_ingestion_worker._run()
+
+    job.refresh_from_db()
+    assert job.finished_at is not None
+    assert job.incoming_transferable.state == models.IncomingTransferableState.REVOKED
+    # the decrypted file replacing the encrypted one after the revocation is removed
+    assert not fs.file_path(job.incoming_transferable).exists()
+    assert not fs.decrypted_path(job.incoming_transferable).exists()
+
+
+@pytest.mark.django_db()
+def test_post_ingestion_worker_runs_at_most_one_job_per_worker(
+    post_ingestion_worker: worker.PostIngestionWorker, settings: Settings
+):
+    jobs = [_make_job(ENCRYPTED_PART) for _ in range(settings.POST_INGESTION_WORKERS + 1)]
+
+    post_ingestion_worker._run()
+
+    assert len(post_ingestion_worker._running) == settings.POST_INGESTION_WORKERS
+    assert models.PostIngestionJob.objects.filter(started_at__isnull=True).count() == 1
+
+    futures.wait(list(post_ingestion_worker._running))
+    _run_jobs(post_ingestion_worker)
+
+    assert not models.PostIngestionJob.objects.filter(id__in=[j.id for j in jobs], finished_at__isnull=True).exists()
+
+
+@pytest.mark.django_db()
+def test_post_ingestion_worker_releases_jobs_of_previous_run(settings: Settings, tmp_path: pathlib.Path):
+    settings.TRANSFERABLE_STORAGE_DIR = tmp_path
+    job = _make_job(ENCRYPTED_PART)
+    models.PostIngestionJob.objects.filter(id=job.id).update(started_at=timezone.now())
+
+    with futures.ThreadPoolExecutor(max_workers=1) as executor:
+        post_ingestion_worker = worker.PostIngestionWorker(executor)
+        post_ingestion_worker._ready()
+        _run_jobs(post_ingestion_worker)
+
+    job.refresh_from_db()
+    assert job.finished_at is not None
+    assert job.incoming_transferable.state == models.IncomingTransferableState.SUCCESS
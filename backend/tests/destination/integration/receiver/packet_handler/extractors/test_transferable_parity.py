@@ -0,0 +1,162 @@
+import hashlib
+import pathlib
+
+import pytest
+from django.conf import Settings
+from faker import Faker
+
+from eurydice.common import parity, protocol
+from eurydice.destination.core import models
+from eurydice.destination.receiver.packet_handler import packet_handler
+from eurydice.destination.storage import fs
+from tests.common.integration import factory as common_factory
+
+_RANGE_SIZE = 1024
+
+
+def _make_packets(faker: Faker, group_size: int, nb_ranges: int) -> tuple[bytes, list[protocol.OnTheWirePacket]]:
+    """Split a file in ranges, each sent in its own packet, the parity of each group
+    of ranges being sent in the packet following the last range of the group.
+
+    As sent by the origin, only the first and last ranges, and the parities covering
+    them, hold the metadata of the Transferable.
+    """
+    data = faker.binary(length=_RANGE_SIZE * nb_ranges - _RANGE_SIZE // 2)
+    transferable = common_factory.TransferableFactory(sha1=hashlib.sha1(data).digest(), size=len(data))
+    middle_transferable = transferable.model_copy(update={"user_provided_meta": None})
+
+    packets = []
+    for start in range(0, len(data), _RANGE_SIZE * group_size):
+        group = [
+            protocol.TransferableRange(
+                transferable=(
+                    transferable if offset == 0 or offset + _RANGE_SIZE >= len(data) else middle_transferable
+                ),
+                is_last=offset + _RANGE_SIZE >= len(data),
+                byte_offset=offset,
+                data=data[offset : offset + _RANGE_SIZE],
+                parity_protected=True,
+            )
+            for offset in range(start, min(start + _RANGE_SIZE * group_size, len(data)), _RANGE_SIZE)
+        ]
+        packets.extend(protocol.OnTheWirePacket(transferable_ranges=[r]) for r in group)
+        packets.append(protocol.OnTheWirePacket())
+        packets[-1].transferable_parities = [
+            protocol.TransferableParity(
+                transferable=transferable,
+                is_last=group[-1].is_last,
+                ranges=[protocol.ProtectedRange(byte_offset=r.byte_offset, size=len(r.data)) for r in group],
+                data=parity.xor(r.data for r in group),
+            )
+        ]
+
+    return data, packets
+
+
+def _receive(packets: list[protocol.OnTheWirePacket], lost_ranges: set[int]) -> None:
+    """Handle the packets, except for the ranges of the packets with the given indexes."""
+    handler = packet_handler.OnTheWirePacketHandler()
+    for i, packet in enumerate(packets):
+        if i in lost_ranges:
+            packet.transferable_ranges = []
+        handler.handle(packet)
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize(
+    "lost_ranges",
+    [
+        set(),
+        # first range
+        {0},
+        # one range in each group
+        {1, 7},
+        # last range of the first group
+        {3},
+        # last range of the transferable
+        {11},
+    ],
+)
+def test_transferable_parity_extractor_rebuilds_missed_ranges(
+    lost_ranges: set[int], faker: Faker, settings: Settings, tmp_path: pathlib.Path
+):
+    settings.TRANSFERABLE_STORAGE_DIR = tmp_path
+    data, packets = _make_packets(faker, group_size=4, nb_ranges=10)
+
+    _receive(packets, lost_ranges)
+
+    transferable = models.IncomingTransferable.objects.get()
+    assert transferable.state == models.IncomingTransferableState.SUCCESS
+    assert transferable.user_provided_meta == packets[-1].transferable_parities[0].transferable.user_provided_meta
+    assert fs.read_bytes(transferable) == data
+    assert not fs.stash_path(transferable).exists()
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize(
+    ("lost_ranges", "lost_parities"),
+    [
+        # two ranges of the same group
+        ({1, 2}, set()),
+        # a range and the parity of its group
+        ({6}, {9}),
+    ],
+)
+def test_transferable_parity_extractor_unrecoverable_ranges(
+    lost_ranges: set[int], lost_parities: set[int], faker: Faker, settings: Settings, tmp_path: pathlib.Path
+):
+    settings.TRANSFERABLE_STORAGE_DIR = tmp_path
+    _, packets = _make_packets(faker, group_size=4, nb_ranges=10)
+    for i in lost_parities:
+        packets[i].transferable_parities = []
+
+    _receive(packets, lost_ranges)
+
+    transferable = models.IncomingTransferable.objects.get()
+    assert transferable.state == models.IncomingTransferableState.ERROR
+    assert not fs.file_path(transferable).exists()
+    assert not fs.stash_path(transferable).exists()
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize(
+    "order",
+    [
+        # ranges overtaking each other
+        [1, 0, 2, 3, 4, 7, 5, 6, 8, 9, 11, 10, 12],
+        # parities overtaking the last range of their group
+        [0, 1, 2, 4, 3, 5, 6, 7, 8, 9, 10, 12, 11],
+        # a parity overtaking several ranges of its group
+        [0, 4, 1, 2, 3, 5, 6, 7, 8, 9, 10, 11, 12],
+    ],
+)
+def test_transferable_parity_extractor_reordered_packets(
+    order: list[int], faker: Faker, settings: Settings, tmp_path: pathlib.Path
+):
+    settings.TRANSFERABLE_STORAGE_DIR = tmp_path
+    settings.RECEIVER_REORDER_WINDOW = 4
+    data, packets = _make_packets(faker, group_size=4, nb_ranges=10)
+
+    _receive([packets[i] for i in order], lost_ranges=set())
+
+    transferable = models.IncomingTransferable.objects.get()
+    assert transferable.state == models.IncomingTransferableState.SUCCESS
+    assert fs.read_bytes(transferable) == data
+    assert not fs.stash_path(transferable).exists()
+
+
+@pytest.mark.django_db()
+def test_transferable_parity_extractor_reorder_window_exceeded(
+    faker: Faker, settings: Settings, tmp_path: pathlib.Path
+):
+    settings.TRANSFERABLE_STORAGE_DIR = tmp_path
+    settings.RECEIVER_REORDER_WINDOW = 2
+    _, packets = _make_packets(faker, group_size=4, nb_ranges=10)
+    # the range is lost along with the parity of its group
+    packets[4].transferable_parities = []
+
+    _receive(packets, lost_ranges={1})
+
+    transferable = models.IncomingTransferable.objects.get()
+    assert transferable.state == models.IncomingTransferableState.ERROR
+    assert not fs.stash_path(transferable).exists()
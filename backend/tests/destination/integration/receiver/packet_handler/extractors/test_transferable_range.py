@@ -1,13 +1,22 @@
 import hashlib
 import logging
+import pathlib
+import threading
+from unittest import mock
 
 import humanfriendly as hf
 import pytest
+from django import db
 from django.conf import Settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from faker import Faker
 
+from eurydice.common import checksum, protocol
 from eurydice.destination.core import models
+from eurydice.destination.receiver import sha1_cache, transferable_ingestion_fs
 from eurydice.destination.receiver.packet_handler import extractors
+from eurydice.destination.receiver.packet_handler.extractors import transferable_range as transferable_range_extractor
 from eurydice.destination.storage import fs
 from eurydice.destination.utils import rehash
 from tests.common.decryption_constants import user_provided_metadata_encrypted
@@ -24,6 +33,7 @@ def _clean_transferables_test_folder_before_each_test(db) -> None:  # noqa
 
 @pytest.mark.django_db()
 def test_transferable_range_extractor_success(settings: Settings):
+    settings.RECEIVER_SHA1_CHECKPOINT_INTERVAL = 1
     extractor = extractors.TransferableRangeExtractor()
 
     transferable = common_factory.TransferableFactory(sha1=None, size=None)
@@ -86,7 +96,6 @@ def test_transferable_range_extractor_success(settings: Settings):
     assert queried_transferable.state == models.IncomingTransferableState.SUCCESS
     assert queried_transferable.bytes_received == final_transferable_size
     assert queried_transferable.size == final_transferable_size
-    assert bytes(queried_transferable.rehash_intermediary) == rehash.sha1_to_bytes(final_transferable_sha1)
     assert queried_transferable.finished_at is not None
     assert bytes(queried_transferable.sha1) == final_transferable_sha1.digest()
 
@@ -133,7 +142,6 @@ def test_transferable_range_extractor_success_small_transferable_range(
     assert queried_transferable.state == models.IncomingTransferableState.SUCCESS
     assert queried_transferable.bytes_received == transferable_range_size
     assert queried_transferable.size == transferable_range_size
-    assert bytes(queried_transferable.rehash_intermediary) == rehash.sha1_to_bytes(transferable_range_digest)
     assert queried_transferable.finished_at is not None
     assert bytes(queried_transferable.sha1) == transferable_range_digest.digest()
     assert queried_transferable.file_upload_parts.count() == 0
@@ -161,6 +169,336 @@ def test_transferable_range_extractor_missed_transferable_range(faker: Faker):
     assert queried_transferable.finished_at is not None
 
 
+@pytest.mark.django_db()
+@pytest.mark.parametrize(
+    ("order", "expected_state"),
+    [
+        ([2, 1, 0, 3], models.IncomingTransferableState.SUCCESS),
+        ([3, 0, 2, 1], models.IncomingTransferableState.SUCCESS),
+        # the first range is still missing after the reorder window
+        ([1, 2, 3], models.IncomingTransferableState.ONGOING),
+        ([1, 2, 3, 0], models.IncomingTransferableState.SUCCESS),
+    ],
+)
+def test_transferable_range_extractor_reordered_transferable_ranges(
+    order: list[int],
+    expected_state: models.IncomingTransferableState,
+    faker: Faker,
+    settings: Settings,
+    tmp_path: pathlib.Path,
+):
+    settings.TRANSFERABLE_STORAGE_DIR = tmp_path
+    settings.RECEIVER_REORDER_WINDOW = 3
+    extractor = extractors.TransferableRangeExtractor()
+
+    data = faker.binary(length=4 * 100)
+    transferable = common_factory.TransferableFactory(sha1=hashlib.sha1(data).digest(), size=len(data))
+    transferable_ranges = [
+        common_factory.TransferableRangeFactory(
+            transferable=transferable,
+            byte_offset=offset,
+            data=data[offset : offset + 100],
+            checksum=checksum.compute(data[offset : offset + 100]),
+            is_last=offset + 100 == len(data),
+        )
+        for offset in range(0, len(data), 100)
+    ]
+
+    for i in order:
+        extractor.extract(common_factory.OnTheWirePacketFactory(transferable_ranges=[transferable_ranges[i]]))
+
+    queried_transferable = models.IncomingTransferable.objects.get(id=transferable.id)
+    assert queried_transferable.state == expected_state
+    if expected_state == models.IncomingTransferableState.SUCCESS:
+        assert fs.read_bytes(queried_transferable) == data
+        assert not fs.stash_path(queried_transferable).exists()
+
+
+@pytest.mark.django_db()
+def test_transferable_range_extractor_reorder_window_exceeded(settings: Settings, tmp_path: pathlib.Path):
+    settings.TRANSFERABLE_STORAGE_DIR = tmp_path
+    settings.RECEIVER_REORDER_WINDOW = 2
+    extractor = extractors.TransferableRangeExtractor()
+
+    transferable = common_factory.TransferableFactory()
+    for byte_offset in (100, 200, 300):
+        transferable_range = common_factory.TransferableRangeFactory(
+            transferable=transferable, byte_offset=byte_offset, is_last=False
+        )
+        extractor.extract(common_factory.OnTheWirePacketFactory(transferable_ranges=[transferable_range]))
+
+    queried_transferable = models.IncomingTransferable.objects.get(id=transferable.id)
+    assert queried_transferable.state == models.IncomingTransferableState.ERROR
+    assert not fs.stash_path(queried_transferable).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_transferable_range_extractor_parallel_extraction(faker: Faker, settings: Settings, tmp_path: pathlib.Path):
+    settings.TRANSFERABLE_STORAGE_DIR = tmp_path
+    settings.RECEIVER_EXTRACTION_WORKERS = 4
+    extractor = extractors.TransferableRangeExtractor()
+
+    files = [faker.binary(length=300) for _ in range(3)]
+    transferables = [common_factory.TransferableFactory(sha1=hashlib.sha1(d).digest(), size=len(d)) for d in files]
+    # the ranges of the transferables are interleaved in the packet
+    transferable_ranges = [
+        common_factory.TransferableRangeFactory(
+            transferable=transferable,
+            byte_offset=offset,
+            data=data[offset : offset + 100],
+            is_last=offset + 100 == len(data),
+        )
+        for offset in range(0, 300, 100)
+        for transferable, data in zip(transferables, files)
+    ]
+
+    extracting_threads = set()
+    extract_transferable_range = transferable_range_extractor._extract_transferable_range
+
+    def _record_thread(*args, **kwargs):
+        extracting_threads.add(threading.current_thread().name)
+        return extract_transferable_range(*args, **kwargs)
+
+    with mock.patch.object(transferable_range_extractor, "_extract_transferable_range", side_effect=_record_thread):
+        extractor.extract(common_factory.OnTheWirePacketFactory(transferable_ranges=transferable_ranges))
+
+    for transferable, data in zip(transferables, files):
+        queried_transferable = models.IncomingTransferable.objects.get(id=transferable.id)
+        assert queried_transferable.state == models.IncomingTransferableState.SUCCESS
+        assert fs.read_bytes(queried_transferable) == data
+
+    assert all(name.startswith("range-extraction") for name in extracting_threads)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_transferable_range_extractor_parallel_extraction_partitions(
+    faker: Faker, settings: Settings, tmp_path: pathlib.Path
+):
+    settings.TRANSFERABLE_STORAGE_DIR = tmp_path
+    settings.RECEIVER_EXTRACTION_WORKERS = 2
+    settings.RECEIVER_BATCH_EXTRACTION = True
+    extractor = extractors.TransferableRangeExtractor()
+
+    files = [faker.binary(length=100) for _ in range(5)]
+    transferable_ranges = [
+        common_factory.TransferableRangeFactory(
+            transferable=common_factory.TransferableFactory(sha1=hashlib.sha1(data).digest(), size=len(data)),
+            byte_offset=0,
+            data=data,
+            is_last=True,
+        )
+        for data in files
+    ]
+
+    with (
+        mock.patch.object(
+            transferable_range_extractor,
+            "_extract_transferable_ranges_in_worker",
+            side_effect=transferable_range_extractor._extract_transferable_ranges_in_worker,
+        ) as extract_in_worker,
+        mock.patch.object(
+            transferable_ingestion_fs.IngestionBatch,
+            "flush",
+            autospec=True,
+            side_effect=transferable_ingestion_fs.IngestionBatch.flush,
+        ) as flush,
+    ):
+        extractor.extract(common_factory.OnTheWirePacketFactory(transferable_ranges=transferable_ranges))
+
+    # one task per worker, and the changes of the packet written at once
+    assert extract_in_worker.call_count == 2
+    assert flush.call_count == 1
+    assert (
+        models.IncomingTransferable.objects.filter(
+            id__in=[r.transferable.id for r in transferable_ranges], state=models.IncomingTransferableState.SUCCESS
+        ).count()
+        == 5
+    )
+
+
+def _make_batch_packet(faker: Faker, nb_transferables: int) -> tuple[list[bytes], list[protocol.TransferableRange]]:
+    """Make the ranges of a packet holding the first range of some Transferables, and
+    the single range of as many others.
+    """
+    files = [faker.binary(length=200) for _ in range(2 * nb_transferables)]
+    transferable_ranges = []
+    for i, data in enumerate(files):
+        is_last = i % 2 == 1
+        transferable_ranges.append(
+            common_factory.TransferableRangeFactory(
+                transferable=common_factory.TransferableFactory(
+                    sha1=hashlib.sha1(data).digest() if is_last else None, size=len(data)
+                ),
+                byte_offset=0,
+                data=data if is_last else data[:100],
+                is_last=is_last,
+            )
+        )
+
+    return files, transferable_ranges
+
+
+@pytest.mark.django_db()
+def test_transferable_range_extractor_batch_extraction_constant_queries(
+    faker: Faker, settings: Settings, tmp_path: pathlib.Path
+):
+    settings.TRANSFERABLE_STORAGE_DIR = tmp_path
+    settings.RECEIVER_BATCH_EXTRACTION = True
+    extractor = extractors.TransferableRangeExtractor()
+
+    nb_queries = []
+    for nb_transferables in (1, 20):
+        files, transferable_ranges = _make_batch_packet(faker, nb_transferables)
+        with CaptureQueriesContext(connection) as queries:
+            extractor.extract(common_factory.OnTheWirePacketFactory(transferable_ranges=transferable_ranges))
+        nb_queries.append(len(queries))
+
+        for transferable_range, data in zip(transferable_ranges, files):
+            queried_transferable = models.IncomingTransferable.objects.get(id=transferable_range.transferable.id)
+            if transferable_range.is_last:
+                assert queried_transferable.state == models.IncomingTransferableState.SUCCESS
+                assert fs.read_bytes(queried_transferable) == data
+            else:
+                assert queried_transferable.state == models.IncomingTransferableState.ONGOING
+                assert queried_transferable.bytes_received == 100
+                assert queried_transferable.file_upload_parts.count() == 1
+                assert fs.read_bytes(queried_transferable) == data[:100]
+
+    assert nb_queries[0] == nb_queries[1]
+
+    # the last ranges of the ongoing transferables follow the data already received
+    last_ranges = [
+        common_factory.TransferableRangeFactory(
+            transferable=transferable_range.transferable.model_copy(update={"sha1": hashlib.sha1(data).digest()}),
+            byte_offset=100,
+            data=data[100:],
+            is_last=True,
+        )
+        for transferable_range, data in zip(transferable_ranges[::2], files[::2])
+    ]
+    extractor.extract(common_factory.OnTheWirePacketFactory(transferable_ranges=last_ranges))
+
+    for transferable_range, data in zip(last_ranges, files[::2]):
+        queried_transferable = models.IncomingTransferable.objects.get(id=transferable_range.transferable.id)
+        assert queried_transferable.state == models.IncomingTransferableState.SUCCESS
+        assert not queried_transferable.file_upload_parts.exists()
+        assert fs.read_bytes(queried_transferable) == data
+
+
+@pytest.mark.django_db()
+def test_transferable_range_extractor_batch_extraction_flush_failure(
+    faker: Faker, settings: Settings, tmp_path: pathlib.Path
+):
+    settings.TRANSFERABLE_STORAGE_DIR = tmp_path
+    settings.RECEIVER_BATCH_EXTRACTION = True
+    extractor = extractors.TransferableRangeExtractor()
+
+    files, transferable_ranges = _make_batch_packet(faker, 2)
+    extractor.extract(common_factory.OnTheWirePacketFactory(transferable_ranges=transferable_ranges))
+
+    next_ranges = [
+        common_factory.TransferableRangeFactory(
+            transferable=transferable_range.transferable,
+            byte_offset=100,
+            data=data[100:150],
+            is_last=False,
+        )
+        for transferable_range, data in zip(transferable_ranges[::2], files[::2])
+    ]
+    with (
+        mock.patch.object(transferable_ingestion_fs.IngestionBatch, "_write", side_effect=db.DatabaseError),
+        pytest.raises(db.DatabaseError),
+    ):
+        extractor.extract(common_factory.OnTheWirePacketFactory(transferable_ranges=next_ranges))
+
+    # the data of the failed packet is dropped, as the database does not know of it
+    for transferable_range, data in zip(next_ranges, files[::2]):
+        queried_transferable = models.IncomingTransferable.objects.get(id=transferable_range.transferable.id)
+        assert queried_transferable.state == models.IncomingTransferableState.ONGOING
+        assert queried_transferable.bytes_received == 100
+        assert fs.read_bytes(queried_transferable) == data[:100]
+        assert sha1_cache.get(queried_transferable).digest() == hashlib.sha1(data[:100]).digest()
+
+    # the ranges can be ingested again
+    extractor.extract(common_factory.OnTheWirePacketFactory(transferable_ranges=next_ranges))
+
+    for transferable_range, data in zip(next_ranges, files[::2]):
+        queried_transferable = models.IncomingTransferable.objects.get(id=transferable_range.transferable.id)
+        assert queried_transferable.bytes_received == 150
+        assert fs.read_bytes(queried_transferable) == data[:150]
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize(
+    ("sent_chain_digest", "expected_state"),
+    [
+        ("computed", models.IncomingTransferableState.SUCCESS),
+        (None, models.IncomingTransferableState.SUCCESS),
+        (b"\x00" * checksum.DIGEST_SIZE, models.IncomingTransferableState.ERROR),
+    ],
+)
+def test_transferable_range_extractor_chain_digest(
+    sent_chain_digest: bytes | str | None,
+    expected_state: models.IncomingTransferableState,
+    faker: Faker,
+    settings: Settings,
+    tmp_path: pathlib.Path,
+):
+    settings.TRANSFERABLE_STORAGE_DIR = tmp_path
+    extractor = extractors.TransferableRangeExtractor()
+
+    data = faker.binary(length=300)
+    ranges_data = [data[offset : offset + 100] for offset in range(0, 300, 100)]
+    chain_digest = checksum.chain_digest(checksum.compute(d) for d in ranges_data)
+    transferable = common_factory.TransferableFactory(
+        sha1=hashlib.sha1(data).digest(),
+        size=len(data),
+        chain_digest=chain_digest if sent_chain_digest == "computed" else sent_chain_digest,
+    )
+
+    for i, range_data in enumerate(ranges_data):
+        transferable_range = common_factory.TransferableRangeFactory(
+            transferable=transferable,
+            byte_offset=i * 100,
+            data=range_data,
+            is_last=i == len(ranges_data) - 1,
+            # the checksum of a range rebuilt from a parity is unknown
+            checksum=None if i == 1 else checksum.compute(range_data),
+        )
+        extractor.extract(common_factory.OnTheWirePacketFactory(transferable_ranges=[transferable_range]))
+
+    queried_transferable = models.IncomingTransferable.objects.get(id=transferable.id)
+    assert queried_transferable.state == expected_state
+    if expected_state == models.IncomingTransferableState.SUCCESS:
+        assert bytes(queried_transferable.chain_digest) == chain_digest
+
+
+@pytest.mark.django_db()
+def test_transferable_range_extractor_checksum_mismatch(caplog: pytest.LogCaptureFixture, faker: Faker):
+    caplog.set_level(logging.ERROR)
+    extractor = extractors.TransferableRangeExtractor()
+
+    transferable_range_data = faker.binary(10)
+    transferable_range = common_factory.TransferableRangeFactory(
+        byte_offset=0,
+        data=transferable_range_data,
+        checksum=checksum.compute(transferable_range_data[::-1]),
+        is_last=False,
+    )
+
+    packet = common_factory.OnTheWirePacketFactory(transferable_ranges=[transferable_range])
+
+    extractor.extract(packet)
+
+    assert f"expected {transferable_range.checksum.hex()}" in caplog.text
+
+    queried_transferable = models.IncomingTransferable.objects.get(id=transferable_range.transferable.id)
+
+    assert queried_transferable.state == models.IncomingTransferableState.ERROR
+    assert queried_transferable.bytes_received == 0
+    assert not fs.file_path(queried_transferable).exists()
+
+
 @pytest.mark.django_db()
 def test_transferable_range_transferable_already_marked_as_error(
     caplog: pytest.LogCaptureFixture,
@@ -287,7 +625,9 @@ def test_transferable_range_extractor_new_transferable_digest_mismatch(
 )
 def test_transferable_range_extractor_existing_transferable_digest_mismatch(
     reported_sha1: bytes,
+    settings: Settings,
 ):
+    settings.RECEIVER_SHA1_CHECKPOINT_INTERVAL = 1
     extractor = extractors.TransferableRangeExtractor()
 
     first_transferable_range_data = b"0" * hf.parse_size("5KiB")
@@ -360,7 +700,9 @@ def test_transferable_range_extractor_existing_transferable_digest_mismatch(
 def test_transferable_range_extractor_existing_transferable_size_mismatch(
     actual_transferable_size: str,
     reported_transferable_size: str,
+    settings: Settings,
 ):
+    settings.RECEIVER_SHA1_CHECKPOINT_INTERVAL = 1
     extractor = extractors.TransferableRangeExtractor()
 
     first_transferable_range_size = hf.parse_size(actual_transferable_size) // 2
@@ -423,12 +765,15 @@ def test_transferable_range_extractor_existing_transferable_size_mismatch(
 
 
 @pytest.mark.parametrize("transferable_range_size", [2, 21, 25])  # small size, exact size, over size
+@pytest.mark.parametrize("streaming_decryption", [True, False])
 @pytest.mark.django_db()
 def test_transferable_range_extractor_encrypted_multiple_ranges_success(
     settings: Settings,
     transferable_range_size: int,
+    streaming_decryption: bool,
 ):
     settings.TRANSFERABLE_RANGE_SIZE = transferable_range_size
+    settings.RECEIVER_STREAMING_DECRYPTION = streaming_decryption
     extractor = extractors.TransferableRangeExtractor()
 
     transferable_full_data = b"h\xb7\xcf\xde\xe6dJ||\xd1\x9b\x8c\xfc\xd3'`\xcf\xe2\xcb\xf3\x04"
@@ -472,7 +817,6 @@ def test_transferable_range_extractor_encrypted_multiple_ranges_success(
     assert queried_transferable.state == models.IncomingTransferableState.SUCCESS
     assert queried_transferable.bytes_received == len(transferable_full_data)
     assert queried_transferable.size is len(transferable_full_data)
-    assert bytes(queried_transferable.rehash_intermediary) == rehash.sha1_to_bytes(hashlib.sha1(transferable_full_data))
     assert queried_transferable.finished_at is not None
     assert queried_transferable.sha1 is not None
 
@@ -482,6 +826,49 @@ def test_transferable_range_extractor_encrypted_multiple_ranges_success(
         decrypted_data = file.read()
     file_path.unlink()
     assert decrypted_data == expected_final_data
+    assert not fs.decrypted_path(queried_transferable).exists()
+
+
+@pytest.mark.parametrize("streaming_decryption", [True, False])
+@pytest.mark.django_db()
+def test_transferable_range_extractor_encrypted_post_ingestion_queue(
+    settings: Settings,
+    tmp_path: pathlib.Path,
+    streaming_decryption: bool,
+):
+    settings.TRANSFERABLE_STORAGE_DIR = tmp_path
+    settings.POST_INGESTION_QUEUE = True
+    settings.RECEIVER_STREAMING_DECRYPTION = streaming_decryption
+    extractor = extractors.TransferableRangeExtractor()
+
+    transferable_range_data = b"h\xb7\xcf\xde\xe6dJ||\xd1\x9b\x8c\xfc\xd3'`\xcf\xe2\xcb\xf3\x04"
+    transferable_range = common_factory.TransferableRangeFactory(
+        transferable=common_factory.TransferableFactory(
+            sha1=hashlib.sha1(transferable_range_data).digest(),
+            size=len(transferable_range_data),
+            user_provided_meta=user_provided_metadata_encrypted.copy(),
+        ),
+        byte_offset=0,
+        data=transferable_range_data,
+        is_last=True,
+    )
+
+    extractor.extract(common_factory.OnTheWirePacketFactory(transferable_ranges=[transferable_range]))
+
+    queried_transferable = models.IncomingTransferable.objects.get()
+    assert queried_transferable.bytes_received == len(transferable_range_data)
+    assert queried_transferable.size == len(transferable_range_data)
+
+    if streaming_decryption:
+        # decrypted as it was received, there is nothing left to do
+        assert queried_transferable.state == models.IncomingTransferableState.SUCCESS
+        assert not models.PostIngestionJob.objects.exists()
+        assert fs.read_bytes(queried_transferable) == b"test"
+    else:
+        assert queried_transferable.state == models.IncomingTransferableState.ONGOING
+        assert queried_transferable.finished_at is None
+        assert models.PostIngestionJob.objects.get().incoming_transferable == queried_transferable
+        assert fs.read_bytes(queried_transferable) == transferable_range_data
 
 
 @pytest.mark.django_db()
@@ -1,9 +1,12 @@
+import pathlib
 import socket
 import time
+from unittest import mock
 
 import pytest
 from django.test import override_settings
 
+from eurydice.common import codec
 from eurydice.destination.receiver import packet_receiver
 from tests.common.integration.factory import protocol as protocol_factory
 from tests.utils import process_logs
@@ -14,7 +17,7 @@ def test_packet_receiver_success():
     receiver = packet_receiver.PacketReceiver()
     receiver.start()
 
-    receiver_port = receiver._receiver_thread._server.server_address[1]
+    receiver_port = receiver._receiver_threads[0]._server.server_address[1]
 
     packet = protocol_factory.OnTheWirePacketFactory()
     with socket.create_connection(("127.0.0.1", receiver_port)) as conn:
@@ -23,7 +26,7 @@ def test_packet_receiver_success():
     assert receiver.receive() == packet
 
     receiver.stop()
-    assert not receiver._receiver_thread.is_alive()
+    assert not receiver._receiver_threads[0].is_alive()
     assert receiver._queue.empty()
 
 
@@ -32,7 +35,7 @@ def test_packet_receiver_context_manager_success():
     with packet_receiver.PacketReceiver() as receiver:
         packet = protocol_factory.OnTheWirePacketFactory()
 
-        receiver_port = receiver._receiver_thread._server.server_address[1]
+        receiver_port = receiver._receiver_threads[0]._server.server_address[1]
         with socket.create_connection(("127.0.0.1", receiver_port)) as conn:
             conn.sendall(packet.to_bytes())
 
@@ -40,12 +43,31 @@ def test_packet_receiver_context_manager_success():
         assert receiver._queue.empty()
 
 
+@override_settings(PACKET_RECEIVER_PORTS=[0, 0], RECEIVER_BUFFER_MAX_ITEMS=12)
+def test_packet_receiver_several_ports_success():
+    packets = [protocol_factory.OnTheWirePacketFactory() for _ in range(4)]
+
+    with packet_receiver.PacketReceiver() as receiver:
+        receiver_ports = [thread._server.server_address[1] for thread in receiver._receiver_threads]
+        assert len(set(receiver_ports)) == 2
+
+        for i, packet in enumerate(packets):
+            with socket.create_connection(("127.0.0.1", receiver_ports[i % 2])) as conn:
+                conn.sendall(packet.to_bytes())
+
+            assert packet == receiver.receive()
+
+        assert receiver._queue.empty()
+
+    assert not any(thread.is_alive() for thread in receiver._receiver_threads)
+
+
 @override_settings(PACKET_RECEIVER_PORT=0, RECEIVER_BUFFER_MAX_ITEMS=12)
 def test_packet_receiver_receive_multiple_successively_success():
     packets = [protocol_factory.OnTheWirePacketFactory() for _ in range(10)]
 
     with packet_receiver.PacketReceiver() as receiver:
-        receiver_port = receiver._receiver_thread._server.server_address[1]
+        receiver_port = receiver._receiver_threads[0]._server.server_address[1]
         for packet in packets:
             with socket.create_connection(("127.0.0.1", receiver_port)) as conn:
                 conn.sendall(packet.to_bytes())
@@ -55,7 +77,7 @@ def test_packet_receiver_receive_multiple_successively_success():
         assert receiver._queue.empty()
 
 
-@override_settings(PACKET_RECEIVER_PORT=0, RECEIVER_BUFFER_MAX_ITEMS=4)
+@override_settings(PACKET_RECEIVER_PORT=0, RECEIVER_BUFFER_MAX_ITEMS=4, RECEIVER_BACKPRESSURE_TIMEOUT=0)
 def test_packet_receiver_receive_multiple_overflow(caplog: pytest.LogCaptureFixture):
     packets = [protocol_factory.OnTheWirePacketFactory() for _ in range(10)]
 
@@ -63,7 +85,7 @@ def test_packet_receiver_receive_multiple_overflow(caplog: pytest.LogCaptureFixt
     expected_misses = len(packets) - expected_hits
 
     with packet_receiver.PacketReceiver() as receiver:
-        receiver_port = receiver._receiver_thread._server.server_address[1]
+        receiver_port = receiver._receiver_threads[0]._server.server_address[1]
         for packet in packets:
             with socket.create_connection(("127.0.0.1", receiver_port)) as conn:
                 conn.sendall(packet.to_bytes())
@@ -81,16 +103,126 @@ def test_packet_receiver_receive_multiple_overflow(caplog: pytest.LogCaptureFixt
         log_messages = process_logs(caplog.messages)
         errors = [error for error in log_messages if error["log_key"] == "dropped_transferable"]
         assert len(errors) == expected_misses
+        assert receiver.dropped_packets == expected_misses
 
         assert receiver._queue.empty()
 
 
+@override_settings(PACKET_RECEIVER_PORT=0, RECEIVER_BUFFER_MAX_ITEMS=1, RECEIVER_BACKPRESSURE_TIMEOUT=10)
+def test_packet_receiver_backpressure_success(caplog: pytest.LogCaptureFixture):
+    packets = [protocol_factory.OnTheWirePacketFactory() for _ in range(4)]
+
+    with packet_receiver.PacketReceiver() as receiver:
+        receiver_port = receiver._receiver_threads[0]._server.server_address[1]
+        for packet in packets:
+            with socket.create_connection(("127.0.0.1", receiver_port)) as conn:
+                conn.sendall(packet.to_bytes())
+
+        # wait for the receiving threads to block on the full queue
+        time.sleep(0.1)
+
+        received = [receiver.receive(timeout=5) for _ in packets]
+
+    assert received == packets
+    assert receiver.dropped_packets == 0
+    assert receiver.backpressured_packets >= 1
+    assert receiver.backpressure_seconds > 0
+
+    log_messages = process_logs(caplog.messages)
+    assert not [log for log in log_messages if log["log_key"] == "dropped_transferable"]
+
+
+@pytest.mark.parametrize("streaming_decode", [True, False])
+def test_packet_receiver_overflow_spool_success(streaming_decode: bool, tmp_path: pathlib.Path):
+    packets = [protocol_factory.OnTheWirePacketFactory() for _ in range(10)]
+
+    with override_settings(
+        PACKET_RECEIVER_PORT=0,
+        RECEIVER_BUFFER_MAX_ITEMS=2,
+        RECEIVER_BACKPRESSURE_TIMEOUT=0,
+        RECEIVER_STREAMING_DECODE=streaming_decode,
+        RECEIVER_OVERFLOW_DIR=str(tmp_path),
+    ):
+        with packet_receiver.PacketReceiver() as receiver:
+            receiver_port = receiver._receiver_threads[0]._server.server_address[1]
+            for packet in packets:
+                with socket.create_connection(("127.0.0.1", receiver_port)) as conn:
+                    conn.sendall(packet.to_bytes())
+
+            # wait for the receiving thread to read all data
+            time.sleep(0.1)
+            # a packet received while the spool is not drained is spooled after the others
+            packets.append(protocol_factory.OnTheWirePacketFactory())
+            receiver.receive(block=False)
+            with socket.create_connection(("127.0.0.1", receiver_port)) as conn:
+                conn.sendall(packets[-1].to_bytes())
+            time.sleep(0.1)
+
+            received = [receiver.receive(block=False) for _ in packets[1:]]
+
+            assert receiver.dropped_packets == 0
+            assert receiver.spooled_packets == len(packets) - 2
+            assert not list(tmp_path.iterdir())
+
+    assert [p.to_bytes() for p in received] == [p.to_bytes() for p in packets[1:]]
+
+
+@override_settings(PACKET_RECEIVER_PORT=0)
+def test_packet_receiver_concurrent_connections_keep_order():
+    first_packet, second_packet = protocol_factory.OnTheWirePacketFactory.create_batch(2)
+    first_data = first_packet.to_bytes()
+
+    with packet_receiver.PacketReceiver() as receiver:
+        receiver_port = receiver._receiver_threads[0]._server.server_address[1]
+        with socket.create_connection(("127.0.0.1", receiver_port)) as first_conn:
+            first_conn.sendall(first_data[:10])
+
+            # the second connection is read while the first one is still open, but
+            # its packet is only queued after the packet of the first one
+            with socket.create_connection(("127.0.0.1", receiver_port)) as second_conn:
+                second_conn.sendall(second_packet.to_bytes())
+
+            with pytest.raises(packet_receiver.NothingToReceive):
+                receiver.receive(timeout=0.1)
+
+            first_conn.sendall(first_data[10:])
+
+        assert receiver.receive(timeout=5) == first_packet
+        assert receiver.receive(timeout=5) == second_packet
+
+
+@override_settings(PACKET_RECEIVER_PORT=0, RECEIVER_MAX_CONNECTIONS=4, RECEIVER_BUFFER_MAX_ITEMS=12)
+def test_packet_receiver_more_concurrent_connections_than_slots():
+    packets = protocol_factory.OnTheWirePacketFactory.create_batch(5)
+    setup = packet_receiver._RequestHandler.setup
+
+    def _slow_first_connection_setup(handler: packet_receiver._RequestHandler) -> None:
+        setup(handler)
+        if handler._ticket == 0:
+            # let the threads of the following connections run first
+            time.sleep(0.2)
+
+    with (
+        mock.patch.object(packet_receiver._RequestHandler, "setup", _slow_first_connection_setup),
+        packet_receiver.PacketReceiver() as receiver,
+    ):
+        receiver_port = receiver._receiver_threads[0]._server.server_address[1]
+        connections = [socket.create_connection(("127.0.0.1", receiver_port)) for _ in packets]
+        for conn, packet in zip(connections, packets):
+            conn.sendall(packet.to_bytes())
+            conn.close()
+
+        received = [receiver.receive(timeout=5) for _ in packets]
+
+    assert received == packets
+
+
 @override_settings(PACKET_RECEIVER_PORT=0, RECEIVER_BUFFER_MAX_ITEMS=12)
 def test_packet_receiver_receive_batch_success():
     packets = [protocol_factory.OnTheWirePacketFactory() for _ in range(10)]
 
     with packet_receiver.PacketReceiver() as receiver:
-        receiver_port = receiver._receiver_thread._server.server_address[1]
+        receiver_port = receiver._receiver_threads[0]._server.server_address[1]
         for packet in packets:
             with socket.create_connection(("127.0.0.1", receiver_port)) as conn:
                 conn.sendall(packet.to_bytes())
@@ -101,10 +233,59 @@ def test_packet_receiver_receive_batch_success():
         assert receiver._queue.empty()
 
 
+@override_settings(PACKET_RECEIVER_PORT=0, RECEIVER_BUFFER_MAX_ITEMS=12, RECEIVER_STREAMING_DECODE=True)
+def test_packet_receiver_streaming_decode_success():
+    packets = [protocol_factory.OnTheWirePacketFactory() for _ in range(3)]
+
+    with packet_receiver.PacketReceiver() as receiver:
+        receiver_port = receiver._receiver_threads[0]._server.server_address[1]
+        with socket.create_connection(("127.0.0.1", receiver_port)) as conn:
+            for packet in packets:
+                conn.sendall(packet.to_bytes())
+
+        for packet in packets:
+            received = receiver.receive()
+            assert [bytes(r.data) for r in received.transferable_ranges] == [r.data for r in packet.transferable_ranges]
+            assert [r.transferable for r in received.transferable_ranges] == [
+                r.transferable for r in packet.transferable_ranges
+            ]
+            assert received.transferable_revocations == packet.transferable_revocations
+            assert received.history == packet.history
+
+        assert receiver._queue.empty()
+
+
+@pytest.mark.parametrize("streaming_decode", [True, False])
+def test_packet_receiver_framed_wire_format_success(streaming_decode: bool):
+    packets = [protocol_factory.OnTheWirePacketFactory() for _ in range(3)]
+
+    with override_settings(PACKET_RECEIVER_PORT=0, RECEIVER_STREAMING_DECODE=streaming_decode):
+        with packet_receiver.PacketReceiver() as receiver:
+            receiver_port = receiver._receiver_threads[0]._server.server_address[1]
+            for packet in packets:
+                with socket.create_connection(("127.0.0.1", receiver_port)) as conn:
+                    for chunk in codec.iter_encode_framed(packet):
+                        conn.sendall(chunk)
+
+            for packet in packets:
+                assert receiver.receive() == packet
+
+
+@override_settings(PACKET_RECEIVER_PORT=0, RECEIVER_STREAMING_DECODE=True)
+def test_packet_receiver_streaming_decode_error_raise_ReceptionError():  # noqa: N802
+    with packet_receiver.PacketReceiver() as receiver:
+        receiver_port = receiver._receiver_threads[0]._server.server_address[1]
+        with socket.create_connection(("127.0.0.1", receiver_port)) as conn:
+            conn.sendall(b"hello, world")
+
+        with pytest.raises(packet_receiver.ReceptionError):
+            receiver.receive()
+
+
 @override_settings(PACKET_RECEIVER_PORT=0)
 def test_packet_receiver_error_raise_ReceptionError():  # noqa: N802
     with packet_receiver.PacketReceiver() as receiver:
-        receiver_port = receiver._receiver_thread._server.server_address[1]
+        receiver_port = receiver._receiver_threads[0]._server.server_address[1]
         with socket.create_connection(("127.0.0.1", receiver_port)) as conn:
             conn.sendall(b"hello, world")
 
@@ -11,6 +11,7 @@ import eurydice.destination.receiver.packet_handler.extractors.transferable_rang
 import eurydice.destination.utils.rehash as rehash
 import tests.common.integration.factory as protocol_factory
 import tests.destination.integration.factory as factory
+from eurydice.common import checksum, compression, enums
 from eurydice.destination.core.models.incoming_transferable import (
     IncomingTransferableState,
 )
@@ -77,6 +78,21 @@ def test__get_or_create_transferable_existing_user_profile_existing_transferable
     assert transferable == expected_transferable
 
 
+@pytest.mark.django_db()
+def test__get_or_create_transferable_fills_meta_missing_from_previous_range():
+    first_range = protocol_factory.TransferableRangeFactory(byte_offset=0)
+    next_range = protocol_factory.TransferableRangeFactory(
+        transferable=first_range.transferable.model_copy(update={"user_provided_meta": None}),
+    )
+
+    transferable = transferable_range._get_or_create_transferable(next_range)
+    assert transferable.user_provided_meta == {}
+
+    transferable = transferable_range._get_or_create_transferable(first_range)
+    transferable.refresh_from_db()
+    assert transferable.user_provided_meta == first_range.transferable.user_provided_meta
+
+
 @pytest.mark.parametrize(
     ("transferable_bytes_received", "byte_offset", "expected_exception"),
     [
@@ -238,6 +254,35 @@ def test__assert_transferable_sha1_is_consistent(
             function_to_call()
 
 
+@pytest.mark.parametrize(
+    ("received_checksum", "expected_exception"),
+    [
+        # no checksum sent
+        (None, None),
+        # correct checksum
+        (checksum.compute(b"I like waffles"), None),
+        # incorrect checksum
+        (checksum.compute(b"I like pancakes"), transferable_range.RangeChecksumMismatchError),
+    ],
+)
+def test__assert_transferable_range_checksum_is_consistent(
+    received_checksum: bytes | None,
+    expected_exception: transferable_range.RangeChecksumMismatchError | None,
+):
+    a_transferable_range = protocol_factory.TransferableRangeFactory(data=b"I like waffles", checksum=received_checksum)
+
+    function_to_call = functools.partial(
+        transferable_range._assert_transferable_range_checksum_is_consistent,
+        a_transferable_range,
+    )
+
+    if expected_exception is None:
+        function_to_call()
+    else:
+        with pytest.raises(expected_exception):
+            function_to_call()
+
+
 @pytest.mark.django_db()
 def test__extract_data():
     data = b"hello "
@@ -248,6 +293,7 @@ def test__extract_data():
     mocked_transferable_range.data = b"world!"
 
     transferable = factory.IncomingTransferableFactory(
+        bytes_received=len(data),
         rehash_intermediary=sha1_intermediary,
         state=models.IncomingTransferableState.ONGOING,
     )
@@ -255,3 +301,48 @@ def test__extract_data():
 
     sha1.update(mocked_transferable_range.data)
     assert sha1.digest() == new_sha1.digest()
+
+
+def test__decompress_transferable_range_success():
+    data = b"a,b,c\n" * 4096
+    a_transferable_range = protocol_factory.TransferableRangeFactory(
+        data=compression.compress(data, enums.TransferableRangeCompression.ZLIB),
+        compression=enums.TransferableRangeCompression.ZLIB,
+        uncompressed_size=len(data),
+        byte_offset=0,
+        transferable=protocol_factory.TransferableFactory(size=len(data)),
+    )
+
+    decompressed = transferable_range._decompress_transferable_range(a_transferable_range)
+
+    assert decompressed.data == data
+    assert decompressed.compression is None
+
+
+def test__decompress_transferable_range_larger_than_transferable():
+    data = b"a,b,c\n" * 4096
+    a_transferable_range = protocol_factory.TransferableRangeFactory(
+        data=compression.compress(data, enums.TransferableRangeCompression.ZLIB),
+        compression=enums.TransferableRangeCompression.ZLIB,
+        uncompressed_size=len(data),
+        byte_offset=1,
+        transferable=protocol_factory.TransferableFactory(size=len(data)),
+    )
+
+    with pytest.raises(compression.CompressionError):
+        transferable_range._decompress_transferable_range(a_transferable_range)
+
+
+@pytest.mark.parametrize("uncompressed_size", [None, 100])
+def test__decompress_transferable_range_invalid_uncompressed_size(uncompressed_size: int | None):
+    data = b"a,b,c\n" * 4096
+    a_transferable_range = protocol_factory.TransferableRangeFactory(
+        data=compression.compress(data, enums.TransferableRangeCompression.ZLIB),
+        compression=enums.TransferableRangeCompression.ZLIB,
+        uncompressed_size=uncompressed_size,
+        byte_offset=0,
+        transferable=protocol_factory.TransferableFactory(size=len(data)),
+    )
+
+    with pytest.raises(compression.CompressionError):
+        transferable_range._decompress_transferable_range(a_transferable_range)
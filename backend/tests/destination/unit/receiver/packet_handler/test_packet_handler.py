@@ -12,10 +12,11 @@ class TestOnTheWirePacketHandler:
     def test_constructor_success(self, mocked_extractors: mock.Mock):
         handler = packet_handler.OnTheWirePacketHandler()
         mocked_extractors.TransferableRangeExtractor.assert_called_once()
+        mocked_extractors.TransferableParityExtractor.assert_called_once()
         mocked_extractors.TransferableRevocationExtractor.assert_called_once()
         mocked_extractors.OngoingHistoryExtractor.assert_called_once()
 
-        assert len(handler._extractors) == 3
+        assert len(handler._extractors) == 4
 
     @mock.patch(
         "eurydice.destination.receiver.packet_handler.packet_handler.extractors",
@@ -26,7 +27,7 @@ class TestOnTheWirePacketHandler:
         packet = mock.Mock(autospec=protocol.OnTheWirePacket)
         handler.handle(packet)
 
-        assert len(handler._extractors) == 3
+        assert len(handler._extractors) == 4
 
         for extractor in handler._extractors:
             extractor.extract.assert_called_once_with(packet)
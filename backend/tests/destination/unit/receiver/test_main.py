@@ -1,5 +1,6 @@
 import datetime
 import logging
+import threading
 from unittest import mock
 
 import freezegun
@@ -13,6 +14,12 @@ from eurydice.destination.receiver import main, packet_handler, packet_receiver
 from tests.utils import process_logs
 
 
+@pytest.fixture(autouse=True)
+def _skip_sha1_checkpoint() -> None:
+    with mock.patch.object(main.sha1_cache, "checkpoint_all"):
+        yield
+
+
 @pytest.fixture()
 def packet() -> mock.MagicMock:
     return mock.MagicMock(autospec=protocol.OnTheWirePacket)
@@ -76,6 +83,89 @@ class TestPacketLogger:
             assert not caplog.messages
 
 
+class TestLatencyHistogram:
+    def test_percentile(self):
+        histogram = main._LatencyHistogram()
+        for seconds in [0.0005] * 50 + [0.003] * 40 + [0.5] * 9 + [0.7]:
+            histogram.record(seconds)
+
+        assert histogram.percentile(50) == 0.001
+        assert histogram.percentile(90) == 0.004
+        assert histogram.percentile(99) == 0.512
+        assert histogram.percentile(100) == 0.7
+        assert histogram.max_seconds == 0.7
+
+    def test_percentile_beyond_buckets(self):
+        histogram = main._LatencyHistogram()
+        histogram.record(3600)
+
+        assert histogram.percentile(50) == 3600
+
+
+class TestStageLatencies:
+    def test_log(self, caplog: pytest.LogCaptureFixture):
+        caplog.set_level(logging.INFO)
+        stage_latencies = main._StageLatencies()
+        for stage in main._StageLatencies.STAGES:
+            stage_latencies.record(stage, 0.01)
+
+        stage_latencies.log()
+        assert not caplog.messages
+
+        stage_latencies.log(force=True)
+        (log,) = process_logs(caplog.messages)
+        assert log["log_key"] == "receiver_stage_latencies"
+        assert log["packets"] == 1
+        assert log["handle_p99_us"] == 10000
+        assert log["decode_max_us"] == 10000
+
+        # the latencies are reset once logged
+        stage_latencies.log(force=True)
+        assert len(caplog.messages) == 1
+
+
+@mock.patch.object(main._PacketLogger, "log_received")
+@mock.patch.object(signals.BooleanCondition, "__bool__")
+@mock.patch("eurydice.destination.receiver.main.packet_receiver.PacketReceiver")
+@pytest.mark.django_db()
+def test_loop_decodes_while_handling(
+    PacketReceiver: mock.Mock,  # noqa: N803
+    boolean_cond: mock.Mock,
+    log_received: mock.Mock,
+):
+    packets = [mock.MagicMock(autospec=protocol.OnTheWirePacket) for _ in range(3)]
+    next_packet_decoded = threading.Event()
+    received = []
+
+    def _receive(*args, **kwargs):
+        if len(received) == len(packets):
+            raise packet_receiver.NothingToReceive
+        received.append(packets[len(received)])
+        if len(received) == 2:
+            next_packet_decoded.set()
+        return received[-1]
+
+    receiver = mock.MagicMock(autospec=packet_receiver.PacketReceiver)
+    receiver.__enter__.return_value = receiver
+    receiver.receive.side_effect = _receive
+    receiver.last_decode_seconds = 0.0
+    PacketReceiver.return_value = receiver
+    boolean_cond.return_value = False
+
+    handled = []
+
+    def _handle(packet):
+        # the next packet is decoded while the first one is handled
+        if not handled:
+            assert next_packet_decoded.wait(timeout=5)
+        handled.append(packet)
+
+    with mock.patch.object(packet_handler.OnTheWirePacketHandler, "handle", side_effect=_handle):
+        main._loop()
+
+    assert handled == packets
+
+
 @mock.patch.object(main._PacketLogger, "log_not_received")
 @mock.patch.object(main._PacketLogger, "log_received")
 @mock.patch.object(packet_handler.OnTheWirePacketHandler, "handle")
@@ -93,6 +183,7 @@ def test_loop_receive_packet(
     receiver = mock.MagicMock(autospec=packet_receiver.PacketReceiver)
     receiver.__enter__.return_value = receiver
     receiver.receive.side_effect = [packet, packet_receiver.NothingToReceive]
+    receiver.last_decode_seconds = 0.0
     PacketReceiver.return_value = receiver
 
     boolean_cond.return_value = False
@@ -103,6 +194,39 @@ def test_loop_receive_packet(
     log_not_received.assert_not_called()
 
 
+@mock.patch.object(main, "_DecodeStage")
+@mock.patch.object(main._PacketLogger, "log_received")
+@mock.patch.object(packet_handler.OnTheWirePacketHandler, "handle")
+@mock.patch.object(signals.BooleanCondition, "__bool__")
+@mock.patch("eurydice.destination.receiver.main.packet_receiver.PacketReceiver")
+@pytest.mark.django_db()
+def test_loop_streaming_decode_has_no_decode_stage(
+    PacketReceiver: mock.Mock,  # noqa: N803
+    boolean_cond: mock.Mock,
+    handler: mock.Mock,
+    log_received: mock.Mock,
+    decode_stage: mock.Mock,
+    packet: mock.Mock,
+    settings: Settings,
+    caplog: pytest.LogCaptureFixture,
+):
+    caplog.set_level(logging.INFO)
+    settings.RECEIVER_STREAMING_DECODE = True
+    receiver = mock.MagicMock(autospec=packet_receiver.PacketReceiver)
+    receiver.__enter__.return_value = receiver
+    receiver.receive.side_effect = [packet, packet_receiver.NothingToReceive]
+    PacketReceiver.return_value = receiver
+
+    boolean_cond.return_value = False
+    main._loop()
+
+    handler.assert_called_once_with(packet)
+    decode_stage.assert_not_called()
+    (log,) = [log for log in process_logs(caplog.messages) if log["log_key"] == "receiver_stage_latencies"]
+    assert log["packets"] == 1
+    assert "decode_max_us" not in log
+
+
 @mock.patch.object(main._PacketLogger, "log_not_received")
 @mock.patch.object(main._PacketLogger, "log_received")
 @mock.patch.object(packet_handler.OnTheWirePacketHandler, "handle")
@@ -0,0 +1,121 @@
+import pathlib
+import threading
+from unittest import mock
+
+import pytest
+
+from eurydice.common import protocol
+from eurydice.destination.receiver import overflow_spool
+
+
+def test_overflow_spool_first_in_first_out(tmp_path: pathlib.Path):
+    spool = overflow_spool.OverflowSpool(tmp_path, max_size=1024)
+    items = [b"first", protocol.DeserializationError("second"), b"third"]
+
+    for item in items:
+        assert spool.append(item) == pytest.approx(0, abs=0.1)
+
+    assert len(spool) == 3
+    assert spool.pop() == b"first"
+    error = spool.pop()
+    assert isinstance(error, protocol.DeserializationError)
+    assert str(error) == "second"
+    assert spool.pop() == b"third"
+    assert spool.pop() is None
+    assert spool.size == 0
+    assert not list(tmp_path.iterdir())
+
+
+def test_overflow_spool_chunks(tmp_path: pathlib.Path):
+    spool = overflow_spool.OverflowSpool(tmp_path, max_size=1024)
+
+    spool.append([b"header", memoryview(b"data")])
+
+    assert spool.size == overflow_spool._RECORD_HEADER.size + 10
+    assert spool.pop() == b"headerdata"
+
+
+def test_overflow_spool_writes_without_lock(tmp_path: pathlib.Path):
+    spool = overflow_spool.OverflowSpool(tmp_path, max_size=1024)
+    writing = threading.Event()
+    resume = threading.Event()
+    write_at = overflow_spool._write_at
+
+    def _blocking_write_at(fd: int, data: bytes | memoryview, offset: int) -> int:
+        if bytes(data) == b"slow":
+            writing.set()
+            assert resume.wait(timeout=5)
+        return write_at(fd, data, offset)
+
+    with mock.patch.object(overflow_spool, "_write_at", side_effect=_blocking_write_at):
+        slow_writer = threading.Thread(target=spool.append, args=(b"slow",))
+        slow_writer.start()
+        assert writing.wait(timeout=5)
+
+        # other packets are appended while the first one is being written,
+        # but not read before it
+        spool.append(b"fast")
+        assert len(spool) == 2
+        assert spool.pop() is None
+
+        resume.set()
+        slow_writer.join()
+
+    assert spool.pop() == b"slow"
+    assert spool.pop() == b"fast"
+    assert not list(tmp_path.iterdir())
+
+
+def test_overflow_spool_segments(tmp_path: pathlib.Path):
+    spool = overflow_spool.OverflowSpool(tmp_path, max_size=1024)
+    items = [bytes([i]) * 20 for i in range(10)]
+
+    with mock.patch.object(overflow_spool, "SEGMENT_SIZE", 50):
+        for item in items[:5]:
+            spool.append(item)
+        assert len(list(tmp_path.iterdir())) == 3
+
+        popped = [spool.pop() for _ in range(3)]
+        # fully read segments are removed
+        assert len(list(tmp_path.iterdir())) == 2
+
+        for item in items[5:]:
+            spool.append(item)
+        popped.extend(spool.pop() for _ in range(7))
+
+    assert popped == items
+    assert spool.pop() is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_overflow_spool_full(tmp_path: pathlib.Path):
+    spool = overflow_spool.OverflowSpool(tmp_path, max_size=100)
+    spool.append(b"a" * 80)
+
+    with pytest.raises(overflow_spool.OverflowSpoolFullError):
+        spool.append(b"b" * 80, timeout=0.01)
+
+    spool.pop()
+    # a packet larger than the spool can be held alone
+    spool.append(b"c" * 200)
+    assert len(spool) == 1
+
+
+def test_overflow_spool_removes_leftovers(tmp_path: pathlib.Path):
+    spool = overflow_spool.OverflowSpool(tmp_path, max_size=1024)
+    spool.append(b"data")
+
+    spool = overflow_spool.OverflowSpool(tmp_path, max_size=1024)
+
+    assert spool.pop() is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_overflow_spool_close(tmp_path: pathlib.Path):
+    spool = overflow_spool.OverflowSpool(tmp_path, max_size=1024)
+    spool.append(b"data")
+
+    spool.close()
+
+    assert len(spool) == 0
+    assert not list(tmp_path.iterdir())
@@ -1,5 +1,6 @@
 import queue
 import socket
+import time
 from unittest import mock
 
 import pytest
@@ -14,19 +15,24 @@ class Test_Server:  # noqa: N801
         exc_msg = "Something terrible happened"
         mocked_handle_func.side_effect = Exception(exc_msg)
 
-        with packet_receiver._Server(receiving_queue=mock.Mock()) as server:
+        with packet_receiver._Server(receiving_queue=mock.Mock(), port=settings.PACKET_RECEIVER_PORT) as server:
             with socket.create_connection(("127.0.0.1", settings.PACKET_RECEIVER_PORT)) as conn:
                 conn.sendall(b"hello, world")
 
             server.handle_request()
 
+            # the request is handled in its own thread
+            deadline = time.monotonic() + 5
+            while exc_msg not in caplog.text and time.monotonic() < deadline:
+                time.sleep(0.01)
+
         assert exc_msg in caplog.text
 
 
 class Test_ReceiverThread:  # noqa: N801
     def test_run_and_stop(self):
         mocked_queue = mock.create_autospec(queue.Queue)
-        thread = packet_receiver._ReceiverThread(mocked_queue)
+        thread = packet_receiver._ReceiverThread(mocked_queue, settings.PACKET_RECEIVER_PORT)
         thread.start()
         assert thread.is_alive()
         thread.stop()
@@ -0,0 +1,122 @@
+import hashlib
+import pathlib
+from unittest import mock
+
+import pytest
+from django.conf import Settings
+from faker import Faker
+
+import tests.destination.integration.factory as factory
+from eurydice.destination.core import models
+from eurydice.destination.receiver import sha1_cache
+from eurydice.destination.storage import fs
+from eurydice.destination.utils import rehash
+
+
+def _make_transferable(data: bytes, checkpoint_offset: int) -> models.IncomingTransferable:
+    transferable = factory.IncomingTransferableFactory(
+        state=models.IncomingTransferableState.ONGOING,
+        size=None,
+        bytes_received=len(data),
+        rehash_intermediary=rehash.sha1_to_bytes(hashlib.sha1(data[:checkpoint_offset])),
+        rehash_intermediary_offset=checkpoint_offset,
+    )
+    fs.write_bytes(transferable, data)
+    return transferable
+
+
+@pytest.mark.django_db()
+def test_sha1_cache_get_cached(faker: Faker, settings: Settings, tmp_path: pathlib.Path):
+    settings.TRANSFERABLE_STORAGE_DIR = tmp_path
+    data = faker.binary(length=100)
+    transferable = _make_transferable(data, checkpoint_offset=0)
+    sha1_cache.put(transferable, hashlib.sha1(data))
+
+    with mock.patch.object(rehash, "sha1_from_bytes") as sha1_from_bytes:
+        sha1 = sha1_cache.get(transferable)
+        sha1.update(b"more")
+
+        assert sha1_cache.get(transferable).digest() == hashlib.sha1(data).digest()
+
+    sha1_from_bytes.assert_not_called()
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize("checkpoint_offset", [0, 60, 100])
+def test_sha1_cache_get_recovers_from_checkpoint(
+    checkpoint_offset: int, faker: Faker, settings: Settings, tmp_path: pathlib.Path
+):
+    settings.TRANSFERABLE_STORAGE_DIR = tmp_path
+    data = faker.binary(length=100)
+    transferable = _make_transferable(data, checkpoint_offset)
+
+    assert sha1_cache.get(transferable).digest() == hashlib.sha1(data).digest()
+
+
+@pytest.mark.django_db()
+def test_sha1_cache_get_stale_entry(faker: Faker, settings: Settings, tmp_path: pathlib.Path):
+    settings.TRANSFERABLE_STORAGE_DIR = tmp_path
+    data = faker.binary(length=100)
+    transferable = _make_transferable(data, checkpoint_offset=100)
+    sha1_cache.put(transferable, hashlib.sha1(b"stale"))
+    transferable.bytes_received = 40
+    transferable.rehash_intermediary = rehash.sha1_to_bytes(hashlib.sha1(data[:40]))
+    transferable.rehash_intermediary_offset = 40
+
+    assert sha1_cache.get(transferable).digest() == hashlib.sha1(data[:40]).digest()
+
+
+@pytest.mark.django_db()
+def test_sha1_cache_get_missing_data(faker: Faker, settings: Settings, tmp_path: pathlib.Path):
+    settings.TRANSFERABLE_STORAGE_DIR = tmp_path
+    transferable = _make_transferable(faker.binary(length=100), checkpoint_offset=50)
+    transferable.bytes_received = 150
+
+    with pytest.raises(sha1_cache.Sha1RecoveryError):
+        sha1_cache.get(transferable)
+
+
+@pytest.mark.django_db()
+def test_sha1_cache_put_checkpoint_interval(settings: Settings):
+    settings.RECEIVER_SHA1_CHECKPOINT_INTERVAL = 3
+    transferable = factory.IncomingTransferableFactory(state=models.IncomingTransferableState.ONGOING)
+
+    checkpoints = []
+    for _ in range(7):
+        transferable.bytes_received += 1
+        checkpoints.append(sha1_cache.put(transferable, hashlib.sha1()))
+
+    assert checkpoints == [False, False, True, False, False, True, False]
+
+
+@pytest.mark.django_db()
+def test_sha1_cache_evicts_least_recently_used(faker: Faker, settings: Settings, tmp_path: pathlib.Path):
+    settings.TRANSFERABLE_STORAGE_DIR = tmp_path
+    settings.RECEIVER_SHA1_CACHE_SIZE = 2
+    transferables = [_make_transferable(faker.binary(length=10), checkpoint_offset=10) for _ in range(3)]
+    for transferable in transferables[:2]:
+        sha1_cache.put(transferable, hashlib.sha1(b"cached"))
+
+    sha1_cache.get(transferables[0])
+    sha1_cache.put(transferables[2], hashlib.sha1(b"cached"))
+
+    cached = [sha1_cache.get(t).digest() == hashlib.sha1(b"cached").digest() for t in transferables]
+    assert cached == [True, False, True]
+
+
+@pytest.mark.django_db()
+def test_sha1_cache_checkpoint_all(settings: Settings):
+    settings.RECEIVER_SHA1_CHECKPOINT_INTERVAL = 2
+    transferable = factory.IncomingTransferableFactory(
+        state=models.IncomingTransferableState.ONGOING, size=None, bytes_received=10
+    )
+    sha1_cache.put(transferable, hashlib.sha1(b"0123456789"))
+
+    sha1_cache.checkpoint_all()
+
+    transferable.refresh_from_db()
+    assert transferable.rehash_intermediary_offset == 10
+    assert rehash.sha1_from_bytes(bytes(transferable.rehash_intermediary)).digest() == (
+        hashlib.sha1(b"0123456789").digest()
+    )
+    sha1_cache.discard(transferable)
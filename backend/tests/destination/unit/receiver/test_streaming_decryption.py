@@ -0,0 +1,137 @@
+import pathlib
+
+import nacl.bindings
+import pytest
+from django.conf import Settings
+from faker import Faker
+
+from eurydice.destination.core.models import IncomingTransferable
+from eurydice.destination.receiver import streaming_decryption
+from eurydice.destination.storage import fs
+from tests.common.decryption_constants import PUBKEY
+
+_CHUNK_SIZE = 64
+
+
+def _to_metadata_bytes_list(data: bytes) -> str:
+    return ",".join(str(byte) for byte in data)
+
+
+def _encrypt(data: bytes) -> tuple[bytes, dict[str, str]]:
+    """Encrypt data in chunks as done by the frontend, returning the encrypted data
+    and the metadata of the Transferable.
+    """
+    symmetric_key = nacl.bindings.crypto_secretstream_xchacha20poly1305_keygen()
+    state = nacl.bindings.crypto_secretstream_xchacha20poly1305_state()
+    header = nacl.bindings.crypto_secretstream_xchacha20poly1305_init_push(state, symmetric_key)
+    chunks = [
+        nacl.bindings.crypto_secretstream_xchacha20poly1305_push(state, data[i : i + _CHUNK_SIZE])
+        for i in range(0, len(data), _CHUNK_SIZE)
+    ]
+    encrypted_data = b"".join(chunks)
+
+    return encrypted_data, {
+        "Metadata-Encrypted": "true",
+        "Metadata-Encrypted-Size": str(len(encrypted_data)),
+        "Metadata-Parts-Count": str(len(chunks)),
+        "Metadata-Main-Part-Size": str(len(chunks[0])),
+        "Metadata-Last-Part-Size": str(len(chunks[-1])),
+        "Metadata-Header": _to_metadata_bytes_list(header),
+        "Metadata-Encrypted-Symmetric-Key": _to_metadata_bytes_list(
+            nacl.bindings.crypto_box_seal(symmetric_key, PUBKEY)
+        ),
+    }
+
+
+def _feed_in_ranges(transferable: IncomingTransferable, encrypted_data: bytes, range_size: int) -> None:
+    for offset in range(0, len(encrypted_data), range_size):
+        data = encrypted_data[offset : offset + range_size]
+        streaming_decryption.feed(transferable, data)
+        fs.append_bytes(transferable, data)
+        transferable.bytes_received += len(data)
+
+
+@pytest.fixture()
+def storage_dir(settings: Settings, tmp_path: pathlib.Path) -> pathlib.Path:
+    settings.TRANSFERABLE_STORAGE_DIR = tmp_path
+    return tmp_path
+
+
+@pytest.mark.parametrize("range_size", [1, 50, 64, 100, 1000])
+def test_streaming_decryption_success(range_size: int, faker: Faker, storage_dir: pathlib.Path):
+    data = faker.binary(length=300)
+    encrypted_data, metadata = _encrypt(data)
+    transferable = IncomingTransferable(name="test.txt", user_provided_meta=metadata, bytes_received=0)
+
+    _feed_in_ranges(transferable, encrypted_data, range_size)
+
+    assert streaming_decryption.finish(transferable)
+    assert fs.read_bytes(transferable) == data
+    assert not fs.decrypted_path(transferable).exists()
+
+
+def test_streaming_decryptor_keeps_partial_chunk_only(faker: Faker, storage_dir: pathlib.Path):
+    data = faker.binary(length=300)
+    encrypted_data, metadata = _encrypt(data)
+    chunk_size = int(metadata["Metadata-Main-Part-Size"])
+    transferable = IncomingTransferable(name="test.txt", user_provided_meta=metadata, bytes_received=0)
+    decryptor = streaming_decryption.StreamingDecryptor(transferable)
+
+    decryptor.feed(encrypted_data[: 2 * chunk_size + 10])
+    assert len(decryptor._pending) == 10
+
+    decryptor.feed(encrypted_data[2 * chunk_size + 10 : 3 * chunk_size + 5])
+    assert len(decryptor._pending) == 5
+    assert fs.decrypted_path(transferable).read_bytes() == data[: 3 * _CHUNK_SIZE]
+
+
+def test_streaming_decryption_lost_state(faker: Faker, storage_dir: pathlib.Path):
+    data = faker.binary(length=300)
+    encrypted_data, metadata = _encrypt(data)
+    transferable = IncomingTransferable(name="test.txt", user_provided_meta=metadata, bytes_received=0)
+
+    _feed_in_ranges(transferable, encrypted_data[:100], range_size=50)
+    streaming_decryption.discard(transferable)
+    _feed_in_ranges(transferable, encrypted_data[100:], range_size=50)
+
+    assert not streaming_decryption.finish(transferable)
+    assert fs.read_bytes(transferable) == encrypted_data
+    assert not fs.decrypted_path(transferable).exists()
+
+
+def test_streaming_decryption_evicted(faker: Faker, settings: Settings, storage_dir: pathlib.Path):
+    settings.RECEIVER_SHA1_CACHE_SIZE = 1
+    encrypted_data, metadata = _encrypt(faker.binary(length=300))
+    transferable = IncomingTransferable(name="a.txt", user_provided_meta=metadata, bytes_received=0)
+    other_transferable = IncomingTransferable(name="b.txt", user_provided_meta=metadata, bytes_received=0)
+
+    _feed_in_ranges(transferable, encrypted_data[:100], range_size=100)
+    _feed_in_ranges(other_transferable, encrypted_data[:100], range_size=100)
+
+    assert not fs.decrypted_path(transferable).exists()
+    _feed_in_ranges(transferable, encrypted_data[100:], range_size=100)
+    assert not streaming_decryption.finish(transferable)
+
+    streaming_decryption.discard(other_transferable)
+    assert not fs.decrypted_path(other_transferable).exists()
+
+
+def test_streaming_decryption_disabled(faker: Faker, settings: Settings, storage_dir: pathlib.Path):
+    settings.RECEIVER_STREAMING_DECRYPTION = False
+    encrypted_data, metadata = _encrypt(faker.binary(length=300))
+    transferable = IncomingTransferable(name="test.txt", user_provided_meta=metadata, bytes_received=0)
+
+    _feed_in_ranges(transferable, encrypted_data, range_size=100)
+
+    assert not fs.decrypted_path(transferable).exists()
+    assert not streaming_decryption.finish(transferable)
+
+
+def test_streaming_decryption_missing_chunk(faker: Faker, storage_dir: pathlib.Path):
+    encrypted_data, metadata = _encrypt(faker.binary(length=300))
+    transferable = IncomingTransferable(name="test.txt", user_provided_meta=metadata, bytes_received=0)
+
+    _feed_in_ranges(transferable, encrypted_data[:-10], range_size=100)
+
+    with pytest.raises(RuntimeError, match="fully read before decryption finished"):
+        streaming_decryption.finish(transferable)
@@ -27,6 +27,7 @@ def test__abort_ingestion(
 def test__update_incoming_transferable(
     settings: Settings,
 ):
+    settings.RECEIVER_SHA1_CHECKPOINT_INTERVAL = 1
     data = b"hello "
     sha1 = hashlib.sha1()
     sha1.update(data)
@@ -56,9 +57,10 @@ def test__update_incoming_transferable(
     assert transferable.rehash_intermediary == sha1_intermediary
     assert transferable_ingestion_fs._storage_exists(transferable)
 
+    assert transferable.rehash_intermediary_offset == len(data + new_data)
+
     new_data2 = b"!"
     sha1.update(new_data2)
-    sha1_intermediary = rehash.sha1_to_bytes(sha1)
 
     transferable_ingestion_fs.ingest(
         transferable,
@@ -70,5 +72,7 @@ def test__update_incoming_transferable(
     assert transferable.finished_at is not None
     assert transferable.bytes_received == len(data + new_data + new_data2)
     assert transferable.size == len(data + new_data + new_data2)
+    # the SHA-1 of a fully received transferable is no longer checkpointed
     assert transferable.rehash_intermediary == sha1_intermediary
+    assert transferable.rehash_intermediary_offset == len(data + new_data)
     assert transferable_ingestion_fs._storage_exists(transferable)
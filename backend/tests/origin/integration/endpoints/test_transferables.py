@@ -15,7 +15,7 @@ from freezegun import freeze_time
 from rest_framework import status, test
 from rest_framework.authtoken.models import Token
 
-from eurydice.common import enums
+from eurydice.common import checksum, enums
 from eurydice.origin.api.views import OutgoingTransferableViewSet
 from eurydice.origin.core import enums as origin_enums
 from eurydice.origin.core import models
@@ -290,7 +290,9 @@ class TestOutgoingTransferable:
         # Verify uploaded transferable_ranges
         final_transferable_digest = hashlib.sha1()
         for transferable_range in outgoing_transferable.transferable_ranges.all():
-            final_transferable_digest.update(fs.read_bytes(transferable_range))
+            data = fs.read_bytes(transferable_range)
+            final_transferable_digest.update(data)
+            assert bytes(transferable_range.checksum) == checksum.compute(data)
         assert final_transferable_digest.hexdigest() == transferable_data["sha1"]
 
     def test_create_outgoing_transferable_unauthorized(self, faker: Faker, api_client: test.APIClient):
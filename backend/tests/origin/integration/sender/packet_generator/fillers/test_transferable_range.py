@@ -1,5 +1,8 @@
+import collections
+import contextlib
 import datetime
 import hashlib
+import threading
 from pathlib import Path
 from unittest import mock
 
@@ -7,10 +10,12 @@ import factory
 import freezegun
 import pytest
 from django.conf import Settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from faker import Faker
 
-from eurydice.common import enums, exceptions, protocol
+from eurydice.common import checksum, enums, exceptions, protocol
 from eurydice.origin.core import enums as origin_enums
 from eurydice.origin.core import models
 from eurydice.origin.sender.packet_generator.fillers import (
@@ -65,6 +70,55 @@ def test__build_protocol_transferable(faker: Faker):
     assert model.outgoing_transferable.size == protocol_model.size
 
 
+@pytest.mark.django_db()
+def test__build_protocol_transferable_meta_in_first_and_last_ranges_only(faker: Faker):
+    transferable = origin_factory.OutgoingTransferableFactory(
+        submission_succeeded_at=faker.date_time_this_decade(tzinfo=timezone.get_current_timezone()),
+        size=30,
+        user_provided_meta={"Metadata-Foo": "bar"},
+    )
+    models = [
+        origin_factory.TransferableRangeFactory(outgoing_transferable=transferable, byte_offset=offset, size=10)
+        for offset in (0, 10, 20)
+    ]
+
+    protocol_models = [transferable_range_filler._build_protocol_transferable(model) for model in models]
+
+    assert [m.user_provided_meta for m in protocol_models] == [{"Metadata-Foo": "bar"}, None, {"Metadata-Foo": "bar"}]
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize(
+    ("chain_digest_enabled", "missing_checksum", "expect_chain_digest"),
+    [(True, False, True), (True, True, False), (False, False, False)],
+)
+def test__build_protocol_transferable_chain_digest(
+    chain_digest_enabled: bool, missing_checksum: bool, expect_chain_digest: bool, faker: Faker, settings: Settings
+):
+    settings.TRANSFERABLE_CHAIN_DIGEST = chain_digest_enabled
+    transferable = origin_factory.OutgoingTransferableFactory(
+        submission_succeeded_at=faker.date_time_this_decade(tzinfo=timezone.get_current_timezone()),
+        size=30,
+    )
+    range_checksums = [checksum.compute(faker.binary(length=10)) for _ in range(3)]
+    sent_checksums = [None if missing_checksum else range_checksums[0], *range_checksums[1:]]
+    models = [
+        origin_factory.TransferableRangeFactory(
+            outgoing_transferable=transferable, byte_offset=offset * 10, size=10, checksum=sent_checksums[offset]
+        )
+        # ranges created in a different order than their byte offsets
+        for offset in (1, 0, 2)
+    ]
+
+    protocol_models = [transferable_range_filler._build_protocol_transferable(model) for model in models]
+
+    assert [m.chain_digest for m in protocol_models[:2]] == [None, None]
+    if expect_chain_digest:
+        assert protocol_models[2].chain_digest == checksum.chain_digest(range_checksums)
+    else:
+        assert protocol_models[2].chain_digest is None
+
+
 @pytest.mark.django_db()
 def test__build_protocol_transferable_no_sha1():
     model = origin_factory.TransferableRangeFactory(
@@ -109,6 +163,30 @@ def test__get_transferable_range_data_success(faker: Faker):
     assert hashlib.sha1(fs_data).digest() == hashlib.sha1(data).digest()
 
 
+@pytest.mark.django_db()
+@pytest.mark.parametrize(
+    ("sendfile", "min_size", "expected_mapped"),
+    [
+        (False, 0, False),
+        (True, 0, True),
+        (True, 1024, True),
+        (True, 1025, False),
+    ],
+)
+def test__get_transferable_range_data_maps_large_ranges(
+    sendfile: bool, min_size: int, expected_mapped: bool, faker: Faker, settings: Settings
+):
+    settings.SENDER_SENDFILE = sendfile
+    settings.SENDER_SENDFILE_MIN_SIZE = min_size
+    data = faker.binary(length=1024)
+
+    with origin_factory.stored_transferable_range(data, size=len(data)) as transferable_range:
+        fs_data = transferable_range_filler._get_transferable_range_data(transferable_range)
+
+    assert fs_data == data
+    assert (fs.sendable_file(fs_data) is not None) is expected_mapped
+
+
 @pytest.mark.django_db()
 def test__get_transferable_range_data_missing(faker: Faker):
     data = faker.binary(length=10)
@@ -339,6 +417,78 @@ class TestTransferableRangeFiller:
         assert transferable_range.finished_at == a_date
 
 
+@pytest.mark.django_db()
+@pytest.mark.parametrize(
+    ("data", "user_provided_meta", "expected_compression"),
+    [
+        (b"a,b,c\n" * 4096, {}, enums.TransferableRangeCompression.ZLIB),
+        (b"a,b,c\n" * 4096, {"Metadata-Encrypted": "true"}, None),
+        (bytes(range(256)) * 64, {}, enums.TransferableRangeCompression.ZLIB),
+        (b"a,b,c\n", {}, None),
+    ],
+)
+def test__add_compresses_transferable_range(
+    data: bytes,
+    user_provided_meta: dict[str, str],
+    expected_compression: enums.TransferableRangeCompression | None,
+    settings: Settings,
+):
+    settings.TRANSFERABLE_RANGE_COMPRESSION = "zlib"
+    packet = protocol.OnTheWirePacket()
+
+    with origin_factory.stored_transferable_range(
+        data,
+        transfer_state=origin_enums.TransferableRangeTransferState.PENDING,
+        outgoing_transferable__user_provided_meta=user_provided_meta,
+    ) as transferable_range:
+        transferable_range_filler._add(transferable_range, packet)
+
+    (protocol_transferable_range,) = packet.transferable_ranges
+    assert protocol_transferable_range.compression == expected_compression
+    if expected_compression is None:
+        assert protocol_transferable_range.data == data
+        assert protocol_transferable_range.uncompressed_size is None
+    else:
+        assert len(protocol_transferable_range.data) < len(data)
+        assert protocol_transferable_range.uncompressed_size == len(data)
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize(("group_size", "keeps_data"), [(0, False), (2, True)])
+def test__add_keeps_uncompressed_data_for_parities(group_size: int, keeps_data: bool, settings: Settings):
+    settings.TRANSFERABLE_RANGE_COMPRESSION = "zlib"
+    settings.TRANSFERABLE_PARITY_GROUP_SIZE = group_size
+    packet = protocol.OnTheWirePacket()
+    data = b"a,b,c\n" * 4096
+
+    with origin_factory.stored_transferable_range(
+        data, transfer_state=origin_enums.TransferableRangeTransferState.PENDING
+    ) as transferable_range:
+        transferable_range_filler._add(transferable_range, packet)
+
+    (protocol_transferable_range,) = packet.transferable_ranges
+    assert protocol_transferable_range.compression == enums.TransferableRangeCompression.ZLIB
+    assert protocol_transferable_range.pop_uncompressed_data() == (data if keeps_data else None)
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize("has_checksum", [True, False])
+def test__add_sends_checksum(has_checksum: bool, faker: Faker):
+    data = faker.binary(length=1024)
+    expected_checksum = checksum.compute(data) if has_checksum else None
+    packet = protocol.OnTheWirePacket()
+
+    with origin_factory.stored_transferable_range(
+        data,
+        checksum=expected_checksum,
+        transfer_state=origin_enums.TransferableRangeTransferState.PENDING,
+    ) as transferable_range:
+        transferable_range_filler._add(transferable_range, packet)
+
+    (protocol_transferable_range,) = packet.transferable_ranges
+    assert protocol_transferable_range.checksum == expected_checksum
+
+
 @pytest.mark.django_db()
 class TestFIFOTransferableRangeFiller:
     def test_fill_success(self, faker: Faker, settings: Settings):
@@ -368,6 +518,239 @@ class TestFIFOTransferableRangeFiller:
         assert transferable_range.transfer_state == origin_enums.TransferableRangeTransferState.TRANSFERRED
         assert transferable_range.finished_at == a_date
 
+    def test_fill_reads_ranges_in_prefetch_threads(self, faker: Faker, settings: Settings):
+        settings.SENDER_PREFETCH_WORKERS = 2
+        filler = transferable_range_filler.FIFOTransferableRangeFiller()
+        packet = protocol.OnTheWirePacket()
+        data = [faker.binary(length=10) for _ in range(4)]
+        reading_threads = set()
+
+        def _read(*args) -> protocol.TransferableRange:
+            reading_threads.add(threading.current_thread().name)
+            return read(*args)
+
+        read = transferable_range_filler._read
+        with contextlib.ExitStack() as stack:
+            transferable_ranges = [
+                stack.enter_context(
+                    origin_factory.stored_transferable_range(
+                        d, size=len(d), transfer_state=origin_enums.TransferableRangeTransferState.PENDING
+                    )
+                )
+                for d in data
+            ]
+            with mock.patch.object(transferable_range_filler, "_read", side_effect=_read):
+                filler.fill(packet=packet)
+
+        assert sorted(r.data for r in packet.transferable_ranges) == sorted(data)
+        assert {r.transferable.id for r in packet.transferable_ranges} == {
+            r.outgoing_transferable.id for r in transferable_ranges
+        }
+        assert all(name.startswith("range-prefetch") for name in reading_threads)
+        for transferable_range in transferable_ranges:
+            transferable_range.refresh_from_db()
+            assert transferable_range.transfer_state == origin_enums.TransferableRangeTransferState.TRANSFERRED
+
+    def test_fill_marks_ranges_as_transferred_in_one_query(self, faker: Faker, settings: Settings):
+        filler = transferable_range_filler.FIFOTransferableRangeFiller()
+        packet = protocol.OnTheWirePacket()
+        data = faker.binary(length=10)
+
+        with origin_factory.stored_transferable_ranges(
+            data, 5, size=len(data), transfer_state=origin_enums.TransferableRangeTransferState.PENDING
+        ) as transferable_ranges:
+            with CaptureQueriesContext(connection) as queries:
+                filler.fill(packet=packet)
+
+        range_updates = [q for q in queries if q["sql"].startswith('UPDATE "eurydice_transferable_ranges"')]
+        assert len(range_updates) == 1
+        assert len(packet.transferable_ranges) == 5
+        for transferable_range in transferable_ranges:
+            transferable_range.refresh_from_db()
+            assert transferable_range.transfer_state == origin_enums.TransferableRangeTransferState.TRANSFERRED
+            assert transferable_range.outgoing_transferable.auto_transferred_ranges_count == 1
+
+
+@pytest.mark.django_db()
+class TestDeficitRoundRobinTransferableRangeFiller:
+    @staticmethod
+    def _make_pending_ranges(count: int, size: int, priority: int) -> models.UserProfile:
+        user_profile = origin_factory.UserProfileFactory(priority=priority)
+        for _ in range(count):
+            origin_factory.TransferableRangeFactory(
+                size=size,
+                transfer_state=origin_enums.TransferableRangeTransferState.PENDING,
+                outgoing_transferable__user_profile=user_profile,
+            )
+        return user_profile
+
+    def test_fill_shares_bytes_according_to_priority(self, settings: Settings):
+        settings.SENDER_DRR_QUANTUM = 500_000
+        settings.TRANSFERABLE_RANGE_SIZE = 3_000_000
+        # many small ranges for the first user, a few large ones for the second
+        small_files_user = self._make_pending_ranges(200, 100_000, priority=0)
+        large_files_user = self._make_pending_ranges(30, 1_000_000, priority=1)
+
+        filler = transferable_range_filler.DeficitRoundRobinTransferableRangeFiller()
+        sent_bytes = collections.Counter()
+        for _ in range(10):
+            selected, _ = filler._select()
+            for transferable_range in selected:
+                sent_bytes[transferable_range.outgoing_transferable.user_profile_id] += transferable_range.size
+            models.TransferableRange.objects.filter(id__in=[r.id for r in selected]).mark_as_transferred()
+
+        # the user with a priority of 1 gets twice the bandwidth of the other
+        ratio = sent_bytes[large_files_user.id] / sent_bytes[small_files_user.id]
+        assert 1.8 < ratio < 2.2
+
+    @pytest.mark.parametrize("user_count", [1, 3, 10])
+    def test_fill_queries_pending_ranges_once_per_round(self, user_count: int, settings: Settings):
+        settings.SENDER_DRR_QUANTUM = 30_000
+        settings.TRANSFERABLE_RANGE_SIZE = 10_000_000
+        for _ in range(user_count):
+            self._make_pending_ranges(5, 10_000, priority=0)
+
+        filler = transferable_range_filler.DeficitRoundRobinTransferableRangeFiller()
+        with CaptureQueriesContext(connection) as queries:
+            selected, cancelled = filler._select()
+
+        # the ranges covered by the first credit of all users, then the rest of them
+        # once the users have run out of fetched ranges, whatever the amount of users
+        assert len(queries) == 2
+        assert len(selected) == 5 * user_count
+        assert cancelled == []
+
+    def test_fill_fetches_ranges_covered_by_credit(self, settings: Settings):
+        settings.SENDER_DRR_QUANTUM = 2_000_000
+        settings.TRANSFERABLE_RANGE_SIZE = 5_000_000
+        self._make_pending_ranges(100, 1_000_000, priority=0)
+        self._make_pending_ranges(100, 1_000_000, priority=0)
+
+        filler = transferable_range_filler.DeficitRoundRobinTransferableRangeFiller()
+        with mock.patch.object(
+            transferable_range_filler._UserQueue,
+            "extend",
+            autospec=True,
+            side_effect=transferable_range_filler._UserQueue.extend,
+        ) as extend:
+            selected, _ = filler._select()
+
+        fetched = sum(len(call.args[1]) for call in extend.call_args_list)
+        assert len(selected) == 5
+        assert fetched <= 2 * len(selected)
+
+    def test_fill_resumes_turn_cut_short_by_full_packet(self, settings: Settings):
+        settings.SENDER_DRR_QUANTUM = 1_000_000
+        settings.TRANSFERABLE_RANGE_SIZE = 100_000
+        first_user = self._make_pending_ranges(3, 100_000, priority=0)
+        second_user = self._make_pending_ranges(3, 100_000, priority=0)
+        filler = transferable_range_filler.DeficitRoundRobinTransferableRangeFiller()
+
+        served = []
+        for _ in range(6):
+            (transferable_range,), _ = filler._select()
+            served.append(transferable_range.outgoing_transferable.user_profile_id)
+            transferable_range.mark_as_transferred()
+
+        # the credit of a turn covers all the ranges of a user
+        first, second = sorted([first_user.id, second_user.id])
+        assert served == [first] * 3 + [second] * 3
+
+    def test_fill_success(self, faker: Faker, settings: Settings):
+        filler = transferable_range_filler.DeficitRoundRobinTransferableRangeFiller()
+        packet = protocol.OnTheWirePacket()
+        data = faker.binary(length=10)
+
+        with origin_factory.stored_transferable_range(
+            data, size=len(data), transfer_state=origin_enums.TransferableRangeTransferState.PENDING
+        ) as transferable_range:
+            filler.fill(packet=packet)
+            transferable_range.refresh_from_db()
+
+        assert [r.data for r in packet.transferable_ranges] == [data]
+        assert transferable_range.transfer_state == origin_enums.TransferableRangeTransferState.TRANSFERRED
+
+
+@pytest.mark.django_db()
+class TestExpressLaneTransferableRangeFiller:
+    @staticmethod
+    def _make_pending_ranges(count: int, size: int, transferable_size: int) -> list[models.TransferableRange]:
+        return [
+            origin_factory.TransferableRangeFactory(
+                size=size,
+                transfer_state=origin_enums.TransferableRangeTransferState.PENDING,
+                outgoing_transferable__size=transferable_size,
+            )
+            for _ in range(count)
+        ]
+
+    def test_fill_reserves_share_for_small_transferables(self, settings: Settings):
+        settings.TRANSFERABLE_RANGE_SIZE = 1_000_000
+        settings.SENDER_EXPRESS_LANE_MAX_SIZE = 100_000
+        settings.SENDER_EXPRESS_LANE_SHARE = 0.3
+        # the small Transferables are queued behind the large ones
+        large = self._make_pending_ranges(2, 1_000_000, transferable_size=5_000_000)
+        small = self._make_pending_ranges(10, 50_000, transferable_size=50_000)
+
+        selected, cancelled = transferable_range_filler.ExpressLaneTransferableRangeFiller()._select()
+
+        assert selected == small[:6] + large[:1]
+        assert cancelled == []
+
+    @pytest.mark.parametrize(("count", "size", "expected_count"), [(30, 50_000, 20), (3, 1_000_000, 1)])
+    def test_fill_gives_whole_packet_to_single_lane(
+        self, count: int, size: int, expected_count: int, settings: Settings
+    ):
+        settings.TRANSFERABLE_RANGE_SIZE = 1_000_000
+        settings.SENDER_EXPRESS_LANE_MAX_SIZE = 100_000
+        settings.SENDER_EXPRESS_LANE_SHARE = 0.3
+        transferable_ranges = self._make_pending_ranges(count, size, transferable_size=size)
+
+        selected, _ = transferable_range_filler.ExpressLaneTransferableRangeFiller()._select()
+
+        assert selected == transferable_ranges[:expected_count]
+
+    def test_fill_logs_latency_percentiles(self, faker: Faker, settings: Settings):
+        settings.SENDER_EXPRESS_LANE_MAX_SIZE = 100_000
+        a_date = faker.date_time_this_decade(tzinfo=timezone.get_current_timezone())
+        with freezegun.freeze_time(a_date):
+            self._make_pending_ranges(1, 1_000_000, transferable_size=5_000_000)
+        with freezegun.freeze_time(a_date + datetime.timedelta(seconds=50)):
+            self._make_pending_ranges(2, 50_000, transferable_size=50_000)
+
+        filler = transferable_range_filler.ExpressLaneTransferableRangeFiller()
+        with (
+            freezegun.freeze_time(a_date + datetime.timedelta(seconds=60)),
+            mock.patch.object(transferable_range_filler, "logger") as logger,
+        ):
+            filler._select()
+
+        logger.info.assert_called_once_with(
+            {
+                "log_key": "express_lane_latencies",
+                "express_p50_ms": 10000,
+                "express_p90_ms": 10000,
+                "express_p99_ms": 10000,
+                "bulk_p50_ms": 60000,
+                "bulk_p90_ms": 60000,
+                "bulk_p99_ms": 60000,
+            }
+        )
+
+    def test_fill_success(self, faker: Faker, settings: Settings):
+        filler = transferable_range_filler.ExpressLaneTransferableRangeFiller()
+        packet = protocol.OnTheWirePacket()
+        data = faker.binary(length=10)
+
+        with origin_factory.stored_transferable_range(
+            data, size=len(data), transfer_state=origin_enums.TransferableRangeTransferState.PENDING
+        ) as transferable_range:
+            filler.fill(packet=packet)
+            transferable_range.refresh_from_db()
+
+        assert [r.data for r in packet.transferable_ranges] == [data]
+        assert transferable_range.transfer_state == origin_enums.TransferableRangeTransferState.TRANSFERRED
+
 
 @pytest.mark.django_db()
 def test_fetch_next_transferable_ranges_for_user_only_returns_user_transferable_ranges(
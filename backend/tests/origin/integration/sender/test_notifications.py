@@ -0,0 +1,51 @@
+import pytest
+
+from eurydice.common import enums
+from eurydice.origin.core import models
+from eurydice.origin.sender import notifications
+from tests.origin.integration import factory
+
+
+@pytest.fixture()
+def listener() -> notifications.DatabaseNotificationListener:
+    listener = notifications.DatabaseNotificationListener()
+    listener.listen()
+    return listener
+
+
+# notifications are only delivered when transactions are committed
+@pytest.mark.django_db(transaction=True)
+def test_listener_wait_times_out(listener: notifications.DatabaseNotificationListener):
+    assert not listener.wait(timeout=0.01)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_listener_notified_on_range_insert(listener: notifications.DatabaseNotificationListener):
+    transferable = factory.OutgoingTransferableFactory()
+    assert not listener.wait(timeout=0.01)
+
+    factory.TransferableRangeFactory.create_batch(3, outgoing_transferable=transferable)
+
+    assert listener.wait(timeout=5)
+    # the notifications of the three inserts were consumed at once
+    assert not listener.wait(timeout=0.01)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_listener_notified_on_revocation_insert(listener: notifications.DatabaseNotificationListener):
+    transferable = factory.OutgoingTransferableFactory()
+    listener.wait(timeout=0.01)
+
+    factory.TransferableRevocationFactory(
+        outgoing_transferable=transferable,
+        reason=enums.TransferableRevocationReason.USER_CANCELED,
+    )
+
+    assert listener.wait(timeout=5)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_listener_notified_on_maintenance_change(listener: notifications.DatabaseNotificationListener):
+    models.Maintenance.objects.update_or_create(defaults={"maintenance": True})
+
+    assert listener.wait(timeout=5)
@@ -1,4 +1,6 @@
+import socket
 import socketserver
+import threading
 from typing import Iterator, Type
 from unittest import mock
 
@@ -6,8 +8,11 @@ import django.conf
 import pytest
 from faker import Faker
 
-from eurydice.common import protocol
+from eurydice.common import codec, protocol
 from eurydice.origin.sender import packet_sender
+from eurydice.origin.storage import fs
+from tests.common.integration.factory import protocol as protocol_factory
+from tests.origin.integration import factory as origin_factory
 
 
 @pytest.fixture()
@@ -44,7 +49,7 @@ def test_packet_sender_success(sender: packet_sender.PacketSender, server: socke
     assert len(server.RequestHandlerClass.received) == 1
     received_data = server.RequestHandlerClass.received[0]
     assert received_data == packet.to_bytes()
-    assert not sender._sender_thread.is_alive()
+    assert not any(t.is_alive() for t in sender._sender_threads)
     assert sender._queue.empty()
 
 
@@ -58,7 +63,7 @@ def test_packet_sender_context_manager_success(sender: packet_sender.PacketSende
     assert len(server.RequestHandlerClass.received) == 1
     received_data = server.RequestHandlerClass.received[0]
     assert received_data == packet.to_bytes()
-    assert not sender._sender_thread.is_alive()
+    assert not any(t.is_alive() for t in sender._sender_threads)
     assert sender._queue.empty()
 
 
@@ -69,7 +74,7 @@ def test_packet_sender_send_multiple_times_success(
         for i in range(10):
             packet = mock.create_autospec(protocol.OnTheWirePacket)
             serialized_packet = faker.binary(faker.pyint(min_value=1, max_value=100))
-            packet.to_bytes.return_value = serialized_packet
+            packet.iter_bytes.return_value = iter([serialized_packet[:1], memoryview(serialized_packet)[1:]])
 
             s.send(packet)
             server.handle_request()
@@ -77,10 +82,126 @@ def test_packet_sender_send_multiple_times_success(
             assert len(server.RequestHandlerClass.received) == i + 1
             assert server.RequestHandlerClass.received[i] == serialized_packet
 
-    assert not sender._sender_thread.is_alive()
+    assert not any(t.is_alive() for t in sender._sender_threads)
     assert sender._queue.empty()
 
 
+def test_packet_sender_framed_wire_format_success(
+    sender: packet_sender.PacketSender, server: socketserver.TCPServer, settings: django.conf.Settings
+):
+    settings.SENDER_WIRE_FORMAT = codec.WireFormat.FRAMED.value
+    packet = protocol.OnTheWirePacket(history=protocol.History(entries=[]))
+
+    with sender as s:
+        s.send(packet)
+        server.handle_request()
+
+    received_data = server.RequestHandlerClass.received[0]
+    assert codec.is_framed(received_data)
+    assert codec.decode(received_data) == packet
+
+
+@pytest.mark.django_db()
+def test_packet_sender_sendfile_success(
+    sender: packet_sender.PacketSender, server: socketserver.TCPServer, settings: django.conf.Settings, faker: Faker
+):
+    settings.SENDER_WIRE_FORMAT = codec.WireFormat.FRAMED.value
+    data = faker.binary(length=4096)
+    with origin_factory.stored_transferable_range(data) as transferable_range:
+        mapped_data = fs.map_bytes(transferable_range)
+    packet = protocol.OnTheWirePacket(
+        transferable_ranges=[
+            protocol_factory.TransferableRangeFactory(data=b""),
+            protocol_factory.TransferableRangeFactory(),
+        ]
+    )
+    packet.transferable_ranges[0].data = mapped_data
+
+    with mock.patch.object(socket.socket, "sendfile", autospec=True, side_effect=socket.socket.sendfile) as sendfile:
+        with sender as s:
+            s.send(packet)
+            server.handle_request()
+
+    sendfile.assert_called_once_with(mock.ANY, fs.sendable_file(mapped_data), 0, len(data))
+    received = codec.decode(server.RequestHandlerClass.received[0])
+    assert [r.data for r in received.transferable_ranges] == [data, packet.transferable_ranges[1].data]
+
+
+@pytest.mark.django_db()
+@pytest.mark.parametrize("sendfile", [False, True])
+def test_packet_sender_rate_limit_success(
+    sendfile: bool,
+    sender: packet_sender.PacketSender,
+    server: socketserver.TCPServer,
+    settings: django.conf.Settings,
+    faker: Faker,
+):
+    settings.SENDER_WIRE_FORMAT = codec.WireFormat.FRAMED.value
+    settings.SENDER_RATE_LIMIT = 10**7
+    settings.SENDER_RATE_LIMIT_BURST = 1000
+    data = faker.binary(length=4096)
+    with origin_factory.stored_transferable_range(data) as transferable_range:
+        packet = protocol.OnTheWirePacket(transferable_ranges=[protocol_factory.TransferableRangeFactory(data=b"")])
+        packet.transferable_ranges[0].data = fs.map_bytes(transferable_range) if sendfile else data
+
+    sender = packet_sender.PacketSender()
+    with sender as s:
+        s.send(packet)
+        server.handle_request()
+
+    received = codec.decode(server.RequestHandlerClass.received[0])
+    assert [r.data for r in received.transferable_ranges] == [data]
+    assert sender._sender_threads[0].rate_limiter.sent_bytes == len(server.RequestHandlerClass.received[0])
+
+
+def test_packet_sender_persistent_connection_success(
+    sender: packet_sender.PacketSender, server: socketserver.TCPServer, settings: django.conf.Settings
+):
+    settings.SENDER_PERSISTENT_CONNECTION = True
+    settings.SENDER_TCP_NODELAY = True
+    settings.SENDER_TCP_CORK = True
+    settings.SENDER_SOCKET_SEND_BUFFER_SIZE = 65536
+    packets = [protocol.OnTheWirePacket(history=protocol.History(entries=[])) for _ in range(3)]
+
+    with sender as s:
+        for packet in packets:
+            s.send(packet)
+
+    # the connection is closed when the sender stops
+    server.handle_request()
+
+    assert server.RequestHandlerClass.received == [b"".join(packet.to_bytes() for packet in packets)]
+    assert sender.failed_sends == 0
+
+
+def test_packet_sender_several_endpoints_success(RequestHandler: Type, settings: django.conf.Settings):  # noqa: N803
+    packets = [
+        protocol.OnTheWirePacket(transferable_ranges=[protocol_factory.TransferableRangeFactory()]) for _ in range(6)
+    ]
+    packets.append(protocol.OnTheWirePacket(history=protocol.History(entries=[])))
+
+    with (
+        socketserver.ThreadingTCPServer(("localhost", 0), RequestHandler) as first_server,
+        socketserver.ThreadingTCPServer(("localhost", 0), RequestHandler) as second_server,
+    ):
+        servers = [first_server, second_server]
+        for server in servers:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        settings.LIDIS_ENDPOINTS = [server.socket.getsockname() for server in servers]
+
+        sender = packet_sender.PacketSender()
+        with sender as s:
+            for packet in packets:
+                s.send(packet)
+
+        for server in servers:
+            server.shutdown()
+
+    assert [t._endpoint for t in sender._sender_threads] == settings.LIDIS_ENDPOINTS
+    assert sorted(RequestHandler.received) == sorted(packet.to_bytes() for packet in packets)
+    assert sender.failed_sends == 0
+
+
 def test_packet_sender_error_thread_not_running(settings: django.conf.Settings):
     settings.LIDIS_HOST, settings.LIDIS_PORT = "localhost", 1
 
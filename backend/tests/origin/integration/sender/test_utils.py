@@ -28,3 +28,249 @@ def test_loop_exception_missing_lidis_address(
     else:
         with pytest.raises(expected_exception):
             sender_utils.check_configuration()
+
+
+@pytest.mark.parametrize(
+    ("lidis_endpoints", "expected_exception"),
+    [
+        ([], django_exceptions.ImproperlyConfigured),
+        ([("127.0.0.1", 666), ("127.0.0.1", 667)], None),
+    ],
+)
+def test_check_configuration_lidis_endpoints(
+    lidis_endpoints: list[tuple[str, int]],
+    expected_exception: django_exceptions.ImproperlyConfigured | None,
+    settings: Settings,
+):
+    settings.LIDIS_HOST = None
+    settings.LIDIS_PORT = None
+    settings.LIDIS_ENDPOINTS = lidis_endpoints
+
+    if expected_exception is None:
+        sender_utils.check_configuration()
+    else:
+        with pytest.raises(expected_exception):
+            sender_utils.check_configuration()
+
+
+@pytest.mark.parametrize(
+    ("wire_format", "expected_exception"),
+    [
+        ("msgpack", None),
+        ("framed", None),
+        ("json", django_exceptions.ImproperlyConfigured),
+    ],
+)
+def test_check_configuration_wire_format(
+    wire_format: str,
+    expected_exception: django_exceptions.ImproperlyConfigured | None,
+    settings: Settings,
+):
+    settings.LIDIS_HOST = "127.0.0.1"
+    settings.LIDIS_PORT = 666
+    settings.SENDER_WIRE_FORMAT = wire_format
+
+    if expected_exception is None:
+        sender_utils.check_configuration()
+    else:
+        with pytest.raises(expected_exception):
+            sender_utils.check_configuration()
+
+
+@pytest.mark.parametrize(
+    ("algorithm", "expected_exception"),
+    [
+        (None, None),
+        ("zlib", None),
+        ("brotli", django_exceptions.ImproperlyConfigured),
+    ],
+)
+def test_check_configuration_compression(
+    algorithm: str | None,
+    expected_exception: django_exceptions.ImproperlyConfigured | None,
+    settings: Settings,
+):
+    settings.LIDIS_HOST = "127.0.0.1"
+    settings.LIDIS_PORT = 666
+    settings.TRANSFERABLE_RANGE_COMPRESSION = algorithm
+
+    if expected_exception is None:
+        sender_utils.check_configuration()
+    else:
+        with pytest.raises(expected_exception):
+            sender_utils.check_configuration()
+
+
+@pytest.mark.parametrize(
+    ("group_size", "expected_exception"),
+    [
+        (0, None),
+        (8, None),
+        (1, django_exceptions.ImproperlyConfigured),
+        (-1, django_exceptions.ImproperlyConfigured),
+    ],
+)
+def test_check_configuration_parity_group_size(
+    group_size: int,
+    expected_exception: django_exceptions.ImproperlyConfigured | None,
+    settings: Settings,
+):
+    settings.LIDIS_HOST = "127.0.0.1"
+    settings.LIDIS_PORT = 666
+    settings.TRANSFERABLE_PARITY_GROUP_SIZE = group_size
+
+    if expected_exception is None:
+        sender_utils.check_configuration()
+    else:
+        with pytest.raises(expected_exception):
+            sender_utils.check_configuration()
+
+
+@pytest.mark.parametrize(
+    ("max_open_groups", "expected_exception"),
+    [
+        (1, None),
+        (0, django_exceptions.ImproperlyConfigured),
+    ],
+)
+def test_check_configuration_parity_max_open_groups(
+    max_open_groups: int,
+    expected_exception: django_exceptions.ImproperlyConfigured | None,
+    settings: Settings,
+):
+    settings.LIDIS_HOST = "127.0.0.1"
+    settings.LIDIS_PORT = 666
+    settings.TRANSFERABLE_PARITY_MAX_OPEN_GROUPS = max_open_groups
+
+    if expected_exception is None:
+        sender_utils.check_configuration()
+    else:
+        with pytest.raises(expected_exception):
+            sender_utils.check_configuration()
+
+
+@pytest.mark.parametrize(
+    ("setting", "value", "expected_exception"),
+    [
+        ("SENDER_RECONNECT_ATTEMPTS", 0, None),
+        ("SENDER_RECONNECT_ATTEMPTS", -1, django_exceptions.ImproperlyConfigured),
+        ("SENDER_RECONNECT_BACKOFF", 0, None),
+        ("SENDER_RECONNECT_BACKOFF", -1, django_exceptions.ImproperlyConfigured),
+        ("SENDER_RECONNECT_BACKOFF_MAX", -1, django_exceptions.ImproperlyConfigured),
+    ],
+)
+def test_check_configuration_reconnection(
+    setting: str,
+    value: float,
+    expected_exception: django_exceptions.ImproperlyConfigured | None,
+    settings: Settings,
+):
+    settings.LIDIS_HOST = "127.0.0.1"
+    settings.LIDIS_PORT = 666
+    setattr(settings, setting, value)
+
+    if expected_exception is None:
+        sender_utils.check_configuration()
+    else:
+        with pytest.raises(expected_exception):
+            sender_utils.check_configuration()
+
+
+@pytest.mark.parametrize(
+    ("wire_format", "expected_exception"),
+    [
+        ("framed", None),
+        ("msgpack", django_exceptions.ImproperlyConfigured),
+    ],
+)
+def test_check_configuration_sendfile(
+    wire_format: str,
+    expected_exception: django_exceptions.ImproperlyConfigured | None,
+    settings: Settings,
+):
+    settings.LIDIS_HOST = "127.0.0.1"
+    settings.LIDIS_PORT = 666
+    settings.SENDER_WIRE_FORMAT = wire_format
+    settings.SENDER_SENDFILE = True
+
+    if expected_exception is None:
+        sender_utils.check_configuration()
+    else:
+        with pytest.raises(expected_exception):
+            sender_utils.check_configuration()
+
+
+@pytest.mark.parametrize(
+    ("workers", "expected_exception"),
+    [
+        (1, None),
+        (8, None),
+        (0, django_exceptions.ImproperlyConfigured),
+    ],
+)
+def test_check_configuration_prefetch_workers(
+    workers: int,
+    expected_exception: django_exceptions.ImproperlyConfigured | None,
+    settings: Settings,
+):
+    settings.LIDIS_HOST = "127.0.0.1"
+    settings.LIDIS_PORT = 666
+    settings.SENDER_PREFETCH_WORKERS = workers
+
+    if expected_exception is None:
+        sender_utils.check_configuration()
+    else:
+        with pytest.raises(expected_exception):
+            sender_utils.check_configuration()
+
+
+@pytest.mark.parametrize(
+    ("share", "expected_exception"),
+    [
+        (0.2, None),
+        (0.9, None),
+        (0, django_exceptions.ImproperlyConfigured),
+        (1, django_exceptions.ImproperlyConfigured),
+    ],
+)
+def test_check_configuration_express_lane_share(
+    share: float,
+    expected_exception: django_exceptions.ImproperlyConfigured | None,
+    settings: Settings,
+):
+    settings.LIDIS_HOST = "127.0.0.1"
+    settings.LIDIS_PORT = 666
+    settings.SENDER_EXPRESS_LANE_SHARE = share
+
+    if expected_exception is None:
+        sender_utils.check_configuration()
+    else:
+        with pytest.raises(expected_exception):
+            sender_utils.check_configuration()
+
+
+@pytest.mark.parametrize(
+    ("rate", "burst", "expected_exception"),
+    [
+        (None, 0, None),
+        (10**8, 10**6, None),
+        (0, 10**6, django_exceptions.ImproperlyConfigured),
+        (10**8, 0, django_exceptions.ImproperlyConfigured),
+    ],
+)
+def test_check_configuration_rate_limit(
+    rate: int | None,
+    burst: int,
+    expected_exception: django_exceptions.ImproperlyConfigured | None,
+    settings: Settings,
+):
+    settings.LIDIS_HOST = "127.0.0.1"
+    settings.LIDIS_PORT = 666
+    settings.SENDER_RATE_LIMIT = rate
+    settings.SENDER_RATE_LIMIT_BURST = burst
+
+    if expected_exception is None:
+        sender_utils.check_configuration()
+    else:
+        with pytest.raises(expected_exception):
+            sender_utils.check_configuration()
@@ -166,6 +166,59 @@ def test_ranges_forbidden_updates():
         transferable_range.mark_as_canceled()
 
 
+@pytest.mark.django_db()
+def test_range_auto_fields_bulk_update():
+    transferables = factory.OutgoingTransferableFactory.create_batch(2)
+    noise_transferable = factory.OutgoingTransferableFactory()
+    transferable_ranges = [
+        factory.TransferableRangeFactory(
+            transfer_state=enums.TransferableRangeTransferState.PENDING,
+            outgoing_transferable=transferable,
+        )
+        for transferable in (transferables[0], transferables[0], transferables[0], transferables[1])
+    ]
+    factory.TransferableRangeFactory(
+        transfer_state=enums.TransferableRangeTransferState.PENDING,
+        outgoing_transferable=noise_transferable,
+    )
+
+    now = timezone.now()
+    with freezegun.freeze_time(now):
+        assert (
+            models.TransferableRange.objects.filter(id__in=[r.id for r in transferable_ranges]).mark_as_transferred()
+            == 4
+        )
+
+    for transferable, expected_ranges in zip(transferables, (transferable_ranges[:3], transferable_ranges[3:])):
+        transferable.refresh_from_db()
+        assert transferable.auto_ranges_count == len(expected_ranges)
+        assert transferable.auto_pending_ranges_count == 0
+        assert transferable.auto_transferred_ranges_count == len(expected_ranges)
+        assert transferable.auto_bytes_transferred == sum(r.size for r in expected_ranges)
+        assert transferable.auto_last_range_finished_at == now
+        assert transferable.auto_state_updated_at == now
+
+    noise_transferable.refresh_from_db()
+    assert noise_transferable.auto_pending_ranges_count == 1
+    assert noise_transferable.auto_transferred_ranges_count == 0
+
+
+@pytest.mark.django_db()
+def test_ranges_forbidden_bulk_updates():
+    pending_range = factory.TransferableRangeFactory(transfer_state=enums.TransferableRangeTransferState.PENDING)
+    transferred_range = factory.TransferableRangeFactory(
+        transfer_state=enums.TransferableRangeTransferState.TRANSFERRED
+    )
+
+    # the atomic transaction is necessary, otherwise `django_db` thinks the
+    # test failed (because the test transaction is broken)
+    with pytest.raises(InternalError), transaction.atomic():
+        models.TransferableRange.objects.filter(id__in=[pending_range.id, transferred_range.id]).mark_as_transferred()
+
+    pending_range.refresh_from_db()
+    assert pending_range.transfer_state == enums.TransferableRangeTransferState.PENDING
+
+
 @pytest.mark.django_db()
 def test_revocations_forbidden_updates():
     transferable_revocation = factory.TransferableRevocationFactory(
@@ -0,0 +1,178 @@
+from unittest import mock
+
+import pytest
+from django.conf import Settings
+from faker import Faker
+
+from eurydice.common import compression, enums, parity, protocol
+from eurydice.origin.sender.packet_generator import fillers
+from tests.common.integration.factory import protocol as protocol_factory
+
+
+def _make_ranges(faker: Faker, count: int, size: int = 100) -> list[protocol.TransferableRange]:
+    transferable = protocol_factory.TransferableFactory()
+    return [
+        protocol_factory.TransferableRangeFactory(
+            transferable=transferable,
+            byte_offset=i * size,
+            data=faker.binary(length=size),
+            is_last=i == count - 1,
+        )
+        for i in range(count)
+    ]
+
+
+def test_transferable_parity_filler_disabled(faker: Faker, settings: Settings):
+    settings.TRANSFERABLE_PARITY_GROUP_SIZE = 0
+    packet = protocol.OnTheWirePacket(transferable_ranges=_make_ranges(faker, 4))
+
+    fillers.TransferableParityFiller().fill(packet)
+
+    assert packet.transferable_parities == []
+    assert not any(r.parity_protected for r in packet.transferable_ranges)
+
+
+def test_transferable_parity_filler_groups_across_packets(faker: Faker, settings: Settings):
+    settings.TRANSFERABLE_PARITY_GROUP_SIZE = 3
+    filler = fillers.TransferableParityFiller()
+    ranges = _make_ranges(faker, 5)
+    ranges[-1].data = ranges[-1].data[:10]
+
+    packets = [protocol.OnTheWirePacket(transferable_ranges=[transferable_range]) for transferable_range in ranges]
+    packets.append(protocol.OnTheWirePacket())
+    for packet in packets:
+        filler.fill(packet)
+
+    parities = [p for packet in packets for p in packet.transferable_parities]
+    # parities are sent in the packet following the last range of their group
+    assert [len(packet.transferable_parities) for packet in packets] == [0, 0, 0, 1, 0, 1]
+    assert all(r.parity_protected for r in ranges)
+    assert [[r.byte_offset for r in p.ranges] for p in parities] == [[0, 100, 200], [300, 400]]
+    assert [p.is_last for p in parities] == [False, True]
+    assert parities[0].data == parity.xor([r.data for r in ranges[:3]])
+    assert [r.size for r in parities[1].ranges] == [100, 10]
+    assert parities[1].data == parity.xor([ranges[3].data, ranges[4].data])
+
+
+def test_transferable_parity_filler_single_range_transferable(faker: Faker, settings: Settings):
+    settings.TRANSFERABLE_PARITY_GROUP_SIZE = 4
+    packet = protocol.OnTheWirePacket(transferable_ranges=_make_ranges(faker, 1))
+
+    fillers.TransferableParityFiller().fill(packet)
+
+    assert packet.transferable_parities == []
+    assert not packet.transferable_ranges[0].parity_protected
+
+
+def test_transferable_parity_filler_covers_uncompressed_data(settings: Settings):
+    settings.TRANSFERABLE_PARITY_GROUP_SIZE = 2
+    data = b"a,b,c\n" * 1024
+    transferable_range = protocol_factory.TransferableRangeFactory(
+        data=compression.compress(data, enums.TransferableRangeCompression.ZLIB),
+        compression=enums.TransferableRangeCompression.ZLIB,
+        uncompressed_size=len(data),
+        is_last=False,
+    )
+    packet = protocol.OnTheWirePacket(transferable_ranges=[transferable_range, transferable_range])
+
+    filler = fillers.TransferableParityFiller()
+    filler.fill(packet)
+    next_packet = protocol.OnTheWirePacket()
+    filler.fill(next_packet)
+
+    (transferable_parity,) = next_packet.transferable_parities
+    assert [r.size for r in transferable_parity.ranges] == [len(data), len(data)]
+    assert transferable_parity.data == bytes(len(data))
+
+
+def test_transferable_parity_filler_reuses_kept_uncompressed_data(settings: Settings):
+    settings.TRANSFERABLE_PARITY_GROUP_SIZE = 2
+    data = b"a,b,c\n" * 1024
+    ranges = [
+        protocol_factory.TransferableRangeFactory(
+            data=compression.compress(data, enums.TransferableRangeCompression.ZLIB),
+            compression=enums.TransferableRangeCompression.ZLIB,
+            uncompressed_size=len(data),
+            is_last=False,
+        )
+        for _ in range(2)
+    ]
+    for transferable_range in ranges:
+        transferable_range.keep_uncompressed_data(data)
+
+    filler = fillers.TransferableParityFiller()
+    with mock.patch.object(compression, "decompress") as decompress:
+        filler.fill(protocol.OnTheWirePacket(transferable_ranges=ranges))
+
+    decompress.assert_not_called()
+    # the kept data is released once XORed into the parity
+    assert all(r.pop_uncompressed_data() is None for r in ranges)
+
+
+def test_transferable_parity_filler_caps_open_groups(faker: Faker, settings: Settings):
+    settings.TRANSFERABLE_PARITY_GROUP_SIZE = 4
+    settings.TRANSFERABLE_PARITY_MAX_OPEN_GROUPS = 2
+    filler = fillers.TransferableParityFiller()
+    first_ranges = [_make_ranges(faker, 4)[0] for _ in range(3)]
+
+    filler.fill(protocol.OnTheWirePacket(transferable_ranges=first_ranges))
+    next_packet = protocol.OnTheWirePacket()
+    filler.fill(next_packet)
+
+    # the group of the first transferable was completed early to open the third one
+    (transferable_parity,) = next_packet.transferable_parities
+    assert transferable_parity.transferable.id == first_ranges[0].transferable.id
+    assert [r.byte_offset for r in transferable_parity.ranges] == [0]
+    assert not transferable_parity.is_last
+    assert transferable_parity.data == first_ranges[0].data
+    assert all(r.parity_protected for r in first_ranges)
+    assert len(filler._groups) == 2
+
+
+@pytest.mark.parametrize("finished_by", ["revocation", "history"])
+def test_transferable_parity_filler_discards_finished_transferables(finished_by: str, faker: Faker, settings: Settings):
+    settings.TRANSFERABLE_PARITY_GROUP_SIZE = 2
+    filler = fillers.TransferableParityFiller()
+    first, second = _make_ranges(faker, 2)
+    transferable_id = first.transferable.id
+
+    filler.fill(protocol.OnTheWirePacket(transferable_ranges=[first]))
+
+    packet = protocol.OnTheWirePacket(transferable_ranges=[second])
+    if finished_by == "revocation":
+        packet.transferable_revocations = [
+            protocol_factory.TransferableRevocationFactory(transferable_id=transferable_id)
+        ]
+    else:
+        packet.history = protocol.History(
+            entries=[protocol_factory.HistoryEntryFactory(transferable_id=transferable_id)]
+        )
+    filler.fill(packet)
+    next_packet = protocol.OnTheWirePacket()
+    filler.fill(next_packet)
+
+    # the group of the first range was discarded, the second range alone is not covered
+    assert next_packet.transferable_parities == []
+    assert not second.parity_protected
+
+
+def test_transferable_parity_filler_sends_meta_of_first_range(faker: Faker, settings: Settings):
+    settings.TRANSFERABLE_PARITY_GROUP_SIZE = 2
+    filler = fillers.TransferableParityFiller()
+    ranges = _make_ranges(faker, 4)
+    for transferable_range in ranges[1:3]:
+        transferable_range.transferable = transferable_range.transferable.model_copy(
+            update={"user_provided_meta": None}
+        )
+
+    packets = [protocol.OnTheWirePacket(transferable_ranges=[transferable_range]) for transferable_range in ranges]
+    packets.append(protocol.OnTheWirePacket())
+    for packet in packets:
+        filler.fill(packet)
+
+    parities = [p for packet in packets for p in packet.transferable_parities]
+    # the first group starts with the first range, the second ends with the last one
+    assert [p.transferable.user_provided_meta for p in parities] == [
+        ranges[0].transferable.user_provided_meta,
+        ranges[3].transferable.user_provided_meta,
+    ]
@@ -2,13 +2,14 @@ import datetime
 import logging
 from unittest import mock
 
+import freezegun
 import pytest
 from django.conf import Settings
 from django.utils import timezone
 
 from eurydice.common import protocol
 from eurydice.common.utils import signals
-from eurydice.origin.sender import main, packet_generator, packet_sender
+from eurydice.origin.sender import main, notifications, packet_generator, packet_sender
 from tests.utils import process_logs
 
 
@@ -111,3 +112,36 @@ def test___log_packet_stats_empty_packet(caplog: pytest.LogCaptureFixture):
     log_messages = process_logs(caplog.messages)
 
     assert [{"log_key": "packet_stats", "message": "sending heartbeat"}] == log_messages
+
+
+@mock.patch("eurydice.origin.sender.main.time.sleep")
+def test__wait_for_new_data_polls_without_listener(sleep: mock.MagicMock, settings: Settings):
+    settings.SENDER_POLL_DATABASE_EVERY = 0.1
+
+    main._wait_for_new_data(None, timezone.now())
+
+    sleep.assert_called_once_with(0.1)
+
+
+@pytest.mark.parametrize(
+    ("sent_seconds_ago", "expected_timeout"),
+    [
+        (None, 10),
+        (0, 10),
+        (115, 5),
+        (200, 0),
+    ],
+)
+def test__wait_for_new_data_waits_until_next_heartbeat(
+    sent_seconds_ago: int | None, expected_timeout: float, settings: Settings
+):
+    settings.SENDER_DATABASE_NOTIFICATIONS_TIMEOUT = 10
+    settings.HEARTBEAT_SEND_EVERY = 120
+    listener = mock.create_autospec(notifications.DatabaseNotificationListener, instance=True)
+    now = timezone.now()
+    last_packet_sent_at = None if sent_seconds_ago is None else now - datetime.timedelta(seconds=sent_seconds_ago)
+
+    with freezegun.freeze_time(now):
+        main._wait_for_new_data(listener, last_packet_sent_at)
+
+    listener.wait.assert_called_once_with(expected_timeout)
@@ -1,9 +1,13 @@
 import queue
+import socket
+from unittest import mock
 
 import django.conf
 import pytest
 
+from eurydice.common import protocol
 from eurydice.origin.sender import packet_sender
+from tests.common.integration.factory import protocol as protocol_factory
 
 
 class Test_SenderThread:  # noqa: N801
@@ -18,8 +22,161 @@ class Test_SenderThread:  # noqa: N801
         settings.LIDIS_HOST, settings.LIDIS_PORT = "localhost", 1
         qu = queue.Queue(maxsize=2)
         thread = packet_sender._SenderThread(qu)
-        qu.put(b"Lorem ipsum dolor sit amet", block=False)
+        qu.put(protocol.OnTheWirePacket(), block=False)
         qu.put(None, block=False)
         thread.run()
         assert qu.empty()
         assert "Failed to send data through the socket." in caplog.text
+        assert thread.failed_sends == 1
+
+    @mock.patch("eurydice.origin.sender.packet_sender.socket.create_connection")
+    def test_run_log_serialization_error(self, create_connection: mock.Mock, caplog: pytest.LogCaptureFixture):
+        packet = mock.create_autospec(protocol.OnTheWirePacket, instance=True)
+        packet.iter_bytes.side_effect = protocol.SerializationError()
+        qu = queue.Queue(maxsize=2)
+        thread = packet_sender._SenderThread(qu)
+        qu.put(packet, block=False)
+        qu.put(None, block=False)
+        thread.run()
+        assert qu.empty()
+        assert "Failed to serialize the packet." in caplog.text
+
+    def test_run_log_timings(self, caplog: pytest.LogCaptureFixture):
+        send = mock.Mock()
+        qu = queue.Queue(maxsize=2)
+        thread = packet_sender._SenderThread(qu)
+        qu.put(protocol.OnTheWirePacket(), block=False)
+        qu.put(None, block=False)
+        thread._send_queued_packets(send)
+        send.assert_called_once()
+        assert "sender_timings" in caplog.text
+        assert "wait_us" in caplog.text
+        assert "throttled_us" in caplog.text
+        assert "throughput_bytes_per_second" in caplog.text
+
+
+class Test_RateLimiter:  # noqa: N801
+    @mock.patch("eurydice.origin.sender.packet_sender.time.sleep")
+    def test_acquire_unlimited(self, sleep: mock.Mock):
+        rate_limiter = packet_sender._RateLimiter(None, 10)
+
+        rate_limiter.acquire(1000)
+
+        sleep.assert_not_called()
+        assert rate_limiter.sent_bytes == 1000
+        assert rate_limiter.max_write_size(1000) == 1000
+
+    @mock.patch("eurydice.origin.sender.packet_sender.time.sleep")
+    @mock.patch("eurydice.origin.sender.packet_sender.time.monotonic")
+    def test_acquire_paces_writes(self, monotonic: mock.Mock, sleep: mock.Mock):
+        monotonic.return_value = 100.0
+        rate_limiter = packet_sender._RateLimiter(1000, 500)
+
+        # the burst is written at once, then writes wait for the bucket to refill
+        rate_limiter.acquire(500)
+        rate_limiter.acquire(250)
+        monotonic.return_value = 100.25
+        rate_limiter.acquire(500)
+
+        assert [c.args[0] for c in sleep.call_args_list] == [0.25, 0.5]
+        assert rate_limiter.throttled_seconds == 0.75
+        assert rate_limiter.sent_bytes == 1250
+        assert rate_limiter.max_write_size(1000) == 500
+
+    @mock.patch("eurydice.origin.sender.packet_sender.time.sleep")
+    @mock.patch("eurydice.origin.sender.packet_sender.time.monotonic")
+    def test_acquire_caps_idle_credit(self, monotonic: mock.Mock, sleep: mock.Mock):
+        monotonic.return_value = 100.0
+        rate_limiter = packet_sender._RateLimiter(1000, 500)
+        rate_limiter.acquire(500)
+
+        # idle time does not credit more than the burst
+        monotonic.return_value = 200.0
+        rate_limiter.acquire(500)
+        rate_limiter.acquire(100)
+
+        assert [c.args[0] for c in sleep.call_args_list] == [0.1]
+
+
+class Test_PersistentConnection:  # noqa: N801
+    @mock.patch("eurydice.origin.sender.packet_sender.time.sleep")
+    @mock.patch("eurydice.origin.sender.packet_sender.socket.create_connection")
+    def test_send_reuses_connection(self, create_connection: mock.Mock, sleep: mock.Mock):
+        connection = packet_sender._PersistentConnection(("localhost", 1))
+
+        connection.send(protocol.OnTheWirePacket())
+        connection.send(protocol.OnTheWirePacket())
+
+        create_connection.assert_called_once()
+        assert create_connection.return_value.sendall.call_count == 2
+        sleep.assert_not_called()
+
+    @mock.patch("eurydice.origin.sender.packet_sender.time.sleep")
+    @mock.patch("eurydice.origin.sender.packet_sender.socket.create_connection")
+    def test_send_reconnects_with_backoff(
+        self, create_connection: mock.Mock, sleep: mock.Mock, settings: django.conf.Settings
+    ):
+        settings.SENDER_RECONNECT_ATTEMPTS = 5
+        settings.SENDER_RECONNECT_BACKOFF = 1
+        settings.SENDER_RECONNECT_BACKOFF_MAX = 3
+        broken_conn, conn = mock.Mock(), mock.Mock()
+        broken_conn.sendall.side_effect = BrokenPipeError()
+        create_connection.side_effect = [broken_conn, ConnectionRefusedError(), ConnectionRefusedError(), conn]
+        connection = packet_sender._PersistentConnection(("localhost", 1))
+
+        connection.send(protocol.OnTheWirePacket())
+
+        broken_conn.close.assert_called_once()
+        conn.sendall.assert_called_once()
+        assert [c.args[0] for c in sleep.call_args_list] == [1, 2, 3]
+
+    @mock.patch("eurydice.origin.sender.packet_sender.time.sleep")
+    @mock.patch("eurydice.origin.sender.packet_sender.socket.create_connection")
+    def test_send_gives_up(self, create_connection: mock.Mock, sleep: mock.Mock, settings: django.conf.Settings):
+        settings.SENDER_RECONNECT_ATTEMPTS = 2
+        create_connection.side_effect = ConnectionRefusedError()
+        connection = packet_sender._PersistentConnection(("localhost", 1))
+
+        with pytest.raises(socket.error):
+            connection.send(protocol.OnTheWirePacket())
+
+        assert create_connection.call_count == 3
+        assert sleep.call_count == 2
+
+    @mock.patch("eurydice.origin.sender.packet_sender.socket.create_connection")
+    def test_send_serialization_error_closes_connection(self, create_connection: mock.Mock):
+        packet = mock.create_autospec(protocol.OnTheWirePacket, instance=True)
+        packet.iter_bytes.side_effect = protocol.SerializationError()
+        connection = packet_sender._PersistentConnection(("localhost", 1))
+
+        with pytest.raises(protocol.SerializationError):
+            connection.send(packet)
+
+        create_connection.return_value.close.assert_called_once()
+
+
+class TestPacketSender:
+    @pytest.mark.parametrize(
+        ("packet", "waits"),
+        [
+            (protocol.OnTheWirePacket(), False),
+            (protocol.OnTheWirePacket(history=protocol.History(entries=[])), True),
+            (
+                protocol.OnTheWirePacket(transferable_revocations=[protocol_factory.TransferableRevocationFactory()]),
+                True,
+            ),
+        ],
+    )
+    def test_send_waits_for_queued_packets_on_several_links(
+        self, packet: protocol.OnTheWirePacket, waits: bool, settings: django.conf.Settings
+    ):
+        settings.LIDIS_ENDPOINTS = [("localhost", 1), ("localhost", 2)]
+        sender = packet_sender.PacketSender()
+        sender._queue = mock.create_autospec(queue.Queue, instance=True)
+
+        with mock.patch.object(packet_sender._SenderThread, "is_alive", return_value=True):
+            sender.send(packet)
+
+        assert len(sender._sender_threads) == 2
+        assert sender._queue.join.called is waits
+        sender._queue.put.assert_called_once_with(packet, block=True)
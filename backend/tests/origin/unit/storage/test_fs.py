@@ -87,3 +87,20 @@ def test_fs_read_bytes():
 
     assert fs.read_bytes(obj) == b"test data"
     fs.delete(obj)
+
+
+@pytest.mark.django_db()
+def test_fs_map_bytes():
+    obj = factory.TransferableRangeFactory(id=UUID("a8fcc4dd-4448-42f0-b678-a99ae8a8189a"))
+
+    file_path = fs.file_path(obj)
+    file_path.write_bytes(b"test data")
+
+    data = fs.map_bytes(obj)
+    fs.delete(obj)
+
+    # the data remain available once the file is deleted
+    assert data == b"test data"
+    assert fs.sendable_file(data).read() == b"test data"
+    assert fs.sendable_file(data[1:]) is None
+    assert fs.sendable_file(b"test data") is None